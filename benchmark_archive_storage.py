@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark: single-blob JSON archives vs. compressed, chunked archive storage
+
+Seeds a temporary database with contributions and audit history, archives it
+a few times and compares the stored payload size against the JSON document the
+old archive format kept in archived_data, plus the cost of listing archives
+and opening one section.
+"""
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.append('.')
+from db_test_helpers import remove_db
+from utils.database import DatabaseManager
+
+GUILD_ID = 888
+CONTRIBUTIONS = 20000
+ARCHIVES = 5
+ROUNDS = 20
+
+
+async def seed(db):
+    conn = await db._get_shared_connection()
+    start = datetime(2024, 1, 1)
+    await conn.executemany(
+        '''INSERT INTO contributions (guild_id, user_id, category, item_name, quantity, created_at)
+           VALUES (?, ?, ?, ?, ?, ?)''',
+        [(GUILD_ID, i % 200, ('Weapons Locker', 'Drug Locker', 'Misc Locker')[i % 3], f'item{i % 60}',
+          i % 7 + 1, (start + timedelta(minutes=i)).strftime('%Y-%m-%d %H:%M:%S'))
+         for i in range(CONTRIBUTIONS)]
+    )
+    await conn.commit()
+
+
+async def legacy_document(db):
+    """The archived_data JSON the single-blob format stored for the current data"""
+    contributions = [dict(row) for row in await db.get_all_contributions(GUILD_ID)]
+    events = await db.get_all_audit_events(GUILD_ID, limit=1000)
+    return json.dumps({
+        'archived_at': datetime.now().isoformat(),
+        'contributions': contributions,
+        'audit_events': events,
+        'total_contributions': len(contributions),
+        'total_audit_events': await db.count_audit_events(GUILD_ID),
+    }, default=str)
+
+
+async def best_of(make):
+    best = float('inf')
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        await make()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+async def main():
+    db_path = 'benchmark_archive_storage.db'
+    remove_db(db_path)
+    db = DatabaseManager(db_path, slow_query_ms=0)
+    try:
+        await db.initialize_guild(GUILD_ID)
+        await db.bulk_upsert_members(GUILD_ID, [
+            (user_id, f'member{user_id}', None, 'Full Patch', 'Active') for user_id in range(200)
+        ])
+        legacy_bytes = 0
+        for index in range(ARCHIVES):
+            await seed(db)
+            legacy_bytes += len(await legacy_document(db))
+            archive_id = await db.create_database_archive(GUILD_ID, f'Season {index}', 'benchmark', None, 1)
+        archives = await db.get_database_archives(GUILD_ID)
+        stored_bytes = sum(archive['stored_size'] for archive in archives)
+        raw_bytes = sum(archive['raw_size'] for archive in archives)
+
+        print(f"{ARCHIVES} archives of {CONTRIBUTIONS:,} contributions each")
+        print(f"  single JSON blob     {legacy_bytes / 1024:10,.1f} KiB")
+        print(f"  chunked, uncompressed{raw_bytes / 1024:10,.1f} KiB")
+        print(f"  chunked, zlib        {stored_bytes / 1024:10,.1f} KiB   ({legacy_bytes / stored_bytes:.1f}x smaller)")
+
+        list_ms = await best_of(lambda: db.get_database_archives(GUILD_ID))
+        metadata_ms = await best_of(lambda: db.get_archive_by_id(archive_id, sections=()))
+        contributions_ms = await best_of(lambda: db.get_archive_by_id(archive_id, sections=('contributions',)))
+        print(f"  list archives        {list_ms:10.2f} ms")
+        print(f"  open (metadata only) {metadata_ms:10.2f} ms")
+        print(f"  open (contributions) {contributions_ms:10.2f} ms")
+    finally:
+        await db.close()
+        remove_db(db_path)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark: dashboard request latency, event loop + DatabaseManager per request vs. shared DatabaseService
+
+Seeds a guild with members, contributions, LOAs and dues, then times the
+database part of the dashboard's API routes both ways: the old handlers that
+built a new event loop and DatabaseManager (connection, PRAGMAs,
+initialize_database) for every request, and the shared background-loop
+service the routes now submit coroutines to. Reports median and p95 latency of
+sequential requests and throughput with several request threads at once.
+"""
+import asyncio
+import os
+import sqlite3
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append('.')
+from utils.database import DatabaseManager
+from utils.db_service import DatabaseService
+
+GUILD_ID = 939393
+MEMBERS = 300
+CONTRIBUTIONS = 5000
+REQUESTS = 60
+THREADS = 8
+ENDPOINTS = [
+    ('/api/treasury', lambda db: db.get_treasury_summary(GUILD_ID)),
+    ('/api/loa/active', lambda db: db.get_active_loas_for_guild(GUILD_ID)),
+    ('/api/audit/events', lambda db: db.get_all_audit_events(GUILD_ID, limit=50)),
+    ('/api/members', lambda db: db.get_all_members(GUILD_ID)),
+]
+
+
+def seed(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.executemany('''INSERT INTO members (guild_id, user_id, discord_name, rank, status)
+                        VALUES (?, ?, ?, 'Member', 'Active')''',
+                     [(GUILD_ID, user_id, f'member{user_id}') for user_id in range(MEMBERS)])
+    conn.executemany('''INSERT INTO contributions (guild_id, user_id, category, item_name, quantity)
+                        VALUES (?, ?, 'Weapons', ?, ?)''',
+                     [(GUILD_ID, i % MEMBERS, f'item{i % 40}', 1 + i % 5) for i in range(CONTRIBUTIONS)])
+    conn.executemany('''INSERT INTO loa_records (guild_id, user_id, duration, reason, start_time, end_time, is_active)
+                        VALUES (?, ?, '7d', 'Away', datetime('now'), datetime('now', '+7 days'), 1)''',
+                     [(GUILD_ID, user_id) for user_id in range(0, MEMBERS, 15)])
+    conn.commit()
+    conn.close()
+
+
+def per_request(db_path, call):
+    """What the routes did before: a new loop and manager for every request"""
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    db = DatabaseManager(db_path)
+    try:
+        loop.run_until_complete(db.initialize_database())
+        return loop.run_until_complete(call(db))
+    finally:
+        loop.run_until_complete(db.close())
+        loop.close()
+
+
+def sequential_ms(handler):
+    timings = []
+    for _ in range(REQUESTS):
+        start = time.perf_counter()
+        handler()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+
+def concurrent_rps(handler):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(THREADS) as pool:
+        for future in [pool.submit(handler) for _ in range(REQUESTS * 2)]:
+            future.result()
+    return REQUESTS * 2 / (time.perf_counter() - start)
+
+
+def main():
+    db_path = 'bench_dashboard_latency.db'
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+    # The bot owns migrations; the service only attaches to a current schema
+    loop = asyncio.new_event_loop()
+    bot_db = DatabaseManager(db_path)
+    loop.run_until_complete(bot_db.initialize_database())
+    loop.run_until_complete(bot_db.close())
+    loop.close()
+
+    service = DatabaseService(db_path)
+    try:
+        service.run(service.db.initialize_guild(GUILD_ID))
+        seed(db_path)
+        print(f"Dashboard request latency, {REQUESTS} sequential requests "
+              f"and {REQUESTS * 2} over {THREADS} threads per route")
+        print(f"  {'route':<18} {'per-req p50':>12} {'p95':>8} {'shared p50':>11} {'p95':>8}"
+              f" {'per-req rps':>12} {'shared rps':>11}")
+        for route, call in ENDPOINTS:
+            old = lambda: per_request(db_path, call)
+            new = lambda: service.run(call(service.db))
+            assert len(str(old())) == len(str(new()))
+            old_p50, old_p95 = sequential_ms(old)
+            new_p50, new_p95 = sequential_ms(new)
+            old_rps = concurrent_rps(old)
+            new_rps = concurrent_rps(new)
+            print(f"  {route:<18} {old_p50:>12.2f} {old_p95:>8.2f} {new_p50:>11.2f} {new_p95:>8.2f}"
+                  f" {old_rps:>12.0f} {new_rps:>11.0f}")
+    finally:
+        service.stop()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark: prospect list counts, tasks x notes GROUP BY vs. correlated subqueries
+
+Seeds prospects holding 50 tasks and 50 notes each and reports the median
+latency of get_active_prospects() against the old query that LEFT JOINed both
+prospect_tasks and prospect_notes before grouping.
+"""
+import asyncio
+import os
+import sqlite3
+import statistics
+import sys
+import time
+
+sys.path.append('.')
+from utils.database import DatabaseManager
+
+GUILD_ID = 929292
+PROSPECT_COUNTS = [20, 200]
+TASKS_PER_PROSPECT = 50
+NOTES_PER_PROSPECT = 50
+ROUNDS = 7
+FAN_OUT_SQL = '''
+    SELECT p.*,
+           sponsor.discord_name as sponsor_name,
+           prospect.discord_name as prospect_name,
+           COUNT(t.id) as total_tasks,
+           COUNT(CASE WHEN t.status = 'completed' THEN 1 END) as completed_tasks,
+           COUNT(CASE WHEN t.status = 'failed' THEN 1 END) as failed_tasks,
+           COUNT(n.id) as total_notes,
+           COUNT(CASE WHEN n.is_strike = TRUE THEN 1 END) as strike_count
+    FROM prospects p
+    LEFT JOIN members sponsor ON p.guild_id = sponsor.guild_id AND p.sponsor_id = sponsor.user_id
+    LEFT JOIN members prospect ON p.guild_id = prospect.guild_id AND p.user_id = prospect.user_id
+    LEFT JOIN prospect_tasks t ON p.id = t.prospect_id
+    LEFT JOIN prospect_notes n ON p.id = n.prospect_id
+    WHERE p.guild_id = ? AND p.status = 'active'
+    GROUP BY p.id
+    ORDER BY p.start_date DESC
+'''
+
+
+def seed(db_path, prospects):
+    conn = sqlite3.connect(db_path)
+    conn.executemany('''INSERT INTO members (guild_id, user_id, discord_name, rank, status)
+                        VALUES (?, ?, ?, 'Prospect', 'Active')''',
+                     [(GUILD_ID, user_id, f'member{user_id}') for user_id in range(prospects + 1)])
+    for user_id in range(1, prospects + 1):
+        cursor = conn.execute('''INSERT INTO prospects (guild_id, user_id, sponsor_id, start_date)
+                                 VALUES (?, ?, 0, datetime('now', ?))''', (GUILD_ID, user_id, f'-{user_id} hours'))
+        prospect_id = cursor.lastrowid
+        conn.executemany('''INSERT INTO prospect_tasks (guild_id, prospect_id, assigned_by_id, task_name,
+                            task_description, status) VALUES (?, ?, 0, ?, 'desc', ?)''',
+                         [(GUILD_ID, prospect_id, f'task{i}', ('assigned', 'completed', 'failed')[i % 3])
+                          for i in range(TASKS_PER_PROSPECT)])
+        conn.executemany('''INSERT INTO prospect_notes (guild_id, prospect_id, author_id, note_text, is_strike)
+                            VALUES (?, ?, 0, ?, ?)''',
+                         [(GUILD_ID, prospect_id, f'note{i}', i % 10 == 0) for i in range(NOTES_PER_PROSPECT)])
+    conn.commit()
+    conn.close()
+
+
+async def median_ms(make_call):
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        await make_call()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+async def run_size(prospects):
+    db_path = f'bench_prospect_list_{prospects}.db'
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+    db = DatabaseManager(db_path)
+    try:
+        await db.initialize_guild(GUILD_ID)
+        seed(db_path, prospects)
+
+        async def fan_out():
+            async with db._read_connection() as conn:
+                cursor = await conn.execute(FAN_OUT_SQL, (GUILD_ID,))
+                columns = [column[0] for column in cursor.description]
+                return [dict(zip(columns, row)) for row in await cursor.fetchall()]
+
+        old_rows = await fan_out()
+        new_rows = await db.get_active_prospects(GUILD_ID)
+        old_ms = await median_ms(fan_out)
+        new_ms = await median_ms(lambda: db.get_active_prospects(GUILD_ID))
+        print(f"  {prospects:>9} {old_ms:>10.2f} {new_ms:>10.2f} {old_ms / new_ms:>8.1f}x"
+              f"   tasks/notes reported {old_rows[0]['total_tasks']}/{old_rows[0]['total_notes']}"
+              f" -> {new_rows[0]['total_tasks']}/{new_rows[0]['total_notes']}")
+    finally:
+        await db.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+
+async def main():
+    print(f"Active prospect list latency, median of {ROUNDS}, "
+          f"{TASKS_PER_PROSPECT} tasks + {NOTES_PER_PROSPECT} notes per prospect")
+    print(f"  {'prospects':>9} {'join ms':>10} {'subq ms':>10} {'speedup':>9}")
+    for prospects in PROSPECT_COUNTS:
+        await run_size(prospects)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
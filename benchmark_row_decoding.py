@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark: aiosqlite.Row + dict(row) decoding vs. slotted record decoding
+
+Seeds a temporary database and decodes the same result sets both ways,
+reporting rows/sec and tracemalloc peak for the materialized lists.
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import aiosqlite
+
+sys.path.append('.')
+from utils.database import DatabaseManager
+from utils.db_records import ContributionRecord, MemberRecord, TranscriptRecord
+
+GUILD_ID = 777
+ROWS = 20000
+ROUNDS = 5
+
+QUERIES = [
+    ('members', MemberRecord, 'SELECT * FROM members WHERE guild_id = ?'),
+    ('contributions', ContributionRecord, 'SELECT * FROM contributions WHERE guild_id = ?'),
+    ('transcripts', TranscriptRecord, 'SELECT * FROM dm_transcripts WHERE guild_id = ?'),
+]
+
+
+async def seed(db):
+    await db.initialize_guild(GUILD_ID)
+    conn = await db._get_shared_connection()
+    await conn.executemany(
+        'INSERT INTO members (guild_id, user_id, discord_name, rank, status) VALUES (?, ?, ?, ?, ?)',
+        [(GUILD_ID, i, f'member{i}', 'Full Patch', 'Active') for i in range(ROWS)]
+    )
+    await conn.executemany(
+        'INSERT INTO contributions (guild_id, user_id, category, item_name, quantity) VALUES (?, ?, ?, ?, ?)',
+        [(GUILD_ID, i % 500, 'Pistols', f'item{i % 50}', i % 7 + 1) for i in range(ROWS)]
+    )
+    attachments = json.dumps([{'filename': 'a.png', 'url': 'https://cdn.example/a.png'}])
+    await conn.executemany(
+        '''INSERT INTO dm_transcripts (guild_id, sender_id, recipient_id, message, message_type,
+           recipient_type, attachments) VALUES (?, ?, ?, ?, ?, ?, ?)''',
+        [(GUILD_ID, 1, i % 500, f'message {i}', 'outgoing', 'user', attachments) for i in range(ROWS)]
+    )
+    await conn.commit()
+
+
+async def decode_dict_rows(conn, query):
+    cursor = await conn.execute(query, (GUILD_ID,))
+    cursor.row_factory = aiosqlite.Row
+    rows = await cursor.fetchall()
+    return [dict(row) for row in rows]
+
+
+async def decode_records(conn, query, record_type):
+    cursor = await conn.execute(query, (GUILD_ID,))
+    DatabaseManager._set_row_factory(cursor, record_type)
+    return await cursor.fetchall()
+
+
+async def measure(label, make_rows):
+    best = float('inf')
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        rows = await make_rows()
+        best = min(best, time.perf_counter() - start)
+        del rows
+
+    tracemalloc.start()
+    rows = await make_rows()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del rows
+
+    rate = ROWS / best
+    print(f"  {label:<10} {rate:>12,.0f} rows/s   peak {peak / 1024 / 1024:7.2f} MiB")
+    return rate, peak
+
+
+async def main():
+    db_path = 'bench_row_decoding.db'
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+    db = DatabaseManager(db_path)
+    try:
+        await seed(db)
+        print(f"Decoding {ROWS:,} rows per table (best of {ROUNDS})")
+        async with db._read_connection() as conn:
+            for name, record_type, query in QUERIES:
+                print(f"\n{name}:")
+                dict_rate, dict_peak = await measure('dict(Row)', lambda: decode_dict_rows(conn, query))
+                rec_rate, rec_peak = await measure('record', lambda: decode_records(conn, query, record_type))
+                print(f"  speedup {rec_rate / dict_rate:.2f}x, "
+                      f"memory {100 * (1 - rec_peak / dict_peak):.0f}% lower")
+    finally:
+        await db.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
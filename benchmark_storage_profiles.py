@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark: storage profiles (cache_size, mmap_size, WAL checkpointing) under a replayed workload
+
+Seeds one database with several guilds of members, contributions and DM
+transcripts, copies it once per entry in STORAGE_PROFILES and replays the same
+synthetic bot workload against each copy: WORKERS concurrent tasks issuing a
+fixed, seeded mix of member lookups, transcript pages, audit log reads,
+contributions and queued transcripts. Reports throughput, p50 and p99 latency
+per operation mix, and how large the WAL grew.
+"""
+import asyncio
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import time
+
+sys.path.append('.')
+from db_test_helpers import remove_db
+from utils.database import STORAGE_PROFILES, DatabaseManager
+
+GUILDS = [929290 + i for i in range(20)]
+MEMBERS = 500
+CONTRIBUTIONS = 200_000
+TRANSCRIPTS = 300_000
+WORKERS = 8
+OPERATIONS = 4000
+CATEGORIES = ['Pistols', 'Rifles', 'SMGs', 'Heist Items', 'Crafting Items']
+# (weight, name, call)
+WORKLOAD = [
+    (35, 'get_member', lambda db, rng: db.get_member(rng.choice(GUILDS), rng.randrange(MEMBERS))),
+    (20, 'transcript_page', lambda db, rng: db.get_user_transcript_page(rng.choice(GUILDS), rng.randrange(MEMBERS))),
+    (15, 'audit_events', lambda db, rng: db.get_all_audit_events(rng.choice(GUILDS), limit=50)),
+    (15, 'add_contribution', lambda db, rng: db.add_contribution(
+        rng.choice(GUILDS), rng.randrange(MEMBERS), rng.choice(CATEGORIES), f'item{rng.randrange(60)}', 1)),
+    (15, 'queue_transcript', lambda db, rng: db.queue_dm_transcript(
+        rng.choice(GUILDS), 1, rng.randrange(MEMBERS), 'benchmark message ' * rng.randint(1, 8), 'outbound', 'user')),
+]
+
+
+async def seed(db_path):
+    db = DatabaseManager(db_path)
+    try:
+        for guild_id in GUILDS:
+            await db.initialize_guild(guild_id)
+    finally:
+        await db.close()
+
+    rng = random.Random(1)
+    conn = sqlite3.connect(db_path)
+    conn.executemany('''INSERT INTO members (guild_id, user_id, discord_name, rank, status)
+                        VALUES (?, ?, ?, 'Member', 'Active')''',
+                     [(guild_id, user_id, f'member{user_id}') for guild_id in GUILDS for user_id in range(MEMBERS)])
+    conn.executemany('''INSERT INTO contributions (guild_id, user_id, category, item_name, quantity)
+                        VALUES (?, ?, ?, ?, ?)''',
+                     ((rng.choice(GUILDS), rng.randrange(MEMBERS), rng.choice(CATEGORIES),
+                       f'item{rng.randrange(60)}', rng.randint(1, 5)) for _ in range(CONTRIBUTIONS)))
+    conn.executemany('''INSERT INTO dm_transcripts (guild_id, sender_id, recipient_id, message,
+                        message_type, recipient_type) VALUES (?, ?, ?, ?, 'outbound', 'user')''',
+                     ((rng.choice(GUILDS), 1, rng.randrange(MEMBERS), 'seeded message ' * rng.randint(2, 12))
+                      for _ in range(TRANSCRIPTS)))
+    conn.commit()
+    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    conn.close()
+
+
+async def replay(db_path, profile):
+    db = DatabaseManager(db_path, storage_profile=profile)
+    await db.initialize_database()
+    weights = [weight for weight, _, _ in WORKLOAD]
+    timings = []
+    wal_peak = 0
+
+    async def worker(index):
+        nonlocal wal_peak
+        rng = random.Random(index)
+        for _ in range(OPERATIONS // WORKERS):
+            _, name, call = rng.choices(WORKLOAD, weights)[0]
+            start = time.perf_counter()
+            await call(db, rng)
+            timings.append((time.perf_counter() - start) * 1000)
+            if os.path.exists(db_path + '-wal'):
+                wal_peak = max(wal_peak, os.path.getsize(db_path + '-wal'))
+
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(index) for index in range(WORKERS)))
+        await db.flush_dm_transcripts()
+        elapsed = time.perf_counter() - start
+    finally:
+        await db.close()
+    timings.sort()
+    return {
+        'ops_per_s': len(timings) / elapsed,
+        'p50_ms': timings[len(timings) // 2],
+        'p99_ms': timings[int(len(timings) * 0.99) - 1],
+        'wal_peak_mb': wal_peak / (1024 * 1024),
+    }
+
+
+async def main():
+    template = 'bench_storage_profiles_seed.db'
+    remove_db(template)
+    print(f"Seeding {len(GUILDS)} guilds, {CONTRIBUTIONS:,} contributions, {TRANSCRIPTS:,} transcripts...")
+    await seed(template)
+    print(f"Database: {os.path.getsize(template) / (1024 * 1024):.1f} MB; "
+          f"{OPERATIONS:,} operations over {WORKERS} workers per profile\n")
+    print(f"  {'profile':<12} {'cache':>8} {'mmap':>8} {'ckpt':>6} {'ops/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'WAL MB':>7}")
+    try:
+        for profile, pragmas in STORAGE_PROFILES.items():
+            db_path = f'bench_storage_profiles_{profile}.db'
+            remove_db(db_path)
+            shutil.copyfile(template, db_path)
+            try:
+                result = await replay(db_path, profile)
+            finally:
+                remove_db(db_path)
+            print(f"  {profile:<12} {-pragmas['cache_size'] // 1000:>6}MB {pragmas['mmap_size'] >> 20:>6}MB "
+                  f"{pragmas['wal_autocheckpoint']:>6} {result['ops_per_s']:>8.0f} {result['p50_ms']:>8.2f} "
+                  f"{result['p99_ms']:>8.2f} {result['wal_peak_mb']:>7.1f}")
+    finally:
+        remove_db(template)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
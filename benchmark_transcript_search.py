@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark: DM transcript search, LIKE scan vs. FTS5 index
+
+Seeds dm_transcripts with synthetic messages at several sizes and reports the
+median latency of search_transcripts() for word, phrase and prefix queries
+against the old LIKE '%term%' query.
+"""
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import time
+
+sys.path.append('.')
+from utils.database import DatabaseManager
+
+GUILD_ID = 919191
+SIZES = [100_000, 1_000_000]
+ROUNDS = 7
+VOCABULARY = [
+    'meet', 'docks', 'warehouse', 'tonight', 'dues', 'payment', 'friday', 'patrol', 'run', 'shipment',
+    'late', 'check', 'in', 'with', 'the', 'crew', 'at', 'noon', 'convoy', 'garage', 'north', 'south',
+    'pickup', 'drop', 'locker', 'inventory', 'meeting', 'officer', 'prospect', 'vote', 'loa', 'back',
+]
+QUERIES = [
+    ('rare word', 'zeppelin'),
+    ('common word', 'docks'),
+    ('phrase', '"meet at the docks"'),
+    ('prefix', 'ship*'),
+]
+LIKE_SQL = '''
+    SELECT * FROM dm_transcripts
+    WHERE guild_id = ? AND message LIKE ?
+    ORDER BY created_at DESC
+    LIMIT 50
+'''
+
+
+def seed(db_path, rows):
+    rng = random.Random(rows)
+    conn = sqlite3.connect(db_path)
+    batch = []
+    for i in range(rows):
+        words = rng.choices(VOCABULARY, k=rng.randint(6, 18))
+        if i % 5000 == 0:
+            words.append('zeppelin')
+        batch.append((GUILD_ID, 1, i % 2000, ' '.join(words), 'outbound', 'user'))
+        if len(batch) == 50_000:
+            conn.executemany('''INSERT INTO dm_transcripts (guild_id, sender_id, recipient_id, message,
+                                message_type, recipient_type) VALUES (?, ?, ?, ?, ?, ?)''', batch)
+            batch = []
+    if batch:
+        conn.executemany('''INSERT INTO dm_transcripts (guild_id, sender_id, recipient_id, message,
+                            message_type, recipient_type) VALUES (?, ?, ?, ?, ?, ?)''', batch)
+    conn.commit()
+    conn.close()
+
+
+async def median_ms(make_call):
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        await make_call()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+async def run_size(rows):
+    db_path = f'bench_transcript_search_{rows}.db'
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+    db = DatabaseManager(db_path)
+    try:
+        await db.initialize_guild(GUILD_ID)
+        start = time.perf_counter()
+        seed(db_path, rows)
+        print(f"\n{rows:,} rows (seeded with index triggers in {time.perf_counter() - start:.1f}s)")
+        print(f"  {'query':<12} {'LIKE ms':>10} {'FTS5 ms':>10} {'speedup':>9}")
+        for label, term in QUERIES:
+            like_term = '%' + term.strip('"*') + '%'
+
+            async def like():
+                async with db._read_connection() as conn:
+                    cursor = await conn.execute(LIKE_SQL, (GUILD_ID, like_term))
+                    return await cursor.fetchall()
+
+            like_ms = await median_ms(like)
+            fts_ms = await median_ms(lambda: db.search_transcripts(GUILD_ID, term, 50))
+            print(f"  {label:<12} {like_ms:>10.2f} {fts_ms:>10.2f} {like_ms / fts_ms:>8.2f}x")
+    finally:
+        await db.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+
+async def main():
+    print(f"Transcript search latency, median of {ROUNDS}, LIMIT 50")
+    for rows in SIZES:
+        await run_size(rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
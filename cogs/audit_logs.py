@@ -9,6 +9,9 @@ import json
 from utils.contribution_audit_helpers import ContributionAuditHelpers
 from utils.smart_time_formatter import SmartTimeFormatter
 
+# Column layout of the detailed transaction history table in audit exports
+AUDIT_ROW_FORMAT = "{:<6} {:<12} {:<16} {:<12} {:<10} {:<25} {:<8} {:<8} {:<8} {:<20} {:<50}\n"
+
 class AuditLogsPaginator(discord.ui.View):
     def __init__(self, bot, guild_id: int, events: List[dict], per_page: int = 10):
         super().__init__(timeout=300)
@@ -301,7 +304,7 @@ class AuditLogs(commands.Cog):
             # If there are many events, auto-export to file
             if len(events) > 50:
                 # Show summary and provide file
-                await self._send_audit_file(interaction, events, item_name, category)
+                await self._send_audit_file(interaction, item_name, category, limit=limit)
             else:
                 # Show paginated view
                 view = AuditLogsPaginator(self.bot, interaction.guild.id, events)
@@ -316,10 +319,57 @@ class AuditLogs(commands.Cog):
             )
             await interaction.followup.send(embed=embed, ephemeral=True)
     
-    async def _send_audit_file(self, interaction: discord.Interaction, events: List[dict], 
-                              item_name: Optional[str], category: Optional[str]):
-        """Send audit logs as a file when there are many events"""
+    async def _send_audit_file(self, interaction: discord.Interaction, item_name: Optional[str],
+                              category: Optional[str], limit: Optional[int] = None) -> bool:
+        """Send audit logs as a file when there are many events
+        
+        Events are streamed from the database grouped by category, so only the
+        rendered report is held in memory. Returns False (without sending
+        anything) when no events match.
+        """
         try:
+            sections = io.StringIO()
+            history = io.StringIO()
+            running_balances = {}
+            counts = {'contribution': 0, 'quantity_change': 0}
+            category_count = 0
+            current_category = None
+            record_number = 0
+            
+            # Categories arrive in this order, then the rest alphabetically
+            category_order = ['Weapons Locker', 'Drug Locker', 'Misc Locker']
+            async for event in self.bot.db.iter_audit_events(
+                interaction.guild.id,
+                item_name=item_name,
+                category=category,
+                limit=limit,
+                category_order=category_order
+            ):
+                event_category = event.get('category') or 'Misc Locker'
+                if event_category != current_category:
+                    if current_category is not None:
+                        self._write_category_section(sections, current_category, history.getvalue(),
+                                                     running_balances, record_number)
+                    current_category = event_category
+                    category_count += 1
+                    history = io.StringIO()
+                    running_balances = {}
+                    record_number = 0
+                
+                record_number += 1
+                self._write_event_row(history, record_number, event, running_balances)
+                counts[event.get('event_type')] = counts.get(event.get('event_type'), 0) + 1
+            
+            if current_category is None:
+                return False
+            self._write_category_section(sections, current_category, history.getvalue(),
+                                         running_balances, record_number)
+            del history
+            
+            total_events = sum(counts.values())
+            contrib_count = counts['contribution']
+            change_count = counts['quantity_change']
+            
             # Generate readable table format
             output = io.StringIO()
             
@@ -339,47 +389,21 @@ class AuditLogs(commands.Cog):
                 output.write("\n")
             
             # Write statistics summary
-            contrib_count = sum(1 for e in events if e['event_type'] == 'contribution')
-            change_count = sum(1 for e in events if e['event_type'] == 'quantity_change')
-            
             output.write("SUMMARY STATISTICS:\n")
-            output.write(f"  - Total Events: {len(events)}\n")
+            output.write(f"  - Total Events: {total_events}\n")
             output.write(f"  - Contributions: {contrib_count}\n")
             output.write(f"  - Quantity Changes: {change_count}\n")
             output.write("\n")
             
-            # Calculate total amounts for all items
-            total_amounts = self._calculate_total_amounts(events)
-            
-            # Group events by category
-            categories = {}
-            for event in events:
-                cat = event.get('category', 'Misc Locker')
-                if cat not in categories:
-                    categories[cat] = []
-                categories[cat].append(event)
-            
-            # Process each category separately
-            category_order = ['Weapons Locker', 'Drug Locker', 'Misc Locker']
-            processed_categories = set()
-            
-            # Process known categories in order
-            for cat_name in category_order:
-                if cat_name in categories:
-                    self._write_category_section(output, cat_name, categories[cat_name], total_amounts)
-                    processed_categories.add(cat_name)
-            
-            # Process any remaining categories
-            for cat_name, cat_events in categories.items():
-                if cat_name not in processed_categories:
-                    self._write_category_section(output, cat_name, cat_events, total_amounts)
+            output.write(sections.getvalue())
+            del sections
             
             # Write final report footer
             output.write("\n" + "=" * 180 + "\n")
             output.write("COMPREHENSIVE AUDIT REPORT SUMMARY\n")
             output.write("=" * 180 + "\n")
-            output.write(f"TOTAL EVENTS PROCESSED: {len(events)}\n")
-            output.write(f"CATEGORIES PROCESSED: {len(categories)}\n")
+            output.write(f"TOTAL EVENTS PROCESSED: {total_events}\n")
+            output.write(f"CATEGORIES PROCESSED: {category_count}\n")
             output.write(f"REPORT COMPLETED: {datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}\n")
             output.write(f"GUILD: {interaction.guild.name} (ID: {interaction.guild.id})\n")
             output.write("\nThis is an official audit trail record with total amounts generated by Thanatos Bot.\n")
@@ -388,15 +412,12 @@ class AuditLogs(commands.Cog):
             output.write("=" * 180 + "\n")
             
             # Create comprehensive export file
-            table_content = output.getvalue()
+            output.seek(0)
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             guild_name_safe = "".join(c for c in interaction.guild.name if c.isalnum() or c in (' ', '-', '_')).strip()
             filename = f"COMPREHENSIVE_AUDIT_TABLE_{guild_name_safe}_{timestamp}.txt"
             
-            file = discord.File(
-                io.StringIO(table_content),
-                filename=filename
-            )
+            file = discord.File(output, filename=filename)
             
             # Create summary embed
             embed = discord.Embed(
@@ -405,13 +426,9 @@ class AuditLogs(commands.Cog):
                 timestamp=datetime.now()
             )
             
-            # Add summary statistics
-            contrib_count = sum(1 for e in events if e['event_type'] == 'contribution')
-            change_count = sum(1 for e in events if e['event_type'] == 'quantity_change')
-            
             embed.add_field(
                 name="📊 Summary",
-                value=f"**Total Events:** {len(events)}\n"
+                value=f"**Total Events:** {total_events}\n"
                      f"**Contributions:** {contrib_count}\n"
                      f"**Quantity Changes:** {change_count}",
                 inline=True
@@ -431,18 +448,20 @@ class AuditLogs(commands.Cog):
                     inline=True
                 )
             
-            # Add recent events preview
-            if events:
-                recent_events = []
-                for event in events[:5]:  # Show first 5 events
-                    occurred_at = datetime.fromisoformat(event['occurred_at'].replace('T', ' ').replace('Z', ''))
-                    if event['event_type'] == 'contribution':
-                        recent_events.append(f"📦 {event['item_name']} (+{event['quantity_delta']}) - {occurred_at.strftime('%m/%d %H:%M')}")
-                    else:
-                        delta = event['quantity_delta']
-                        sign = '+' if delta >= 0 else ''
-                        recent_events.append(f"⚖️ {event['item_name']} ({sign}{delta}) - {occurred_at.strftime('%m/%d %H:%M')}")
-                
+            # Add recent events preview (the report itself is grouped by category)
+            recent_events = []
+            for event in await self.bot.db.get_all_audit_events(
+                interaction.guild.id, item_name=item_name, category=category, limit=5
+            ):
+                occurred_at = datetime.fromisoformat(event['occurred_at'].replace('T', ' ').replace('Z', ''))
+                if event['event_type'] == 'contribution':
+                    recent_events.append(f"📦 {event['item_name']} (+{event['quantity_delta']}) - {occurred_at.strftime('%m/%d %H:%M')}")
+                else:
+                    delta = event['quantity_delta']
+                    sign = '+' if delta >= 0 else ''
+                    recent_events.append(f"⚖️ {event['item_name']} ({sign}{delta}) - {occurred_at.strftime('%m/%d %H:%M')}")
+            
+            if recent_events:
                 embed.add_field(
                     name="🕐 Recent Events (Latest First)",
                     value="\n".join(recent_events),
@@ -460,6 +479,7 @@ class AuditLogs(commands.Cog):
                 color=discord.Color.red()
             )
             await interaction.followup.send(embed=embed, ephemeral=True)
+        return True
     
     @app_commands.command(name="audit_export", description="Export complete audit trail as CSV file")
     @app_commands.describe(
@@ -484,15 +504,8 @@ class AuditLogs(commands.Cog):
         await interaction.response.defer()
         
         try:
-            # Fetch ALL audit events (no limit)
-            events = await self.bot.db.get_all_audit_events(
-                interaction.guild.id,
-                item_name=item_name,
-                category=category,
-                limit=None
-            )
-            
-            if not events:
+            # Stream ALL audit events (no limit) into the export file
+            if not await self._send_audit_file(interaction, item_name, category):
                 embed = discord.Embed(
                     title="📋 Audit Export",
                     description="No audit events found for the specified criteria.",
@@ -500,9 +513,6 @@ class AuditLogs(commands.Cog):
                     timestamp=datetime.now()
                 )
                 return await interaction.followup.send(embed=embed, ephemeral=True)
-            
-            # Always send as file for exports
-            await self._send_audit_file(interaction, events, item_name, category)
                 
         except Exception as e:
             embed = discord.Embed(
@@ -634,51 +644,107 @@ class AuditLogs(commands.Cog):
             )
             await interaction.followup.send(embed=embed, ephemeral=True)
     
-    def _calculate_total_amounts(self, events: List[dict]) -> dict:
-        """Calculate current inventory levels by tracking all contributions and quantity changes"""
-        amounts = {}
-        
-        # Process events chronologically to get accurate running totals
-        sorted_events = sorted(events, key=lambda x: x.get('occurred_at', ''))
-        
-        for event in sorted_events:
-            item_name = event.get('item_name', 'Unknown')
-            category = event.get('category', 'Misc Locker')
-            item_key = f"{category}::{item_name}"
-            
-            # Initialize item if not seen before
-            if item_key not in amounts:
-                amounts[item_key] = 0
-            
-            if event.get('event_type') == 'quantity_change':
-                # For quantity changes, use the new_quantity directly as the current level
-                # This represents an administrative override of the inventory level
-                if event.get('new_quantity') is not None:
-                    amounts[item_key] = event['new_quantity']
-            elif event.get('event_type') == 'contribution':
-                # For contributions, add the contribution amount to the current level
-                contribution_amount = event.get('quantity_delta', 0)
-                amounts[item_key] += contribution_amount
-        
-        return amounts
+    def _write_event_row(self, output: io.StringIO, index: int, event: dict, running_balances: dict):
+        """Write one transaction history row, updating the category's running balances
+        
+        Events must be passed oldest first for the TOTAL column to be a running balance.
+        """
+        # Get user information
+        user_display_name = "Unknown"
+        
+        if event.get('actor_id'):
+            try:
+                user_obj = self.bot.get_user(event['actor_id'])
+                if user_obj:
+                    user_display_name = user_obj.display_name[:15]
+                else:
+                    user_display_name = f"User_{str(event['actor_id'])[-6:]}"
+            except:
+                user_display_name = f"User_{str(event['actor_id'])[-6:]}"
+        
+        # Parse timestamp details
+        try:
+            dt = datetime.fromisoformat(event['occurred_at'].replace('T', ' ').replace('Z', ''))
+            date_str = dt.strftime("%Y-%m-%d")
+            time_str = dt.strftime("%H:%M:%S")
+        except:
+            date_str = "Unknown"
+            time_str = "Unknown"
+        
+        # Format event data
+        event_type = event.get('event_type', 'unknown')[:11]
+        item_name = event.get('item_name', 'Unknown')[:24]
+        old_qty = str(event.get('old_quantity', ''))
+        new_qty = str(event.get('new_quantity', ''))
+        
+        # Calculate current inventory level for the TOTAL column
+        # The TOTAL column should show the running inventory balance after this transaction
+        item_name_key = event.get('item_name', 'Unknown')
+        
+        # Initialize running balance for this item if not seen before
+        if item_name_key not in running_balances:
+            running_balances[item_name_key] = 0
+        
+        if event.get('event_type') == 'quantity_change':
+            # For quantity changes, set the inventory level to new_quantity (admin override)
+            if event.get('new_quantity') is not None:
+                running_balances[item_name_key] = event['new_quantity']
+        elif event.get('event_type') == 'contribution':
+            # For contributions, add the contribution amount to the current balance
+            contribution_amount = event.get('quantity_delta', 0)
+            running_balances[item_name_key] += contribution_amount
+        
+        total_amount_after_transaction = running_balances[item_name_key]
+        
+        # Create change description
+        change_desc = ""
+        if event.get('quantity_delta') is not None:
+            delta = event['quantity_delta']
+            if delta > 0:
+                change_desc = f"+{delta} Added"
+            elif delta < 0:
+                change_desc = f"{delta} Removed"
+            else:
+                change_desc = "No Change"
+        else:
+            change_desc = "N/A"
+        
+        # Format notes/reason
+        notes_reason = ""
+        if event.get('reason'):
+            notes_reason = f"REASON: {event['reason'][:40]}"
+        elif event.get('notes'):
+            notes_reason = f"NOTES: {event['notes'][:40]}"
+        else:
+            notes_reason = "No additional details"
+        
+        # Write formatted row
+        output.write(AUDIT_ROW_FORMAT.format(
+            f"{index:04d}",
+            event_type,
+            user_display_name,
+            date_str,
+            time_str,
+            item_name,
+            old_qty[:7] if old_qty else "-",
+            new_qty[:7] if new_qty else "-",
+            str(total_amount_after_transaction)[:7],
+            change_desc[:19],
+            notes_reason[:49]
+        ))
     
-    def _write_category_section(self, output: io.StringIO, category_name: str, 
-                               category_events: List[dict], total_amounts: dict):
-        """Write a section for a specific category with total amounts"""
+    def _write_category_section(self, output: io.StringIO, category_name: str, history: str,
+                               running_balances: dict, event_count: int):
+        """Write a section for a specific category with total amounts
+        
+        history holds the rows already rendered by _write_event_row and
+        running_balances the per-item totals they ended on.
+        """
         # Category header
         output.write(f"\n{'=' * 180}\n")
         output.write(f"CATEGORY: {category_name.upper()}\n")
         output.write(f"{'=' * 180}\n")
         
-        # Get unique items in this category and their total amounts
-        category_items = {}
-        for event in category_events:
-            item_name = event.get('item_name', 'Unknown')
-            item_key = f"{category_name}::{item_name}"
-            if item_key not in category_items:
-                total_amount = total_amounts.get(item_key, 0)
-                category_items[item_name] = total_amount
-        
         # Write current totals summary for this category
         output.write(f"\nCURRENT TOTALS SUMMARY - {category_name}:\n")
         output.write("-" * 80 + "\n")
@@ -686,7 +752,7 @@ class AuditLogs(commands.Cog):
         output.write("-" * 80 + "\n")
         
         total_items = 0
-        for item_name, qty in sorted(category_items.items()):
+        for item_name, qty in sorted(running_balances.items()):
             status = "IN STOCK" if qty > 0 else "OUT OF STOCK" if qty == 0 else "NEGATIVE"
             output.write(f"{item_name[:39]:<40} {str(qty):<20} {status:<15}\n")
             total_items += qty
@@ -700,106 +766,14 @@ class AuditLogs(commands.Cog):
         output.write("-" * 180 + "\n")
         
         # Enhanced table headers with total amount column
-        header_format = "{:<6} {:<12} {:<16} {:<12} {:<10} {:<25} {:<8} {:<8} {:<8} {:<20} {:<50}\n"
-        output.write(header_format.format(
+        output.write(AUDIT_ROW_FORMAT.format(
             "REC#", "EVENT_TYPE", "USER", "DATE", "TIME", "ITEM_NAME", "OLD_QTY", "NEW_QTY", "TOTAL", "CHANGE_DESC", "NOTES/REASON"
         ))
         output.write("-" * 180 + "\n")
-        
-        # Sort events chronologically for proper running balance calculation
-        sorted_category_events = sorted(category_events, key=lambda x: x.get('occurred_at', ''))
-        
-        # Track running balances for each item in this category
-        running_balances = {}
-        
-        # Write events for this category
-        for i, event in enumerate(sorted_category_events, 1):
-            # Get user information
-            user_display_name = "Unknown"
-            
-            if event.get('actor_id'):
-                try:
-                    user_obj = self.bot.get_user(event['actor_id'])
-                    if user_obj:
-                        user_display_name = user_obj.display_name[:15]
-                    else:
-                        user_display_name = f"User_{str(event['actor_id'])[-6:]}"
-                except:
-                    user_display_name = f"User_{str(event['actor_id'])[-6:]}"
-            
-            # Parse timestamp details
-            try:
-                dt = datetime.fromisoformat(event['occurred_at'].replace('T', ' ').replace('Z', ''))
-                date_str = dt.strftime("%Y-%m-%d")
-                time_str = dt.strftime("%H:%M:%S")
-            except:
-                date_str = "Unknown"
-                time_str = "Unknown"
-            
-            # Format event data
-            event_type = event.get('event_type', 'unknown')[:11]
-            item_name = event.get('item_name', 'Unknown')[:24]
-            old_qty = str(event.get('old_quantity', ''))
-            new_qty = str(event.get('new_quantity', ''))
-            
-            # Calculate current inventory level for the TOTAL column
-            # The TOTAL column should show the running inventory balance after this transaction
-            item_name_key = event.get('item_name', 'Unknown')
-            
-            # Initialize running balance for this item if not seen before
-            if item_name_key not in running_balances:
-                running_balances[item_name_key] = 0
-            
-            if event.get('event_type') == 'quantity_change':
-                # For quantity changes, set the inventory level to new_quantity (admin override)
-                if event.get('new_quantity') is not None:
-                    running_balances[item_name_key] = event['new_quantity']
-            elif event.get('event_type') == 'contribution':
-                # For contributions, add the contribution amount to the current balance
-                contribution_amount = event.get('quantity_delta', 0)
-                running_balances[item_name_key] += contribution_amount
-            
-            total_amount_after_transaction = running_balances[item_name_key]
-            
-            # Create change description
-            change_desc = ""
-            if event.get('quantity_delta') is not None:
-                delta = event['quantity_delta']
-                if delta > 0:
-                    change_desc = f"+{delta} Added"
-                elif delta < 0:
-                    change_desc = f"{delta} Removed"
-                else:
-                    change_desc = "No Change"
-            else:
-                change_desc = "N/A"
-            
-            # Format notes/reason
-            notes_reason = ""
-            if event.get('reason'):
-                notes_reason = f"REASON: {event['reason'][:40]}"
-            elif event.get('notes'):
-                notes_reason = f"NOTES: {event['notes'][:40]}"
-            else:
-                notes_reason = "No additional details"
-            
-            # Write formatted row
-            output.write(header_format.format(
-                f"{i:04d}",
-                event_type,
-                user_display_name,
-                date_str,
-                time_str,
-                item_name,
-                old_qty[:7] if old_qty else "-",
-                new_qty[:7] if new_qty else "-",
-                str(total_amount_after_transaction)[:7],
-                change_desc[:19],
-                notes_reason[:49]
-            ))
+        output.write(history)
         
         output.write("-" * 180 + "\n")
-        output.write(f"End of {category_name} - {len(category_events)} transactions processed\n")
+        output.write(f"End of {category_name} - {event_count} transactions processed\n")
         output.write("=" * 180 + "\n\n")
 
 
@@ -1,15 +1,85 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
 from datetime import datetime
+import heapq
 import json
 import io
+import logging
 import zipfile
 import os
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+BACKUP_PREFIX = 'thanatos_database_backup_'
+BACKUP_SUFFIX = '.db.gz'
+
+
+def backup_filename(when: datetime = None, suffix: str = BACKUP_SUFFIX) -> str:
+    """File name for a backup taken at `when` (names sort oldest to newest)"""
+    return f"{BACKUP_PREFIX}{(when or datetime.now()).strftime('%Y%m%d_%H%M%S')}{suffix}"
+
+
+def rotate_backups(directory: str, keep: int, suffix: str = BACKUP_SUFFIX) -> list:
+    """Delete all but the newest `keep` backups in directory; returns the removed paths"""
+    if not os.path.isdir(directory):
+        return []
+    backups = sorted(name for name in os.listdir(directory)
+                     if name.startswith(BACKUP_PREFIX) and name.endswith(suffix))
+    removed = []
+    for name in backups[:max(len(backups) - keep, 0)]:
+        path = os.path.join(directory, name)
+        try:
+            os.remove(path)
+            removed.append(path)
+        except OSError as e:
+            logger.error(f"Failed to remove old backup {path}: {e}")
+    return removed
+
 
 class BackupSystem(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        
+        # Scheduled local backups (off unless backup_interval_hours is set)
+        config = getattr(bot, 'config', None) or {}
+        self.backup_directory = config.get('backup_directory', 'backups')
+        self.backup_keep = config.get('backup_keep', 7)
+        self.backup_interval_hours = config.get('backup_interval_hours', 0)
+        if self.backup_interval_hours > 0:
+            self.scheduled_backup.change_interval(hours=self.backup_interval_hours)
+            self.scheduled_backup.start()
+    
+    def cog_unload(self):
+        """Stop the scheduled backup task"""
+        self.scheduled_backup.cancel()
+    
+    @tasks.loop(hours=24)
+    async def scheduled_backup(self):
+        """Write a gzipped backup to backup_directory and prune old ones"""
+        if not self.bot.db.allow_expensive_work():
+            logger.warning("Skipping scheduled database backup: database circuit breaker is open")
+            return
+        try:
+            await self.run_local_backup()
+        except Exception as e:
+            logger.error(f"Scheduled database backup failed: {e}")
+    
+    @scheduled_backup.before_loop
+    async def before_scheduled_backup(self):
+        await self.bot.wait_until_ready()
+    
+    async def run_local_backup(self) -> dict:
+        """Back up the database into backup_directory, keeping the newest backup_keep files"""
+        # .db.gz for one database, .tar of per-guild snapshots with sharded storage
+        suffix = self.bot.db.backup_suffix
+        path = os.path.join(self.backup_directory, backup_filename(suffix=suffix))
+        result = await self.bot.db.backup_to(path)
+        removed = rotate_backups(self.backup_directory, self.backup_keep, suffix)
+        if removed:
+            logger.info(f"Rotated out {len(removed)} old backup(s)")
+        return dict(result, path=path, removed=removed)
     
     def _has_admin_permissions(self, member: discord.Member) -> bool:
         """Check if member has administrator permissions"""
@@ -26,13 +96,13 @@ class BackupSystem(commands.Cog):
         await interaction.response.defer(ephemeral=True)
         
         try:
-            # Export guild data
-            guild_data = await self.bot.db.export_guild_data(interaction.guild.id)
+            guild_id = interaction.guild.id
             
             if format_type.lower() == "json":
-                # Create JSON file
-                json_content = json.dumps(guild_data, indent=2, default=str)
-                file_content = io.StringIO(json_content)
+                # Create JSON file, streamed row by row from the database
+                file_content = io.StringIO()
+                await self.bot.db.write_guild_export(guild_id, file_content)
+                file_content.seek(0)
                 filename = f"thanatos_export_{interaction.guild.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
                 file = discord.File(file_content, filename=filename)
                 
@@ -44,7 +114,7 @@ class BackupSystem(commands.Cog):
             
             elif format_type.lower() == "text":
                 # Create human-readable text format
-                text_content = await self._format_data_as_text(guild_data)
+                text_content = await self._format_data_as_text(guild_id)
                 file_content = io.StringIO(text_content)
                 filename = f"thanatos_export_{interaction.guild.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
                 file = discord.File(file_content, filename=filename)
@@ -60,16 +130,17 @@ class BackupSystem(commands.Cog):
                 zip_buffer = io.BytesIO()
                 
                 with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                    # Add JSON file
-                    json_content = json.dumps(guild_data, indent=2, default=str)
-                    zip_file.writestr(f"thanatos_data.json", json_content)
+                    # Add JSON file, compressed as it is written
+                    with zip_file.open("thanatos_data.json", 'w') as json_file:
+                        with io.TextIOWrapper(json_file, encoding='utf-8') as json_text:
+                            await self.bot.db.write_guild_export(guild_id, json_text)
                     
                     # Add text file
-                    text_content = await self._format_data_as_text(guild_data)
+                    text_content = await self._format_data_as_text(guild_id)
                     zip_file.writestr(f"thanatos_data.txt", text_content)
                     
                     # Add membership list
-                    members = guild_data.get('members', [])
+                    members = await self.bot.db.get_all_members(guild_id)
                     if members:
                         # Group members by rank for membership list
                         grouped_members = {}
@@ -107,20 +178,24 @@ class BackupSystem(commands.Cog):
             )
             await interaction.followup.send(embed=embed, ephemeral=True)
     
-    async def _format_data_as_text(self, guild_data: dict) -> str:
-        """Format guild data as human-readable text"""
+    async def _format_data_as_text(self, guild_id: int) -> str:
+        """Format guild data as human-readable text
+        
+        LOA records and contributions are streamed and summarized on the fly
+        rather than loaded as full lists.
+        """
         lines = []
         lines.append("=" * 80)
         lines.append("THANATOS BOT - DATA EXPORT")
-        lines.append(f"Export Date: {guild_data.get('export_timestamp', 'Unknown')}")
-        lines.append(f"Guild ID: {guild_data.get('guild_id', 'Unknown')}")
+        lines.append(f"Export Date: {datetime.now().isoformat()}")
+        lines.append(f"Guild ID: {guild_id}")
         lines.append("=" * 80)
         lines.append("")
         
         # Server Configuration
         lines.append("SERVER CONFIGURATION")
         lines.append("-" * 30)
-        config = guild_data.get('server_config', {})
+        config = await self.bot.db.get_server_config(guild_id)
         
         if config:
             lines.append(f"Officer Role ID: {config.get('officer_role_id', 'Not set')}")
@@ -157,7 +232,7 @@ class BackupSystem(commands.Cog):
         # Members
         lines.append("MEMBERS")
         lines.append("-" * 30)
-        members = guild_data.get('members', [])
+        members = await self.bot.db.get_all_members(guild_id)
         
         if members:
             lines.append(f"Total Members: {len(members)}")
@@ -180,23 +255,28 @@ class BackupSystem(commands.Cog):
         # LOA Records
         lines.append("LOA RECORDS")
         lines.append("-" * 30)
-        loa_records = guild_data.get('loa_records', [])
-        
-        if loa_records:
-            lines.append(f"Total LOA Records: {len(loa_records)}")
+        total_loas = active_count = expired_count = inactive_count = 0
+        recent_heap = []  # (created_at, sequence, record) for the 10 most recent
+        async for loa in self.bot.db.iter_loa_records(guild_id):
+            total_loas += 1
+            active_count += 1 if loa.get('is_active') else 0
+            expired_count += 1 if loa.get('is_expired') else 0
+            inactive_count += 0 if loa.get('is_active') else 1
+            heapq.heappush(recent_heap, (str(loa.get('created_at') or ''), total_loas, loa))
+            if len(recent_heap) > 10:
+                heapq.heappop(recent_heap)
+        
+        if total_loas:
+            lines.append(f"Total LOA Records: {total_loas}")
             lines.append("")
             
-            active_loas = [loa for loa in loa_records if loa.get('is_active')]
-            expired_loas = [loa for loa in loa_records if loa.get('is_expired')]
-            inactive_loas = [loa for loa in loa_records if not loa.get('is_active')]
-            
-            lines.append(f"Active LOAs: {len(active_loas)}")
-            lines.append(f"Expired LOAs: {len(expired_loas)}")
-            lines.append(f"Completed LOAs: {len(inactive_loas)}")
+            lines.append(f"Active LOAs: {active_count}")
+            lines.append(f"Expired LOAs: {expired_count}")
+            lines.append(f"Completed LOAs: {inactive_count}")
             lines.append("")
             
             # Show recent LOAs
-            recent_loas = sorted(loa_records, key=lambda x: x.get('created_at', ''), reverse=True)[:10]
+            recent_loas = [entry[2] for entry in sorted(recent_heap, reverse=True)]
             lines.append("Recent LOA Records (Last 10):")
             lines.append(f"{'User ID':<15} {'Duration':<15} {'Status':<10} {'Start Date':<20} {'End Date'}")
             lines.append("-" * 80)
@@ -205,8 +285,8 @@ class BackupSystem(commands.Cog):
                 user_id = str(loa.get('user_id', 'Unknown'))
                 duration = loa.get('duration', 'Unknown')
                 status = 'Active' if loa.get('is_active') else ('Expired' if loa.get('is_expired') else 'Completed')
-                start_date = loa.get('start_time', 'Unknown')[:10] if loa.get('start_time') else 'Unknown'
-                end_date = loa.get('end_time', 'Unknown')[:10] if loa.get('end_time') else 'Unknown'
+                start_date = str(loa.get('start_time'))[:10] if loa.get('start_time') else 'Unknown'
+                end_date = str(loa.get('end_time'))[:10] if loa.get('end_time') else 'Unknown'
                 
                 lines.append(f"{user_id:<15} {duration:<15} {status:<10} {start_date:<20} {end_date}")
         else:
@@ -217,46 +297,37 @@ class BackupSystem(commands.Cog):
         # Contributions
         lines.append("CONTRIBUTIONS")
         lines.append("-" * 30)
-        contributions = guild_data.get('contributions', [])
+        # Aggregate per category as the rows stream in
+        total_contributions = 0
+        categories = {}
+        async for contrib in self.bot.db.iter_all_contributions(guild_id):
+            total_contributions += 1
+            category = contrib.get('category', 'Unknown')
+            if category not in categories:
+                categories[category] = {'count': 0, 'items': {}, 'contributors': set()}
+            summary = categories[category]
+            summary['count'] += 1
+            
+            item_name = contrib.get('item_name', 'Unknown')
+            summary['items'][item_name] = summary['items'].get(item_name, 0) + contrib.get('quantity', 1)
+            summary['contributors'].add(contrib.get('discord_name', 'Unknown'))
         
-        if contributions:
-            lines.append(f"Total Contributions: {len(contributions)}")
+        if total_contributions:
+            lines.append(f"Total Contributions: {total_contributions}")
             lines.append("")
             
-            # Group by category
-            categories = {}
-            for contrib in contributions:
-                category = contrib.get('category', 'Unknown')
-                if category not in categories:
-                    categories[category] = []
-                categories[category].append(contrib)
-            
-            for category, contribs in categories.items():
-                lines.append(f"{category} ({len(contribs)} contributions):")
-                
-                # Aggregate items
-                items = {}
-                contributors = set()
-                for contrib in contribs:
-                    item_name = contrib.get('item_name', 'Unknown')
-                    quantity = contrib.get('quantity', 1)
-                    contributor = contrib.get('discord_name', 'Unknown')
-                    
-                    contributors.add(contributor)
-                    if item_name in items:
-                        items[item_name] += quantity
-                    else:
-                        items[item_name] = quantity
+            for category, summary in categories.items():
+                lines.append(f"{category} ({summary['count']} contributions):")
                 
                 # Show top items
-                sorted_items = sorted(items.items(), key=lambda x: x[1], reverse=True)
+                sorted_items = sorted(summary['items'].items(), key=lambda x: x[1], reverse=True)
                 for item, total in sorted_items[:5]:  # Top 5 items per category
                     lines.append(f"  - {item}: {total}")
                 
                 if len(sorted_items) > 5:
                     lines.append(f"  ... and {len(sorted_items) - 5} more items")
                 
-                lines.append(f"  Contributors: {len(contributors)}")
+                lines.append(f"  Contributors: {len(summary['contributors'])}")
                 lines.append("")
         else:
             lines.append("No contributions found")
@@ -345,8 +416,17 @@ class BackupSystem(commands.Cog):
                 "❌ This command requires administrator permissions.", ephemeral=True
             )
         
+        if not self.bot.db.allow_expensive_work():
+            return await interaction.response.send_message(
+                "⚠️ The database is failing right now, so the backup was not started. "
+                "Please try again in a few minutes.", ephemeral=True
+            )
+        
         await interaction.response.defer(ephemeral=True)
         
+        temp_dir = tempfile.mkdtemp(prefix='thanatos_backup_')
+        filename = backup_filename(suffix=self.bot.db.backup_suffix)
+        backup_path = os.path.join(temp_dir, filename)
         try:
             # Check if database file exists
             db_path = self.bot.db.db_path
@@ -356,28 +436,46 @@ class BackupSystem(commands.Cog):
                 )
                 return
             
-            # Read and send database file
-            with open(db_path, 'rb') as db_file:
-                file_content = io.BytesIO(db_file.read())
+            # Online backup (consistent with the WAL), gzipped to a temp file
+            result = await self.bot.db.backup_to(backup_path)
+            
+            limit = interaction.guild.filesize_limit if interaction.guild else 8 * 1024 * 1024
+            if result['size'] > limit:
+                # Too big to upload; keep it with the scheduled backups instead
+                os.makedirs(self.backup_directory, exist_ok=True)
+                kept_path = os.path.join(self.backup_directory, filename)
+                os.replace(backup_path, kept_path)
+                embed = discord.Embed(
+                    title="💾 Database Backup Saved Locally",
+                    description=f"The compressed backup ({result['size']:,} bytes) is larger than this "
+                               f"server's upload limit ({limit:,} bytes).\n\n"
+                               f"**Saved to:** `{kept_path}`",
+                    color=discord.Color.orange(),
+                    timestamp=datetime.now()
+                )
+                await interaction.followup.send(embed=embed, ephemeral=True)
+                return
             
-            filename = f"thanatos_database_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
-            file = discord.File(file_content, filename=filename)
+            file = discord.File(backup_path, filename=filename)
             
             embed = discord.Embed(
                 title="💾 Database Backup Complete",
                 description=f"Complete SQLite database backup created.\n\n"
                            f"**File:** {filename}\n"
-                           f"**Size:** {len(file_content.getvalue())} bytes\n\n"
+                           f"**Size:** {result['size']:,} bytes gzipped ({result['raw_size']:,} bytes uncompressed)\n\n"
                            f"⚠️ **Warning:** This file contains all bot data. Keep it secure!",
                 color=discord.Color.green(),
                 timestamp=datetime.now()
             )
             
-            await interaction.followup.send(
-                embed=embed,
-                file=file,
-                ephemeral=True
-            )
+            try:
+                await interaction.followup.send(
+                    embed=embed,
+                    file=file,
+                    ephemeral=True
+                )
+            finally:
+                file.close()
         
         except Exception as e:
             embed = discord.Embed(
@@ -386,6 +484,10 @@ class BackupSystem(commands.Cog):
                 color=discord.Color.red()
             )
             await interaction.followup.send(embed=embed, ephemeral=True)
+        finally:
+            if os.path.exists(backup_path):
+                os.remove(backup_path)
+            os.rmdir(temp_dir)
     
     @app_commands.command(name="data_summary", description="View a summary of server data")
     async def data_summary(self, interaction: discord.Interaction):
@@ -398,20 +500,9 @@ class BackupSystem(commands.Cog):
             contributions = await self.bot.db.get_all_contributions(interaction.guild.id)
             
             # Get LOA counts
-            conn = await self.bot.db._get_shared_connection()
-            # Active LOAs
-            cursor = await conn.execute(
-                'SELECT COUNT(*) FROM loa_records WHERE guild_id = ? AND is_active = TRUE AND is_expired = FALSE',
-                (interaction.guild.id,)
-            )
-            active_loas = (await cursor.fetchone())[0]
-            
-            # Total LOA records
-            cursor = await conn.execute(
-                'SELECT COUNT(*) FROM loa_records WHERE guild_id = ?',
-                (interaction.guild.id,)
-            )
-            total_loa_records = (await cursor.fetchone())[0]
+            loa_counts = await self.bot.db.get_loa_counts(interaction.guild.id)
+            active_loas = loa_counts['active']
+            total_loa_records = loa_counts['total']
             
             # Create summary embed
             embed = discord.Embed(
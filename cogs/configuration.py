@@ -874,7 +874,7 @@ class ConfigurationSystem(commands.Cog):
                 )
             
             # Reset configuration
-            await self.bot.db.initialize_guild(interaction.guild.id)
+            await self.bot.db.reset_server_config(interaction.guild.id)
             
             success_embed = discord.Embed(
                 title="✅ Configuration Reset",
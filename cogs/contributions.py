@@ -3,7 +3,6 @@ from discord.ext import commands
 from discord import app_commands
 from datetime import datetime
 from typing import List, Optional, Union
-import aiosqlite
 import asyncio
 
 class ContributionModal(discord.ui.Modal):
@@ -847,18 +846,7 @@ class ContributionSystem(commands.Cog):
             )
         
         # Find and delete the contribution
-        conn = await self.bot.db._get_shared_connection()
-        # Set row factory to get dictionary-like rows
-        conn.row_factory = aiosqlite.Row
-        cursor = await conn.execute('''
-            SELECT c.*, m.discord_name
-            FROM contributions c
-            JOIN members m ON c.guild_id = m.guild_id AND c.user_id = m.user_id
-            WHERE c.guild_id = ? AND c.user_id = ? AND c.item_name LIKE ?
-            ORDER BY c.created_at DESC LIMIT 1
-        ''', (interaction.guild.id, member.id, f"%{item_name}%"))
-        
-        contribution = await cursor.fetchone()
+        contribution = await self.bot.db.delete_latest_contribution(interaction.guild.id, member.id, item_name)
         
         if not contribution:
             return await interaction.response.send_message(
@@ -868,13 +856,6 @@ class ContributionSystem(commands.Cog):
         
         contrib_dict = dict(contribution)
         
-        # Delete the contribution
-        await conn.execute(
-            'DELETE FROM contributions WHERE id = ?',
-            (contrib_dict['id'],)
-        )
-        await self.bot.db._execute_commit()
-        
         embed = discord.Embed(
             title="✅ Contribution Deleted",
             description=f"Deleted contribution: **{contrib_dict['item_name']}** (Qty: {contrib_dict['quantity']}) from **{contrib_dict['discord_name']}**",
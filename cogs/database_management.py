@@ -117,9 +117,7 @@ class ArchiveSelectionView(discord.ui.View):
         options = []
         for archive in archives[-25:]:  # Show most recent 25
             created_date = datetime.fromisoformat(archive['created_at']).strftime('%Y-%m-%d %H:%M')
-            archive_data = json.loads(archive['archived_data'])
-            
-            description = f"{created_date} • {archive_data.get('total_contributions', 0)} contributions"
+            description = f"{created_date} • {archive['total_contributions']} contributions"
             options.append(
                 discord.SelectOption(
                     label=archive['archive_name'][:100],  # Discord limit
@@ -153,7 +151,8 @@ class ArchiveSelectionView(discord.ui.View):
         
         # Get the selected archive details
         bot = interaction.client
-        archive = await bot.db.get_archive_by_id(archive_id)
+        # Audit events are only decoded if the archive is exported
+        archive = await bot.db.get_archive_by_id(archive_id, sections=('contributions',))
         
         if not archive:
             await interaction.response.send_message("❌ Archive not found.", ephemeral=True)
@@ -171,7 +170,7 @@ class ArchiveDetailView(discord.ui.View):
     def __init__(self, archive: Dict[str, Any]):
         super().__init__(timeout=300)
         self.archive = archive
-        self.archived_data = archive['archived_data']  # Already parsed JSON
+        self.archived_data = archive['archived_data']  # Already decoded sections
     
     async def create_archive_embed(self) -> discord.Embed:
         """Create detailed embed for archive contents"""
@@ -194,7 +193,9 @@ class ArchiveDetailView(discord.ui.View):
             name="📊 Archive Statistics",
             value=f"📦 **{total_contributions:,}** Contributions\n"
                   f"📋 **{total_audit_events:,}** Audit Events\n"
-                  f"📚 **Archive ID:** {self.archive['id']}",
+                  f"📚 **Archive ID:** {self.archive['id']}\n"
+                  f"🗜️ **Size:** {self.archive['stored_size'] / 1024:,.1f} KB "
+                  f"({self.archive['raw_size'] / 1024:,.1f} KB uncompressed)",
             inline=True
         )
         
@@ -274,7 +275,10 @@ class ArchiveDetailView(discord.ui.View):
             
             # Get archived contributions and audit events
             contributions = self.archived_data.get('contributions', [])
-            audit_events = self.archived_data.get('audit_events', [])
+            audit_events = self.archived_data.get('audit_events')
+            if audit_events is None:
+                audit_events = [event async for event in
+                                interaction.client.db.iter_archive_section(self.archive['id'], 'audit_events')]
             
             # Write statistics summary
             output.write("ARCHIVE STATISTICS:\n")
@@ -461,10 +465,9 @@ class ArchiveDetailView(discord.ui.View):
         archive_list = []
         for archive in recent_archives:
             created_date = datetime.fromisoformat(archive['created_at']).strftime('%Y-%m-%d %H:%M')
-            archive_data = json.loads(archive['archived_data'])
             archive_list.append(
                 f"• **{archive['archive_name']}** ({created_date})\n"
-                f"  └ {archive_data.get('total_contributions', 0)} contributions"
+                f"  └ {archive['total_contributions']} contributions"
             )
         
         embed.add_field(
@@ -709,25 +712,27 @@ class QuantityOperationModal(discord.ui.Modal):
                 actual_removed = min(input_qty, self.current_quantity)
                 operation_desc = f"Removed {actual_removed} (from {self.current_quantity})"
             
-            # Log the quantity change with operation details
-            change_id = await bot.db.log_quantity_change(
-                interaction.guild.id,
-                self.item_name,
-                self.category,
-                self.current_quantity,
-                new_qty,
-                f"[{self.operation.upper()}] {self.reason.value}",
-                f"Operation: {operation_desc}\nNotes: {self.notes.value}" if self.notes.value else f"Operation: {operation_desc}",
-                interaction.user.id
-            )
+            # Audit entry and redistribution commit together
+            async with bot.db.transaction(interaction.guild.id):
+                # Log the quantity change with operation details
+                change_id = await bot.db.log_quantity_change(
+                    interaction.guild.id,
+                    self.item_name,
+                    self.category,
+                    self.current_quantity,
+                    new_qty,
+                    f"[{self.operation.upper()}] {self.reason.value}",
+                    f"Operation: {operation_desc}\nNotes: {self.notes.value}" if self.notes.value else f"Operation: {operation_desc}",
+                    interaction.user.id
+                )
             
-            # Update the actual quantities in contributions
-            await bot.db.update_item_quantities(
-                interaction.guild.id,
-                self.item_name,
-                self.category,
-                new_qty
-            )
+                # Update the actual quantities in contributions
+                await bot.db.update_item_quantities(
+                    interaction.guild.id,
+                    self.item_name,
+                    self.category,
+                    new_qty
+                )
             
             # Log to officer channel if configured
             await self._log_quantity_change_to_channel(
@@ -879,25 +884,27 @@ class ConfirmOperationView(discord.ui.View):
             actual_removed = min(self.input_qty, self.modal.current_quantity)
             operation_desc = f"Removed {actual_removed} (from {self.modal.current_quantity}) - exceeded available quantity"
             
-            # Log the quantity change
-            change_id = await bot.db.log_quantity_change(
-                interaction.guild.id,
-                self.modal.item_name,
-                self.modal.category,
-                self.modal.current_quantity,
-                self.new_qty,
-                f"[{self.modal.operation.upper()}] {self.modal.reason.value}",
-                f"Operation: {operation_desc}\nNotes: {self.modal.notes.value}" if self.modal.notes.value else f"Operation: {operation_desc}",
-                interaction.user.id
-            )
+            # Audit entry and redistribution commit together
+            async with bot.db.transaction(interaction.guild.id):
+                # Log the quantity change
+                change_id = await bot.db.log_quantity_change(
+                    interaction.guild.id,
+                    self.modal.item_name,
+                    self.modal.category,
+                    self.modal.current_quantity,
+                    self.new_qty,
+                    f"[{self.modal.operation.upper()}] {self.modal.reason.value}",
+                    f"Operation: {operation_desc}\nNotes: {self.modal.notes.value}" if self.modal.notes.value else f"Operation: {operation_desc}",
+                    interaction.user.id
+                )
             
-            # Update the actual quantities in contributions
-            await bot.db.update_item_quantities(
-                interaction.guild.id,
-                self.modal.item_name,
-                self.modal.category,
-                self.new_qty
-            )
+                # Update the actual quantities in contributions
+                await bot.db.update_item_quantities(
+                    interaction.guild.id,
+                    self.modal.item_name,
+                    self.modal.category,
+                    self.new_qty
+                )
             
             # Log to officer channel if configured
             await self.modal._log_quantity_change_to_channel(
@@ -1294,17 +1301,14 @@ class DatabaseManagement(commands.Cog):
     
     async def _get_contribution_summary(self, guild_id: int) -> Dict[str, Any]:
         """Get a complete summary of all contributions"""
-        contributions = await self.bot.db.get_all_contributions(guild_id)
-        
-        if not contributions:
-            return {"total_contributions": 0, "categories": {}, "contributors": {}, "items": {}}
-        
-        # Aggregate data
+        # Aggregate data as the rows stream in
+        total_contributions = 0
         categories = {}
         contributors = {}
         items = {}
         
-        for contrib in contributions:
+        async for contrib in self.bot.db.iter_all_contributions(guild_id):
+            total_contributions += 1
             category = contrib['category']
             contributor = contrib['discord_name']
             item_name = contrib['item_name']
@@ -1335,6 +1339,9 @@ class DatabaseManagement(commands.Cog):
             items[item_name]["contributions"] += 1
             items[item_name]["categories"].add(category)
         
+        if not total_contributions:
+            return {"total_contributions": 0, "categories": {}, "contributors": {}, "items": {}}
+        
         # Convert sets to lists for JSON serialization
         for cat_data in categories.values():
             cat_data["unique_contributors"] = list(cat_data["unique_contributors"])
@@ -1346,7 +1353,7 @@ class DatabaseManagement(commands.Cog):
             item_data["categories"] = list(item_data["categories"])
         
         return {
-            "total_contributions": len(contributions),
+            "total_contributions": total_contributions,
             "categories": categories,
             "contributors": contributors,
             "items": items,
@@ -1578,6 +1585,12 @@ class DatabaseManagement(commands.Cog):
                 "❌ This command is only available to officers.", ephemeral=True
             )
         
+        if not self.bot.db.allow_expensive_work():
+            return await interaction.response.send_message(
+                "⚠️ The database is failing right now, so this was not started. "
+                "Please try again in a few minutes.", ephemeral=True
+            )
+        
         # Get current summary for preview
         try:
             summary = await self._get_contribution_summary(interaction.guild.id)
@@ -1647,10 +1660,9 @@ class DatabaseManagement(commands.Cog):
             archive_list = []
             for archive in recent_archives:
                 created_date = datetime.fromisoformat(archive['created_at']).strftime('%Y-%m-%d %H:%M')
-                archive_data = json.loads(archive['archived_data'])
                 archive_list.append(
                     f"• **{archive['archive_name']}** ({created_date})\n"
-                    f"  └ {archive_data.get('total_contributions', 0)} contributions"
+                    f"  └ {archive['total_contributions']} contributions"
                 )
             
             embed.add_field(
@@ -1767,6 +1779,372 @@ class DatabaseManagement(commands.Cog):
             )
             await interaction.followup.send(embed=embed, ephemeral=True)
     
+    @app_commands.command(name="inventory_verify", description="Check inventory totals against the raw contributions")
+    @app_commands.describe(repair="Rebuild this server's totals from the contributions if mismatches are found")
+    async def inventory_verify(self, interaction: discord.Interaction, repair: bool = False):
+        """Verify (and optionally rebuild) the materialized inventory totals"""
+        # Check permissions
+        config = await self.bot.db.get_server_config(interaction.guild.id)
+        if not config or not config.get('officer_role_id'):
+            return await interaction.response.send_message(
+                "❌ Officer role not configured.", ephemeral=True
+            )
+        
+        officer_role = interaction.guild.get_role(config['officer_role_id'])
+        if not officer_role or officer_role not in interaction.user.roles:
+            return await interaction.response.send_message(
+                "❌ This command is only available to officers.", ephemeral=True
+            )
+        
+        await interaction.response.defer(ephemeral=True)
+        
+        try:
+            mismatches = await self.bot.db.verify_inventory_totals(interaction.guild.id)
+            
+            if not mismatches:
+                embed = discord.Embed(
+                    title="✅ Inventory Totals Verified",
+                    description="Every item total matches the contribution records.",
+                    color=discord.Color.green()
+                )
+                return await interaction.followup.send(embed=embed, ephemeral=True)
+            
+            lines = []
+            for item in mismatches[:10]:
+                expected = item['expected_quantity'] if item['expected_quantity'] is not None else 'none'
+                stored = item['stored_quantity'] if item['stored_quantity'] is not None else 'missing'
+                lines.append(f"• **{item['item_name']}** ({item['category']}) - stored: {stored}, actual: {expected}")
+            if len(mismatches) > 10:
+                lines.append(f"...and {len(mismatches) - 10} more")
+            
+            if repair:
+                rebuilt = await self.bot.db.rebuild_inventory_totals(interaction.guild.id)
+                embed = discord.Embed(
+                    title="🔧 Inventory Totals Rebuilt",
+                    description=f"Found {len(mismatches)} mismatched item(s) and rebuilt {rebuilt} total(s) "
+                                f"from the contribution records.",
+                    color=discord.Color.orange()
+                )
+            else:
+                embed = discord.Embed(
+                    title="⚠️ Inventory Totals Out of Sync",
+                    description=f"Found {len(mismatches)} mismatched item(s). "
+                                f"Run `/inventory_verify repair:True` to rebuild them.",
+                    color=discord.Color.orange()
+                )
+            embed.add_field(name="Mismatches", value="\n".join(lines)[:1024], inline=False)
+            await interaction.followup.send(embed=embed, ephemeral=True)
+            
+        except Exception as e:
+            embed = discord.Embed(
+                title="❌ Error Verifying Inventory",
+                description=f"An error occurred while verifying inventory totals: {str(e)}",
+                color=discord.Color.red()
+            )
+            await interaction.followup.send(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="dues_verify", description="Check the dues ledger totals against the raw payments")
+    @app_commands.describe(repair="Rebuild this server's dues totals from the payments if mismatches are found")
+    async def dues_verify(self, interaction: discord.Interaction, repair: bool = False):
+        """Verify (and optionally rebuild) the per-period dues totals"""
+        # Check permissions
+        config = await self.bot.db.get_server_config(interaction.guild.id)
+        if not config or not config.get('officer_role_id'):
+            return await interaction.response.send_message(
+                "❌ Officer role not configured.", ephemeral=True
+            )
+        
+        officer_role = interaction.guild.get_role(config['officer_role_id'])
+        if not officer_role or officer_role not in interaction.user.roles:
+            return await interaction.response.send_message(
+                "❌ This command is only available to officers.", ephemeral=True
+            )
+        
+        if not self.bot.db.allow_expensive_work():
+            return await interaction.response.send_message(
+                "⚠️ The database is failing right now, so this was not started. "
+                "Please try again in a few minutes.", ephemeral=True
+            )
+        
+        await interaction.response.defer(ephemeral=True)
+        
+        try:
+            mismatches = await self.bot.db.verify_dues_totals(interaction.guild.id)
+            
+            if not mismatches:
+                embed = discord.Embed(
+                    title="✅ Dues Totals Verified",
+                    description="Every dues period's totals match the payment records.",
+                    color=discord.Color.green()
+                )
+                return await interaction.followup.send(embed=embed, ephemeral=True)
+            
+            lines = []
+            for item in mismatches[:10]:
+                expected, stored = item['expected'], item['stored']
+                if stored is None:
+                    lines.append(f"• Period #{item['dues_period_id']} - totals missing")
+                elif expected is None:
+                    lines.append(f"• Period #{item['dues_period_id']} - totals left over from a deleted period")
+                else:
+                    lines.append(f"• Period #{item['dues_period_id']} - stored: {stored['paid_count']} paid / "
+                                 f"${stored['total_collected']:,.2f}, actual: {expected['paid_count']} paid / "
+                                 f"${expected['total_collected']:,.2f}")
+            if len(mismatches) > 10:
+                lines.append(f"...and {len(mismatches) - 10} more")
+            
+            if repair:
+                rebuilt = await self.bot.db.rebuild_dues_totals(interaction.guild.id)
+                embed = discord.Embed(
+                    title="🔧 Dues Totals Rebuilt",
+                    description=f"Found {len(mismatches)} mismatched period(s) and rebuilt {rebuilt} total(s) "
+                                f"from the payment records.",
+                    color=discord.Color.orange()
+                )
+            else:
+                embed = discord.Embed(
+                    title="⚠️ Dues Totals Out of Sync",
+                    description=f"Found {len(mismatches)} mismatched period(s). "
+                                f"Run `/dues_verify repair:True` to rebuild them.",
+                    color=discord.Color.orange()
+                )
+            embed.add_field(name="Mismatches", value="\n".join(lines)[:1024], inline=False)
+            await interaction.followup.send(embed=embed, ephemeral=True)
+            
+        except Exception as e:
+            embed = discord.Embed(
+                title="❌ Error Verifying Dues",
+                description=f"An error occurred while verifying dues totals: {str(e)}",
+                color=discord.Color.red()
+            )
+            await interaction.followup.send(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="retention_policy", description="View or change how long old records are kept")
+    @app_commands.describe(
+        transcripts_days="Delete DM transcripts older than this many days (0 = keep forever)",
+        audit_days="Roll quantity change audit rows older than this into monthly summaries (0 = keep forever)",
+        loa_days="Delete ended LOA records older than this many days (0 = keep forever)",
+        run_now="Apply the policy now instead of waiting for the background job"
+    )
+    async def retention_policy(self, interaction: discord.Interaction, transcripts_days: Optional[int] = None,
+                               audit_days: Optional[int] = None, loa_days: Optional[int] = None,
+                               run_now: bool = False):
+        """Show, update and optionally apply this server's retention policy"""
+        # Check permissions
+        config = await self.bot.db.get_server_config(interaction.guild.id)
+        if not config or not config.get('officer_role_id'):
+            return await interaction.response.send_message(
+                "❌ Officer role not configured.", ephemeral=True
+            )
+        
+        officer_role = interaction.guild.get_role(config['officer_role_id'])
+        if not officer_role or officer_role not in interaction.user.roles:
+            return await interaction.response.send_message(
+                "❌ This command is only available to officers.", ephemeral=True
+            )
+        
+        changes = {kind: days for kind, days in
+                   (('transcripts', transcripts_days), ('audit', audit_days), ('loa', loa_days))
+                   if days is not None}
+        if any(days < 0 for days in changes.values()):
+            return await interaction.response.send_message(
+                "❌ Retention periods can't be negative.", ephemeral=True
+            )
+        
+        await interaction.response.defer(ephemeral=True)
+        
+        try:
+            if changes:
+                await self.bot.db.set_retention_policy(interaction.guild.id, **changes)
+            policy = await self.bot.db.get_retention_policy(interaction.guild.id)
+            
+            embed = discord.Embed(
+                title="🧹 Retention Policy",
+                description="Old records are pruned in small batches by a background job, "
+                            "then the freed space is returned to disk.",
+                color=discord.Color.blue(),
+                timestamp=datetime.now()
+            )
+            labels = {'transcripts': "DM transcripts", 'audit': "Audit log (rolled up)", 'loa': "Ended LOAs"}
+            embed.add_field(
+                name="Kept for",
+                value="\n".join(f"• **{label}**: {f'{policy[kind]} days' if policy[kind] else 'forever'}"
+                                for kind, label in labels.items()),
+                inline=False
+            )
+            
+            if run_now:
+                result = await self.bot.db.apply_retention(interaction.guild.id, policy)
+                reclaimed = await self.bot.db.incremental_vacuum()
+                embed.add_field(
+                    name="Applied now",
+                    value=f"🗑️ {result['transcripts']:,} transcript(s) deleted\n"
+                          f"📋 {result['audit']:,} audit row(s) rolled up\n"
+                          f"📅 {result['loa']:,} LOA record(s) deleted\n"
+                          f"💾 {reclaimed:,} page(s) reclaimed",
+                    inline=False
+                )
+            await interaction.followup.send(embed=embed, ephemeral=True)
+            
+        except Exception as e:
+            embed = discord.Embed(
+                title="❌ Error Applying Retention Policy",
+                description=f"An error occurred while updating the retention policy: {str(e)}",
+                color=discord.Color.red()
+            )
+            await interaction.followup.send(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="db_stats", description="Show database query timings and slow queries (Bot owner only)")
+    @app_commands.describe(
+        sort_by="Rank methods by this column",
+        reset="Clear the collected timings after showing them"
+    )
+    @app_commands.choices(sort_by=[
+        app_commands.Choice(name="Total time", value="total_ms"),
+        app_commands.Choice(name="Slowest round trip", value="max_ms"),
+        app_commands.Choice(name="Average time", value="avg_ms"),
+        app_commands.Choice(name="Statements", value="statements"),
+        app_commands.Choice(name="Rows", value="rows"),
+    ])
+    async def db_stats(self, interaction: discord.Interaction, sort_by: str = "total_ms", reset: bool = False):
+        """Dump the top query offenders collected by DatabaseManager"""
+        if not await self.bot.is_owner(interaction.user):
+            return await interaction.response.send_message(
+                "❌ This command is only available to the bot owner.", ephemeral=True
+            )
+
+        stats = self.bot.db.get_query_stats(limit=10, key=sort_by)
+        embed = discord.Embed(
+            title="🗄️ Database Query Stats",
+            description=f"{stats['methods']} calling method(s) tracked, sorted by `{sort_by}`. "
+                        f"Slow-query threshold: {stats['slow_query_ms']} ms.",
+            color=discord.Color.blue(),
+            timestamp=datetime.now()
+        )
+
+        if stats['top']:
+            lines = [f"{'method':<34} {'stmts':>6} {'total':>8} {'avg':>6} {'p95':>5} {'max':>7} {'rows':>7}"]
+            for row in stats['top']:
+                p95 = f"<{row['p95_ms']}" if row['p95_ms'] is not None else ">1000"
+                lines.append(
+                    f"{row['method'][-34:]:<34} {row['statements']:>6} {row['total_ms']:>8.0f} "
+                    f"{row['avg_ms']:>6.1f} {p95:>5} {row['max_ms']:>7.1f} {row['rows']:>7}"
+                )
+            embed.add_field(name="Top methods (ms)", value="```\n" + "\n".join(lines)[:1000] + "\n```", inline=False)
+        else:
+            embed.add_field(name="Top methods", value="No queries recorded yet.", inline=False)
+
+        slow_lines = []
+        for entry in stats['slow_queries'][:5]:
+            plan = f"\n  ↳ {'; '.join(entry['plan'])[:120]}" if entry['plan'] else ""
+            slow_lines.append(f"**{entry['elapsed_ms']:.0f} ms** `{entry['method']}` ({entry['call']})\n"
+                              f"`{entry['sql'][:150]}`{plan}")
+        embed.add_field(
+            name="Recent slow queries",
+            value="\n".join(slow_lines)[:1024] if slow_lines else "None above the threshold.",
+            inline=False
+        )
+
+        commits = self.bot.db.get_commit_stats()
+        cache = self.bot.db.get_server_config_cache_stats()
+        embed.add_field(
+            name="Commits",
+            value=f"{commits['commits']} commits for {commits['commit_requests']} requests "
+                  f"({commits['commits_saved']} saved, {commits['transactions']} transactions)",
+            inline=True
+        )
+        embed.add_field(
+            name="Config cache",
+            value=f"{cache['hits']} hits / {cache['misses']} misses ({cache['size']} cached)",
+            inline=True
+        )
+
+        health = self.bot.db.get_connection_health()
+        breaker = health['state'].replace('_', '-')
+        if health['retry_in_s'] is not None:
+            breaker += f" (half-open in {health['retry_in_s']:.0f}s)"
+        health_lines = [
+            f"Circuit breaker: **{breaker}**, {health['consecutive_failures']} failure(s) in a row",
+            f"{health['statements']} statements, {health['retries']} retries "
+            f"({health['recovered']} recovered, {health['backoff_ms'] / 1000:.1f}s backing off), "
+            f"{health['reconnects']} reconnects",
+            f"Errors: {health['transient_errors']} busy/locked, {health['connection_errors']} connection, "
+            f"{health['logical_errors']} logical",
+        ]
+        if health['last_error']:
+            health_lines.append(f"Last error: `{health['last_error'][:200]}`")
+        embed.add_field(name="Connection health", value="\n".join(health_lines), inline=False)
+
+        if reset:
+            self.bot.db.reset_query_stats()
+            embed.set_footer(text="Query timings have been reset")
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="db_storage", description="Show table sizes, WAL size and index usage (Bot owner only)")
+    @app_commands.describe(analyze="Refresh the query planner's statistics (PRAGMA optimize) first")
+    async def db_storage(self, interaction: discord.Interaction, analyze: bool = False):
+        """Show per-table rows and pages, file/WAL/freelist sizes and index usage"""
+        if not await self.bot.is_owner(interaction.user):
+            return await interaction.response.send_message(
+                "❌ This command is only available to the bot owner.", ephemeral=True
+            )
+        
+        if not self.bot.db.allow_expensive_work():
+            return await interaction.response.send_message(
+                "⚠️ The database is failing right now, so this was not started. "
+                "Please try again in a few minutes.", ephemeral=True
+            )
+        
+        await interaction.response.defer(ephemeral=True)
+        
+        try:
+            analyzed = await self.bot.db.optimize() if analyze else None
+            storage = await self.bot.db.get_storage_stats()
+            indexes = await self.bot.db.get_index_usage()
+            
+            embed = discord.Embed(
+                title="🗄️ Database Storage",
+                description=f"File: **{storage['file_bytes'] / 1024:,.1f} KB** "
+                            f"({storage['page_count']:,} pages of {storage['page_size']:,} bytes)\n"
+                            f"WAL: **{storage['wal_bytes'] / 1024:,.1f} KB** · "
+                            f"Free pages: **{storage['freelist_count']:,}**"
+                            + (f" · Shards: **{storage['shards']}**" if 'shards' in storage else ""),
+                color=discord.Color.blue(),
+                timestamp=datetime.now()
+            )
+            
+            lines = [f"{'table':<26} {'rows':>9} {'data KB':>9} {'index KB':>9}"]
+            for table in storage['tables'][:15]:
+                rows = f"{table['rows']:,}" if table['rows'] is not None else '-'
+                lines.append(f"{table['name'][-26:]:<26} {rows:>9} {table['bytes'] / 1024:>9,.1f} "
+                             f"{table['index_bytes'] / 1024:>9,.1f}")
+            embed.add_field(name="Largest tables", value="```\n" + "\n".join(lines)[:1000] + "\n```", inline=False)
+            
+            used = [index for index in indexes if index['executions']]
+            unused = [index['name'] for index in indexes
+                      if not index['executions'] and not index['name'].startswith('sqlite_autoindex')]
+            usage_lines = [f"`{index['name']}`: {index['executions']:,} execution(s) of "
+                           f"{index['statements']} statement(s)" for index in used[:8]]
+            if unused:
+                usage_lines.append("Not used since the last `/db_stats reset`: " + ", ".join(f"`{name}`" for name in unused))
+            embed.add_field(
+                name="Index usage",
+                value="\n".join(usage_lines)[:1024] if usage_lines else "No statements recorded yet.",
+                inline=False
+            )
+            
+            if analyzed is not None:
+                embed.add_field(name="Optimize", value=f"Analyzed {len(analyzed)} table(s)", inline=False)
+            elif not storage['analyzed']:
+                embed.set_footer(text="No planner statistics yet; run with analyze:True")
+            
+            await interaction.followup.send(embed=embed, ephemeral=True)
+        
+        except Exception as e:
+            logging.getLogger(__name__).error(f"Error collecting database storage stats: {e}")
+            await interaction.followup.send(f"❌ Error collecting storage stats: {str(e)}", ephemeral=True)
+
     @app_commands.command(name="quantity_history", description="View the quantity change history for an item")
     async def quantity_history(self, interaction: discord.Interaction, item_name: str):
         """View quantity change history for a specific item"""
@@ -2027,27 +2405,7 @@ async def create_misc_archive(bot, guild_id):
     # Archive contributions and logs related to misc locker
     # Assuming contributions table has a category field to filter misc categories
     misc_categories = ["Heist Items", "Dirty Cash", "Drug Items", "Mech Shop", "Crafting Items"]
-    conn = await bot.db._get_shared_connection()
-    await conn.execute('BEGIN')
-    try:
-        # Delete audit log entries linked to misc categories
-        await conn.execute(
-            'DELETE FROM audit_logs WHERE guild_id = ? AND category IN ({seq})'.format(
-                seq=','.join(['?']*len(misc_categories))
-            ), 
-            [guild_id] + misc_categories
-        )
-        # Delete contributions linked to misc categories
-        await conn.execute(
-            'DELETE FROM contributions WHERE guild_id = ? AND category IN ({seq})'.format(
-                seq=','.join(['?']*len(misc_categories))
-            ), 
-            [guild_id] + misc_categories
-        )
-        await conn.commit()
-    except Exception as e:
-        await conn.rollback()
-        raise e
+    await bot.db.delete_category_records(guild_id, misc_categories)
 
 async def wipe_misc_locker(bot, guild_id):
     """Wipe all contributions and audit logs related to misc locker"""
@@ -2057,27 +2415,7 @@ async def wipe_misc_locker(bot, guild_id):
         raise ValueError('Misc Locker forum channel not configured.')
     
     misc_categories = ["Heist Items", "Dirty Cash", "Drug Items", "Mech Shop", "Crafting Items"]
-    conn = await bot.db._get_shared_connection()
-    await conn.execute('BEGIN')
-    try:
-        # Remove audit logs
-        await conn.execute(
-            'DELETE FROM audit_logs WHERE guild_id = ? AND category IN ({seq})'.format(
-                seq=','.join(['?']*len(misc_categories))
-            ), 
-            [guild_id] + misc_categories
-        )
-        # Remove contributions
-        await conn.execute(
-            'DELETE FROM contributions WHERE guild_id = ? AND category IN ({seq})'.format(
-                seq=','.join(['?']*len(misc_categories))
-            ), 
-            [guild_id] + misc_categories
-        )
-        await conn.commit()
-    except Exception as e:
-        await conn.rollback()
-        raise e
+    await bot.db.delete_category_records(guild_id, misc_categories)
 
 async def setup(bot):
     await bot.add_cog(DatabaseManagement(bot))
@@ -2,11 +2,50 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 from datetime import datetime
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Callable, Awaitable, Tuple
 import asyncio
 import json
 import io
 
+class TranscriptPaginator(discord.ui.View):
+    """Newer/older page buttons over a keyset-paginated transcript query
+    
+    Each page is fetched with the opaque cursor the previous page returned, so
+    paging back through a long history costs the same as the first page.
+    """
+    def __init__(self, fetch_page: Callable[[Optional[str]], Awaitable[Tuple[List[dict], Optional[str]]]],
+                 build_embed: Callable[[List[dict], int], discord.Embed]):
+        super().__init__(timeout=300)
+        self.fetch_page = fetch_page
+        self.build_embed = build_embed
+        # Cursor that loaded each visited page (None = first page)
+        self.page_cursors: List[Optional[str]] = [None]
+        self.next_cursor: Optional[str] = None
+        self.entries: List[dict] = []
+    
+    @property
+    def current_page(self) -> int:
+        return len(self.page_cursors) - 1
+    
+    async def load(self) -> discord.Embed:
+        """Fetch the current page and return its embed"""
+        self.entries, self.next_cursor = await self.fetch_page(self.page_cursors[-1])
+        self.newer_page.disabled = (self.current_page == 0)
+        self.older_page.disabled = (self.next_cursor is None)
+        return self.build_embed(self.entries, self.current_page + 1)
+    
+    @discord.ui.button(label='◀️ Newer', style=discord.ButtonStyle.secondary)
+    async def newer_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page_cursors.pop()
+        embed = await self.load()
+        await interaction.response.edit_message(embed=embed, view=self)
+    
+    @discord.ui.button(label='Older ▶️', style=discord.ButtonStyle.secondary)
+    async def older_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page_cursors.append(self.next_cursor)
+        embed = await self.load()
+        await interaction.response.edit_message(embed=embed, view=self)
+
 class DirectMessagingSystem(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -70,20 +109,9 @@ class DirectMessagingSystem(commands.Cog):
                             role_id: int = None, attachments: List[str] = None):
         """Log message to transcript database"""
         try:
-            transcript_data = {
-                'guild_id': guild_id,
-                'sender_id': sender_id,
-                'recipient_id': recipient_id,
-                'role_id': role_id,
-                'message': message,
-                'message_type': message_type,  # 'outbound', 'inbound'
-                'recipient_type': recipient_type,  # 'user', 'role'
-                'attachments': json.dumps(attachments) if attachments else None,
-                'timestamp': datetime.now().isoformat()
-            }
-            
-            # Store in database
-            await self.bot.db.log_dm_transcript(
+            # Queue for the next batched transcript write; the entry keeps the
+            # time it was queued as its created_at
+            await self.bot.db.queue_dm_transcript(
                 guild_id=guild_id,
                 sender_id=sender_id,
                 recipient_id=recipient_id,
@@ -519,7 +547,7 @@ class DirectMessagingSystem(commands.Cog):
                 await notification_channel.send(embed=log_embed)
     
     @app_commands.command(name="transcript_user", description="View DM transcript for a specific user (Admin/Officer only)")
-    async def transcript_user_command(self, interaction: discord.Interaction, user_identifier: str, limit: int = 50):
+    async def transcript_user_command(self, interaction: discord.Interaction, user_identifier: str, limit: int = 10):
         """View DM transcript history for a specific user"""
         # Check permissions
         config = await self.bot.db.get_server_config(interaction.guild.id)
@@ -545,58 +573,67 @@ class DirectMessagingSystem(commands.Cog):
                 f"❌ Could not find user matching '{user_identifier}'.", ephemeral=True
             )
         
-        # Get transcript from database
+        # Get transcript from database, one page at a time
         try:
-            transcripts = await self.bot.db.get_user_transcript(
-                guild_id=interaction.guild.id,
-                user_id=target_user.id,
-                limit=limit
-            )
+            per_page = max(1, min(limit, 25))
             
-            if not transcripts:
-                return await interaction.response.send_message(
-                    f"❌ No DM transcript found for **{target_user.display_name}**.", ephemeral=True
+            async def fetch_page(cursor):
+                return await self.bot.db.get_user_transcript_page(
+                    guild_id=interaction.guild.id,
+                    user_id=target_user.id,
+                    limit=per_page,
+                    cursor=cursor
                 )
             
-            # Create transcript embed
-            embed = discord.Embed(
-                title=f"📋 DM Transcript for {target_user.display_name}",
-                description=f"Showing last {len(transcripts)} messages (max {limit})",
-                color=discord.Color.blue(),
-                timestamp=datetime.now()
-            )
-            embed.set_thumbnail(url=target_user.display_avatar.url)
-            
-            # Add transcript entries
-            transcript_text = ""
-            for entry in transcripts[-10:]:  # Show last 10 messages in embed
-                timestamp = entry.get('timestamp', 'Unknown')
-                message_type = entry.get('message_type', 'unknown')
-                message = entry.get('message', 'No content')[:100]
+            def build_embed(transcripts, page):
+                # Create transcript embed
+                embed = discord.Embed(
+                    title=f"📋 DM Transcript for {target_user.display_name}",
+                    description=f"Page {page} - newest messages first ({per_page} per page)",
+                    color=discord.Color.blue(),
+                    timestamp=datetime.now()
+                )
+                embed.set_thumbnail(url=target_user.display_avatar.url)
+                
+                # Add transcript entries
+                transcript_text = ""
+                for entry in transcripts:
+                    timestamp = entry.get('created_at', 'Unknown')
+                    message_type = entry.get('message_type', 'unknown')
+                    message = (entry.get('message') or 'No content')[:100]
+                    
+                    direction = "→" if message_type == "outbound" else "←"
+                    transcript_text += f"`{timestamp}` {direction} {message}\n\n"
+                
+                if transcript_text:
+                    embed.add_field(
+                        name="Messages",
+                        value=transcript_text[:1000] + ("..." if len(transcript_text) > 1000 else ""),
+                        inline=False
+                    )
+                
+                # Add summary
+                outbound_count = len([t for t in transcripts if t.get('message_type') == 'outbound'])
+                inbound_count = len([t for t in transcripts if t.get('message_type') == 'inbound'])
                 
-                direction = "→" if message_type == "outbound" else "←"
-                transcript_text += f"`{timestamp}` {direction} {message}\n\n"
-            
-            if transcript_text:
                 embed.add_field(
-                    name="Recent Messages",
-                    value=transcript_text[:1000] + ("..." if len(transcript_text) > 1000 else ""),
-                    inline=False
+                    name="📊 This Page",
+                    value=f"• **Messages:** {len(transcripts)}\n"
+                          f"• **Sent to User:** {outbound_count}\n"
+                          f"• **Received from User:** {inbound_count}",
+                    inline=True
                 )
+                return embed
             
-            # Add summary
-            outbound_count = len([t for t in transcripts if t.get('message_type') == 'outbound'])
-            inbound_count = len([t for t in transcripts if t.get('message_type') == 'inbound'])
+            view = TranscriptPaginator(fetch_page, build_embed)
+            embed = await view.load()
             
-            embed.add_field(
-                name="📊 Summary",
-                value=f"• **Total Messages:** {len(transcripts)}\n"
-                      f"• **Sent to User:** {outbound_count}\n"
-                      f"• **Received from User:** {inbound_count}",
-                inline=True
-            )
+            if not view.entries:
+                return await interaction.response.send_message(
+                    f"❌ No DM transcript found for **{target_user.display_name}**.", ephemeral=True
+                )
             
-            await interaction.response.send_message(embed=embed, ephemeral=True)
+            await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
             
         except Exception as e:
             await interaction.response.send_message(
@@ -604,8 +641,9 @@ class DirectMessagingSystem(commands.Cog):
             )
     
     @app_commands.command(name="transcript_search", description="Search DM transcripts by message content (Admin/Officer only)")
+    @app_commands.describe(search_term='Words to find; use "quotes" for a phrase and word* for a prefix')
     async def transcript_search_command(self, interaction: discord.Interaction, search_term: str, limit: int = 20):
-        """Search through DM transcripts for specific content"""
+        """Search through DM transcripts for specific content (best matches first)"""
         # Check permissions
         config = await self.bot.db.get_server_config(interaction.guild.id)
         if not config:
@@ -645,9 +683,9 @@ class DirectMessagingSystem(commands.Cog):
                 user = interaction.guild.get_member(user_id) or self.bot.get_user(user_id)
                 username = user.display_name if user else f"User ID: {user_id}"
                 
-                timestamp = result.get('timestamp', 'Unknown')
+                timestamp = result.get('created_at', 'Unknown')
                 message_type = result.get('message_type', 'unknown')
-                message = result.get('message', 'No content')[:200]
+                message = (result.get('snippet') or result.get('message') or 'No content')[:200]
                 
                 direction = "→ Sent to" if message_type == "outbound" else "← Received from"
                 
@@ -789,7 +827,7 @@ class DirectMessagingSystem(commands.Cog):
         await self.dm_role_command(interaction, role_identifier, message)
     
     @app_commands.command(name="transcript_list", description="List all DM transcripts (Admin/Officer only)")
-    async def transcript_list_command(self, interaction: discord.Interaction, page: int = 1):
+    async def transcript_list_command(self, interaction: discord.Interaction):
         """List all DM transcripts with pagination"""
         # Check permissions
         config = await self.bot.db.get_server_config(interaction.guild.id)
@@ -804,68 +842,75 @@ class DirectMessagingSystem(commands.Cog):
             )
         
         try:
-            # Get recent conversations (this gives us unique user pairs)
-            conversations = await self.bot.db.get_recent_dm_conversations(
-                guild_id=interaction.guild.id,
-                limit=20  # Show 20 conversations per page
-            )
-            
-            if not conversations:
-                return await interaction.response.send_message(
-                    "📭 No DM transcripts found.", ephemeral=True
+            async def fetch_page(cursor):
+                # Get recent conversations (this gives us unique user pairs)
+                return await self.bot.db.get_recent_dm_conversations_page(
+                    guild_id=interaction.guild.id,
+                    limit=10,  # Show 10 conversations per page
+                    cursor=cursor
                 )
             
-            # Create list embed
-            embed = discord.Embed(
-                title="📋 DM Transcript List",
-                description=f"Showing recent conversations (Page {page})",
-                color=discord.Color.blue(),
-                timestamp=datetime.now()
-            )
-            
-            # Add conversations to embed
-            for i, conv in enumerate(conversations[:10]):  # Show 10 per embed
-                # Determine the user involved in the conversation
-                user_id = conv.get('recipient_id') if conv.get('message_type') == 'outbound' else conv.get('sender_id')
-                user = interaction.guild.get_member(user_id) or self.bot.get_user(user_id)
-                username = user.display_name if user else f"User ID: {user_id}"
-                
-                # Get message info
-                created_at = conv.get('created_at', 'Unknown')
-                message_type = conv.get('message_type', 'unknown')
-                message_preview = conv.get('message', 'No content')[:100]
-                recipient_type = conv.get('recipient_type', 'user')
-                
-                # Activity status
-                is_active = user_id in self.active_conversations if user else False
-                activity_status = "🟢 Active" if is_active else "⚪ Inactive"
-                
-                # Direction indicator
-                direction = "→ Sent to" if message_type == "outbound" else "← Received from"
+            def build_embed(conversations, page):
+                # Create list embed
+                embed = discord.Embed(
+                    title="📋 DM Transcript List",
+                    description=f"Showing recent conversations (Page {page})",
+                    color=discord.Color.blue(),
+                    timestamp=datetime.now()
+                )
                 
-                # Role info if applicable
-                role_info = ""
-                if recipient_type == "role" and conv.get('role_id'):
-                    role = interaction.guild.get_role(conv.get('role_id'))
-                    if role:
-                        role_info = f" (via @{role.name})"
+                # Add conversations to embed
+                for i, conv in enumerate(conversations, start=(page - 1) * 10 + 1):
+                    # Determine the user involved in the conversation
+                    user_id = conv.get('recipient_id') if conv.get('message_type') == 'outbound' else conv.get('sender_id')
+                    user = interaction.guild.get_member(user_id) or self.bot.get_user(user_id)
+                    username = user.display_name if user else f"User ID: {user_id}"
+                    
+                    # Get message info
+                    created_at = conv.get('created_at', 'Unknown')
+                    message_type = conv.get('message_type', 'unknown')
+                    message_preview = (conv.get('message') or 'No content')[:100]
+                    recipient_type = conv.get('recipient_type', 'user')
+                    
+                    # Activity status
+                    is_active = user_id in self.active_conversations if user else False
+                    activity_status = "🟢 Active" if is_active else "⚪ Inactive"
+                    
+                    # Direction indicator
+                    direction = "→ Sent to" if message_type == "outbound" else "← Received from"
+                    
+                    # Role info if applicable
+                    role_info = ""
+                    if recipient_type == "role" and conv.get('role_id'):
+                        role = interaction.guild.get_role(conv.get('role_id'))
+                        if role:
+                            role_info = f" (via @{role.name})"
+                    
+                    embed.add_field(
+                        name=f"{i}. {username} {activity_status}",
+                        value=f"**Last Activity:** `{created_at}`\n"
+                              f"**Type:** {direction}{role_info}\n"
+                              f"**Preview:** {message_preview}{'...' if len(conv.get('message') or '') > 100 else ''}",
+                        inline=False
+                    )
                 
-                embed.add_field(
-                    name=f"{i+1}. {username} {activity_status}",
-                    value=f"**Last Activity:** `{created_at}`\n"
-                          f"**Type:** {direction}{role_info}\n"
-                          f"**Preview:** {message_preview}{'...' if len(conv.get('message', '')) > 100 else ''}",
-                    inline=False
+                # Add summary footer
+                total_active = len([uid for uid, gid in self.active_conversations.items() if gid == interaction.guild.id])
+                embed.set_footer(
+                    text=f"Active: {total_active} | "
+                         f"Use /transcript_user <username> to view full history"
                 )
+                return embed
             
-            # Add summary footer
-            total_active = len([uid for uid, gid in self.active_conversations.items() if gid == interaction.guild.id])
-            embed.set_footer(
-                text=f"Total Conversations: {len(conversations)} | Active: {total_active} | "
-                     f"Use /transcript_user <username> to view full history"
-            )
+            view = TranscriptPaginator(fetch_page, build_embed)
+            embed = await view.load()
             
-            await interaction.response.send_message(embed=embed, ephemeral=True)
+            if not view.entries:
+                return await interaction.response.send_message(
+                    "📭 No DM transcripts found.", ephemeral=True
+                )
+            
+            await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
             
         except Exception as e:
             await interaction.response.send_message(
@@ -103,19 +103,10 @@ class DashboardView(ModernMenuView):
             dues_periods = 0
             if self.is_officer:
                 try:
-                    conn = await self.bot.db._get_shared_connection()
-                    cursor = await conn.execute(
-                        'SELECT COUNT(*) FROM loa_records WHERE guild_id = ? AND is_active = TRUE AND is_expired = FALSE',
-                        (interaction.guild.id,)
-                    )
-                    active_loas = (await cursor.fetchone())[0]
+                    active_loas = (await self.bot.db.get_loa_counts(interaction.guild.id))['active']
                     
                     # Get active dues periods
-                    cursor = await conn.execute(
-                        'SELECT COUNT(*) FROM dues_periods WHERE guild_id = ? AND is_active = TRUE',
-                        (interaction.guild.id,)
-                    )
-                    dues_periods = (await cursor.fetchone())[0]
+                    dues_periods = len(await self.bot.db.get_active_dues_periods(interaction.guild.id))
                 except:
                     active_loas = 0
                     dues_periods = 0
@@ -1728,22 +1719,14 @@ class DuesTrackingModuleView(ModernMenuView):
             
             if is_officer:
                 # Get dues periods for officer stats
-                conn = await self.bot.db._get_shared_connection()
-                cursor = await conn.execute(
-                    'SELECT COUNT(*) FROM dues_periods WHERE guild_id = ? AND is_active = TRUE',
-                    (interaction.guild.id,)
-                )
-                active_periods = (await cursor.fetchone())[0]
+                periods = await self.bot.db.get_active_dues_periods(interaction.guild.id)
+                active_periods = len(periods)
                 
                 # Get payment stats from latest period
-                cursor = await conn.execute(
-                    'SELECT * FROM dues_periods WHERE guild_id = ? AND is_active = TRUE ORDER BY created_at DESC LIMIT 1',
-                    (interaction.guild.id,)
-                )
-                latest_period = await cursor.fetchone()
+                latest_period = max(periods, key=lambda period: period['created_at']) if periods else None
                 
                 if latest_period:
-                    summary = await self.bot.db.get_dues_collection_summary(interaction.guild.id, latest_period[0])
+                    summary = await self.bot.db.get_dues_collection_summary(interaction.guild.id, latest_period['id'])
                     
                     collection_rate = summary.get('collection_percentage', 0)
                     status_emoji = "🟢" if collection_rate >= 80 else "🟡" if collection_rate >= 60 else "🔴"
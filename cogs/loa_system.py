@@ -4,7 +4,6 @@ from discord import app_commands
 from datetime import datetime
 import asyncio
 import io
-import aiosqlite
 from utils.smart_time_formatter import SmartTimeFormatter
 
 class LOAModal(discord.ui.Modal):
@@ -61,27 +60,26 @@ class LOAModal(discord.ui.Modal):
                     self.duration.value, start_time
                 )
             
-            # Create LOA record in database
-            loa_id = await bot.db.create_loa_record(
-                interaction.guild.id,
-                interaction.user.id,
-                normalized_duration,
-                self.reason.value,
-                start_time,
-                end_time
-            )
-            
-            # Update member record and LOA status
-            await bot.db.add_or_update_member(
-                interaction.guild.id,
-                interaction.user.id,
-                interaction.user.display_name
-            )
-            await bot.db.update_member_loa_status(
-                interaction.guild.id,
-                interaction.user.id,
-                True
-            )
+            # Create LOA record and update member status in one commit
+            async with bot.db.transaction(interaction.guild.id):
+                loa_id = await bot.db.create_loa_record(
+                    interaction.guild.id,
+                    interaction.user.id,
+                    normalized_duration,
+                    self.reason.value,
+                    start_time,
+                    end_time
+                )
+                await bot.db.add_or_update_member(
+                    interaction.guild.id,
+                    interaction.user.id,
+                    interaction.user.display_name
+                )
+                await bot.db.update_member_loa_status(
+                    interaction.guild.id,
+                    interaction.user.id,
+                    True
+                )
             
             # Get server configuration for notifications
             config = await bot.db.get_server_config(interaction.guild.id)
@@ -263,8 +261,8 @@ class LOASystem(commands.Cog):
         lines.append("+" + "="*24 + "+" + "="*18 + "+" + "="*14 + "+" + "="*22 + "+" + "="*16 + "+" + "="*30 + "+")
         
         for loa in loas:
-            name = loa.get('discord_name', 'Unknown')
-            username = loa.get('discord_username', 'N/A')
+            name = loa.get('discord_name') or 'Unknown'
+            username = loa.get('discord_username') or 'N/A'
             duration = loa.get('duration', '')
             reason = loa.get('reason', '')
             # Truncate fields
@@ -388,18 +386,7 @@ class LOASystem(commands.Cog):
             )
         
         # Get all active LOAs
-        import aiosqlite
-        conn = await self.bot.db._get_shared_connection()
-        conn.row_factory = aiosqlite.Row
-        cursor = await conn.execute('''
-            SELECT l.*, m.discord_name, m.discord_username
-            FROM loa_records l
-            JOIN members m ON l.guild_id = m.guild_id AND l.user_id = m.user_id
-            WHERE l.guild_id = ? AND l.is_active = TRUE AND l.is_expired = FALSE
-            ORDER BY l.end_time ASC
-        ''', (interaction.guild.id,))
-        rows = await cursor.fetchall()
-        active_loas = [dict(r) for r in rows]
+        active_loas = [dict(loa) for loa in await self.bot.db.get_active_loas_for_guild(interaction.guild.id)]
         
         if not active_loas:
             return await interaction.followup.send(
@@ -473,18 +460,7 @@ class LOASystem(commands.Cog):
             )
         
         # Get all active LOAs with member information
-        import aiosqlite
-        conn = await self.bot.db._get_shared_connection()
-        conn.row_factory = aiosqlite.Row
-        cursor = await conn.execute('''
-            SELECT l.*, m.discord_name, m.discord_username
-            FROM loa_records l
-            JOIN members m ON l.guild_id = m.guild_id AND l.user_id = m.user_id
-            WHERE l.guild_id = ? AND l.is_active = TRUE AND l.is_expired = FALSE
-            ORDER BY l.end_time ASC
-        ''', (interaction.guild.id,))
-        rows = await cursor.fetchall()
-        active_loas = [dict(r) for r in rows]
+        active_loas = [dict(loa) for loa in await self.bot.db.get_active_loas_for_guild(interaction.guild.id)]
         
         if not active_loas:
             return await interaction.followup.send(
@@ -594,7 +570,7 @@ class LOAManagementView(discord.ui.View):
                 end_date_str = "Unknown"
             
             # Create option
-            member_name = loa.get('discord_name', 'Unknown')[:50]
+            member_name = (loa.get('discord_name') or 'Unknown')[:50]
             duration = loa.get('duration', 'Unknown')[:20]
             
             options.append(
@@ -726,7 +702,7 @@ class LOAManagementView(discord.ui.View):
             except:
                 time_str = "Unknown"
             
-            member_name = loa.get('discord_name', 'Unknown')[:25]
+            member_name = (loa.get('discord_name') or 'Unknown')[:25]
             duration = loa.get('duration', 'Unknown')[:15]
             reason = loa.get('reason', 'No reason')[:30]
             
@@ -796,7 +772,7 @@ class LOAActionView(discord.ui.View):
     async def create_loa_detail_embed(self, detailed: bool = False) -> discord.Embed:
         """Create detailed embed for the LOA"""
         member = self.guild.get_member(self.loa_data['user_id'])
-        member_name = member.display_name if member else self.loa_data.get('discord_name', 'Unknown')
+        member_name = member.display_name if member else self.loa_data.get('discord_name') or 'Unknown'
         
         embed = discord.Embed(
             title=f"📋 LOA Details: {member_name}",
@@ -849,7 +825,7 @@ class LOAActionView(discord.ui.View):
         embed.add_field(
             name="👤 Member Info",
             value=f"**Name:** {member_name}\n"
-                  f"**Username:** {self.loa_data.get('discord_username', 'Unknown')}\n"
+                  f"**Username:** {self.loa_data.get('discord_username') or 'Unknown'}\n"
                   f"**User ID:** {self.loa_data['user_id']}\n"
                   f"**LOA ID:** {self.loa_data['id']}",
             inline=True
@@ -57,6 +57,27 @@ class MembershipSystem(commands.Cog):
             all_variations.extend(variations)
         return all_variations
     
+    def _highest_rank(self, member: discord.Member, membership_roles: list) -> str:
+        """Return the member's highest ranking canonical role, or None"""
+        member_rank = None
+        highest_rank_order = float('inf')
+        
+        for role in member.roles:
+            # Try exact match first, then flexible match
+            canonical_role = None
+            if role.name in membership_roles:
+                canonical_role = role.name
+            else:
+                # Try flexible matching for role variations
+                canonical_role = self._find_role_match(role.name)
+                
+            if canonical_role:
+                rank_order = self.default_rank_order.get(canonical_role, 999)
+                if rank_order < highest_rank_order:
+                    highest_rank_order = rank_order
+                    member_rank = canonical_role
+        return member_rank
+    
     @commands.Cog.listener()
     async def on_member_update(self, before: discord.Member, after: discord.Member):
         """Update member database when roles change"""
@@ -137,57 +158,58 @@ class MembershipSystem(commands.Cog):
             import asyncio
             await asyncio.sleep(0.5)
         
-        synced_count = 0
+        guild_id = interaction.guild.id
+        
+        # Load existing rows once and diff against the guild's current roles
+        existing = {row['user_id']: row for row in await self.bot.db.get_all_members(guild_id)}
+        added, changed = [], []
+        unchanged_count = 0
+        seen = set()
         
-        # Sync all guild members
         for member in interaction.guild.members:
             if member.bot:  # Skip bots
                 continue
             
-            # Find member's highest ranking role
-            member_rank = None
-            highest_rank_order = float('inf')
+            member_rank = self._highest_rank(member, membership_roles)
+            if not member_rank:
+                continue
+            seen.add(member.id)
             
-            for role in member.roles:
-                # Try exact match first, then flexible match
-                canonical_role = None
-                if role.name in membership_roles:
-                    canonical_role = role.name
-                else:
-                    # Try flexible matching for role variations
-                    canonical_role = self._find_role_match(role.name)
-                    
-                if canonical_role:
-                    rank_order = self.default_rank_order.get(canonical_role, 999)
-                    if rank_order < highest_rank_order:
-                        highest_rank_order = rank_order
-                        member_rank = canonical_role
+            # Keep LOA status for members currently on leave
+            row = existing.get(member.id)
+            status = 'LOA' if row and row.get('is_on_loa') else 'Active'
+            entry = (member.id, member.display_name, member.name, member_rank, status)
             
-            if member_rank:
-                # Determine member status
-                status = 'Active'
-                existing_member = await self.bot.db.get_member(member.guild.id, member.id)
-                if existing_member and existing_member.get('is_on_loa'):
-                    status = 'LOA'
-                
-                # Update member with username
-                discord_username = member.name
-                await self.bot.db.add_or_update_member(
-                    member.guild.id,
-                    member.id,
-                    member.display_name,
-                    member_rank,
-                    discord_username,
-                    status
-                )
-                synced_count += 1
+            if row is None:
+                added.append(entry)
+            elif (row['discord_name'], row['discord_username'], row['rank'], row['status']) != entry[1:]:
+                changed.append(entry)
+            else:
+                unchanged_count += 1
+        
+        # Only prune members who left the guild, and only when the member list
+        # is complete, otherwise a partial cache would look like a mass
+        # departure. Rows without a rank (contributors, prospects, sponsors)
+        # are kept while the user is still in the guild.
+        removed_ids = []
+        if interaction.guild.chunked:
+            guild_member_ids = {member.id for member in interaction.guild.members}
+            removed_ids = [user_id for user_id in existing if user_id not in guild_member_ids]
+        
+        async with self.bot.db.transaction(guild_id):
+            await self.bot.db.bulk_upsert_members(guild_id, added + changed)
+            removed_count = await self.bot.db.remove_members(guild_id, removed_ids)
         
         embed = discord.Embed(
             title="✅ Membership Sync Complete",
-            description=f"Successfully synced {synced_count} members with their Discord roles.",
+            description=f"Synced {len(seen)} members with their Discord roles.",
             color=discord.Color.green(),
             timestamp=datetime.now()
         )
+        embed.add_field(name="Added", value=str(len(added)), inline=True)
+        embed.add_field(name="Updated", value=str(len(changed)), inline=True)
+        embed.add_field(name="Unchanged", value=str(unchanged_count), inline=True)
+        embed.add_field(name="Removed", value=str(removed_count), inline=True)
         
         await interaction.followup.send(embed=embed, ephemeral=True)
     
@@ -548,12 +570,7 @@ class MembershipSystem(commands.Cog):
             )
         
         # Remove member
-        conn = await self.bot.db._get_shared_connection()
-        await conn.execute(
-            'DELETE FROM members WHERE guild_id = ? AND user_id = ?',
-            (interaction.guild.id, member.id)
-        )
-        await self.bot.db._execute_commit()
+        await self.bot.db.remove_members(interaction.guild.id, [member.id])
         
         embed = discord.Embed(
             title="✅ Member Removed",
@@ -1,9 +1,9 @@
 import os
 import json
-import asyncio
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
+import atexit
 import threading
 import time
 import uuid
@@ -21,7 +21,7 @@ import sys
 import os
 # Add parent directory to sys.path to access utils
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from utils.database import DatabaseManager
+from utils.db_service import DatabaseService
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -44,9 +44,30 @@ TARGET_GUILD_ID = 1336076303098450003
 # Initialize session
 Session(app)
 
+def _database_sharding_enabled() -> bool:
+    """Whether the bot's config.json stores each guild in its own shard (which the dashboard cannot read)"""
+    for path in ('config.json', os.path.join(os.path.dirname(__file__), '..', 'config.json')):
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    return bool(json.load(f).get('database_sharding', False))
+            except Exception as e:
+                logger.error(f"Failed to read {path}: {e}")
+                return False
+    return False
+
 class DashboardManager:
     def __init__(self):
-        self.db = DatabaseManager()
+        # The dashboard only knows the single-file database; with shards on it
+        # would read and edit a stale copy
+        if _database_sharding_enabled():
+            logger.critical("database_sharding is enabled in config.json, but the dashboard only supports "
+                            "the single-file data/thanatos.db; refusing to start")
+            raise RuntimeError("The dashboard does not support database_sharding")
+        
+        # One background event loop owns the database for every request
+        self.db_service = DatabaseService()
+        self.db = self.db_service.db
         self.discord_client = None
         self._guild_cache = {}
         self._channel_cache = {}
@@ -54,15 +75,17 @@ class DashboardManager:
         self.executor = ThreadPoolExecutor(max_workers=2)  # For background tasks
         
     async def initialize(self):
-        """Initialize database and Discord client"""
-        await self.db.initialize_database()
-        
+        """Initialize the Discord client (the database service checks the schema when it starts)"""
         # Initialize Discord client for API calls
         intents = discord.Intents.default()
         intents.guilds = True
         intents.message_content = True
         
         self.discord_client = discord.Client(intents=intents)
+    
+    def run(self, coro, timeout: Optional[float] = None):
+        """Run a coroutine on the shared database loop and wait for its result"""
+        return self.db_service.run(coro, timeout)
         
     async def get_guild_info(self, guild_id: int) -> Optional[Dict]:
         """Get guild information from Discord API"""
@@ -227,7 +250,8 @@ class DashboardManager:
         
         return categories
         
-    async def update_category_mapping(self, category: str, forum_id: Optional[int], thread_id: Optional[int]) -> bool:
+    async def update_category_mapping(self, category: str, forum_id: Optional[int], thread_id: Optional[int],
+                                      updated_by: str = 'Unknown') -> bool:
         """Update the forum/thread mapping for a category"""
         try:
             # This would update the bot's configuration
@@ -246,7 +270,7 @@ class DashboardManager:
                 'forum_id': forum_id,
                 'thread_id': thread_id,
                 'updated_at': datetime.now().isoformat(),
-                'updated_by': session.get('user', {}).get('username', 'Unknown')
+                'updated_by': updated_by
             }
             
             # Ensure config directory exists
@@ -304,30 +328,21 @@ async def get_members_for_sync():
 async def get_inventory_for_sync():
     """Get inventory data formatted for MC Manager sync"""
     try:
-        # Get contributions from the database which serve as inventory
-        contributions = await dashboard.db.get_all_contributions(TARGET_GUILD_ID)
-        
-        # Group contributions by item name and sum quantities
-        inventory_map = {}
-        for contrib in contributions:
-            item_name = contrib.get('item_name', 'Unknown Item')
-            category = contrib.get('category', 'General')
-            quantity = contrib.get('quantity', 1)
-            
-            if item_name in inventory_map:
-                inventory_map[item_name]['quantity'] += quantity
-            else:
-                inventory_map[item_name] = {
-                    'id': f'I{len(inventory_map) + 1:03d}',
-                    'name': item_name,
-                    'category': category,
-                    'quantity': quantity,
-                    'condition': 'Good',
-                    'value': 0,  # Could be calculated based on category
-                    'location': 'Club House'
-                }
+        # Current per-item totals, maintained in inventory_totals as contributions change
+        quantities = await dashboard.db.get_all_current_item_quantities(TARGET_GUILD_ID)
         
-        return list(inventory_map.values())
+        return [
+            {
+                'id': f'I{index:03d}',
+                'name': item['item_name'],
+                'category': item['category'],
+                'quantity': item['current_quantity'],
+                'condition': 'Good',
+                'value': 0,  # Could be calculated based on category
+                'location': 'Club House'
+            }
+            for index, item in enumerate(quantities.values(), start=1)
+        ]
     except Exception as e:
         logger.error(f"Error getting inventory for sync: {e}")
         # Return mock data as fallback
@@ -341,6 +356,7 @@ async def get_inventory_for_sync():
 
 # Initialize dashboard manager
 dashboard = DashboardManager()
+atexit.register(dashboard.db_service.stop)
 
 def requires_auth(f):
     """Decorator to require authentication"""
@@ -386,15 +402,7 @@ def api_treasury():
         guild_id = TARGET_GUILD_ID  # Use your target guild ID
         
         # Get treasury summary using the database manager
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        try:
-            treasury_data = loop.run_until_complete(
-                dashboard.db.get_treasury_summary(guild_id)
-            )
-        finally:
-            loop.close()
+        treasury_data = dashboard.run(dashboard.db.get_treasury_summary(guild_id))
         
         return jsonify({
             'success': True,
@@ -674,10 +682,9 @@ def api_update_mapping():
         forum_id = int(forum_id) if forum_id else None
         thread_id = int(thread_id) if thread_id else None
         
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        success = loop.run_until_complete(dashboard.update_category_mapping(category, forum_id, thread_id))
-        loop.close()
+        success = dashboard.run(dashboard.update_category_mapping(
+            category, forum_id, thread_id, session['user']['username']
+        ))
         
         if success:
             return jsonify({
@@ -726,13 +733,7 @@ def api_members():
             return jsonify({'error': 'Invalid API key'}), 401
         
         # Get members from database
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        try:
-            members_data = loop.run_until_complete(get_members_for_sync())
-        finally:
-            loop.close()
+        members_data = dashboard.run(get_members_for_sync())
         
         return jsonify({
             'success': True,
@@ -762,13 +763,7 @@ def api_inventory():
             return jsonify({'error': 'Invalid API key'}), 401
         
         # Get inventory from database (contributions)
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        try:
-            inventory_data = loop.run_until_complete(get_inventory_for_sync())
-        finally:
-            loop.close()
+        inventory_data = dashboard.run(get_inventory_for_sync())
         
         return jsonify({
             'success': True,
@@ -796,21 +791,18 @@ def api_bulk_update():
             return jsonify({'success': False, 'error': 'No mappings provided'})
             
         results = []
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
         for mapping in mappings:
             category = mapping.get('category')
             forum_id = int(mapping.get('forum_id')) if mapping.get('forum_id') else None
             thread_id = int(mapping.get('thread_id')) if mapping.get('thread_id') else None
             
-            success = loop.run_until_complete(dashboard.update_category_mapping(category, forum_id, thread_id))
+            success = dashboard.run(dashboard.update_category_mapping(
+                category, forum_id, thread_id, session['user']['username']
+            ))
             results.append({
                 'category': category,
                 'success': success
             })
-            
-        loop.close()
         
         successful_updates = len([r for r in results if r['success']])
         
@@ -865,18 +857,12 @@ def loa_management():
 def api_get_active_loas():
     """Get all active LOAs for the target guild"""
     try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
         # Get active LOAs from the database
-        db = DatabaseManager()
-        active_loas = loop.run_until_complete(db.get_active_loas_for_guild(TARGET_GUILD_ID))
-        
-        loop.close()
+        active_loas = dashboard.run(dashboard.db.get_active_loas_for_guild(TARGET_GUILD_ID))
         
         return jsonify({
             'success': True,
-            'loas': active_loas
+            'loas': [dict(loa) for loa in active_loas]
         })
         
     except Exception as e:
@@ -888,26 +874,20 @@ def api_get_active_loas():
 def api_end_loa(loa_id):
     """Force end an active LOA"""
     try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
         # Get LOA details first
-        db = DatabaseManager()
-        loa_details = loop.run_until_complete(db.get_loa_by_id(loa_id))
+        loa_details = dashboard.run(dashboard.db.get_loa_by_id(loa_id))
         
         if not loa_details:
             return jsonify({'success': False, 'error': 'LOA not found'})
         
         # End the LOA
-        success = loop.run_until_complete(db.end_loa(loa_id))
+        success = dashboard.run(dashboard.db.end_loa(loa_id))
         
         if success:
             # Send notifications to Discord
-            loop.run_until_complete(send_loa_end_notification(
+            dashboard.run(send_loa_end_notification(
                 TARGET_GUILD_ID, loa_details, session['user']['username']
             ))
-            
-        loop.close()
         
         if success:
             logger.info(f"Admin {session['user']['username']} force-ended LOA {loa_id}")
@@ -935,17 +915,11 @@ def api_get_audit_events():
     try:
         limit = request.args.get('limit', 50, type=int)
         
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        db = DatabaseManager()
-        events = loop.run_until_complete(db.get_all_audit_events(
+        events = dashboard.run(dashboard.db.get_all_audit_events(
             TARGET_GUILD_ID, 
             limit=limit
         ))
         
-        loop.close()
-        
         return jsonify({
             'success': True,
             'events': events
@@ -967,24 +941,17 @@ def api_remove_audit_entry():
         if not event_type or not entry_id:
             return jsonify({'success': False, 'error': 'Missing event_type or entry_id'})
         
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        db = DatabaseManager()
-        
         # Get entry details first for logging
-        entry_details = loop.run_until_complete(db.get_audit_entry_details(
+        entry_details = dashboard.run(dashboard.db.get_audit_entry_details(
             TARGET_GUILD_ID, event_type, entry_id
         ))
         
         # Remove the entry
-        success = loop.run_until_complete(db.remove_audit_entry(
+        success = dashboard.run(dashboard.db.remove_audit_entry(
             TARGET_GUILD_ID, event_type, entry_id, 
             int(session['user']['id'])
         ))
         
-        loop.close()
-        
         if success:
             item_name = entry_details.get('item_name', 'Unknown') if entry_details else 'Unknown'
             logger.info(f"Admin {session['user']['username']} removed {event_type} entry {entry_id} ({item_name})")
@@ -1010,16 +977,10 @@ def api_bulk_remove_audit_entries():
         if not entries:
             return jsonify({'success': False, 'error': 'No entries provided'})
         
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        db = DatabaseManager()
-        result = loop.run_until_complete(db.bulk_remove_audit_entries(
+        result = dashboard.run(dashboard.db.bulk_remove_audit_entries(
             TARGET_GUILD_ID, entries, int(session['user']['id'])
         ))
         
-        loop.close()
-        
         logger.info(f"Admin {session['user']['username']} bulk removed {result['total_removed']} audit entries")
         
         return jsonify({
@@ -1039,8 +1000,7 @@ async def send_loa_end_notification(guild_id: int, loa_details: dict, admin_user
         headers = {'Authorization': f'Bot {DISCORD_BOT_TOKEN}'}
         
         # Get server config for notification channels
-        db = DatabaseManager()
-        config = await db.get_server_config(guild_id)
+        config = await dashboard.db.get_server_config(guild_id)
         if not config:
             return
         
@@ -1328,30 +1288,18 @@ def send_mass_dm_background(job_id: str, role_id: int, message: str, sender_user
                     if message_response.status_code == 200:
                         successful_sends += 1
                         
-                        # Log to database in a separate thread to avoid blocking
+                        # Queue the transcript entry for the database's batched writes
                         try:
-                            def log_dm():
-                                log_loop = asyncio.new_event_loop()
-                                asyncio.set_event_loop(log_loop)
-                                db = DatabaseManager()
-                                
-                                log_loop.run_until_complete(db.log_dm_transcript(
-                                    guild_id=TARGET_GUILD_ID,
-                                    sender_id=sender_id,
-                                    recipient_id=int(user_id),
-                                    role_id=role_id,
-                                    message=message,
-                                    message_type="outbound",
-                                    recipient_type="role",
-                                    attachments=None
-                                ))
-                                log_loop.close()
-                            
-                            # Run logging in a separate thread to avoid blocking
-                            log_thread = threading.Thread(target=log_dm)
-                            log_thread.daemon = True
-                            log_thread.start()
-                            
+                            dashboard.run(dashboard.db.queue_dm_transcript(
+                                guild_id=TARGET_GUILD_ID,
+                                sender_id=sender_id,
+                                recipient_id=int(user_id),
+                                role_id=role_id,
+                                message=message,
+                                message_type="outbound",
+                                recipient_type="role",
+                                attachments=None
+                            ))
                         except Exception as log_error:
                             logger.error(f"Error logging DM transcript: {log_error}")
                     elif message_response.status_code == 429:  # Rate limit
@@ -1393,6 +1341,11 @@ def send_mass_dm_background(job_id: str, role_id: int, message: str, sender_user
                 failed_sends += 1
                 dashboard._mass_dm_jobs[job_id]['failed'] = failed_sends
         
+        try:
+            dashboard.run(dashboard.db.flush_dm_transcripts())
+        except Exception as log_error:
+            logger.error(f"Error writing queued DM transcripts: {log_error}")
+        
         # Update final job status
         dashboard._mass_dm_jobs[job_id]['status'] = 'completed'
         dashboard._mass_dm_jobs[job_id]['completed_at'] = datetime.now().isoformat()
@@ -1565,10 +1518,7 @@ def api_list_mass_dm_jobs():
 if __name__ == '__main__':
     # Initialize dashboard on startup
     try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        loop.run_until_complete(dashboard.initialize())
-        loop.close()
+        dashboard.run(dashboard.initialize())
         logger.info("Dashboard initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize dashboard: {e}")
@@ -0,0 +1,11 @@
+"""
+Shared helpers for the database test and benchmark scripts
+"""
+import os
+
+
+def remove_db(db_path):
+    """Delete a SQLite database file together with its -wal and -shm files"""
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
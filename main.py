@@ -11,6 +11,7 @@ from datetime import datetime
 if os.path.dirname(os.path.abspath(__file__)) not in sys.path:
     sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from utils.database import DatabaseManager
+from utils.database_shards import ShardedDatabaseManager
 from utils.time_parser import TimeParser
 from utils.loa_notifications import LOANotificationManager
 
@@ -57,7 +58,27 @@ class ThanatosBot(commands.Bot):
         
         # Initialize database
         try:
-            self.db = DatabaseManager()
+            if self.config.get('database_sharding', False):
+                # One SQLite file per guild (split an existing database with split_database.py)
+                self.db = ShardedDatabaseManager(
+                    directory=self.config.get('database_shard_directory', 'data/guilds'),
+                    max_open_shards=self.config.get('database_max_open_shards', 16),
+                    read_pool_size=self.config.get('database_read_pool_size', 2),
+                    group_commit_ms=self.config.get('database_group_commit_ms', 0),
+                    slow_query_ms=self.config.get('database_slow_query_ms', 250),
+                    transcript_batch_size=self.config.get('transcript_batch_size', 50),
+                    transcript_flush_ms=self.config.get('transcript_flush_ms', 500),
+                    storage_profile=self.config.get('database_storage_profile', 'balanced')
+                )
+            else:
+                self.db = DatabaseManager(
+                    read_pool_size=self.config.get('database_read_pool_size', 4),
+                    group_commit_ms=self.config.get('database_group_commit_ms', 0),
+                    slow_query_ms=self.config.get('database_slow_query_ms', 250),
+                    transcript_batch_size=self.config.get('transcript_batch_size', 50),
+                    transcript_flush_ms=self.config.get('transcript_flush_ms', 500),
+                    storage_profile=self.config.get('database_storage_profile', 'balanced')
+                )
             logger.info("Database manager initialized")
         except Exception as e:
             logger.error(f"Failed to initialize database manager: {e}")
@@ -106,6 +127,7 @@ class ThanatosBot(commands.Bot):
         # Initialize database first
         try:
             await self.db.initialize_database()
+            await self.db.warm_server_config_cache()
             logger.info("Database initialized in setup hook")
         except Exception as e:
             logger.error(f"Failed to initialize database in setup hook: {e}")
@@ -150,6 +172,20 @@ class ThanatosBot(commands.Bot):
             logger.info("LOA expiration check task already running")
             self._loa_task_started = True
         
+        # Retention/compaction job (retention_interval_hours = 0 turns it off)
+        retention_hours = self.config.get('retention_interval_hours', 24)
+        if retention_hours > 0 and not self.run_retention.is_running():
+            self.run_retention.change_interval(hours=retention_hours)
+            self.run_retention.start()
+            logger.info(f"Retention task started (every {retention_hours}h)")
+        
+        # Planner statistics refresh (optimize_interval_hours = 0 turns it off)
+        optimize_hours = self.config.get('optimize_interval_hours', 6)
+        if optimize_hours > 0 and not self.run_optimize.is_running():
+            self.run_optimize.change_interval(hours=optimize_hours)
+            self.run_optimize.start()
+            logger.info(f"Database optimize task started (every {optimize_hours}h)")
+        
         # Sync commands (force sync if configured)
         try:
             # Check if force sync is enabled in config
@@ -226,9 +262,25 @@ class ThanatosBot(commands.Bot):
         if hasattr(self, 'check_loa_expiration') and not self.check_loa_expiration.is_being_cancelled():
             self.check_loa_expiration.cancel()
             logger.info("LOA expiration check task cancelled")
+        if hasattr(self, 'run_retention') and self.run_retention.is_running():
+            self.run_retention.cancel()
+        if hasattr(self, 'run_optimize') and self.run_optimize.is_running():
+            self.run_optimize.cancel()
         
         # Close database connections
         if hasattr(self, 'db'):
+            try:
+                # Write queued DM transcripts before the connections go away
+                flushed = await self.db.flush_dm_transcripts()
+                if flushed:
+                    logger.info(f"Flushed {flushed} queued DM transcript(s)")
+            except Exception as e:
+                logger.error(f"Error flushing queued DM transcripts: {e}")
+            try:
+                # Leave fresh planner statistics for the next start
+                await self.db.optimize()
+            except Exception as e:
+                logger.error(f"Error optimizing database: {e}")
             try:
                 await self.db.close()
             except Exception as e:
@@ -301,6 +353,36 @@ class ThanatosBot(commands.Bot):
         await self.wait_until_ready()
         logger.info("LOA expiration check task is ready to start")
 
+    @tasks.loop(hours=24)
+    async def run_retention(self):
+        """Prune rows past each guild's retention policy and reclaim the freed pages"""
+        if not self.db.allow_expensive_work():
+            logger.warning("Skipping retention run: database circuit breaker is open")
+            return
+        try:
+            await self.db.run_retention()
+        except Exception as e:
+            logger.error(f"Error running retention: {e}", exc_info=True)
+    
+    @run_retention.before_loop
+    async def before_run_retention(self):
+        await self.wait_until_ready()
+    
+    @tasks.loop(hours=6)
+    async def run_optimize(self):
+        """Refresh the query planner's statistics (ANALYZE via PRAGMA optimize)"""
+        if not self.db.allow_expensive_work():
+            logger.warning("Skipping database optimize: database circuit breaker is open")
+            return
+        try:
+            await self.db.optimize()
+        except Exception as e:
+            logger.error(f"Error optimizing database: {e}", exc_info=True)
+    
+    @run_optimize.before_loop
+    async def before_run_optimize(self):
+        await self.wait_until_ready()
+
 def main():
     """Load bot token and run"""
     if not os.path.exists('config.json'):
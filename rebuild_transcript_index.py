@@ -0,0 +1,20 @@
+import asyncio
+import sys
+sys.path.append('.')
+from utils.database import DatabaseManager
+
+async def rebuild_transcript_index(db_path: str = "data/thanatos.db"):
+    """Backfill the DM transcript full-text index from existing transcript rows"""
+    db = DatabaseManager(db_path)
+    try:
+        print(f'Rebuilding transcript search index in {db_path}...')
+        indexed = await db.rebuild_transcript_search_index()
+        print(f'✅ Indexed {indexed} transcript row(s).')
+    except Exception as e:
+        print(f'❌ Failed to rebuild transcript search index: {e}')
+        raise
+    finally:
+        await db.close()
+
+if __name__ == '__main__':
+    asyncio.run(rebuild_transcript_index(*sys.argv[1:2]))
@@ -0,0 +1,20 @@
+import asyncio
+import sys
+sys.path.append('.')
+from utils.database_shards import split_database
+
+async def split(source_path: str = "data/thanatos.db", directory: str = "data/guilds"):
+    """Split the single-file database into per-guild shards for database_sharding mode"""
+    print(f'Splitting {source_path} into per-guild shards under {directory}...')
+    try:
+        copied = await split_database(source_path, directory)
+    except Exception as e:
+        print(f'❌ Failed to split database: {e}')
+        raise
+    for guild_id, rows in copied.items():
+        print(f'  guild {guild_id}: {rows} row(s)')
+    print(f'✅ Split {len(copied)} guild(s). Set "database_sharding": true in config.json to use them; '
+          f'{source_path} was left in place.')
+
+if __name__ == '__main__':
+    asyncio.run(split(*sys.argv[1:3]))
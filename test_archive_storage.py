@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Test script for compressed, chunked archive storage
+"""
+import asyncio
+import json
+import sqlite3
+import sys
+
+sys.path.append('.')
+from db_test_helpers import remove_db
+from utils.database import DatabaseManager, ARCHIVE_CHUNK_ROWS
+from cogs.database_management import ArchiveDetailView, ArchiveSelectionView
+
+GUILD_ID = 848484
+
+
+def _legacy_contribution(i):
+    return {'id': i, 'guild_id': GUILD_ID, 'user_id': i % 9, 'category': 'Pistols',
+            'item_name': f'item{i % 4}', 'quantity': i % 3 + 1,
+            'created_at': '2024-01-01 00:00:00', 'discord_name': f'member{i % 9}'}
+
+
+async def _run_archive_storage():
+    print("🧪 Testing compressed archive storage...")
+
+    db_path = 'test_archive_storage.db'
+    remove_db(db_path)
+
+    # A pre-chunking database with one archive stored as a single JSON blob
+    legacy_payload = {
+        'archived_at': '2024-02-01T00:00:00',
+        'contributions': [_legacy_contribution(i) for i in range(ARCHIVE_CHUNK_ROWS + 10)],
+        'audit_events': [{'event_type': 'Contribution', 'item_name': 'item1', 'quantity': 1}],
+        'total_contributions': ARCHIVE_CHUNK_ROWS + 10,
+        'total_audit_events': 1,
+    }
+    legacy = sqlite3.connect(db_path)
+    legacy.execute('''
+        CREATE TABLE database_archives (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            archive_name TEXT NOT NULL,
+            description TEXT NOT NULL,
+            notes TEXT,
+            archived_data TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            created_by_id INTEGER NOT NULL
+        )
+    ''')
+    legacy.execute('''
+        INSERT INTO database_archives (guild_id, archive_name, description, notes, archived_data,
+                                       created_at, created_by_id)
+        VALUES (?, 'Legacy', 'old', NULL, ?, '2024-02-01T00:00:00', 1)
+    ''', (GUILD_ID, json.dumps(legacy_payload)))
+    legacy.commit()
+    legacy.close()
+
+    db = DatabaseManager(db_path)
+    try:
+        await db.initialize_guild(GUILD_ID)
+        [listed] = await db.get_database_archives(GUILD_ID)
+        assert 'archived_data' not in listed
+        assert listed['total_contributions'] == ARCHIVE_CHUNK_ROWS + 10
+        assert 0 < listed['stored_size'] < len(json.dumps(legacy_payload))
+        archive = await db.get_archive_by_id(listed['id'])
+        for key, value in legacy_payload.items():
+            assert archive['archived_data'][key] == value, key
+        conn = await db._get_shared_connection()
+        cursor = await conn.execute('SELECT archived_data FROM database_archives')
+        assert json.loads((await cursor.fetchone())[0]) == {'archived_at': '2024-02-01T00:00:00'}
+        print(f"✅ Legacy archive migrated: {len(json.dumps(legacy_payload)):,} -> {listed['stored_size']:,} bytes")
+
+        # New archives are written as chunks straight from the streams
+        await db.bulk_upsert_members(GUILD_ID, [(1, 'Alice', None, 'Full Patch', 'Active')])
+        for i in range(25):
+            await db.add_contribution(GUILD_ID, 1, 'Weapons Locker', f'rifle{i % 3}', 2)
+        archive_id = await db.create_database_archive(GUILD_ID, 'Season 2', 'desc', None, 1)
+        archives = await db.get_database_archives(GUILD_ID)
+        assert [a['archive_name'] for a in archives] == ['Season 2', 'Legacy']
+        assert archives[0]['total_contributions'] == 25 and archives[0]['total_audit_events'] == 25
+
+        only_contributions = await db.get_archive_by_id(archive_id, sections=('contributions',))
+        data = only_contributions['archived_data']
+        assert 'audit_events' not in data and len(data['contributions']) == 25
+        assert data['contributions'][0]['discord_name'] == 'Alice'
+        metadata = await db.get_archive_by_id(archive_id, sections=())
+        assert 'contributions' not in metadata['archived_data']
+        assert metadata['archived_data']['total_audit_events'] == 25
+        events = [event async for event in db.iter_archive_section(archive_id, 'audit_events')]
+        assert len(events) == 25 and events[0]['item_name'].startswith('rifle')
+        print("✅ Listing reads metadata only; opening decodes only requested sections")
+
+        # Views render from metadata and fetch audit events lazily
+        view = ArchiveSelectionView(archives)
+        assert any(option.description.endswith('• 25 contributions') for option in view.archive_select.options)
+        detail = ArchiveDetailView(only_contributions)
+        embed = await detail.create_archive_embed()
+        assert 'KB' in embed.fields[0].value
+        assert embed.fields[1].value.startswith('• **Weapons Locker**: 50')
+        print("✅ Archive views use stored totals and sizes")
+
+        # Deleting an archive removes its chunks
+        await conn.execute('DELETE FROM database_archives WHERE id = ?', (archive_id,))
+        await conn.commit()
+        cursor = await conn.execute('SELECT COUNT(*) FROM database_archive_chunks WHERE archive_id = ?', (archive_id,))
+        assert (await cursor.fetchone())[0] == 0
+        print("✅ Chunks cascade with their archive")
+    finally:
+        await db.close()
+        remove_db(db_path)
+
+    print("\n🎉 Archive storage tests passed!")
+
+
+def test_archive_storage():
+    asyncio.run(_run_archive_storage())
+
+
+if __name__ == "__main__":
+    asyncio.run(_run_archive_storage())
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Test script for the database connection supervisor: error classes, retries and the circuit breaker
+"""
+import asyncio
+import sqlite3
+import sys
+import threading
+import time
+from sqlite3 import SQLITE_BUSY_SNAPSHOT
+
+sys.path.append('.')
+from db_test_helpers import remove_db
+from utils.database import DatabaseManager
+from utils.db_supervisor import (
+    BUSY_TIMEOUT_MS, CLOSED, CONNECTION, HALF_OPEN, LOGICAL, OPEN, TRANSIENT, ConnectionSupervisor, classify_error,
+)
+
+GUILD_ID = 828282
+
+
+def _real_error(sql, setup=()):
+    """Run a failing statement on a scratch connection and return the sqlite3 error"""
+    conn = sqlite3.connect(':memory:')
+    try:
+        for statement in setup:
+            conn.execute(statement)
+        conn.execute(sql)
+    except sqlite3.Error as e:
+        return e
+    finally:
+        conn.close()
+    raise AssertionError(f"{sql} did not fail")
+
+
+def test_classification():
+    print("🧪 Testing database error classification...")
+    duplicate = _real_error('INSERT INTO t VALUES (1)', ['CREATE TABLE t (id INTEGER PRIMARY KEY)',
+                                                         'INSERT INTO t VALUES (1)'])
+    assert classify_error(duplicate) == LOGICAL
+    assert classify_error(_real_error('SELECT * FROM missing_table')) == LOGICAL
+    assert classify_error(sqlite3.OperationalError('database is locked')) == TRANSIENT
+    assert classify_error(sqlite3.ProgrammingError('Cannot operate on a closed database.')) == CONNECTION
+    assert classify_error(ValueError('Connection closed')) == CONNECTION
+    assert classify_error(KeyError('guild_id')) == LOGICAL
+    print("✅ Busy/locked, connection and logical errors are told apart")
+
+
+def test_circuit_breaker():
+    print("🧪 Testing the circuit breaker...")
+    supervisor = ConnectionSupervisor(failure_threshold=3, reset_timeout=0.1)
+    locked = sqlite3.OperationalError('database is locked')
+
+    for _ in range(10):
+        supervisor.record_failure(sqlite3.IntegrityError('UNIQUE constraint failed'))
+    assert supervisor.state == CLOSED and supervisor.consecutive_failures == 0, "logical errors never trip it"
+
+    supervisor.record_failure(locked)
+    supervisor.record_failure(locked)
+    assert supervisor.state == CLOSED and supervisor.allow_expensive_work()
+    supervisor.record_failure(ValueError('Connection closed'))
+    assert supervisor.state == OPEN and not supervisor.allow_expensive_work()
+    health = supervisor.health()
+    assert health['circuit_opened'] == 1 and health['retry_in_s'] is not None
+    assert health['transient_errors'] == 2 and health['connection_errors'] == 1 and health['logical_errors'] == 10
+    print("✅ The breaker opens after the failure threshold")
+
+    time.sleep(0.15)
+    assert supervisor.state == HALF_OPEN and supervisor.allow_expensive_work()
+    supervisor.record_failure(locked)
+    assert supervisor.state == OPEN, "a failure while half-open re-opens it"
+    time.sleep(0.15)
+    supervisor.record_success()
+    assert supervisor.state == CLOSED and supervisor.consecutive_failures == 0
+    print("✅ The breaker goes half-open after the timeout and closes on success")
+
+    delays = [supervisor.retry_delay(attempt) for attempt in range(20) for _ in range(5)]
+    assert all(0 <= delay <= supervisor.max_delay for delay in delays) and len(set(delays)) > 1
+    print("✅ Retry delays are jittered and capped")
+
+
+async def _run_supervised_connections():
+    print("🧪 Testing supervised DatabaseManager connections...")
+
+    db_path = 'test_connection_supervisor.db'
+    remove_db(db_path)
+    # One retry would cover well under a second; writers retry on a time budget instead
+    supervisor = ConnectionSupervisor(max_retries=1, base_delay=0.05)
+    db = DatabaseManager(db_path, supervisor=supervisor)
+    try:
+        await db.initialize_database()
+        await db.initialize_guild(GUILD_ID)
+        writer = await db._get_shared_connection()
+
+        # A constraint violation is raised once, without retries or a new connection
+        health = db.get_connection_health()
+        try:
+            await db._execute_query('INSERT INTO server_configs (guild_id) VALUES (?)', (GUILD_ID,))
+            raise AssertionError("duplicate guild accepted")
+        except sqlite3.IntegrityError:
+            pass
+        after = db.get_connection_health()
+        assert after['logical_errors'] == health['logical_errors'] + 1
+        assert after['retries'] == health['retries'] and after['reconnects'] == health['reconnects']
+        assert await db._get_shared_connection() is writer and after['state'] == CLOSED
+        await writer.rollback()
+        print("✅ Logical errors leave the connection alone and are not retried")
+
+        # Another process holds the write lock for longer than SQLite's own busy wait
+        # and the reader's max_retries, so the writer's backoff does the waiting
+        holder = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        holder.execute('BEGIN IMMEDIATE')
+        release = threading.Timer(BUSY_TIMEOUT_MS * 6 / 1000, holder.rollback)
+        release.start()
+        try:
+            await db.add_or_update_member(GUILD_ID, 1, 'Member 1', rank='Member')
+        finally:
+            release.join()
+        health = db.get_connection_health()
+        assert health['retries'] > 0 and health['recovered'] >= 1, health
+        assert health['backoff_ms'] > 0, health
+        assert (await db.get_member(GUILD_ID, 1))['discord_name'] == 'Member 1'
+        print(f"✅ A busy write is retried with backoff and succeeds "
+              f"({health['retries']} retries, {health['backoff_ms']:.0f} ms backing off)")
+
+        # Inside an open transaction the statement is not retried; the transaction fails as a whole.
+        # The BEGIN is queued before the update is submitted, and the update must not
+        # roll it back even though no transaction was open when it was submitted.
+        retries = health['retries']
+        holder.execute('BEGIN IMMEDIATE')
+        try:
+            begin = asyncio.ensure_future(writer.execute('BEGIN'))
+            update = asyncio.ensure_future(writer.execute("UPDATE members SET rank = 'Officer' WHERE user_id = 1"))
+            await begin
+            try:
+                await update
+                raise AssertionError("write went through while another connection held the lock")
+            except sqlite3.OperationalError as e:
+                assert classify_error(e) == TRANSIENT, e
+            assert writer.in_transaction, "another statement's transaction was rolled back"
+        finally:
+            holder.rollback()
+            holder.close()
+            await writer.rollback()
+        assert db.get_connection_health()['retries'] == retries
+        print("✅ Busy statements inside an open transaction are not retried or rolled back")
+
+        assert supervisor.should_retry(sqlite3.OperationalError('database is locked'), 100, time.monotonic() + 1)
+        assert not supervisor.should_retry(sqlite3.OperationalError('database is locked'), 0, time.monotonic())
+        print("✅ A retry deadline replaces max_retries")
+
+        stale = sqlite3.OperationalError('database is locked')
+        stale.sqlite_errorcode = SQLITE_BUSY_SNAPSHOT
+        assert not supervisor.should_retry(stale, 0)
+        assert supervisor.should_retry(sqlite3.OperationalError('database is locked'), 0)
+        print("✅ SQLITE_BUSY_SNAPSHOT is not retried")
+
+        # A connection that died underneath the manager is replaced on next use
+        await writer.close()
+        reconnects = health['reconnects']
+        config = await db.get_server_config(GUILD_ID)
+        await db.add_or_update_member(GUILD_ID, 2, 'Member 2', rank='Member')
+        assert config is not None and await db._get_shared_connection() is not writer
+        assert db.get_connection_health()['reconnects'] == reconnects + 1
+        assert (await db.get_member(GUILD_ID, 2))['discord_name'] == 'Member 2'
+        print("✅ A closed writer is replaced and counted as a reconnect")
+
+        async with db._read_connection() as reader:
+            reader.broken = True
+        assert reader not in db._read_connections
+        assert (await db.get_member(GUILD_ID, 1)) is not None
+        print("✅ A broken reader is dropped from the pool")
+    finally:
+        await db.close()
+        remove_db(db_path)
+
+
+def test_connection_supervisor():
+    test_classification()
+    test_circuit_breaker()
+    asyncio.run(_run_supervised_connections())
+    print("\n🎉 Connection supervisor tests passed!")
+
+
+if __name__ == "__main__":
+    test_connection_supervisor()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Test script for online (backup API) database backups and scheduled rotation
+"""
+import asyncio
+import gzip
+import os
+import shutil
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+sys.path.append('.')
+from db_test_helpers import remove_db
+from utils.database import DatabaseManager
+from cogs.backup import BackupSystem, backup_filename, rotate_backups
+
+GUILD_ID = 858585
+BACKUP_DIR = 'test_backups'
+
+
+def _restore(gz_path, db_path):
+    with gzip.open(gz_path, 'rb') as source, open(db_path, 'wb') as dest:
+        shutil.copyfileobj(source, dest)
+    return sqlite3.connect(db_path)
+
+
+class _Interaction:
+    def __init__(self, filesize_limit):
+        self.user = SimpleNamespace(guild_permissions=SimpleNamespace(administrator=True))
+        self.guild = SimpleNamespace(id=GUILD_ID, filesize_limit=filesize_limit)
+        self.response = SimpleNamespace(defer=self._defer)
+        self.followup = SimpleNamespace(send=self._send)
+        self.sent = []
+
+    async def _defer(self, **kwargs):
+        pass
+
+    async def _send(self, content=None, embed=None, file=None, **kwargs):
+        self.sent.append((embed, file and file.filename, file and file.fp.read()))
+
+
+async def _run_database_backup():
+    print("🧪 Testing online database backups...")
+
+    db_path = 'test_database_backup.db'
+    restored_path = 'test_database_backup_restored.db'
+    remove_db(db_path)
+    shutil.rmtree(BACKUP_DIR, ignore_errors=True)
+    db = DatabaseManager(db_path)
+    try:
+        await db.initialize_guild(GUILD_ID)
+        await db.bulk_upsert_members(GUILD_ID, [
+            (user_id, f'member{user_id}', None, 'Full Patch', 'Active') for user_id in range(2000)
+        ])
+        # Committed but still only in the WAL: the backup must include it
+        await db.add_or_update_member(GUILD_ID, 99999, 'Latest')
+        assert os.path.getsize(db_path + '-wal') > 0
+
+        # Writes keep landing between backup steps
+        async def writer():
+            for i in range(20):
+                await db.add_contribution(GUILD_ID, 1, 'Pistols', f'item{i}', 1)
+                await asyncio.sleep(0)
+        gz_path = os.path.join(BACKUP_DIR, backup_filename())
+        result, _ = await asyncio.gather(db.backup_to(gz_path, pages=4), writer())
+        assert result['pages'] > 4 and 0 < result['size'] < result['raw_size']
+        restored = _restore(gz_path, restored_path)
+        try:
+            assert restored.execute('PRAGMA integrity_check').fetchone()[0] == 'ok'
+            names = {row[0] for row in restored.execute('SELECT discord_name FROM members')}
+            assert len(names) == 2001 and 'Latest' in names
+        finally:
+            restored.close()
+            remove_db(restored_path)
+        assert not [name for name in os.listdir(BACKUP_DIR) if name.endswith('.db')]
+        print(f"✅ Backup API copy is consistent ({result['pages']} pages, "
+              f"{result['raw_size']:,} -> {result['size']:,} bytes gzipped)")
+
+        # Rotation keeps the newest files only
+        base = datetime(2024, 1, 1)
+        for day in range(5):
+            open(os.path.join(BACKUP_DIR, backup_filename(base + timedelta(days=day))), 'wb').close()
+        open(os.path.join(BACKUP_DIR, 'unrelated.txt'), 'wb').close()
+        removed = rotate_backups(BACKUP_DIR, 3)
+        remaining = sorted(os.listdir(BACKUP_DIR))
+        assert len(removed) == 3 and 'unrelated.txt' in remaining
+        assert os.path.basename(gz_path) in remaining and len(remaining) == 4
+        print("✅ rotate_backups prunes the oldest backups")
+
+        # Scheduled mode writes into backup_directory and rotates
+        bot = SimpleNamespace(db=db, config={'backup_directory': BACKUP_DIR, 'backup_keep': 1})
+        cog = BackupSystem(bot)
+        assert not cog.scheduled_backup.is_running()
+        await asyncio.sleep(1)  # distinct timestamp
+        local = await cog.run_local_backup()
+        assert os.path.exists(local['path']) and len(local['removed']) == 3
+        print("✅ Scheduled backups rotate down to backup_keep")
+
+        # /backup_database uploads the gzipped snapshot, or keeps it when too large
+        interaction = _Interaction(filesize_limit=25 * 1024 * 1024)
+        await BackupSystem.backup_database.callback(cog, interaction)
+        embed, filename, payload = interaction.sent[-1]
+        assert embed.title == "💾 Database Backup Complete" and filename.endswith('.db.gz')
+        assert gzip.decompress(payload).startswith(b'SQLite format 3')
+        interaction = _Interaction(filesize_limit=10)
+        await asyncio.sleep(1)
+        await BackupSystem.backup_database.callback(cog, interaction)
+        assert interaction.sent[-1][0].title == "💾 Database Backup Saved Locally"
+        assert len([name for name in os.listdir(BACKUP_DIR) if name.endswith('.db.gz')]) == 2
+        print("✅ /backup_database uploads a gzipped online backup")
+    finally:
+        await db.close()
+        remove_db(db_path)
+        shutil.rmtree(BACKUP_DIR, ignore_errors=True)
+
+    print("\n🎉 Database backup tests passed!")
+
+
+def test_database_backup():
+    asyncio.run(_run_database_backup())
+
+
+if __name__ == "__main__":
+    asyncio.run(_run_database_backup())
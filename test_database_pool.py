@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test script for the DatabaseManager reader pool
+"""
+import asyncio
+import sys
+
+sys.path.append('.')
+from db_test_helpers import remove_db
+from utils.database import DatabaseManager
+
+GUILD_ID = 424242
+
+
+async def _run_database_pool():
+    print("🧪 Testing database reader pool...")
+
+    db_path = 'test_database_pool.db'
+    remove_db(db_path)
+    db = DatabaseManager(db_path, read_pool_size=2)
+    try:
+        await db.initialize_guild(GUILD_ID)
+        await db.add_or_update_member(GUILD_ID, 1, 'Committed')
+
+        # Hold an open write transaction on the writer connection
+        writer = await db._get_shared_connection()
+        await writer.execute('BEGIN IMMEDIATE')
+        await writer.execute(
+            "INSERT INTO members (guild_id, user_id, discord_name) VALUES (?, 2, 'Uncommitted')",
+            (GUILD_ID,)
+        )
+
+        # Readers must not wait for the writer and only see committed rows
+        members = await asyncio.wait_for(db.get_all_members(GUILD_ID), timeout=2)
+        assert [m['discord_name'] for m in members] == ['Committed'], members
+        print("✅ Reads proceed during an open write transaction")
+
+        await writer.rollback()
+
+        # Concurrent reads never open more connections than the pool size
+        results = await asyncio.gather(*(db.get_server_config(GUILD_ID) for _ in range(20)))
+        assert all(r and r['guild_id'] == GUILD_ID for r in results)
+        assert len(db._read_connections) <= 2, len(db._read_connections)
+        print(f"✅ 20 concurrent reads served by {len(db._read_connections)} reader connection(s)")
+
+        # Readers are query_only
+        async with db._read_connection() as reader:
+            try:
+                await reader.execute("DELETE FROM members")
+                raise AssertionError("reader connection accepted a write")
+            except Exception as e:
+                assert 'readonly' in str(e) or 'read-only' in str(e) or 'query_only' in str(e), e
+        print("✅ Reader connections reject writes")
+    finally:
+        await db.close()
+        remove_db(db_path)
+
+    # Pool size 0 falls back to the writer connection
+    db = DatabaseManager(db_path, read_pool_size=0)
+    try:
+        await db.initialize_guild(GUILD_ID)
+        assert await db.get_server_config(GUILD_ID)
+        assert not db._read_connections
+        print("✅ read_pool_size=0 runs reads on the writer")
+    finally:
+        await db.close()
+        remove_db(db_path)
+
+    print("\n🎉 Database pool tests passed!")
+
+
+def test_database_pool():
+    asyncio.run(_run_database_pool())
+
+
+if __name__ == "__main__":
+    asyncio.run(_run_database_pool())
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Test script for per-guild database shards and the split tool
+"""
+import asyncio
+import gzip
+import os
+import shutil
+import sqlite3
+import sys
+import tarfile
+from datetime import datetime, timedelta
+
+sys.path.append('.')
+from db_test_helpers import remove_db
+from utils.database import DatabaseManager
+from utils.database_shards import ShardedDatabaseManager, shard_id_base, shard_index_of, split_database
+
+GUILD_A = 111111
+GUILD_B = 222222
+GUILD_C = 333333
+
+
+async def _seed_guild(db, guild_id, expired_loa):
+    """Members, contributions, an LOA, a prospect with a vote, dues and a transcript"""
+    await db.initialize_guild(guild_id)
+    await db.bulk_upsert_members(guild_id, [
+        (1, 'Sponsor', None, 'Full Patch', 'Active'),
+        (2, 'Prospect', None, 'Prospect', 'Active'),
+    ])
+    await db.add_contribution(guild_id, 1, 'Weapons', 'Rifle', 3)
+    await db.add_contribution(guild_id, 2, 'Weapons', 'Rifle', 2)
+    now = datetime.now()
+    end_time = now - timedelta(hours=1) if expired_loa else now + timedelta(days=3)
+    loa_id = await db.create_loa_record(guild_id, 2, '3d', 'Travel', now - timedelta(days=3), end_time)
+    prospect_id = await db.create_prospect(guild_id, 2, 1)
+    await db.create_prospect_task(guild_id, prospect_id, 1, 'Task', 'desc')
+    await db.add_prospect_note(guild_id, prospect_id, 1, 'Strike', is_strike=True)
+    vote_id = await db.create_prospect_vote(guild_id, prospect_id, 1)
+    await db.cast_prospect_vote(vote_id, 1, 'yes')
+    period_id = await db.create_dues_period(guild_id, 'October', due_amount=25.0,
+                                         due_date=now + timedelta(days=10), created_by_id=1)
+    await db.update_dues_payment(guild_id, 1, period_id, amount_paid=25.0, payment_status='paid')
+    await db.log_dm_transcript(guild_id, 1, 2, f'rendezvous at dock {guild_id}', 'direct', 'user')
+    return {'loa': loa_id, 'prospect': prospect_id, 'vote': vote_id, 'period': period_id}
+
+
+async def _run_database_shards():
+    print("🧪 Testing per-guild database shards...")
+
+    directory = 'test_shards'
+    shutil.rmtree(directory, ignore_errors=True)
+    db = ShardedDatabaseManager(directory, max_open_shards=2, read_pool_size=1)
+    try:
+        await db.initialize_database()
+        ids_a = await _seed_guild(db, GUILD_A, expired_loa=True)
+        ids_b = await _seed_guild(db, GUILD_B, expired_loa=False)
+        assert os.path.exists(os.path.join(directory, f'guild_{GUILD_A}.db'))
+        assert os.path.exists(os.path.join(directory, f'guild_{GUILD_B}.db'))
+        assert await db.get_guild_ids() == [GUILD_A, GUILD_B]
+        assert sorted(c.quantity for c in await db.get_contributions_by_category(GUILD_A, 'Weapons')) == [2, 3]
+        print("✅ Guild-keyed calls create and use one file per guild")
+
+        assert shard_index_of(ids_a['loa']) == 1 and shard_index_of(ids_b['loa']) == 2
+        assert ids_b['prospect'] > shard_id_base(2)
+        assert (await db.get_loa_by_id(ids_b['loa'])).guild_id == GUILD_B
+        assert (await db.get_vote_responses(ids_a['vote']))['yes'] == 1
+        assert await db.end_prospect_vote(ids_b['vote'], 1, 'approved')
+        assert await db.get_loa_by_id(shard_id_base(9) + 1) is None
+        print("✅ Row-id methods find the shard from the id")
+
+        await db.get_server_config(GUILD_C)
+        assert db.get_open_shard_ids() == [GUILD_B, GUILD_C]
+        rows = db.iter_all_contributions(GUILD_A)
+        first = await rows.__anext__()
+        assert first.guild_id == GUILD_A
+        await db.get_server_config(GUILD_B)
+        await db.get_server_config(GUILD_C)
+        assert GUILD_A in db.get_open_shard_ids(), "shard closed while iterated"
+        assert len([row async for row in rows]) == 1
+        await db.get_server_config(GUILD_B)
+        assert len(db.get_open_shard_ids()) == 2 and GUILD_A not in db.get_open_shard_ids()
+        print("✅ Idle shards close least recently used first, pinned shards stay open")
+
+        async with db.transaction(GUILD_C) as conn:
+            await conn.execute('''INSERT INTO members (guild_id, user_id, discord_name, rank, status)
+                                  VALUES (?, 5, 'Tx', 'Member', 'Active')''', (GUILD_C,))
+        try:
+            async with db.transaction(GUILD_C) as conn:
+                await conn.execute('''INSERT INTO members (guild_id, user_id, discord_name, rank, status)
+                                      VALUES (?, 6, 'Rolled back', 'Member', 'Active')''', (GUILD_C,))
+                raise RuntimeError("rollback")
+        except RuntimeError:
+            pass
+        assert [m.user_id for m in await db.get_all_members(GUILD_C)] == [5]
+        print("✅ Units of work run on the guild's shard")
+
+        # Cogs use routed methods; there is no unpinned shared connection to hand out
+        assert not hasattr(db, '_get_shared_connection')
+        await db.add_or_update_member(GUILD_C, 7, 'Gunner')
+        await db.add_contribution(GUILD_C, 7, 'Heist Items', 'Drill', 1)
+        await db.add_contribution(GUILD_C, 7, 'Weapons', 'Pistol', 2)
+        deleted = await db.delete_latest_contribution(GUILD_C, 7, 'pist')
+        assert deleted['item_name'] == 'Pistol' and deleted['discord_name'] == 'Gunner'
+        assert await db.delete_latest_contribution(GUILD_C, 7, 'pist') is None
+        assert await db.delete_category_records(GUILD_C, ['Heist Items']) == {'contributions': 1, 'quantity_changes': 0}
+        assert await db.get_all_contributions(GUILD_C) == []
+        assert await db.get_loa_counts(GUILD_C) == {'active': 0, 'total': 0}
+        async with db.transaction(GUILD_C):
+            pass  # the shard's writer holds no leftover write transaction
+        print("✅ Contribution deletes and LOA counts are routed to the guild's shard")
+
+        await db.close()
+        db = ShardedDatabaseManager(directory, max_open_shards=2, read_pool_size=1)
+        expired = await db.get_expired_loas()
+        assert [loa.id for loa in expired] == [ids_a['loa']]
+        assert db.get_open_shard_ids() == [GUILD_A], "only the due shard is opened"
+        await db.mark_loa_expired(ids_a['loa'])
+        assert await db.get_expired_loas() == []
+        assert await db.get_next_loa_expiry() is not None
+        print("✅ LOA expiry opens only shards with a due LOA")
+
+        await db.update_server_config(GUILD_B, loa_notification_channel_id=4242)
+        assert await db.get_loa_notification_guild_ids() == [GUILD_B]
+        await db.reset_server_config(GUILD_B)
+        assert await db.get_loa_notification_guild_ids() == []
+        print("✅ Notification channels are answered from the catalog")
+
+        assert await db.verify_inventory_totals() == []
+        assert await db.verify_dues_totals() == []
+        print("✅ All-guild verification fans out over every shard")
+
+        backup_path = os.path.join(directory, 'backup.tar')
+        result = await db.backup_to(backup_path)
+        assert result['shards'] == 3
+        with tarfile.open(backup_path) as archive:
+            names = set(archive.getnames())
+            assert names == {'catalog.db.gz', f'guild_{GUILD_A}.db.gz', f'guild_{GUILD_B}.db.gz',
+                             f'guild_{GUILD_C}.db.gz'}, names
+            restored = os.path.join(directory, 'restored.db')
+            with open(restored, 'wb') as out:
+                out.write(gzip.decompress(archive.extractfile(f'guild_{GUILD_A}.db.gz').read()))
+        conn = sqlite3.connect(restored)
+        assert conn.execute('SELECT COUNT(*) FROM contributions').fetchone()[0] == 2
+        conn.close()
+        print("✅ Backups bundle the catalog and every shard in one tar")
+    finally:
+        await db.close()
+        shutil.rmtree(directory, ignore_errors=True)
+
+    print("\n🎉 Database shard tests passed!")
+
+
+async def _run_split_database():
+    print("🧪 Testing splitting a single-file database...")
+
+    source_path = 'test_split_source.db'
+    directory = 'test_split_shards'
+    remove_db(source_path)
+    shutil.rmtree(directory, ignore_errors=True)
+    source = DatabaseManager(source_path)
+    try:
+        await source.initialize_database()
+        ids_a = await _seed_guild(source, GUILD_A, expired_loa=True)
+        await _seed_guild(source, GUILD_B, expired_loa=False)
+        await source.update_server_config(GUILD_B, loa_notification_channel_id=4242)
+        archive_id = await source.create_database_archive(GUILD_A, 'Q3', 'desc', 'notes', 1)
+        assert archive_id
+    finally:
+        await source.close()
+
+    db = None
+    try:
+        copied = await split_database(source_path, directory)
+        assert set(copied) == {GUILD_A, GUILD_B} and all(copied.values())
+        assert await split_database(source_path, directory) == {}, "already split guilds are skipped"
+        print("✅ Every guild is copied into its own shard once")
+
+        conn = sqlite3.connect(source_path)
+        for guild_id in (GUILD_A, GUILD_B):
+            shard = sqlite3.connect(os.path.join(directory, f'guild_{guild_id}.db'))
+            for table in ('members', 'contributions', 'loa_records', 'prospects', 'prospect_votes',
+                          'prospect_vote_responses', 'dues_payments', 'dm_transcripts', 'database_archives'):
+                if table == 'prospect_vote_responses':
+                    where = 'vote_id IN (SELECT id FROM prospect_votes WHERE guild_id = ?)'
+                else:
+                    where = 'guild_id = ?'
+                expected = conn.execute(f'SELECT COUNT(*) FROM {table} WHERE {where}', (guild_id,)).fetchone()[0]
+                actual = shard.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                assert expected == actual, (guild_id, table, expected, actual)
+            shard.close()
+        conn.close()
+        print("✅ Row counts match the source per guild")
+
+        db = ShardedDatabaseManager(directory)
+        base_a = shard_id_base(1)
+        loa = await db.get_loa_by_id(ids_a['loa'] + base_a)
+        assert loa.guild_id == GUILD_A and loa.user_id == 2
+        assert (await db.get_vote_responses(ids_a['vote'] + base_a))['yes'] == 1
+        archive = await db.get_archive_by_id(archive_id + base_a)
+        assert archive and archive['archive_name'] == 'Q3'
+        assert await db.verify_inventory_totals() == []
+        assert await db.verify_dues_totals() == []
+        assert len(await db.search_transcripts(GUILD_B, 'rendezvous')) == 1
+        print("✅ Ids and references are shifted into each shard's range; totals and search rebuilt")
+
+        assert await db.get_loa_notification_guild_ids() == [GUILD_B]
+        assert [loa.id for loa in await db.get_expired_loas()] == [ids_a['loa'] + base_a]
+        print("✅ The catalog holds the split guilds' LOA expiry and notification channel")
+    finally:
+        if db is not None:
+            await db.close()
+        remove_db(source_path)
+        shutil.rmtree(directory, ignore_errors=True)
+
+    print("\n🎉 Database split tests passed!")
+
+
+def test_database_shards():
+    asyncio.run(_run_database_shards())
+
+
+def test_split_database():
+    asyncio.run(_run_split_database())
+
+
+if __name__ == "__main__":
+    asyncio.run(_run_database_shards())
+    asyncio.run(_run_split_database())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test script for planner statistics (optimize) and the storage/index usage report
+"""
+import asyncio
+import shutil
+import sqlite3
+import sys
+
+sys.path.append('.')
+from db_test_helpers import remove_db
+from utils.database import TRANSCRIPT_FTS_TABLE, DatabaseManager
+from utils.database_shards import ShardedDatabaseManager
+
+GUILD_ID = 848484
+
+
+async def _seed(db, guild_id, members=40):
+    await db.initialize_guild(guild_id)
+    await db.bulk_upsert_members(guild_id, [
+        (user_id, f'Member {user_id}', None, 'Member', 'Active') for user_id in range(members)
+    ])
+
+
+async def _run_db_maintenance():
+    print("🧪 Testing database optimize and storage stats...")
+
+    db_path = 'test_db_maintenance.db'
+    remove_db(db_path)
+    db = DatabaseManager(db_path)
+    try:
+        await db.initialize_database()
+        await _seed(db, GUILD_ID)
+
+        storage = await db.get_storage_stats()
+        assert not storage['analyzed'], "nothing has run ANALYZE yet"
+        analyzed = await db.optimize()
+        assert 'members' in analyzed and 'contributions' not in analyzed, analyzed
+        conn = sqlite3.connect(db_path)
+        stat_tables = {row[0] for row in conn.execute('SELECT tbl FROM sqlite_stat1')}
+        conn.close()
+        assert 'members' in stat_tables
+        assert 'members' not in await db.optimize(), "analyzed tables are left to PRAGMA optimize"
+        print("✅ optimize() analyzes tables without statistics, then leaves them to PRAGMA optimize")
+
+        storage = await db.get_storage_stats()
+        tables = {table['name']: table for table in storage['tables']}
+        assert storage['analyzed'] and storage['page_size'] > 0
+        assert storage['file_bytes'] == storage['page_size'] * storage['page_count']
+        assert storage['wal_bytes'] > 0 and storage['freelist_count'] >= 0
+        assert tables['members']['rows'] == 40 and tables['server_configs']['rows'] == 1
+        assert tables['members']['pages'] >= 1 and tables['members']['index_bytes'] > 0
+        assert tables[TRANSCRIPT_FTS_TABLE]['rows'] is None, "virtual tables are not counted"
+        assert sum(table['pages'] for table in storage['tables']) < storage['page_count']
+        print("✅ Storage stats report rows, pages and index size per table plus file and WAL size")
+
+        db.reset_query_stats()
+        for user_id in range(5):
+            await db.get_member(GUILD_ID, user_id)
+        await db.get_active_loas_for_guild(GUILD_ID)
+        usage = {index['name']: index for index in await db.get_index_usage()}
+        assert usage['sqlite_autoindex_members_1']['executions'] >= 5, usage['sqlite_autoindex_members_1']
+        assert sum(index['statements'] for index in usage.values() if index['table'] == 'loa_records') == 1
+        assert usage['idx_prospect_tasks_due_epoch']['executions'] == 0
+        print("✅ Index usage is charged from the query plans of the statements run")
+    finally:
+        await db.close()
+        remove_db(db_path)
+
+    shard_dir = 'test_db_maintenance_shards'
+    shutil.rmtree(shard_dir, ignore_errors=True)
+    sharded = ShardedDatabaseManager(shard_dir)
+    try:
+        await sharded.initialize_database()
+        await _seed(sharded, GUILD_ID, members=10)
+        await _seed(sharded, GUILD_ID + 1, members=15)
+        assert 'members' in await sharded.optimize()
+        storage = await sharded.get_storage_stats()
+        tables = {table['name']: table for table in storage['tables']}
+        assert storage['shards'] == 2 and tables['members']['rows'] == 25
+        assert any(index['executions'] for index in await sharded.get_index_usage())
+        print("✅ Sharded storage stats are summed over every shard")
+    finally:
+        await sharded.close()
+        shutil.rmtree(shard_dir, ignore_errors=True)
+
+    print("\n🎉 Database maintenance tests passed!")
+
+
+def test_db_maintenance():
+    asyncio.run(_run_db_maintenance())
+
+
+if __name__ == "__main__":
+    asyncio.run(_run_db_maintenance())
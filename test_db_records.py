@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test script for typed row records returned by DatabaseManager
+"""
+import asyncio
+import json
+import sys
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+sys.path.append('.')
+from db_test_helpers import remove_db
+from utils.database import DatabaseManager
+from utils.db_records import LOARecord, MemberRecord, TranscriptRecord
+from cogs.loa_system import LOASystem
+
+GUILD_ID = 515151
+
+
+async def _run_db_records():
+    print("🧪 Testing typed row records...")
+
+    db_path = 'test_db_records.db'
+    remove_db(db_path)
+    db = DatabaseManager(db_path)
+    try:
+        await db.initialize_guild(GUILD_ID)
+        await db.add_or_update_member(GUILD_ID, 1, 'Alice', rank='President')
+        await db.add_or_update_member(GUILD_ID, 2, 'Bob', rank='Full Patch')
+        await db.update_member_loa_status(GUILD_ID, 2, True)
+
+        member = await db.get_member(GUILD_ID, 2)
+        assert isinstance(member, MemberRecord)
+        assert member['discord_name'] == 'Bob' and member.get('missing', 'x') == 'x'
+        assert member['on_loa'] == member['is_on_loa'] == 1
+        assert 'on_loa' in member and 'nope' not in member
+        plain = dict(member)
+        assert plain['on_loa'] == 1 and plain['discord_name'] == 'Bob'
+        assert json.loads(json.dumps(plain))['user_id'] == 2
+        print("✅ Member records behave like the old dict rows")
+
+        # Mutation keeps working for extra keys (used by cogs to annotate rows)
+        member['display_label'] = 'Bob (LOA)'
+        assert member['display_label'] == 'Bob (LOA)' and 'display_label' in dict(member)
+        print("✅ Records accept extra keys")
+
+        now = datetime.now()
+        await db.create_loa_record(GUILD_ID, 1, '1d', 'Trip', now - timedelta(days=2), now - timedelta(days=1))
+        expired = await db.get_expired_loas()
+        assert len(expired) == 1 and isinstance(expired[0], LOARecord)
+        assert expired[0]['reason'] == 'Trip'
+        active = await db.get_active_loas_for_guild(GUILD_ID)
+        assert active[0]['discord_name'] == 'Alice'  # joined column lands in the overflow dict
+        assert active[0]['end_time_utc'] is not None and 'end_time_utc' in active[0]
+        assert 'end_time_utc' not in dict(active[0]), "computed aliases stay out of dict(record)"
+        print("✅ LOA records include joined columns")
+
+        await db.log_dm_transcript(GUILD_ID, 1, 2, 'hi', 'outgoing', 'user',
+                                   attachments=[{'filename': 'a.png', 'url': 'http://x'}])
+        transcript = (await db.get_user_transcript(GUILD_ID, 2))[0]
+        assert isinstance(transcript, TranscriptRecord)
+        assert isinstance(transcript.attachments, str)  # not decoded yet
+        assert transcript['attachments'][0]['filename'] == 'a.png'
+        assert transcript['attachments'] is transcript['attachments']  # decoded once, cached
+        assert isinstance(transcript.attachments, str)  # attribute access keeps the stored text
+        transcript['attachments'] = json.dumps([{'filename': 'b.png'}])
+        assert transcript['attachments'][0]['filename'] == 'b.png'
+        print("✅ Transcript attachments are decoded lazily")
+
+        # Reads, including the cogs' LOA listing, must not change the writer connection's row factory
+        await db.update_server_config(GUILD_ID, officer_role_id=99)
+        officer = SimpleNamespace(id=99)
+        sent = []
+
+        async def _send(content=None, **kwargs):
+            sent.append(content)
+
+        interaction = SimpleNamespace(
+            guild=SimpleNamespace(id=GUILD_ID, name='Test Guild', get_role=lambda role_id: officer),
+            user=SimpleNamespace(roles=[officer]),
+            response=SimpleNamespace(defer=lambda **kwargs: asyncio.sleep(0)),
+            followup=SimpleNamespace(send=_send),
+        )
+        await db.create_loa_record(GUILD_ID, 2, '1w', 'Vacation', now, now + timedelta(days=7))
+        await LOASystem.loa_list.callback(LOASystem(SimpleNamespace(db=db)), interaction)
+        assert sent[-1] == "📋 **Active LOAs Table** - 2 record(s)", sent
+        writer = await db._get_shared_connection()
+        assert writer.row_factory is None
+        print("✅ Shared connection row_factory left untouched")
+    finally:
+        await db.close()
+        remove_db(db_path)
+
+    print("\n🎉 Row record tests passed!")
+
+
+def test_db_records():
+    asyncio.run(_run_db_records())
+
+
+if __name__ == "__main__":
+    asyncio.run(_run_db_records())
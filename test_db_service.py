@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared background-loop database service used by the dashboard
+"""
+import asyncio
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append('.')
+from db_test_helpers import remove_db
+from utils.database import DatabaseManager, SCHEMA_MIGRATIONS
+from utils.db_service import DatabaseService
+
+GUILD_ID = 949494
+
+
+async def _write_through_reader(db):
+    async with db._read_connection() as conn:
+        await conn.execute("INSERT INTO members (guild_id, user_id, discord_name) VALUES (1, 1, 'x')")
+
+
+def test_db_service():
+    print("🧪 Testing the shared database service...")
+
+    db_path = 'test_db_service.db'
+    remove_db(db_path)
+    service = DatabaseService(db_path, read_pool_size=2)
+    try:
+        service.start()
+        raise AssertionError("service started on an unmigrated database")
+    except RuntimeError as e:
+        assert 'schema' in str(e), e
+    assert not service.running
+    conn = sqlite3.connect(db_path)
+    assert conn.execute('SELECT COUNT(*) FROM schema_version').fetchone()[0] == 0
+    conn.close()
+    print("✅ The service refuses to start, and migrates nothing, while the schema is behind")
+
+    bot_db = DatabaseManager(db_path)
+    asyncio.run(bot_db.initialize_database())
+    asyncio.run(bot_db.close())
+    service = DatabaseService(db_path, read_pool_size=2, transcript_flush_ms=50)
+    try:
+        assert not service.running
+        assert service.run(service.db.get_schema_version()) == SCHEMA_MIGRATIONS[-1][0]
+        assert service.running
+        loop_thread = service._thread
+        print("✅ The service starts on first use against a database the bot migrated")
+
+        service.run(service.db.initialize_guild(GUILD_ID))
+        service.run(service.db.bulk_upsert_members(GUILD_ID, [
+            (user_id, f'Member {user_id}', None, 'Member', 'Active') for user_id in range(20)
+        ]))
+        threads = set()
+
+        def request(user_id):
+            threads.add(threading.current_thread())
+            member = service.run(service.db.get_member(GUILD_ID, user_id))
+            return member['discord_name']
+
+        with ThreadPoolExecutor(8) as pool:
+            names = list(pool.map(request, range(20)))
+        assert names == [f'Member {user_id}' for user_id in range(20)]
+        assert service._thread is loop_thread and loop_thread not in threads
+        print("✅ Requests from many threads share one loop and one manager")
+
+        try:
+            service.run(_write_through_reader(service.db))
+            raise AssertionError("pooled reader accepted a write")
+        except sqlite3.OperationalError as e:
+            assert 'readonly' in str(e), e
+        print("✅ Pooled readers are read-only connections")
+
+        # The bot updates configs from its own process; the service must not serve a stale copy
+        assert service.run(service.db.get_server_config(GUILD_ID))['loa_notification_channel_id'] is None
+        bot_db = DatabaseManager(db_path)
+        service.run(bot_db.update_server_config(GUILD_ID, loa_notification_channel_id=1234))
+        service.run(bot_db.close())
+        assert service.run(service.db.get_server_config(GUILD_ID))['loa_notification_channel_id'] == 1234
+        print("✅ Config changes made by another process are seen without a restart")
+
+        service.run(service.db.queue_dm_transcript(GUILD_ID, 1, 2, 'queued', 'outbound', 'user'))
+        time.sleep(0.3)
+        conn = sqlite3.connect(db_path)
+        assert conn.execute('SELECT COUNT(*) FROM dm_transcripts').fetchone()[0] == 1
+        conn.close()
+        print("✅ Queued transcripts are flushed by the running loop")
+    finally:
+        service.stop()
+    try:
+        assert not service.running and not loop_thread.is_alive()
+        service.run(service.db.get_member(GUILD_ID, 1))
+        assert service.running, "the service restarts on use after stop()"
+        service.stop()
+        print("✅ stop() closes the database and ends the loop thread")
+    finally:
+        remove_db(db_path)
+
+    print("\n🎉 Database service tests passed!")
+
+
+if __name__ == "__main__":
+    test_db_service()
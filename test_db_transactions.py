@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Test script for DatabaseManager unit-of-work transactions and group commit
+"""
+import asyncio
+import sys
+from datetime import datetime, timedelta
+
+sys.path.append('.')
+from db_test_helpers import remove_db
+from utils.database import DatabaseManager
+
+GUILD_ID = 616161
+
+
+async def check_transactions():
+    db_path = 'test_db_transactions.db'
+    remove_db(db_path)
+    db = DatabaseManager(db_path)
+    try:
+        await db.initialize_guild(GUILD_ID)
+        before = db.get_commit_stats()
+
+        # Several writes, one commit
+        async with db.transaction():
+            await db.add_or_update_member(GUILD_ID, 1, 'Alice')
+            await db.add_contribution(GUILD_ID, 1, 'Pistols', 'Glock', 2)
+            await db.add_contribution(GUILD_ID, 1, 'Pistols', 'Glock', 3)
+            # Reads inside the unit of work see its own writes
+            assert await db.get_member(GUILD_ID, 1) is not None
+        stats = db.get_commit_stats()
+        assert stats['commits'] - before['commits'] == 1, stats
+        assert stats['commits_saved'] - before['commits_saved'] == 2, stats
+        assert len(await db.get_all_contributions(GUILD_ID)) == 2
+        print("✅ Three writes committed with a single COMMIT")
+
+        # A failure rolls the whole unit of work back
+        try:
+            async with db.transaction():
+                await db.add_or_update_member(GUILD_ID, 2, 'Bob')
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+        assert await db.get_member(GUILD_ID, 2) is None
+        print("✅ Exceptions roll the unit of work back")
+
+        # Writes from other tasks are not swept into an open unit of work
+        async def outsider():
+            await db.add_or_update_member(GUILD_ID, 3, 'Carol')
+
+        try:
+            async with db.transaction():
+                await db.add_or_update_member(GUILD_ID, 4, 'Dave')
+                task = asyncio.create_task(outsider())
+                await asyncio.sleep(0.05)
+                raise RuntimeError("rollback")
+        except RuntimeError:
+            pass
+        await task
+        assert await db.get_member(GUILD_ID, 3) is not None
+        assert await db.get_member(GUILD_ID, 4) is None
+        print("✅ Concurrent writers are isolated from a rolled-back unit of work")
+
+        # end_loa commits once
+        now = datetime.now()
+        loa_id = await db.create_loa_record(GUILD_ID, 1, '1d', 'Trip', now, now + timedelta(days=1))
+        await db.update_member_loa_status(GUILD_ID, 1, True)
+        before = db.get_commit_stats()['commits']
+        await db.end_loa(loa_id)
+        assert db.get_commit_stats()['commits'] - before == 1
+        assert (await db.get_member(GUILD_ID, 1))['is_on_loa'] == 0
+        assert await db.get_active_loa(GUILD_ID, 1) is None
+        print("✅ end_loa commits once")
+    finally:
+        await db.close()
+        remove_db(db_path)
+
+
+async def check_group_commit():
+    db_path = 'test_db_group_commit.db'
+    remove_db(db_path)
+    db = DatabaseManager(db_path, group_commit_ms=5)
+    try:
+        await db.initialize_guild(GUILD_ID)
+        before = db.get_commit_stats()
+
+        await asyncio.gather(*(
+            db.log_dm_transcript(GUILD_ID, 1, user_id, 'hello', 'outgoing', 'user')
+            for user_id in range(50)
+        ))
+        stats = db.get_commit_stats()
+        requests = stats['commit_requests'] - before['commit_requests']
+        commits = stats['commits'] - before['commits']
+        assert requests == 50 and commits < 5, stats
+        print(f"✅ Group commit coalesced {requests} commit requests into {commits} COMMIT(s)")
+
+        # Every caller returned only after its write was durable
+        other = DatabaseManager(db_path, read_pool_size=0)
+        try:
+            assert len(await other.get_recent_dm_conversations(GUILD_ID, limit=100)) == 50
+        finally:
+            await other.close()
+        print("✅ Coalesced writes are visible to other connections")
+    finally:
+        await db.close()
+        remove_db(db_path)
+
+
+async def _run_db_transactions():
+    print("🧪 Testing unit-of-work transactions...")
+    await check_transactions()
+    await check_group_commit()
+    print("\n🎉 Transaction tests passed!")
+
+
+def test_db_transactions():
+    asyncio.run(_run_db_transactions())
+
+
+if __name__ == "__main__":
+    asyncio.run(_run_db_transactions())
@@ -37,7 +37,7 @@ class MockDatabase:
             'notification_channel_id': 67890
         }
     
-    async def log_dm_transcript(self, **kwargs):
+    async def queue_dm_transcript(self, **kwargs):
         return True
 
 class MockGuild:
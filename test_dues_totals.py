@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Test script for the incrementally maintained dues_period_totals ledger
+"""
+import asyncio
+import random
+import sqlite3
+import sys
+from datetime import datetime
+from types import SimpleNamespace
+
+sys.path.append('.')
+from db_test_helpers import remove_db
+from utils.database import DatabaseManager
+from cogs.database_management import DatabaseManagement
+
+GUILD_ID = 878787
+OTHER_GUILD_ID = 878788
+OFFICER_ROLE_ID = 77
+STATUSES = ['paid', 'unpaid', 'partial', 'exempt', 'overdue']
+
+
+async def _full_recompute_summary(db, guild_id, period_id):
+    """The collection summary as the members LEFT JOIN dues_payments query computed it"""
+    period = dict(await db._fetchone('SELECT * FROM dues_periods WHERE id = ?', (period_id,)))
+    stats = dict(await db._fetchone('''
+        SELECT COUNT(DISTINCT m.user_id) as total_members,
+               COUNT(dp.id) as members_with_records,
+               COUNT(CASE WHEN dp.payment_status = 'paid' THEN 1 END) as paid_count,
+               COUNT(CASE WHEN dp.payment_status = 'unpaid' THEN 1 END) as unpaid_count,
+               COUNT(CASE WHEN dp.payment_status = 'partial' THEN 1 END) as partial_count,
+               COUNT(CASE WHEN dp.is_exempt = TRUE THEN 1 END) as exempt_count,
+               COALESCE(SUM(dp.amount_paid), 0) as total_collected,
+               COALESCE(SUM(CASE WHEN dp.is_exempt = FALSE THEN ? ELSE 0 END), 0) as total_expected
+        FROM members m
+        LEFT JOIN dues_payments dp ON m.guild_id = dp.guild_id AND m.user_id = dp.user_id AND dp.dues_period_id = ?
+        WHERE m.guild_id = ? AND m.status = 'Active'
+    ''', (period['due_amount'], period_id, guild_id)))
+    stats['unpaid_count'] += stats['total_members'] - stats['members_with_records']
+    return stats
+
+
+async def _assert_consistent(db, step):
+    mismatches = await db.verify_dues_totals()
+    assert not mismatches, f"{step}: {mismatches}"
+    for guild_id in (GUILD_ID, OTHER_GUILD_ID):
+        for period in await db.get_active_dues_periods(guild_id):
+            summary = await db.get_dues_collection_summary(guild_id, period['id'])
+            expected = await _full_recompute_summary(db, guild_id, period['id'])
+            for key in ('total_members', 'paid_count', 'unpaid_count', 'partial_count', 'exempt_count'):
+                assert summary[key] == expected[key], f"{step}: {key} {summary[key]} != {expected[key]}"
+            assert abs(summary['total_collected'] - expected['total_collected']) < 0.005, step
+            assert abs(summary['total_expected'] - expected['total_expected']) < 0.005, step
+
+
+class _Interaction:
+    def __init__(self):
+        role = SimpleNamespace(id=OFFICER_ROLE_ID)
+        self.guild = SimpleNamespace(id=GUILD_ID, get_role=lambda role_id: role if role_id == OFFICER_ROLE_ID else None)
+        self.user = SimpleNamespace(roles=[role])
+        self.response = SimpleNamespace(defer=self._defer, send_message=self._send)
+        self.followup = SimpleNamespace(send=self._send)
+        self.sent = []
+
+    async def _defer(self, **kwargs):
+        pass
+
+    async def _send(self, content=None, embed=None, **kwargs):
+        self.sent.append(embed or content)
+
+
+async def _run_dues_totals():
+    print("🧪 Testing dues ledger totals...")
+
+    db_path = 'test_dues_totals.db'
+    remove_db(db_path)
+    db = DatabaseManager(db_path)
+    rng = random.Random(17)
+    try:
+        for guild_id in (GUILD_ID, OTHER_GUILD_ID):
+            await db.initialize_guild(guild_id)
+            await db.bulk_upsert_members(guild_id, [
+                (user_id, f'member{user_id}', None, 'Full Patch', 'Active') for user_id in range(30)
+            ])
+        periods = [
+            await db.create_dues_period(GUILD_ID, f'Month {i}', due_amount=25.5 + i, due_date=datetime(2024, i + 1, 28),
+                                        created_by_id=1)
+            for i in range(3)
+        ]
+        await db.create_dues_period(OTHER_GUILD_ID, 'Month 0', due_amount=10, due_date=datetime(2024, 1, 28), created_by_id=1)
+        await _assert_consistent(db, 'create_dues_period')
+        print("✅ New periods start with the guild's active member count")
+
+        for _ in range(200):
+            status = rng.choice(STATUSES)
+            await db.update_dues_payment(
+                GUILD_ID, rng.randrange(35), rng.choice(periods),
+                amount_paid=round(rng.uniform(0, 40), 2), payment_status=status,
+                is_exempt=status == 'exempt' and rng.random() < 0.7, updated_by_id=1
+            )
+        await _assert_consistent(db, 'update_dues_payment')
+        history = await db.get_dues_payment_history(GUILD_ID, 1)
+        assert history and history[-1]['action_type'] == 'created'
+        print("✅ Payment updates keep every period's totals exact")
+
+        for user_id in rng.sample(range(30), 8):
+            await db.update_member_status(GUILD_ID, user_id, status='Inactive')
+        await db.add_or_update_member(GUILD_ID, 3, 'member3')  # upsert back to Active
+        await db.add_or_update_member(GUILD_ID, 31, 'late joiner')  # had payments before joining
+        await db.remove_members(GUILD_ID, [4, 5, 6])
+        await _assert_consistent(db, 'member status changes')
+        print("✅ Member joins, leaves and status changes move their payments in and out")
+
+        assert await db.reset_dues_period(GUILD_ID, periods[0], 1)
+        summary = await db.get_dues_collection_summary(GUILD_ID, periods[0])
+        assert summary['total_collected'] == 0 and summary['paid_count'] == 0
+        assert summary['unpaid_count'] == summary['total_members']
+        conn = await db._get_shared_connection()
+        await conn.execute('DELETE FROM dues_periods WHERE id = ?', (periods[2],))
+        await conn.commit()
+        await _assert_consistent(db, 'reset and delete')
+        print("✅ Period resets and deletes update the totals")
+
+        treasury = await db.get_treasury_summary(GUILD_ID)
+        active = await db._fetchone("SELECT COUNT(*) FROM members WHERE guild_id = ? AND status = 'Active'", (GUILD_ID,))
+        collected = await db._fetchone('''
+            SELECT COALESCE(SUM(dp.amount_paid), 0) FROM dues_payments dp
+            JOIN members m ON m.guild_id = dp.guild_id AND m.user_id = dp.user_id AND m.status = 'Active'
+            WHERE dp.guild_id = ? AND dp.dues_period_id IN (?, ?)
+        ''', (GUILD_ID, periods[0], periods[1]))
+        assert treasury['active_periods_count'] == 2 and treasury['recent_period_name'] in ('Month 0', 'Month 1')
+        assert treasury['total_collected'] == round(collected[0], 2)
+        assert treasury['total_expected'] == round((25.5 + 26.5) * active[0], 2)
+        print(f"✅ Treasury reads one totals row per period (${treasury['total_collected']:,.2f} collected)")
+
+        # Drift is reported and repaired
+        await conn.execute('UPDATE dues_period_totals SET paid_count = paid_count + 5 WHERE dues_period_id = ?', (periods[1],))
+        await conn.commit()
+        [mismatch] = await db.verify_dues_totals(GUILD_ID)
+        assert mismatch['dues_period_id'] == periods[1]
+        await db.update_server_config(GUILD_ID, officer_role_id=OFFICER_ROLE_ID)
+        cog = DatabaseManagement(SimpleNamespace(db=db))
+        interaction = _Interaction()
+        await DatabaseManagement.dues_verify.callback(cog, interaction, repair=True)
+        assert interaction.sent[-1].title == "🔧 Dues Totals Rebuilt"
+        await DatabaseManagement.dues_verify.callback(cog, interaction)
+        assert interaction.sent[-1].title == "✅ Dues Totals Verified"
+        print("✅ /dues_verify detects drift and rebuild repairs it")
+    finally:
+        await db.close()
+
+    # Existing databases get the missing columns/tables and a filled ledger
+    conn = sqlite3.connect(db_path)
+    for trigger in [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'dues_totals_%'")]:
+        conn.execute(f'DROP TRIGGER {trigger}')
+    conn.execute('DROP TABLE dues_period_totals')
+    conn.execute("DELETE FROM schema_version WHERE version >= "
+                 "(SELECT version FROM schema_version WHERE name = 'dues_period_totals')")
+    conn.commit()
+    conn.close()
+    db = DatabaseManager(db_path)
+    try:
+        await db.initialize_database()
+        await _assert_consistent(db, 'migration backfill')
+        print("✅ Migration backfills totals for existing periods")
+    finally:
+        await db.close()
+        remove_db(db_path)
+
+    print("\n🎉 Dues totals tests passed!")
+
+
+def test_dues_totals():
+    asyncio.run(_run_dues_totals())
+
+
+if __name__ == "__main__":
+    asyncio.run(_run_dues_totals())
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test script for the integer epoch time columns and the aware datetimes read from them
+"""
+import asyncio
+import sqlite3
+import sys
+from datetime import datetime, timedelta, timezone
+
+sys.path.append('.')
+from db_test_helpers import remove_db
+from utils.database import SCHEMA_MIGRATIONS, DatabaseManager, to_epoch
+
+GUILD_ID = 868686
+
+
+async def _run_epoch_columns():
+    print("🧪 Testing integer epoch time columns...")
+
+    db_path = 'test_epoch_columns.db'
+    remove_db(db_path)
+    db = DatabaseManager(db_path)
+    now = datetime.now().replace(microsecond=0)
+    try:
+        await db.initialize_database()
+        await db.initialize_guild(GUILD_ID)
+        assert await db.get_schema_version() == SCHEMA_MIGRATIONS[-1][0] >= 12
+
+        # The three formats the bot has written: str(datetime), isoformat() and UTC with an offset
+        past = [
+            now - timedelta(hours=1),
+            now - timedelta(minutes=30),
+            now - timedelta(minutes=10),
+        ]
+        stored = [
+            str(past[0]),
+            past[1].isoformat(),
+            past[2].astimezone(timezone.utc).isoformat(),
+        ]
+        future = now + timedelta(days=2)
+        conn = sqlite3.connect(db_path)
+        for user_id, end_time in enumerate(stored + [future.isoformat()]):
+            conn.execute('''INSERT INTO loa_records (guild_id, user_id, duration, reason, start_time, end_time)
+                            VALUES (?, ?, '1d', 'test', ?, ?)''', (GUILD_ID, user_id, str(now), end_time))
+        conn.commit()
+        epochs = [row[0] for row in conn.execute('SELECT end_time_epoch FROM loa_records ORDER BY id')]
+        assert epochs == [to_epoch(value) for value in past + [future]], epochs
+        print("✅ Triggers fill the epoch column for writers that only set the TEXT column")
+
+        # Rows written before the migration are backfilled from the TEXT column
+        conn.execute('UPDATE loa_records SET end_time_epoch = NULL')
+        conn.commit()
+        conn.close()
+        async with db.transaction() as tx:
+            await db._migrate_epoch_time_columns(tx)
+        expired = await db.get_expired_loas()
+        assert [loa['user_id'] for loa in expired] == [0, 1, 2], "expired LOAs in every format are found"
+        assert all(loa['end_time_utc'] == past[loa['user_id']].astimezone(timezone.utc) for loa in expired)
+        assert expired[0]['end_time_utc'].tzinfo is not None and expired[0]['end_time'] == stored[0]
+        next_expiry = await db.get_next_loa_expiry()
+        assert next_expiry == past[0].astimezone(timezone.utc), next_expiry
+        print("✅ Backfilled epochs filter LOAs correctly across formats and read back as aware datetimes")
+
+        loa_id = await db.create_loa_record(GUILD_ID, 9, '1h', 'api', now, now - timedelta(hours=2))
+        active = await db.get_active_loas_for_guild(GUILD_ID)
+        assert active[0]['id'] == loa_id and active[-1]['user_id'] == 3, "ordered by end time"
+        print("✅ New LOAs store their epoch and active LOAs are ordered by it")
+
+        # Audit events mixing CURRENT_TIMESTAMP (UTC) contributions and isoformat() quantity changes
+        await db.add_contribution(GUILD_ID, 1, 'Pistols', 'Glock', 2)
+        await db.log_quantity_change(GUILD_ID, 'Glock', 'Pistols', 2, 5, 'restock', '', 1)
+        conn = sqlite3.connect(db_path)
+        conn.execute('''INSERT INTO contributions (guild_id, user_id, category, item_name, quantity, created_at)
+                        VALUES (?, 2, 'Pistols', 'Glock', 1, ?)''',
+                     (GUILD_ID, (datetime.now(timezone.utc) - timedelta(hours=3)).strftime('%Y-%m-%d %H:%M:%S')))
+        conn.commit()
+        conn.close()
+        events = await db.get_all_audit_events(GUILD_ID)
+        times = [event['occurred_at_utc'] for event in events]
+        assert len(events) == 3 and all(value.tzinfo is not None for value in times)
+        assert times == sorted(times, reverse=True) and events[-1]['actor_id'] == 2
+        assert abs(times[0] - datetime.now(timezone.utc)) < timedelta(minutes=1)
+        print("✅ Audit events are ordered by epoch and carry occurred_at_utc")
+
+        prospect_id = await db.create_prospect(GUILD_ID, 77, 1)
+        await db.create_prospect_task(GUILD_ID, prospect_id, 1, 'overdue', 'late', now - timedelta(days=1))
+        await db.add_prospect_task(GUILD_ID, prospect_id, 1, 'soon', 'later', now + timedelta(days=1))
+        overdue = await db.get_overdue_tasks(GUILD_ID)
+        assert [task['task_name'] for task in overdue] == ['overdue'], overdue
+        assert overdue[0]['due_date_utc'] == (now - timedelta(days=1)).astimezone(timezone.utc)
+        print("✅ Overdue prospect tasks are found by epoch and carry due_date_utc")
+    finally:
+        await db.close()
+        remove_db(db_path)
+
+    print("\n🎉 Epoch column tests passed!")
+
+
+def test_epoch_columns():
+    asyncio.run(_run_epoch_columns())
+
+
+if __name__ == "__main__":
+    asyncio.run(_run_epoch_columns())
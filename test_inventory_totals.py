@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Test script for the materialized inventory_totals table
+"""
+import asyncio
+import sqlite3
+import sys
+
+sys.path.append('.')
+from db_test_helpers import remove_db
+from utils.database import DatabaseManager
+
+GUILD_ID = 848484
+OTHER_GUILD_ID = 858585
+
+
+async def _assert_consistent(db, step):
+    mismatches = await db.verify_inventory_totals()
+    assert not mismatches, f"{step}: {mismatches}"
+
+
+async def _run_inventory_totals():
+    print("🧪 Testing inventory totals...")
+
+    db_path = 'test_inventory_totals.db'
+    remove_db(db_path)
+    db = DatabaseManager(db_path)
+    try:
+        await db.initialize_guild(GUILD_ID)
+        await db.initialize_guild(OTHER_GUILD_ID)
+
+        first = await db.add_contribution(GUILD_ID, 1, 'Pistols', 'Glock', 3)
+        await db.add_contribution(GUILD_ID, 2, 'Pistols', 'Glock', 2)
+        await db.add_contribution(GUILD_ID, 2, 'Drugs', 'Weed', 10)
+        await db.add_contribution(OTHER_GUILD_ID, 2, 'Pistols', 'Glock', 7)
+        assert await db.get_current_item_quantity(GUILD_ID, 'Glock', 'Pistols') == 5
+        assert set(await db.get_all_current_item_quantities(GUILD_ID)) == {'Glock|Pistols', 'Weed|Drugs'}
+        await _assert_consistent(db, 'add_contribution')
+        print("✅ Contributions update the totals")
+
+        await db.update_item_quantities(GUILD_ID, 'Glock', 'Pistols', 9)
+        assert await db.get_current_item_quantity(GUILD_ID, 'Glock', 'Pistols') == 9
+        await db.update_item_quantities(GUILD_ID, 'Weed', 'Drugs', 0)
+        assert 'Weed|Drugs' not in await db.get_all_current_item_quantities(GUILD_ID)
+        await _assert_consistent(db, 'update_item_quantities')
+        print("✅ Quantity edits update the totals")
+
+        assert await db.remove_audit_entry(GUILD_ID, 'contribution', first, 99)
+        await _assert_consistent(db, 'remove_audit_entry')
+        print("✅ Removing a contribution updates the totals")
+
+        # Writes that bypass DatabaseManager (as some cogs do) are covered too
+        conn = await db._get_shared_connection()
+        await conn.execute("UPDATE contributions SET category = 'Rifles' WHERE guild_id = ?", (GUILD_ID,))
+        await db._execute_commit()
+        assert await db.get_current_item_quantity(GUILD_ID, 'Glock', 'Rifles') > 0
+        assert await db.get_current_item_quantity(GUILD_ID, 'Glock', 'Pistols') == 0
+        await _assert_consistent(db, 'direct update')
+        print("✅ Direct SQL writes keep the totals in sync")
+
+        await db.create_database_archive(GUILD_ID, 'Archive', 'desc', '', 1)
+        assert await db.get_all_current_item_quantities(GUILD_ID) == {}
+        assert await db.get_current_item_quantity(OTHER_GUILD_ID, 'Glock', 'Pistols') == 7
+        await _assert_consistent(db, 'archive')
+        print("✅ Archive reset clears only that guild's totals")
+
+        # Corrupt the table: verify reports it and rebuild repairs it
+        await conn.execute('UPDATE inventory_totals SET total_quantity = 1000')
+        await conn.execute("INSERT INTO inventory_totals (guild_id, category, item_name, total_quantity, contribution_count) "
+                           "VALUES (?, 'Ghost', 'Phantom', 1, 1)", (GUILD_ID,))
+        await db._execute_commit()
+        mismatches = await db.verify_inventory_totals()
+        assert {m['item_name'] for m in mismatches} == {'Glock', 'Phantom'}, mismatches
+        assert len(await db.verify_inventory_totals(GUILD_ID)) == 1
+        await db.rebuild_inventory_totals(GUILD_ID)
+        assert len(await db.verify_inventory_totals()) == 1  # other guild untouched
+        await db.rebuild_inventory_totals()
+        await _assert_consistent(db, 'rebuild')
+        print("✅ Verify detects drift and rebuild repairs it")
+    finally:
+        await db.close()
+
+    # Existing databases get their totals backfilled by the migration
+    conn = sqlite3.connect(db_path)
+    for trigger in ('inventory_totals_insert', 'inventory_totals_delete', 'inventory_totals_update'):
+        conn.execute(f'DROP TRIGGER {trigger}')
+    conn.execute('DROP TABLE inventory_totals')
+    conn.execute("DELETE FROM schema_version WHERE version >= (SELECT version FROM schema_version WHERE name = 'inventory_totals')")
+    conn.execute("INSERT INTO contributions (guild_id, user_id, category, item_name, quantity) VALUES (?, 1, 'Pistols', 'Deagle', 4)",
+                 (GUILD_ID,))
+    conn.commit()
+    conn.close()
+    db = DatabaseManager(db_path)
+    try:
+        await db.initialize_database()
+        assert await db.get_current_item_quantity(GUILD_ID, 'Deagle', 'Pistols') == 4
+        await _assert_consistent(db, 'migration backfill')
+        print("✅ Migration backfills totals for existing contributions")
+    finally:
+        await db.close()
+        remove_db(db_path)
+
+    print("\n🎉 Inventory totals tests passed!")
+
+
+def test_inventory_totals():
+    asyncio.run(_run_inventory_totals())
+
+
+if __name__ == "__main__":
+    asyncio.run(_run_inventory_totals())
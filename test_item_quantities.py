@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test script for set-based item quantity redistribution
+"""
+import asyncio
+import random
+import sys
+
+sys.path.append('.')
+from db_test_helpers import remove_db
+from utils.database import DatabaseManager, _redistribute_quantities
+
+GUILD_ID = 868686
+
+
+def _reference_redistribution(contributions, new_total):
+    """The original per-row loop from update_item_quantities, returning {id: quantity} (deleted ids omitted)"""
+    result = {contrib_id: qty for contrib_id, qty in contributions}
+    if new_total == 0:
+        return {}
+    total_current = sum(contrib[1] for contrib in contributions)
+    if total_current > 0:
+        remaining_total = new_total
+        for i, (contrib_id, current_qty) in enumerate(contributions):
+            if i == len(contributions) - 1:
+                new_qty = max(0, remaining_total)
+            else:
+                new_qty = max(0, int(new_total * (current_qty / total_current)))
+            remaining_total -= new_qty
+            if new_qty == 0:
+                del result[contrib_id]
+            else:
+                result[contrib_id] = new_qty
+    else:
+        result[contributions[0][0]] = new_total
+    return result
+
+
+def check_matches_reference():
+    rng = random.Random(42)
+    for _ in range(2000):
+        contributions = [(i, rng.choice([0, 1, 2, 5, 17, 250])) for i in range(rng.randint(1, 30))]
+        new_total = rng.choice([0, 1, 3, 10, 99, 1000, rng.randint(0, 5000)])
+        updates, deletes = _redistribute_quantities(contributions, new_total)
+        result = dict(contributions)
+        for qty, contrib_id in updates:
+            result[contrib_id] = qty
+        for (contrib_id,) in deletes:
+            del result[contrib_id]
+        assert result == _reference_redistribution(contributions, new_total), (contributions, new_total)
+    print("✅ Redistribution matches the original algorithm on 2000 random cases")
+
+
+async def check_bulk_updates():
+    db_path = 'test_item_quantities.db'
+    remove_db(db_path)
+    db = DatabaseManager(db_path)
+    try:
+        await db.initialize_guild(GUILD_ID)
+        for i in range(300):
+            await db.add_contribution(GUILD_ID, i % 7, 'Money', 'Dirty Cash', 100 + i % 13)
+        for i in range(5):
+            await db.add_contribution(GUILD_ID, i, 'Pistols', 'Glock', 2)
+        await db.add_contribution(GUILD_ID, 1, 'Drugs', 'Weed', 4)
+
+        before = db.get_commit_stats()['commits']
+        changed = await db.update_item_quantities_bulk(GUILD_ID, [
+            ('Dirty Cash', 'Money', 12345),
+            ('Glock', 'Pistols', 3),
+            ('Weed', 'Drugs', 0),
+            ('Missing', 'Nothing', 5),
+        ])
+        assert db.get_commit_stats()['commits'] - before == 1
+        assert changed > 300
+        totals = await db.get_all_current_item_quantities(GUILD_ID)
+        assert totals['Dirty Cash|Money']['current_quantity'] == 12345
+        assert totals['Glock|Pistols']['current_quantity'] == 3
+        assert 'Weed|Drugs' not in totals and 'Missing|Nothing' not in totals
+        assert not await db.verify_inventory_totals(GUILD_ID)
+        print(f"✅ Bulk edit of 4 items changed {changed} rows in one commit")
+
+        await db.update_item_quantities(GUILD_ID, 'Dirty Cash', 'Money', 50)
+        assert await db.get_current_item_quantity(GUILD_ID, 'Dirty Cash', 'Money') == 50
+        print("✅ Single-item update uses the same path")
+    finally:
+        await db.close()
+        remove_db(db_path)
+
+
+async def _run_item_quantities():
+    print("🧪 Testing item quantity redistribution...")
+    check_matches_reference()
+    await check_bulk_updates()
+    print("\n🎉 Item quantity tests passed!")
+
+
+def test_item_quantities():
+    asyncio.run(_run_item_quantities())
+
+
+if __name__ == "__main__":
+    asyncio.run(_run_item_quantities())
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test script for bulk member upserts and the diff-based /membership_sync
+"""
+import asyncio
+import sys
+from datetime import datetime
+from types import SimpleNamespace
+
+sys.path.append('.')
+from db_test_helpers import remove_db
+from utils.database import DatabaseManager
+from cogs.membership import MembershipSystem
+
+GUILD_ID = 818181
+
+
+def _member(user_id, name, *roles, bot=False):
+    return SimpleNamespace(
+        id=user_id, name=name.lower(), display_name=name, bot=bot,
+        roles=[SimpleNamespace(name=role) for role in roles]
+    )
+
+
+class _Interaction:
+    def __init__(self, members):
+        self.guild = SimpleNamespace(id=GUILD_ID, members=members, chunked=True)
+        self.response = SimpleNamespace(defer=self._defer)
+        self.followup = SimpleNamespace(send=self._send)
+        self.embeds = []
+
+    async def _defer(self, **kwargs):
+        pass
+
+    async def _send(self, content=None, embed=None, **kwargs):
+        if embed is not None:
+            self.embeds.append(embed)
+
+
+def _counts(embed):
+    return {field.name: int(field.value) for field in embed.fields}
+
+
+async def _run_member_sync():
+    print("🧪 Testing bulk member sync...")
+
+    db_path = 'test_member_sync.db'
+    remove_db(db_path)
+    db = DatabaseManager(db_path)
+    try:
+        await db.initialize_guild(GUILD_ID)
+        before = db.get_commit_stats()['commits']
+        written = await db.bulk_upsert_members(GUILD_ID, [
+            (user_id, f'member{user_id}', None, 'Full Patch', 'Active') for user_id in range(100)
+        ])
+        assert written == 100 and len(await db.get_all_members(GUILD_ID)) == 100
+        assert db.get_commit_stats()['commits'] - before == 1
+        print("✅ bulk_upsert_members writes 100 members with one COMMIT")
+
+        # Dues periods give the members table triggers something to update on delete
+        await db.create_dues_period(GUILD_ID, 'January', due_amount=10, due_date=datetime.now(), created_by_id=1)
+        await db.create_dues_period(GUILD_ID, 'February', due_amount=10, due_date=datetime.now(), created_by_id=1)
+        assert await db.remove_members(GUILD_ID, list(range(50, 100)) + [999]) == 50
+        assert len(await db.get_all_members(GUILD_ID)) == 50
+        await db.remove_members(GUILD_ID, list(range(50)))
+        print("✅ remove_members deletes only existing rows and counts only members")
+
+        cog = MembershipSystem(SimpleNamespace(db=db))
+        await db.update_server_config(GUILD_ID, membership_roles=list(cog.default_rank_order))
+        members = [
+            _member(1, 'Alice', 'President', 'Full Patch'),
+            _member(2, 'Bob', 'Full Patch'),
+            _member(3, 'Carol', 'Prospect'),
+            _member(4, 'Dave', 'Nomad'),
+            _member(5, 'Eve'),  # no membership role
+            _member(6, 'Robot', 'Prospect', bot=True),
+        ]
+        # Eve has no rank role but contributed, which stores her without a rank
+        await db.add_contribution(GUILD_ID, 5, 'Pistols', 'Glock', 1)
+        await db.add_or_update_member(GUILD_ID, 5, 'Eve')
+        interaction = _Interaction(members)
+        await MembershipSystem.sync_membership.callback(cog, interaction)
+        assert _counts(interaction.embeds[-1]) == {'Added': 4, 'Updated': 0, 'Unchanged': 0, 'Removed': 0}
+        assert (await db.get_member(GUILD_ID, 1))['rank'] == 'President'
+        print("✅ First sync adds every ranked member")
+
+        await db.update_member_loa_status(GUILD_ID, 2, True)
+        members[2].roles = [SimpleNamespace(name='Full Patch')]  # Carol patched in
+        members[0].display_name = 'Alice B'
+        del members[3]  # Dave left
+        before = db.get_commit_stats()['commits']
+        interaction = _Interaction(members)
+        await MembershipSystem.sync_membership.callback(cog, interaction)
+        assert _counts(interaction.embeds[-1]) == {'Added': 0, 'Updated': 3, 'Unchanged': 0, 'Removed': 1}
+        assert db.get_commit_stats()['commits'] - before == 1
+        assert (await db.get_member(GUILD_ID, 2))['status'] == 'LOA'
+        assert (await db.get_member(GUILD_ID, 3))['rank'] == 'Full Patch'
+        assert (await db.get_member(GUILD_ID, 1))['discord_name'] == 'Alice B'
+        assert await db.get_member(GUILD_ID, 4) is None
+        assert (await db.get_member(GUILD_ID, 5))['rank'] is None
+        assert [c['user_id'] for c in await db.get_all_contributions(GUILD_ID)] == [5]
+        print("✅ Second sync writes only the diff in one COMMIT and keeps rankless members")
+
+        interaction = _Interaction(members)
+        await MembershipSystem.sync_membership.callback(cog, interaction)
+        assert _counts(interaction.embeds[-1]) == {'Added': 0, 'Updated': 0, 'Unchanged': 3, 'Removed': 0}
+        print("✅ Re-running the sync is a no-op")
+
+        # An incomplete member cache must not prune anyone
+        interaction = _Interaction(members[:1])
+        interaction.guild.chunked = False
+        await MembershipSystem.sync_membership.callback(cog, interaction)
+        assert _counts(interaction.embeds[-1])['Removed'] == 0
+        assert len(await db.get_all_members(GUILD_ID)) == 4
+        print("✅ Unchunked guilds skip pruning")
+    finally:
+        await db.close()
+        remove_db(db_path)
+
+    print("\n🎉 Member sync tests passed!")
+
+
+def test_member_sync():
+    asyncio.run(_run_member_sync())
+
+
+if __name__ == "__main__":
+    asyncio.run(_run_member_sync())
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test script for prospect list task/note counts
+"""
+import asyncio
+import sys
+from datetime import datetime
+
+sys.path.append('.')
+from db_test_helpers import remove_db
+from utils.database import DatabaseManager
+
+GUILD_ID = 898989
+
+
+async def _run_prospect_counts():
+    print("🧪 Testing prospect list counts...")
+
+    db_path = 'test_prospect_counts.db'
+    remove_db(db_path)
+    db = DatabaseManager(db_path)
+    try:
+        await db.initialize_guild(GUILD_ID)
+        await db.bulk_upsert_members(GUILD_ID, [
+            (1, 'Sponsor', None, 'Full Patch', 'Active'),
+            (2, 'Busy', None, 'Prospect', 'Active'),
+            (3, 'Quiet', None, 'Prospect', 'Active'),
+            (4, 'Dropped', None, 'Prospect', 'Active'),
+        ])
+        busy = await db.create_prospect(GUILD_ID, 2, 1)
+        quiet = await db.create_prospect(GUILD_ID, 3, 1)
+        dropped = await db.create_prospect(GUILD_ID, 4, 1)
+
+        # 4 tasks x 5 notes: the old tasks-join-notes GROUP BY counted 20 of each
+        task_ids = [await db.create_prospect_task(GUILD_ID, busy, 1, f'Task {i}', 'desc') for i in range(4)]
+        await db.complete_prospect_task(task_ids[0], 1)
+        await db.complete_prospect_task(task_ids[1], 1)
+        await db.fail_prospect_task(task_ids[2], 1)
+        for i in range(5):
+            await db.add_prospect_note(GUILD_ID, busy, 1, f'Note {i}', is_strike=i < 2)
+        await db.create_prospect_task(GUILD_ID, dropped, 1, 'Task', 'desc')
+        await db.add_prospect_note(GUILD_ID, dropped, 1, 'Strike', is_strike=True)
+        await db.update_prospect_status(dropped, 'dropped', datetime.now())
+
+        active = {p['id']: p for p in await db.get_active_prospects(GUILD_ID)}
+        assert set(active) == {busy, quiet}
+        counts = {key: active[busy][key] for key in
+                  ('total_tasks', 'completed_tasks', 'failed_tasks', 'total_notes', 'strike_count')}
+        assert counts == {'total_tasks': 4, 'completed_tasks': 2, 'failed_tasks': 1,
+                          'total_notes': 5, 'strike_count': 2}, counts
+        assert active[busy]['strikes'] == 2
+        assert active[busy]['sponsor_name'] == 'Sponsor' and active[busy]['prospect_name'] == 'Busy'
+        assert active[quiet]['total_tasks'] == 0 and active[quiet]['total_notes'] == 0
+        print("✅ Active prospects report exact task and note counts")
+
+        [archived] = await db.get_archived_prospects(GUILD_ID)
+        assert archived['id'] == dropped and archived['status'] == 'dropped'
+        assert (archived['total_tasks'], archived['total_notes'], archived['strike_count']) == (1, 1, 1)
+        print("✅ Archived prospects report exact task and note counts")
+    finally:
+        await db.close()
+        remove_db(db_path)
+
+    print("\n🎉 Prospect count tests passed!")
+
+
+def test_prospect_counts():
+    asyncio.run(_run_prospect_counts())
+
+
+if __name__ == "__main__":
+    asyncio.run(_run_prospect_counts())
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Query plan regression harness for utils/database.py
+
+Runs every hot DatabaseManager query against a seeded database, captures the
+SQL actually executed through the connection's trace callback and checks its
+EXPLAIN QUERY PLAN. A hot query that falls back to a full table SCAN fails.
+"""
+import asyncio
+import re
+import sys
+from datetime import datetime, timedelta
+
+sys.path.append('.')
+from db_test_helpers import remove_db
+from utils.database import (
+    EPOCH_INDEXES, RETENTION_INDEXES, SECONDARY_INDEXES, SUPERSEDED_INDEXES, DatabaseManager, _encode_page_cursor,
+)
+
+GUILD_ID = 111111111
+USER_ID = 222222222
+OTHER_USER_ID = 333333333
+
+# (method name, args) for every query path that runs on a timer or on most interactions
+HOT_QUERIES = [
+    ('get_expired_loas', ()),
+    ('get_active_loa', (GUILD_ID, USER_ID)),
+    ('get_active_loas_for_guild', (GUILD_ID,)),
+    ('get_server_config', (GUILD_ID,)),
+    ('get_member', (GUILD_ID, USER_ID)),
+    ('get_all_members', (GUILD_ID,)),
+    ('get_all_contributions', (GUILD_ID,)),
+    ('get_contributions_by_category', (GUILD_ID, 'Pistols')),
+    ('get_current_item_quantity', (GUILD_ID, 'Glock', 'Pistols')),
+    ('get_all_current_item_quantities', (GUILD_ID,)),
+    ('get_user_transcript', (GUILD_ID, USER_ID)),
+    ('get_user_transcript_page', (GUILD_ID, USER_ID, 10, _encode_page_cursor('2099-01-01 00:00:00', 1000))),
+    ('search_transcripts', (GUILD_ID, 'hello')),
+    ('get_recent_dm_conversations_page', (GUILD_ID, 10, _encode_page_cursor('2099-01-01 00:00:00', 1000))),
+    ('get_quantity_change_history', (GUILD_ID, 'Glock')),
+    ('get_all_audit_events', (GUILD_ID,)),
+    ('get_all_audit_events', (GUILD_ID, 'Glock', 'Pistols', 50)),
+    ('get_database_archives', (GUILD_ID,)),
+    ('get_active_dues_periods', (GUILD_ID,)),
+    ('get_dues_payments_for_period', (GUILD_ID, 1)),
+    ('get_all_dues_payments_with_members', (GUILD_ID, 1)),
+    ('get_dues_collection_summary', (GUILD_ID, 1)),
+    ('get_treasury_summary', (GUILD_ID,)),
+    ('get_active_prospects', (GUILD_ID,)),
+    ('get_archived_prospects', (GUILD_ID,)),
+    ('get_prospect_tasks', (1,)),
+    ('get_prospect_notes', (1,)),
+    ('get_overdue_tasks', (GUILD_ID,)),
+    ('get_active_prospect_vote', (1,)),
+]
+
+TRACED_PREFIXES = ('SELECT', 'WITH', 'UPDATE', 'DELETE')
+SCAN_PATTERN = re.compile(r'^SCAN (\S+)')
+
+
+async def _seed(db):
+    """Insert a small amount of data into every hot table"""
+    await db.initialize_guild(GUILD_ID)
+    await db.add_or_update_member(GUILD_ID, USER_ID, 'Tester', rank='Full Patch')
+    await db.add_or_update_member(GUILD_ID, OTHER_USER_ID, 'Other', rank='Prospect')
+    now = datetime.now()
+    await db.create_loa_record(GUILD_ID, USER_ID, '1d', 'Testing', now - timedelta(days=2), now - timedelta(days=1))
+    await db.add_contribution(GUILD_ID, USER_ID, 'Pistols', 'Glock', 3)
+    await db.log_quantity_change(GUILD_ID, 'Glock', 'Pistols', 3, 2, 'Used', None, USER_ID)
+    await db.log_dm_transcript(GUILD_ID, USER_ID, OTHER_USER_ID, 'hello there', 'outgoing', 'user')
+    await db.create_dues_period(GUILD_ID, 'January', due_amount=10.0, due_date=now, created_by_id=USER_ID)
+    prospect_id = await db.create_prospect(GUILD_ID, OTHER_USER_ID, USER_ID)
+    await db.create_prospect_task(GUILD_ID, prospect_id, USER_ID, 'Task', 'Do it', now - timedelta(days=1))
+    await db.add_prospect_note(GUILD_ID, prospect_id, USER_ID, 'Note')
+
+
+def _find_table_scans(plan_rows):
+    """Return the names of real tables that are fully scanned in a query plan"""
+    subqueries = set()
+    scans = []
+    for row in plan_rows:
+        detail = row[3]
+        if detail.startswith(('CO-ROUTINE ', 'MATERIALIZE ')):
+            subqueries.add(detail.split(' ', 1)[1])
+            continue
+        match = SCAN_PATTERN.match(detail)
+        if not match or ' USING ' in detail or detail == 'SCAN CONSTANT ROW':
+            continue
+        if match.group(1) not in subqueries:
+            scans.append(detail)
+    return scans
+
+
+async def check_hot_query_plans():
+    print("🧪 Checking query plans for hot queries...")
+
+    db_path = 'test_query_plans.db'
+    remove_db(db_path)
+
+    db = DatabaseManager(db_path)
+    failures = []
+    try:
+        await db.initialize_database()
+        await _seed(db)
+
+        conn = await db._get_shared_connection()
+        cursor = await conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+        existing = {row[0] for row in await cursor.fetchall()}
+        expected = (set(SECONDARY_INDEXES) - set(SUPERSEDED_INDEXES)) | set(RETENTION_INDEXES) | set(EPOCH_INDEXES)
+        missing = expected - existing
+        if existing & set(SUPERSEDED_INDEXES):
+            failures.append(f"Superseded indexes still exist: {', '.join(sorted(existing & set(SUPERSEDED_INDEXES)))}")
+        if missing:
+            failures.append(f"Missing indexes: {', '.join(sorted(missing))}")
+        else:
+            print(f"✅ All {len(expected)} secondary indexes exist")
+
+        for method_name, args in HOT_QUERIES:
+            statements = []
+            await conn.set_trace_callback(statements.append)
+            try:
+                await getattr(db, method_name)(*args)
+            finally:
+                await conn.set_trace_callback(None)
+
+            for sql in statements:
+                if not sql.lstrip().upper().startswith(TRACED_PREFIXES):
+                    continue
+                cursor = await conn.execute(f'EXPLAIN QUERY PLAN {sql}')
+                scans = _find_table_scans(await cursor.fetchall())
+                if scans:
+                    failures.append(f"{method_name}: {'; '.join(scans)}")
+
+            status = '❌' if any(f.startswith(f"{method_name}:") for f in failures) else '✅'
+            print(f"{status} {method_name}{args}")
+    finally:
+        await db.close()
+        remove_db(db_path)
+
+    if failures:
+        print("\n❌ Query plan regressions found:")
+        for failure in failures:
+            print(f"   {failure}")
+    else:
+        print("\n🎉 No hot query falls back to a full table scan!")
+    return failures
+
+
+def test_hot_query_plans():
+    failures = asyncio.run(check_hot_query_plans())
+    assert not failures, f"{len(failures)} hot queries fall back to a table scan"
+
+
+if __name__ == "__main__":
+    sys.exit(1 if asyncio.run(check_hot_query_plans()) else 0)
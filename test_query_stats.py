@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Test script for DatabaseManager query timing and the slow-query log
+"""
+import asyncio
+import logging
+import sys
+from types import SimpleNamespace
+
+sys.path.append('.')
+from db_test_helpers import remove_db
+from utils.database import DatabaseManager
+from cogs.database_management import DatabaseManagement
+
+GUILD_ID = 838383
+
+
+class _SlowQueryHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+class _Interaction:
+    def __init__(self):
+        self.user = SimpleNamespace(id=1)
+        self.response = SimpleNamespace(send_message=self._send)
+        self.sent = []
+
+    async def _send(self, content=None, embed=None, **kwargs):
+        self.sent.append(embed or content)
+
+
+async def _run_query_stats():
+    print("🧪 Testing query timing instrumentation...")
+
+    db_path = 'test_query_stats.db'
+    remove_db(db_path)
+    db = DatabaseManager(db_path, slow_query_ms=0)
+    try:
+        await db.initialize_guild(GUILD_ID)
+        db.reset_query_stats()
+
+        await db.add_or_update_member(GUILD_ID, 1, 'Alice', rank='President')
+        await db.add_or_update_member(GUILD_ID, 2, 'Bob', rank='Full Patch')
+        assert (await db.get_member(GUILD_ID, 1))['discord_name'] == 'Alice'
+        assert len(await db.get_all_members(GUILD_ID)) == 2
+        events = [event async for event in db.iter_audit_events(GUILD_ID)]
+
+        methods = {row['method']: row for row in db.get_query_stats(limit=50)['top']}
+        assert methods['DatabaseManager.add_or_update_member']['statements'] == 4  # upsert + COMMIT, twice
+        assert methods['DatabaseManager.add_or_update_member']['rows'] == 2
+        assert methods['DatabaseManager.get_member']['rows'] == 1
+        assert methods['DatabaseManager.get_all_members']['rows'] == 2
+        assert 'DatabaseManager.iter_audit_events' in methods and events == []
+        assert not any(name.startswith(('DatabaseManager._fetch', 'DatabaseManager._iterate')) for name in methods)
+        assert sum(methods['DatabaseManager.get_member']['buckets'].values()) == methods['DatabaseManager.get_member']['round_trips']
+        print(f"✅ Statements are charged to their calling methods ({len(methods)} tracked)")
+
+        # Raw SQL issued outside DatabaseManager is tagged with its caller too
+        async def cog_command():
+            conn = await db._get_shared_connection()
+            await conn.execute('DELETE FROM members WHERE guild_id = ? AND user_id = ?', (GUILD_ID, 2))
+            await db._execute_commit()
+        await cog_command()
+        methods = {row['method']: row for row in db.get_query_stats(limit=50)['top']}
+        assert methods['_run_query_stats.<locals>.cog_command']['rows'] == 1
+        print("✅ Direct connection use is tagged with the calling function")
+
+        ranked = db.get_query_stats(limit=3, key='statements')['top']
+        assert len(ranked) == 3 and ranked[0]['statements'] >= ranked[-1]['statements']
+        assert db.get_query_stats()['slow_queries'] == []
+        print("✅ Top offenders rank by the requested column; no slow log when disabled")
+
+        # Anything above a (tiny) threshold lands in the slow-query log with its plan
+        handler = _SlowQueryHandler()
+        logging.getLogger('utils.database.slow_queries').addHandler(handler)
+        try:
+            db._query_stats.slow_query_ms = 0.000001
+            await db.get_member(GUILD_ID, 1)
+        finally:
+            logging.getLogger('utils.database.slow_queries').removeHandler(handler)
+            db._query_stats.slow_query_ms = 0
+        slow = db.get_query_stats()['slow_queries']
+        entry = next(e for e in slow if e['call'] == 'execute')
+        assert entry['method'] == 'DatabaseManager.get_member'
+        assert entry['sql'].startswith('SELECT * FROM members') and entry['plan']
+        assert any('members' in step for step in entry['plan']), entry['plan']
+        assert any('DatabaseManager.get_member' in message for message in handler.messages)
+        print(f"✅ Slow queries are logged with EXPLAIN QUERY PLAN: {entry['plan']}")
+
+        # /db_stats is owner-only
+        async def is_owner(user):
+            return user.id == 1
+        cog = DatabaseManagement(SimpleNamespace(db=db, is_owner=is_owner))
+        interaction = _Interaction()
+        await DatabaseManagement.db_stats.callback(cog, interaction, reset=True)
+        embed = interaction.sent[-1]
+        assert embed.title == "🗄️ Database Query Stats"
+        assert 'get_member' in embed.fields[0].value
+        assert db.get_query_stats()['methods'] == 0
+        interaction.user = SimpleNamespace(id=2)
+        await DatabaseManagement.db_stats.callback(cog, interaction)
+        assert 'bot owner' in interaction.sent[-1]
+        print("✅ /db_stats dumps the top offenders for the owner only")
+    finally:
+        await db.close()
+        remove_db(db_path)
+
+    print("\n🎉 Query timing tests passed!")
+
+
+def test_query_stats():
+    asyncio.run(_run_query_stats())
+
+
+if __name__ == "__main__":
+    asyncio.run(_run_query_stats())
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Test script for per-guild retention policies, batched pruning and incremental vacuum
+"""
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+sys.path.append('.')
+from db_test_helpers import remove_db
+from utils.database import DatabaseManager
+from cogs.database_management import DatabaseManagement
+
+GUILD_ID = 868686
+OTHER_GUILD_ID = 868687
+OFFICER_ROLE_ID = 55
+
+
+async def seed(db, guild_id):
+    await db.initialize_guild(guild_id)
+    conn = await db._get_shared_connection()
+    now = datetime.now()
+    old, recent = now - timedelta(days=400), now - timedelta(days=5)
+    # 300 old transcripts (both timestamp formats) and 20 recent ones
+    await conn.executemany(
+        '''INSERT INTO dm_transcripts (guild_id, sender_id, recipient_id, message, message_type,
+           recipient_type, created_at) VALUES (?, 1, 2, ?, 'outgoing', 'user', ?)''',
+        [(guild_id, f'old message {i} ' + 'x' * 500,
+          (old + timedelta(minutes=i)).isoformat(sep='T' if i % 2 else ' ')) for i in range(300)]
+        + [(guild_id, f'recent message {i}', recent.strftime('%Y-%m-%d %H:%M:%S')) for i in range(20)]
+    )
+    await conn.executemany(
+        '''INSERT INTO quantity_changes (guild_id, item_name, category, old_quantity, new_quantity,
+           reason, changed_at, changed_by_id) VALUES (?, ?, 'Pistols', ?, ?, 'Audit', ?, 1)''',
+        [(guild_id, f'item{i % 2}', 10, 10 + i % 3, (old + timedelta(days=i % 40)).isoformat()) for i in range(120)]
+        + [(guild_id, 'item0', 5, 6, recent.isoformat())]
+    )
+    await conn.executemany(
+        '''INSERT INTO loa_records (guild_id, user_id, duration, reason, start_time, end_time, is_active, is_expired)
+           VALUES (?, ?, '1d', 'Trip', ?, ?, ?, ?)''',
+        [(guild_id, 1, old, old + timedelta(days=1), False, True),
+         (guild_id, 2, old, old + timedelta(days=1), True, False),  # still active: never pruned
+         (guild_id, 3, recent, recent + timedelta(days=1), False, True)]
+    )
+    await conn.commit()
+
+
+async def _count(conn, table, guild_id):
+    cursor = await conn.execute(f'SELECT COUNT(*) FROM {table} WHERE guild_id = ?', (guild_id,))
+    return (await cursor.fetchone())[0]
+
+
+class _Interaction:
+    def __init__(self):
+        role = SimpleNamespace(id=OFFICER_ROLE_ID)
+        self.guild = SimpleNamespace(id=GUILD_ID, get_role=lambda role_id: role if role_id == OFFICER_ROLE_ID else None)
+        self.user = SimpleNamespace(roles=[role])
+        self.response = SimpleNamespace(defer=self._defer, send_message=self._send)
+        self.followup = SimpleNamespace(send=self._send)
+        self.sent = []
+
+    async def _defer(self, **kwargs):
+        pass
+
+    async def _send(self, content=None, embed=None, **kwargs):
+        self.sent.append(embed or content)
+
+
+async def _run_retention():
+    print("🧪 Testing retention and compaction...")
+
+    db_path = 'test_retention.db'
+    remove_db(db_path)
+    db = DatabaseManager(db_path)
+    try:
+        await db.initialize_database()
+        conn = await db._get_shared_connection()
+        cursor = await conn.execute('PRAGMA auto_vacuum')
+        assert (await cursor.fetchone())[0] == 2
+        print("✅ Database uses auto_vacuum=INCREMENTAL")
+
+        await seed(db, GUILD_ID)
+        await seed(db, OTHER_GUILD_ID)
+        assert await db.get_retention_policy(GUILD_ID) == {'transcripts': None, 'audit': None, 'loa': None}
+        assert await db.run_retention() == {'guilds': 0, 'transcripts': 0, 'audit': 0, 'loa': 0, 'reclaimed_pages': 0}
+        print("✅ Without a policy nothing is pruned")
+
+        await db.set_retention_policy(GUILD_ID, transcripts=180, audit=90, loa=30)
+        assert await db.get_retention_policy(GUILD_ID) == {'transcripts': 180, 'audit': 90, 'loa': 30}
+        writer = await db._get_transaction_connection()
+        statements = []
+        await writer.set_trace_callback(statements.append)
+        try:
+            result = await db.apply_retention(GUILD_ID, batch_size=64)
+        finally:
+            await writer.set_trace_callback(None)
+        assert result == {'transcripts': 300, 'audit': 120, 'loa': 1}, result
+        assert await _count(conn, 'dm_transcripts', GUILD_ID) == 20
+        assert await _count(conn, 'quantity_changes', GUILD_ID) == 1
+        assert await _count(conn, 'loa_records', GUILD_ID) == 2
+        assert await _count(conn, 'dm_transcripts', OTHER_GUILD_ID) == 320
+        assert [row['message'] for row in await db.search_transcripts(GUILD_ID, 'old')] == []
+        assert len(await db.search_transcripts(OTHER_GUILD_ID, 'old')) > 0
+        print("✅ Policy prunes only this guild's expired rows (FTS index stays in sync)")
+
+        for sql in {sql for sql in statements if sql.lstrip().startswith('SELECT id FROM')}:
+            cursor = await writer.execute(f'EXPLAIN QUERY PLAN {sql}')
+            plan = [row[3] for row in await cursor.fetchall()]
+            assert all(' USING ' in detail for detail in plan if detail.startswith(('SCAN', 'SEARCH'))), (sql, plan)
+        assert any('end_time_epoch <' in sql for sql in statements)
+        print("✅ Retention batches seek their indexes, LOAs by end_time_epoch")
+
+        summaries = await db.get_quantity_change_summaries(GUILD_ID)
+        assert sum(row['change_count'] for row in summaries) == 120
+        assert sum(row['net_change'] for row in summaries) == sum(i % 3 for i in range(120))
+        assert {row['item_name'] for row in summaries} == {'item0', 'item1'}
+        assert all(len(row['period']) == 7 for row in summaries)
+        print(f"✅ Audit rows rolled into {len(summaries)} monthly summaries")
+
+        cursor = await conn.execute('PRAGMA freelist_count')
+        free_pages = (await cursor.fetchone())[0]
+        assert free_pages > 0
+        reclaimed = await db.incremental_vacuum(max_pages=5, pages_per_step=2)
+        assert reclaimed == 5
+        totals = await db.run_retention()
+        assert totals['guilds'] == 1 and totals['transcripts'] == 0
+        assert totals['reclaimed_pages'] == free_pages - 5
+        cursor = await conn.execute('PRAGMA freelist_count')
+        assert (await cursor.fetchone())[0] == 0
+        print(f"✅ Incremental vacuum reclaimed {free_pages} page(s)")
+
+        # Officer command updates the policy and applies it on demand
+        await db.update_server_config(GUILD_ID, officer_role_id=OFFICER_ROLE_ID)
+        cog = DatabaseManagement(SimpleNamespace(db=db))
+        interaction = _Interaction()
+        await DatabaseManagement.retention_policy.callback(cog, interaction, transcripts_days=0, loa_days=7, run_now=True)
+        embed = interaction.sent[-1]
+        assert await db.get_retention_policy(GUILD_ID) == {'transcripts': None, 'audit': 90, 'loa': 7}
+        assert 'forever' in embed.fields[0].value and 'page(s) reclaimed' in embed.fields[1].value
+        await DatabaseManagement.retention_policy.callback(cog, interaction, audit_days=-1)
+        assert "negative" in interaction.sent[-1]
+        print("✅ /retention_policy updates and applies the policy")
+    finally:
+        await db.close()
+        remove_db(db_path)
+
+    print("\n🎉 Retention tests passed!")
+
+
+def test_retention():
+    asyncio.run(_run_retention())
+
+
+if __name__ == "__main__":
+    asyncio.run(_run_retention())
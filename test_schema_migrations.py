@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Test script for the versioned schema migration runner
+"""
+import asyncio
+import sqlite3
+import sys
+
+sys.path.append('.')
+from db_test_helpers import remove_db
+from utils.database import DatabaseManager, SCHEMA_MIGRATIONS
+
+LATEST_VERSION = SCHEMA_MIGRATIONS[-1][0]
+
+
+async def check_fresh_database():
+    """A new database is migrated to the latest version exactly once"""
+    db_path = 'test_schema_fresh.db'
+    remove_db(db_path)
+    db = DatabaseManager(db_path)
+    try:
+        await db.initialize_database()
+        version = await db.get_schema_version()
+        assert version == LATEST_VERSION, f"expected version {LATEST_VERSION}, got {version}"
+        print(f"✅ Fresh database migrated to version {version}")
+
+        # Per-guild init must not re-run DDL
+        statements = []
+        conn = await db._get_shared_connection()
+        await conn.set_trace_callback(statements.append)
+        for guild_id in range(1, 51):
+            await db.initialize_guild(guild_id)
+        await conn.set_trace_callback(None)
+        ddl = [s for s in statements if s.lstrip().upper().startswith(('CREATE', 'ALTER', 'PRAGMA'))]
+        assert not ddl, f"initialize_guild re-ran DDL: {ddl[:3]}"
+        print(f"✅ 50 guild inits ran {len(statements)} statements and no DDL")
+
+        config = await db.get_server_config(1)
+        assert config and 'Pistols' in config['contribution_categories']
+        print("✅ Default guild config created")
+    finally:
+        await db.close()
+        remove_db(db_path)
+
+
+async def check_legacy_database():
+    """A pre-migration database gets its legacy columns added and is versioned"""
+    db_path = 'test_schema_legacy.db'
+    remove_db(db_path)
+
+    legacy = sqlite3.connect(db_path)
+    legacy.execute('''
+        CREATE TABLE server_configs (
+            guild_id INTEGER PRIMARY KEY,
+            officer_role_id INTEGER,
+            dm_user_id INTEGER,
+            membership_roles TEXT,
+            contribution_categories TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    legacy.execute('INSERT INTO server_configs (guild_id, dm_user_id) VALUES (42, 1234)')
+    legacy.commit()
+    legacy.close()
+
+    db = DatabaseManager(db_path)
+    try:
+        await db.initialize_database()
+        assert await db.get_schema_version() == LATEST_VERSION
+        config = await db.get_server_config(42)
+        assert config is not None and 'weapons_locker_forum_channel_id' in config
+        assert await db.get_dm_users(42) == [1234]
+        print("✅ Legacy database upgraded and dm_user_id migrated")
+
+        # The one-time rebuild is a recorded migration, not a step run on every start
+        conn = await db._get_shared_connection()
+        cursor = await conn.execute('PRAGMA auto_vacuum')
+        assert (await cursor.fetchone())[0] == 2
+        cursor = await conn.execute("SELECT version FROM schema_version WHERE name = 'incremental_vacuum'")
+        assert (await cursor.fetchone()) is not None
+        print("✅ Legacy database rebuilt with auto_vacuum=INCREMENTAL by its migration")
+    finally:
+        await db.close()
+
+    # A second process start applies nothing
+    db = DatabaseManager(db_path)
+    try:
+        await db.initialize_database()
+        conn = await db._get_shared_connection()
+        cursor = await conn.execute('SELECT COUNT(*) FROM schema_version')
+        assert (await cursor.fetchone())[0] == len(SCHEMA_MIGRATIONS)
+        print("✅ Re-opening the database applies no migrations")
+    finally:
+        await db.close()
+        remove_db(db_path)
+
+
+async def check_concurrent_startup():
+    """Two processes starting against one new file apply each migration once"""
+    db_path = 'test_schema_concurrent.db'
+    for attempt in range(5):
+        remove_db(db_path)
+        first, second = DatabaseManager(db_path), DatabaseManager(db_path)
+        try:
+            await asyncio.gather(first.initialize_database(), second.initialize_database())
+            assert await first.get_schema_version() == LATEST_VERSION
+            conn = await second._get_shared_connection()
+            cursor = await conn.execute('SELECT COUNT(*) FROM schema_version')
+            assert (await cursor.fetchone())[0] == len(SCHEMA_MIGRATIONS)
+            cursor = await conn.execute('PRAGMA auto_vacuum')
+            assert (await cursor.fetchone())[0] == 2
+        finally:
+            await first.close()
+            await second.close()
+            remove_db(db_path)
+    print("✅ Concurrent starts on one file both succeed and apply each migration once")
+
+
+async def _run_schema_migrations():
+    print("🧪 Testing schema migrations...")
+    await check_fresh_database()
+    await check_legacy_database()
+    await check_concurrent_startup()
+    print("\n🎉 Schema migration tests passed!")
+
+
+def test_schema_migrations():
+    asyncio.run(_run_schema_migrations())
+
+
+if __name__ == "__main__":
+    asyncio.run(_run_schema_migrations())
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Test script for the server config read-through cache
+"""
+import asyncio
+import sys
+
+sys.path.append('.')
+from db_test_helpers import remove_db
+from utils.database import DatabaseManager
+
+GUILD_IDS = [707070, 717171, 727272]
+
+
+async def _run_server_config_cache():
+    print("🧪 Testing server config cache...")
+
+    db_path = 'test_server_config_cache.db'
+    remove_db(db_path)
+    db = DatabaseManager(db_path)
+    try:
+        for guild_id in GUILD_IDS:
+            await db.initialize_guild(guild_id)
+
+        assert await db.warm_server_config_cache() == len(GUILD_IDS)
+        for guild_id in GUILD_IDS:
+            assert (await db.get_server_config(guild_id))['guild_id'] == guild_id
+        stats = db.get_server_config_cache_stats()
+        assert stats == {'hits': 3, 'misses': 0, 'size': 3}, stats
+        print("✅ Warmed cache serves every guild without a query")
+
+        guild_id = GUILD_IDS[0]
+
+        # Mutating a returned config must not leak into the cache
+        config = await db.get_server_config(guild_id)
+        config['contribution_categories'].append('Explosives')
+        assert 'Explosives' not in (await db.get_server_config(guild_id))['contribution_categories']
+        print("✅ Returned configs are independent copies")
+
+        await db.update_server_config(guild_id, officer_role_id=555)
+        assert (await db.get_server_config(guild_id))['officer_role_id'] == 555
+        await db.add_dm_user(guild_id, 42)
+        assert await db.get_dm_users(guild_id) == [42]
+        await db.remove_dm_user(guild_id, 42)
+        assert await db.get_dm_users(guild_id) == []
+        print("✅ Config and DM user writes invalidate the cache")
+
+        await db.reset_server_config(guild_id)
+        config = await db.get_server_config(guild_id)
+        assert config['officer_role_id'] is None and 'Pistols' in config['contribution_categories']
+        print("✅ Reset restores defaults and invalidates the cache")
+
+        # A rolled-back unit of work leaves no stale entry behind
+        try:
+            async with db.transaction():
+                await db.update_server_config(guild_id, officer_role_id=999)
+                assert (await db.get_server_config(guild_id))['officer_role_id'] == 999
+                raise RuntimeError("rollback")
+        except RuntimeError:
+            pass
+        assert (await db.get_server_config(guild_id))['officer_role_id'] is None
+        print("✅ Rolled-back config changes are not served from the cache")
+
+        stats = db.get_server_config_cache_stats()
+        print(f"✅ Cache stats: {stats}")
+    finally:
+        await db.close()
+        remove_db(db_path)
+
+    print("\n🎉 Server config cache tests passed!")
+
+
+def test_server_config_cache():
+    asyncio.run(_run_server_config_cache())
+
+
+if __name__ == "__main__":
+    asyncio.run(_run_server_config_cache())
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Test script for the storage profiles applied to database connections
+"""
+import asyncio
+import sys
+
+sys.path.append('.')
+from db_test_helpers import remove_db
+from utils.database import DEFAULT_STORAGE_PROFILE, STORAGE_PROFILES, DatabaseManager, resolve_storage_profile
+
+
+async def _pragma(conn, name):
+    cursor = await conn.execute(f'PRAGMA {name}')
+    return (await cursor.fetchone())[0]
+
+
+async def _run_storage_profiles():
+    print("🧪 Testing storage profiles...")
+
+    assert resolve_storage_profile() == STORAGE_PROFILES[DEFAULT_STORAGE_PROFILE]
+    assert resolve_storage_profile('throughput') == STORAGE_PROFILES['throughput']
+    assert resolve_storage_profile('no-such-profile') == STORAGE_PROFILES[DEFAULT_STORAGE_PROFILE]
+    custom = resolve_storage_profile({'name': 'low-memory', 'mmap_size': '1048576', 'bogus': 1})
+    assert custom == dict(STORAGE_PROFILES['low-memory'], mmap_size=1048576)
+    print("✅ Profiles resolve by name, with overrides, and fall back on unknown names")
+
+    db_path = 'test_storage_profiles.db'
+    remove_db(db_path)
+    db = DatabaseManager(db_path, storage_profile='throughput')
+    try:
+        await db.initialize_database()
+        profile = STORAGE_PROFILES['throughput']
+        writer = await db._get_shared_connection()
+        for pragma, value in profile.items():
+            assert await _pragma(writer, pragma) == value, pragma
+        async with db._read_connection() as reader:
+            assert await _pragma(reader, 'cache_size') == profile['cache_size']
+            assert await _pragma(reader, 'mmap_size') == profile['mmap_size']
+        async with db.transaction() as conn:
+            assert await _pragma(conn, 'wal_autocheckpoint') == profile['wal_autocheckpoint']
+        print("✅ The writer, pooled readers and transaction connection use the profile")
+    finally:
+        await db.close()
+        remove_db(db_path)
+
+    print("\n🎉 Storage profile tests passed!")
+
+
+def test_storage_profiles():
+    asyncio.run(_run_storage_profiles())
+
+
+if __name__ == "__main__":
+    asyncio.run(_run_storage_profiles())
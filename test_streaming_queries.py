@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Test script for the streaming (fetchmany) query API and its export consumers
+"""
+import asyncio
+import io
+import json
+import sys
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+sys.path.append('.')
+from db_test_helpers import remove_db
+from utils.database import DatabaseManager, STREAM_CHUNK_SIZE
+from cogs.audit_logs import AuditLogs
+from cogs.backup import BackupSystem
+
+GUILD_ID = 828282
+CATEGORIES = ['Misc Locker', 'Weapons Locker', 'Pistols']
+
+
+async def seed(db):
+    await db.initialize_guild(GUILD_ID)
+    await db.bulk_upsert_members(GUILD_ID, [
+        (user_id, f'member{user_id}', None, 'Full Patch', 'Active') for user_id in range(20)
+    ])
+    start = datetime(2024, 1, 1)
+    conn = await db._get_shared_connection()
+    await conn.executemany(
+        '''INSERT INTO contributions (guild_id, user_id, category, item_name, quantity, created_at)
+           VALUES (?, ?, ?, ?, ?, ?)''',
+        [(GUILD_ID, i % 20, CATEGORIES[i % 3], f'item{i % 7}', i % 5 + 1,
+          (start + timedelta(minutes=i)).strftime('%Y-%m-%d %H:%M:%S'))
+         for i in range(STREAM_CHUNK_SIZE * 3 + 17)]
+    )
+    await conn.executemany(
+        '''INSERT INTO quantity_changes (guild_id, item_name, category, old_quantity, new_quantity,
+           reason, notes, changed_at, changed_by_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+        [(GUILD_ID, f'item{i % 7}', CATEGORIES[i % 3], 10, 5, 'Audit', None,
+          (start + timedelta(minutes=i, seconds=30)).strftime('%Y-%m-%d %H:%M:%S'), 1)
+         for i in range(0, 600, 7)]
+    )
+    await conn.commit()
+    for user_id in range(3):
+        await db.create_loa_record(GUILD_ID, user_id, '1d', 'Trip', start, start + timedelta(days=1))
+
+
+class _Interaction:
+    def __init__(self):
+        self.guild = SimpleNamespace(id=GUILD_ID, name='Test Guild')
+        self.followup = SimpleNamespace(send=self._send)
+        self.sent = []
+
+    async def _send(self, content=None, embed=None, file=None, **kwargs):
+        self.sent.append((embed, file))
+
+
+async def _run_streaming_queries():
+    print("🧪 Testing streaming query API...")
+
+    db_path = 'test_streaming_queries.db'
+    remove_db(db_path)
+    db = DatabaseManager(db_path)
+    try:
+        await seed(db)
+
+        streamed = [row async for row in db.iter_all_contributions(GUILD_ID)]
+        assert [dict(row) for row in streamed] == [dict(row) for row in await db.get_all_contributions(GUILD_ID)]
+        assert len(streamed) > STREAM_CHUNK_SIZE * 3
+        print(f"✅ iter_all_contributions streams the same {len(streamed)} rows in chunks of {STREAM_CHUNK_SIZE}")
+
+        events = await db.get_all_audit_events(GUILD_ID)
+        assert [e async for e in db.iter_audit_events(GUILD_ID)] == events
+        assert [e async for e in db.iter_audit_events(GUILD_ID, limit=25)] == events[:25]
+        assert await db.count_audit_events(GUILD_ID) == len(events)
+
+        grouped = [e async for e in db.iter_audit_events(GUILD_ID, limit=300, category_order=['Weapons Locker'])]
+        encode = lambda event: json.dumps(event, default=str)
+        assert sorted(map(encode, grouped)) == sorted(map(encode, events[:300]))
+        order = list(dict.fromkeys(e['category'] for e in grouped))
+        assert order == ['Weapons Locker', 'Misc Locker', 'Pistols'], order
+        for category in order:
+            times = [e['occurred_at'] for e in grouped if e['category'] == category]
+            assert times == sorted(times)
+        print("✅ iter_audit_events matches get_all_audit_events and regroups by category")
+
+        # Readers go back to the pool when a stream finishes or is closed early
+        for stream in (db.iter_all_contributions(GUILD_ID), db.iter_audit_events(GUILD_ID)):
+            await stream.__anext__()
+            assert db._read_pool.qsize() < len(db._read_connections)
+            await stream.aclose()
+            assert db._read_pool.qsize() == len(db._read_connections)
+        print("✅ Reader connections are returned after aclose()")
+
+        buffer = io.StringIO()
+        counts = await db.write_guild_export(GUILD_ID, buffer)
+        expected = json.loads(json.dumps(await db.export_guild_data(GUILD_ID), indent=2, default=str))
+        exported = json.loads(buffer.getvalue())
+        expected.pop('export_timestamp')
+        exported.pop('export_timestamp')
+        assert exported == expected
+        assert buffer.getvalue() == json.dumps(dict(json.loads(buffer.getvalue()), **expected), indent=2, default=str)
+        assert counts == {'members': 20, 'contributions': len(streamed), 'loa_records': 3}
+        print(f"✅ write_guild_export streams the export_guild_data document ({counts})")
+
+        # Consumers
+        bot = SimpleNamespace(db=db, get_user=lambda user_id: None)
+        text = await BackupSystem(bot)._format_data_as_text(GUILD_ID)
+        assert f"Total Contributions: {len(streamed)}" in text and "Total LOA Records: 3" in text
+        print("✅ Text export summarizes streamed rows")
+
+        interaction = _Interaction()
+        assert await AuditLogs(bot)._send_audit_file(interaction, None, None)
+        embed, file = interaction.sent[-1]
+        report = file.fp.read()
+        assert f"TOTAL EVENTS PROCESSED: {len(events)}" in report
+        assert report.index("CATEGORY: WEAPONS LOCKER") < report.index("CATEGORY: MISC LOCKER") < report.index("CATEGORY: PISTOLS")
+        assert embed.fields[0].value.startswith(f"**Total Events:** {len(events)}")
+        assert not await AuditLogs(bot)._send_audit_file(interaction, 'no such item', None)
+        print("✅ Audit export file is built from the stream")
+
+        archive_id = await db.create_database_archive(GUILD_ID, 'Season 1', 'desc', 'notes', 1)
+        archive = await db.get_archive_by_id(archive_id)
+        data = archive['archived_data']
+        assert data['total_contributions'] == len(data['contributions']) == len(streamed)
+        assert data['total_audit_events'] == len(events) and len(data['audit_events']) == 1000
+        assert data['audit_events'][0] == json.loads(json.dumps(events[0], default=str))
+        assert await db.get_all_contributions(GUILD_ID) == []
+        print("✅ Archives serialize contributions as they stream")
+    finally:
+        await db.close()
+        remove_db(db_path)
+
+    print("\n🎉 Streaming query tests passed!")
+
+
+def test_streaming_queries():
+    asyncio.run(_run_streaming_queries())
+
+
+if __name__ == "__main__":
+    asyncio.run(_run_streaming_queries())
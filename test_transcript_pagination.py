@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test script for keyset (cursor) pagination of DM transcripts
+"""
+import asyncio
+import sys
+
+sys.path.append('.')
+from db_test_helpers import remove_db
+from utils.database import DatabaseManager
+
+GUILD_ID = 838383
+USER_ID = 5
+OFFICER_ID = 1
+
+
+async def _collect(fetch_page):
+    """Walk every page and return the ids in order"""
+    ids, cursor, pages = [], None, 0
+    while True:
+        rows, cursor = await fetch_page(cursor)
+        ids.extend(row['id'] for row in rows)
+        pages += 1
+        if cursor is None:
+            return ids, pages
+
+
+async def _run_transcript_pagination():
+    print("🧪 Testing transcript pagination...")
+
+    db_path = 'test_transcript_pagination.db'
+    remove_db(db_path)
+    db = DatabaseManager(db_path)
+    try:
+        await db.initialize_guild(GUILD_ID)
+        conn = await db._get_shared_connection()
+        # Several rows share a created_at so the id tie-breaker matters
+        for i in range(23):
+            sender, recipient = (OFFICER_ID, USER_ID) if i % 2 else (USER_ID, OFFICER_ID)
+            await conn.execute('''
+                INSERT INTO dm_transcripts (guild_id, sender_id, recipient_id, message, message_type,
+                                            recipient_type, created_at)
+                VALUES (?, ?, ?, ?, 'outbound', 'user', ?)
+            ''', (GUILD_ID, sender, recipient, f'message {i}', f'2025-01-01 00:00:{i // 3:02d}'))
+        # Another user's conversation and a self-DM edge case
+        await conn.execute('''INSERT INTO dm_transcripts (guild_id, sender_id, recipient_id, message, message_type, recipient_type)
+                              VALUES (?, ?, 9, 'other', 'outbound', 'user')''', (GUILD_ID, OFFICER_ID))
+        await conn.execute('''INSERT INTO dm_transcripts (guild_id, sender_id, recipient_id, message, message_type, recipient_type)
+                              VALUES (?, ?, ?, 'note to self', 'outbound', 'user')''', (GUILD_ID, USER_ID, USER_ID))
+        await db._execute_commit()
+
+        expected = [row['id'] for row in await db.get_user_transcript(GUILD_ID, USER_ID, limit=1000)]
+        expected.sort(key=lambda row_id: row_id, reverse=True)
+        ids, pages = await _collect(lambda cursor: db.get_user_transcript_page(GUILD_ID, USER_ID, 5, cursor))
+        assert len(ids) == 24 and len(set(ids)) == 24, ids
+        assert ids == expected, (ids, expected)
+        assert pages == 5
+        print(f"✅ {len(ids)} transcript entries walked in {pages} pages, newest first, no gaps or repeats")
+
+        rows, cursor = await db.get_user_transcript_page(GUILD_ID, USER_ID, 24)
+        assert len(rows) == 24 and cursor is None
+        print("✅ Last page returns no cursor")
+
+        conversations, pages = await _collect(lambda cursor: db.get_recent_dm_conversations_page(GUILD_ID, 1, cursor))
+        assert len(conversations) == 3 and pages == 3, conversations
+        assert len(await db.get_recent_dm_conversations(GUILD_ID)) == 3
+        print("✅ Conversation list pages with cursors")
+
+        try:
+            await db.get_user_transcript_page(GUILD_ID, USER_ID, 5, 'not-a-cursor')
+            raise AssertionError("invalid cursor accepted")
+        except ValueError:
+            pass
+        print("✅ Malformed cursors are rejected")
+
+        # The cog's paginator walks forward and back with the same cursors
+        from cogs.direct_messaging import TranscriptPaginator
+
+        async def fetch_page(cursor):
+            return await db.get_user_transcript_page(GUILD_ID, USER_ID, 10, cursor)
+
+        view = TranscriptPaginator(fetch_page, lambda entries, page: page)
+        assert await view.load() == 1 and view.newer_page.disabled and not view.older_page.disabled
+        first_page = [e['id'] for e in view.entries]
+        view.page_cursors.append(view.next_cursor)
+        assert await view.load() == 2
+        view.page_cursors.append(view.next_cursor)
+        assert await view.load() == 3 and view.older_page.disabled and len(view.entries) == 4
+        view.page_cursors.pop()
+        view.page_cursors.pop()
+        assert await view.load() == 1 and [e['id'] for e in view.entries] == first_page
+        print("✅ Paginator view moves between pages with opaque cursors")
+
+        # dm_conversations follows deletes and edits of each pair's latest message
+        pair_ids = sorted(row_id for row_id in ids if row_id <= 23)
+        await conn.execute('DELETE FROM dm_transcripts WHERE id = ?', (pair_ids[-1],))
+        await conn.execute("DELETE FROM dm_transcripts WHERE recipient_id = 9")
+        await db._execute_commit()
+        assert [row['id'] for row in await db.get_recent_dm_conversations(GUILD_ID)] == [25, pair_ids[-2]]
+        await conn.execute("UPDATE dm_transcripts SET created_at = '2030-01-01 00:00:00' WHERE id = ?", (pair_ids[0],))
+        await db._execute_commit()
+        conversations = await db.get_recent_dm_conversations(GUILD_ID)
+        cursor = await conn.execute('''
+            SELECT id FROM (
+                SELECT id, created_at, ROW_NUMBER() OVER (
+                    PARTITION BY min(sender_id, recipient_id), max(sender_id, recipient_id)
+                    ORDER BY created_at DESC, id DESC
+                ) AS row_num
+                FROM dm_transcripts WHERE guild_id = ?
+            )
+            WHERE row_num = 1 ORDER BY created_at DESC, id DESC
+        ''', (GUILD_ID,))
+        expected = [row[0] for row in await cursor.fetchall()]
+        assert [row['id'] for row in conversations] == expected == [pair_ids[0], 25], (conversations, expected)
+        print("✅ Conversation list follows deleted and re-dated messages")
+    finally:
+        await db.close()
+        remove_db(db_path)
+
+    print("\n🎉 Transcript pagination tests passed!")
+
+
+def test_transcript_pagination():
+    asyncio.run(_run_transcript_pagination())
+
+
+if __name__ == "__main__":
+    asyncio.run(_run_transcript_pagination())
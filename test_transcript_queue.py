@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Test script for the DM transcript write-behind queue
+"""
+import asyncio
+import os
+import shutil
+import sqlite3
+import sys
+from datetime import datetime, timezone
+
+sys.path.append('.')
+from db_test_helpers import remove_db
+from utils.database import DatabaseManager
+from utils.database_shards import ShardedDatabaseManager
+
+GUILD_ID = 737373
+
+
+def _stored(db_path):
+    """Transcript rows committed to the file, read outside the manager"""
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute('SELECT COUNT(*) FROM dm_transcripts').fetchone()[0]
+    finally:
+        conn.close()
+
+
+async def _queue(db, count, start=0):
+    for i in range(start, start + count):
+        await db.queue_dm_transcript(GUILD_ID, 1, 100 + i, f'message {i}', 'outbound', 'role', role_id=9)
+
+
+async def _run_transcript_queue():
+    print("🧪 Testing DM transcript write-behind queue...")
+
+    db_path = 'test_transcript_queue.db'
+    remove_db(db_path)
+    db = DatabaseManager(db_path, transcript_batch_size=5, transcript_flush_ms=50)
+    try:
+        await db.initialize_database()
+
+        await _queue(db, 3)
+        assert _stored(db_path) == 0, "queued entries are written later"
+        await asyncio.sleep(0.2)
+        assert _stored(db_path) == 3
+        print("✅ A partial batch is written after the flush interval")
+
+        commits = db.get_commit_stats()['commits']
+        await _queue(db, 5, start=3)
+        assert _stored(db_path) == 8, "a full batch is written by the call that fills it"
+        assert db.get_commit_stats()['commits'] == commits + 1
+        print("✅ A full batch is written at once with a single commit")
+
+        await asyncio.sleep(0.2)
+        db._transcript_flush_delay = 60
+        await _queue(db, 2, start=8)
+        page, _ = await db.get_user_transcript_page(GUILD_ID, 1, limit=20)
+        assert len(page) == 10 and page[0]['message'] == 'message 9'
+        assert len(await db.search_transcripts(GUILD_ID, 'message')) == 10
+        print("✅ Transcript reads see entries that are still queued")
+
+        # A failed timed flush is retried on its own, without waiting for another entry
+        db._transcript_flush_task.cancel()
+        db._transcript_flush_task = None
+        db._transcript_flush_delay = 0.05
+        log_dm_transcripts = db.log_dm_transcripts
+        failures = []
+
+        async def fail_once(entries):
+            if not failures:
+                failures.append(len(entries))
+                raise sqlite3.OperationalError('database is locked')
+            return await log_dm_transcripts(entries)
+
+        db.log_dm_transcripts = fail_once
+        await _queue(db, 1, start=10)
+        await asyncio.sleep(0.2)
+        assert failures == [1] and _stored(db_path) == 10
+        await asyncio.sleep(1.0)
+        assert _stored(db_path) == 11 and not db._transcript_queue
+        db.log_dm_transcripts = log_dm_transcripts
+        print("✅ A failed flush is rescheduled with backoff")
+
+        # Entries keep the time they were queued, not the time they were written
+        db._transcript_flush_delay = 60
+        queued_at = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        await _queue(db, 1, start=11)
+        await asyncio.sleep(1.1)
+        await db.flush_dm_transcripts()
+        conn = sqlite3.connect(db_path)
+        created_at = conn.execute("SELECT created_at FROM dm_transcripts WHERE message = 'message 11'").fetchone()[0]
+        conn.close()
+        assert queued_at <= created_at < datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S'), created_at
+        print("✅ Queued entries are stored with the time they were queued")
+
+        # An entry the schema rejects is dropped; the rest of its batch is written
+        await _queue(db, 2, start=12)
+        await db.queue_dm_transcript(GUILD_ID, 1, 200, None, 'outbound', 'role')
+        await _queue(db, 2, start=14)
+        assert _stored(db_path) == 16 and not db._transcript_queue
+        print("✅ A rejected entry is dropped without blocking its batch")
+
+        # Reads and the call that fills the batch log a failed flush instead of raising it
+        async def always_fail(entries):
+            raise sqlite3.OperationalError('database is locked')
+
+        db.log_dm_transcripts = always_fail
+        await _queue(db, 1, start=16)
+        page, _ = await db.get_user_transcript_page(GUILD_ID, 1, limit=50)
+        assert len(page) == 16 and len(db._transcript_queue) == 1
+        assert len(await db.get_recent_dm_conversations(GUILD_ID)) == 16
+        await _queue(db, 4, start=17)
+        assert len(db._transcript_queue) == 5 and _stored(db_path) == 16
+        db.log_dm_transcripts = log_dm_transcripts
+        print("✅ A failed flush stays queued without failing reads or writers")
+
+        # A unit of work that reads transcripts writes the queue inside itself
+        async with db.transaction():
+            page, _ = await db.get_user_transcript_page(GUILD_ID, 1, limit=50)
+        assert not db._transcript_queue and _stored(db_path) == 21
+
+        await _queue(db, 2, start=21)
+        assert _stored(db_path) == 21
+    finally:
+        await db.close()
+    try:
+        assert _stored(db_path) == 23
+        print("✅ close() writes whatever is still queued")
+    finally:
+        remove_db(db_path)
+
+    directory = 'test_transcript_queue_shards'
+    shutil.rmtree(directory, ignore_errors=True)
+    sharded = ShardedDatabaseManager(directory, max_open_shards=1, transcript_flush_ms=60000)
+    try:
+        await _queue(sharded, 3)
+        assert await sharded.flush_dm_transcripts() == 3
+        await _queue(sharded, 2, start=3)
+        await sharded.get_server_config(GUILD_ID + 1)  # evicts the guild's shard
+        assert _stored(os.path.join(directory, f'guild_{GUILD_ID}.db')) == 5
+        print("✅ Sharded storage flushes every open shard and shards flush when closed")
+    finally:
+        await sharded.close()
+        shutil.rmtree(directory, ignore_errors=True)
+
+    print("\n🎉 Transcript queue tests passed!")
+
+
+def test_transcript_queue():
+    asyncio.run(_run_transcript_queue())
+
+
+if __name__ == "__main__":
+    asyncio.run(_run_transcript_queue())
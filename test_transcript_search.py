@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test script for FTS5 DM transcript search
+"""
+import asyncio
+import sys
+
+sys.path.append('.')
+from db_test_helpers import remove_db
+import utils.database as database
+from utils.database import DatabaseManager, TRANSCRIPT_FTS_TABLE
+
+GUILD_ID = 818181
+OTHER_GUILD_ID = 828282
+
+
+async def _run_transcript_search():
+    print("🧪 Testing transcript full-text search...")
+
+    db_path = 'test_transcript_search.db'
+    remove_db(db_path)
+    db = DatabaseManager(db_path)
+    try:
+        await db.initialize_guild(GUILD_ID)
+        messages = [
+            'Meet at the docks tonight',
+            'The docks are closed, meet at the warehouse',
+            'Dockside delivery is late',
+            'Weekly dues reminder',
+            'Meeting moved to Friday',
+        ]
+        ids = []
+        for i, message in enumerate(messages):
+            ids.append(await db.log_dm_transcript(GUILD_ID, 1, 100 + i, message, 'outbound', 'user'))
+        await db.log_dm_transcript(OTHER_GUILD_ID, 1, 200, 'docks docks docks', 'outbound', 'user')
+
+        results = await db.search_transcripts(GUILD_ID, 'docks')
+        assert [r['id'] for r in results] and {r['id'] for r in results} == {ids[0], ids[1]}, results
+        assert '**docks**' in results[0]['snippet'].lower()
+        print("✅ Word search is scoped to the guild and highlights matches")
+
+        results = await db.search_transcripts(GUILD_ID, '"meet at the docks"')
+        assert [r['id'] for r in results] == [ids[0]]
+        print("✅ Phrase queries match exact phrases")
+
+        results = await db.search_transcripts(GUILD_ID, 'dock*')
+        assert {r['id'] for r in results} == {ids[0], ids[1], ids[2]}
+        results = await db.search_transcripts(GUILD_ID, 'meet*')
+        assert {r['id'] for r in results} == {ids[0], ids[1], ids[4]}
+        print("✅ Prefix queries match word prefixes")
+
+        # Only the guild's most recent window of matches is ranked
+        window = database.TRANSCRIPT_SEARCH_WINDOW
+        database.TRANSCRIPT_SEARCH_WINDOW = 2
+        try:
+            results = await db.search_transcripts(GUILD_ID, 'dock*')
+            assert {r['id'] for r in results} == {ids[1], ids[2]}, results
+        finally:
+            database.TRANSCRIPT_SEARCH_WINDOW = window
+        print("✅ Ranking is bounded to the most recent matches")
+
+        # Newer matches in another guild don't push this guild out of the window
+        dragon_id = await db.log_dm_transcript(GUILD_ID, 1, 150, 'A dragon was sighted', 'outbound', 'user')
+        for i in range(6):
+            await db.log_dm_transcript(OTHER_GUILD_ID, 1, 300 + i, f'dragon sighting {i}', 'outbound', 'user')
+        database.TRANSCRIPT_SEARCH_WINDOW = 5
+        try:
+            results = await db.search_transcripts(GUILD_ID, 'dragon')
+            assert [r['id'] for r in results] == [dragon_id], results
+            assert len(await db.search_transcripts(OTHER_GUILD_ID, 'dragon')) == 5
+        finally:
+            database.TRANSCRIPT_SEARCH_WINDOW = window
+        print("✅ The ranking window is computed per guild")
+
+        # FTS5 syntax in user input is searched literally instead of erroring
+        for raw in ('docks OR', 'NOT (', 'message:docks', '"unterminated', '*'):
+            await db.search_transcripts(GUILD_ID, raw)
+        print("✅ Operator characters in search input are handled safely")
+
+        # Triggers keep the index in sync with updates and deletes
+        conn = await db._get_shared_connection()
+        await conn.execute("UPDATE dm_transcripts SET message = 'Harbor pickup' WHERE id = ?", (ids[2],))
+        await conn.execute('DELETE FROM dm_transcripts WHERE id = ?', (ids[0],))
+        await db._execute_commit()
+        assert {r['id'] for r in await db.search_transcripts(GUILD_ID, 'dock*')} == {ids[1]}
+        assert [r['id'] for r in await db.search_transcripts(GUILD_ID, 'harbor')] == [ids[2]]
+        print("✅ Index follows updates and deletes")
+
+        # Backfill re-creates a dropped index from existing rows
+        await conn.execute(f'DROP TABLE {TRANSCRIPT_FTS_TABLE}')
+        await db._execute_commit()
+        assert await db.rebuild_transcript_search_index() == 12
+        assert {r['id'] for r in await db.search_transcripts(GUILD_ID, 'meet*')} == {ids[1], ids[4]}
+        print("✅ Rebuild backfills the index from existing transcripts")
+    finally:
+        await db.close()
+        remove_db(db_path)
+
+    print("\n🎉 Transcript search tests passed!")
+
+
+def test_transcript_search():
+    asyncio.run(_run_transcript_search())
+
+
+if __name__ == "__main__":
+    asyncio.run(_run_transcript_search())
@@ -1,33 +1,719 @@
 import aiosqlite
+import base64
+import gzip
 import json
-from datetime import datetime
+import re
+import shutil
+import sqlite3
+import tempfile
+import zlib
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
 import os
 import asyncio
+import contextvars
 import logging
-from typing import List, Dict, Optional, Any
+from contextlib import aclosing, asynccontextmanager
+from typing import List, Dict, Optional, Any, Tuple, AsyncIterator, TextIO
+
+from utils import db_stats, db_supervisor
+from utils.db_records import (
+    ContributionRecord, DuesPaymentRecord, LOARecord, MemberRecord, TranscriptRecord, from_epoch, make_row_factory
+)
 
 # Set up logger for this module
 logger = logging.getLogger(__name__)
 
+# (DatabaseManager, connection, owning task) of the unit of work open in the current
+# task, if any. Write methods called inside `async with db.transaction():` pick up
+# its connection and skip their own commit. Tasks spawned inside the block inherit
+# the context but not the transaction, hence the owner check.
+_active_transaction = contextvars.ContextVar('db_active_transaction', default=None)
+
+# Secondary indexes backing the hot query paths (LOA expiry loop, inventory,
+# transcripts, audit log, dues joins). Keyed by index name -> (table, columns).
+# test_query_plans.py runs EXPLAIN QUERY PLAN against these to catch regressions.
+# This is the set the secondary_indexes migration (6) creates, so it must not
+# change; later migrations add (RETENTION_INDEXES, EPOCH_INDEXES) and drop
+# (SUPERSEDED_INDEXES) indexes themselves.
+SECONDARY_INDEXES = {
+    'idx_loa_records_pending_expiry': ('loa_records', 'is_active, is_expired, end_time'),
+    'idx_loa_records_guild_user': ('loa_records', 'guild_id, user_id'),
+    'idx_contributions_guild_item': ('contributions', 'guild_id, category, item_name, quantity'),
+    'idx_dm_transcripts_guild_created': ('dm_transcripts', 'guild_id, created_at'),
+    'idx_dm_transcripts_guild_sender': ('dm_transcripts', 'guild_id, sender_id, created_at'),
+    'idx_dm_transcripts_guild_recipient': ('dm_transcripts', 'guild_id, recipient_id, created_at'),
+    'idx_database_archives_guild_created': ('database_archives', 'guild_id, created_at'),
+    'idx_quantity_changes_guild_item': ('quantity_changes', 'guild_id, item_name, changed_at'),
+    'idx_dues_payments_period': ('dues_payments', 'guild_id, dues_period_id'),
+    'idx_prospect_tasks_prospect': ('prospect_tasks', 'prospect_id, status'),
+    'idx_prospect_tasks_due': ('prospect_tasks', 'guild_id, status, due_date'),
+    'idx_prospect_notes_prospect': ('prospect_notes', 'prospect_id, is_strike'),
+    'idx_prospect_votes_prospect': ('prospect_votes', 'prospect_id, status'),
+}
+# Created by the retention_policies migration (10) for the audit retention scan
+RETENTION_INDEXES = {
+    'idx_quantity_changes_guild_changed': ('quantity_changes', 'guild_id, changed_at'),
+}
+
+# Integer epoch (UTC seconds) copies of the timestamps that are range-scanned or
+# sorted on. The TEXT columns hold a mix of str(datetime), isoformat() and
+# CURRENT_TIMESTAMP values that do not compare correctly as strings. The epoch
+# columns are written next to them, and triggers fill them in for writers that
+# only set the TEXT column. (table, text column) -> (epoch column, whether naive
+# text in the column is UTC, i.e. a CURRENT_TIMESTAMP default, not local time)
+EPOCH_COLUMNS = {
+    ('loa_records', 'end_time'): ('end_time_epoch', False),
+    ('prospect_tasks', 'due_date'): ('due_date_epoch', False),
+    ('contributions', 'created_at'): ('created_at_epoch', True),
+    ('quantity_changes', 'changed_at'): ('changed_at_epoch', False),
+}
+# Indexes on the epoch columns (created by the epoch_time_columns migration, 12),
+# and the TEXT-column indexes from SECONDARY_INDEXES it drops in their place
+EPOCH_INDEXES = {
+    'idx_loa_records_pending_expiry_epoch': ('loa_records', 'is_active, is_expired, end_time_epoch'),
+    'idx_prospect_tasks_due_epoch': ('prospect_tasks', 'guild_id, status, due_date_epoch'),
+    'idx_contributions_guild_created_epoch': ('contributions', 'guild_id, created_at_epoch'),
+    'idx_quantity_changes_guild_changed_epoch': ('quantity_changes', 'guild_id, changed_at_epoch'),
+}
+SUPERSEDED_INDEXES = ('idx_loa_records_pending_expiry', 'idx_prospect_tasks_due')
+
+# Internal query helpers; query timing charges their statements to whoever called them
+QUERY_HELPER_FUNCTIONS = frozenset({'_fetchall', '_fetchone', '_iterate', '_execute_query', '_execute_commit'})
+
+# Rows pulled per fetchmany() call by the streaming iterators (DatabaseManager._iterate)
+STREAM_CHUNK_SIZE = 500
+
+# Defaults written to server_configs the first time a guild is initialized
+DEFAULT_MEMBERSHIP_ROLES_JSON = json.dumps([
+    "President", "Vice President", "Sergeant At Arms",
+    "Secretary", "Treasurer", "Road Captain", "Tailgunner",
+    "Enforcer", "Full Patch", "Full Patch/Nomad"
+])
+DEFAULT_CONTRIBUTION_CATEGORIES_JSON = json.dumps([
+    "Body Armour & Medical", "Pistols", "Rifles", "SMGs",
+    "Heist Items", "Dirty Cash", "Drug Items", "Mech Shop", "Crafting Items"
+])
+
+# Ordered schema migrations: (version, name, DatabaseManager method name).
+# Append new migrations with the next version number; never renumber or edit
+# one that has shipped. Applied versions are recorded in schema_version.
+SCHEMA_MIGRATIONS = [
+    (1, 'base_tables', '_create_base_tables'),
+    (2, 'loa_notification_columns', '_migrate_loa_notification_columns'),
+    (3, 'dm_users_column', '_migrate_dm_users_column'),
+    (4, 'forum_channel_columns', '_migrate_forum_channel_columns'),
+    (5, 'dues_periods_updated_at', '_migrate_dues_periods_updated_at'),
+    (6, 'secondary_indexes', '_create_indexes'),
+    (7, 'transcript_search_index', '_create_transcript_search_index'),
+    (8, 'inventory_totals', '_create_inventory_totals'),
+    (9, 'archive_chunks', '_migrate_archive_chunks'),
+    (10, 'retention_policies', '_migrate_retention_policies'),
+    (11, 'dues_period_totals', '_create_dues_period_totals'),
+    (12, 'epoch_time_columns', '_migrate_epoch_time_columns'),
+    (13, 'incremental_vacuum', '_enable_incremental_vacuum'),
+    (14, 'dm_conversations', '_create_dm_conversations'),
+]
+SCHEMA_VERSION_TABLE = '''
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TEXT NOT NULL
+    )
+'''
+# Migrations that cannot run inside a transaction (VACUUM). They are recorded
+# after they finish, so they must be safe to run again after a crash.
+NON_TRANSACTIONAL_MIGRATIONS = frozenset({'incremental_vacuum'})
+# PRAGMA busy_timeout while migrations run. Another process migrating the same
+# file takes the write lock for each migration back to back, which can outlast
+# the writer's WRITER_RETRY_BUDGET_S; startup can wait.
+MIGRATION_BUSY_TIMEOUT_MS = 60000
+
+# Per-guild retention settings on server_configs, in days (NULL = keep forever):
+# policy key -> column
+RETENTION_COLUMNS = {
+    'transcripts': 'transcript_retention_days',
+    'audit': 'audit_retention_days',
+    'loa': 'loa_retention_days',
+}
+# Rows deleted (or rolled up) per write transaction by apply_retention, and
+# free pages returned per PRAGMA incremental_vacuum step by incremental_vacuum
+RETENTION_BATCH_SIZE = 500
+VACUUM_PAGES_PER_STEP = 1000
+
+# Rows sampled per index by the ANALYZE that optimize() runs (PRAGMA analysis_limit);
+# enough for the planner's estimates while keeping the pass cheap on large tables
+OPTIMIZE_ANALYSIS_LIMIT = 400
+# Index names in EXPLAIN QUERY PLAN detail lines, for get_index_usage
+INDEX_IN_PLAN = re.compile(r'USING (?:COVERING )?INDEX (\S+)')
+
+# Named connection PRAGMA sets, picked with the database_storage_profile config key.
+# cache_size is per connection (negative = KiB; the writer and every pooled reader
+# get their own), mmap_size is in bytes and maps the file through the OS page cache
+# shared by all connections, wal_autocheckpoint is in WAL pages and
+# journal_size_limit (bytes) is what the WAL is truncated back to after a checkpoint.
+# The last two only apply to the writer, which runs the checkpoints.
+STORAGE_PROFILES = {
+    'low-memory': {'cache_size': -2000, 'mmap_size': 0, 'wal_autocheckpoint': 1000,
+                   'journal_size_limit': 4 * 1024 * 1024},
+    'balanced': {'cache_size': -8000, 'mmap_size': 64 * 1024 * 1024, 'wal_autocheckpoint': 1000,
+                 'journal_size_limit': 32 * 1024 * 1024},
+    'throughput': {'cache_size': -32000, 'mmap_size': 256 * 1024 * 1024, 'wal_autocheckpoint': 4000,
+                   'journal_size_limit': 128 * 1024 * 1024},
+}
+DEFAULT_STORAGE_PROFILE = 'balanced'
+WRITER_ONLY_PRAGMAS = ('wal_autocheckpoint', 'journal_size_limit')
+
+# Pages copied per sqlite3_backup_step() call by backup_to (1024 x 4 KiB pages = 4 MiB)
+# and the pause between steps, which lets the writer commit while a backup runs.
+BACKUP_PAGES_PER_STEP = 1024
+BACKUP_STEP_SLEEP = 0.01
+
+# Archive payload sections. Each is stored in database_archive_chunks as
+# zlib-compressed JSON chunks of up to ARCHIVE_CHUNK_ROWS rows
+# ({"columns": [...], "rows": [[...], ...]}), so listing archives never reads
+# a payload and opening one decodes only the sections asked for.
+ARCHIVE_SECTIONS = ('contributions', 'audit_events')
+ARCHIVE_CHUNK_ROWS = 500
+# Columns get_database_archives returns (everything but the archived_data header)
+ARCHIVE_METADATA_COLUMNS = (
+    'id, guild_id, archive_name, description, notes, created_at, created_by_id, '
+    'total_contributions, total_audit_events, raw_size, stored_size'
+)
+
+# Per-item running totals of contributions.quantity. Triggers keep them in step
+# with every insert/update/delete on contributions (including the cogs that
+# write to it directly), inside the writer's own transaction.
+INVENTORY_TOTALS_TRIGGERS = {
+    'inventory_totals_insert': '''
+        CREATE TRIGGER IF NOT EXISTS inventory_totals_insert AFTER INSERT ON contributions BEGIN
+            INSERT INTO inventory_totals (guild_id, category, item_name, total_quantity, contribution_count, updated_at)
+            VALUES (new.guild_id, new.category, new.item_name, COALESCE(new.quantity, 0), 1, CURRENT_TIMESTAMP)
+            ON CONFLICT(guild_id, category, item_name) DO UPDATE SET
+                total_quantity = total_quantity + excluded.total_quantity,
+                contribution_count = contribution_count + 1,
+                updated_at = excluded.updated_at;
+        END
+    ''',
+    'inventory_totals_delete': '''
+        CREATE TRIGGER IF NOT EXISTS inventory_totals_delete AFTER DELETE ON contributions BEGIN
+            UPDATE inventory_totals
+            SET total_quantity = total_quantity - COALESCE(old.quantity, 0),
+                contribution_count = contribution_count - 1,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE guild_id = old.guild_id AND category = old.category AND item_name = old.item_name;
+            DELETE FROM inventory_totals
+            WHERE guild_id = old.guild_id AND category = old.category AND item_name = old.item_name
+            AND contribution_count <= 0;
+        END
+    ''',
+    'inventory_totals_update': '''
+        CREATE TRIGGER IF NOT EXISTS inventory_totals_update
+        AFTER UPDATE OF guild_id, category, item_name, quantity ON contributions BEGIN
+            UPDATE inventory_totals
+            SET total_quantity = total_quantity - COALESCE(old.quantity, 0),
+                contribution_count = contribution_count - 1,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE guild_id = old.guild_id AND category = old.category AND item_name = old.item_name;
+            DELETE FROM inventory_totals
+            WHERE guild_id = old.guild_id AND category = old.category AND item_name = old.item_name
+            AND contribution_count <= 0;
+            INSERT INTO inventory_totals (guild_id, category, item_name, total_quantity, contribution_count, updated_at)
+            VALUES (new.guild_id, new.category, new.item_name, COALESCE(new.quantity, 0), 1, CURRENT_TIMESTAMP)
+            ON CONFLICT(guild_id, category, item_name) DO UPDATE SET
+                total_quantity = total_quantity + excluded.total_quantity,
+                contribution_count = contribution_count + 1,
+                updated_at = excluded.updated_at;
+        END
+    ''',
+}
+
+
+# Latest dm_transcripts row per (guild, user pair), so the conversation list
+# seeks on idx_dm_conversations_recent instead of ranking the guild's history.
+# A pair is keyed by min/max of sender and recipient; when the latest row is
+# deleted or moved, the pair's next latest is found through
+# idx_dm_transcripts_guild_pair.
+DM_CONVERSATION_PAIR = 'min({ref}sender_id, {ref}recipient_id), max({ref}sender_id, {ref}recipient_id)'
+DM_CONVERSATION_UPSERT = f'''
+            INSERT INTO dm_conversations (guild_id, user_low, user_high, last_created_at, last_id)
+            VALUES (new.guild_id, {DM_CONVERSATION_PAIR.format(ref='new.')}, new.created_at, new.id)
+            ON CONFLICT(guild_id, user_low, user_high) DO UPDATE SET
+                last_created_at = excluded.last_created_at,
+                last_id = excluded.last_id
+            WHERE (excluded.last_created_at, excluded.last_id) > (last_created_at, last_id);'''
+DM_CONVERSATION_RESEEK = f'''
+            DELETE FROM dm_conversations
+            WHERE guild_id = old.guild_id AND (user_low, user_high) = ({DM_CONVERSATION_PAIR.format(ref='old.')})
+            AND last_id = old.id;
+            INSERT OR IGNORE INTO dm_conversations (guild_id, user_low, user_high, last_created_at, last_id)
+            SELECT guild_id, {DM_CONVERSATION_PAIR.format(ref='t.')}, created_at, id
+            FROM dm_transcripts t
+            WHERE guild_id = old.guild_id AND ({DM_CONVERSATION_PAIR.format(ref='t.')}) = ({DM_CONVERSATION_PAIR.format(ref='old.')})
+            AND NOT EXISTS (
+                SELECT 1 FROM dm_conversations
+                WHERE guild_id = old.guild_id AND (user_low, user_high) = ({DM_CONVERSATION_PAIR.format(ref='old.')})
+            )
+            ORDER BY created_at DESC, id DESC
+            LIMIT 1;'''
+DM_CONVERSATION_TRIGGERS = {
+    'dm_conversations_insert': f'''
+        CREATE TRIGGER IF NOT EXISTS dm_conversations_insert AFTER INSERT ON dm_transcripts BEGIN
+            {DM_CONVERSATION_UPSERT}
+        END
+    ''',
+    'dm_conversations_delete': f'''
+        CREATE TRIGGER IF NOT EXISTS dm_conversations_delete AFTER DELETE ON dm_transcripts BEGIN
+            {DM_CONVERSATION_RESEEK}
+        END
+    ''',
+    'dm_conversations_update': f'''
+        CREATE TRIGGER IF NOT EXISTS dm_conversations_update
+        AFTER UPDATE OF guild_id, sender_id, recipient_id, created_at ON dm_transcripts BEGIN
+            {DM_CONVERSATION_RESEEK}
+            {DM_CONVERSATION_UPSERT}
+        END
+    ''',
+}
+
+def _dues_totals_delta(ref: str, sign: str) -> str:
+    """SET clause adding (sign '+') or removing (sign '-') one dues_payments row, named ref, from dues_period_totals"""
+    return f'''
+        payment_records = payment_records {sign} 1,
+        paid_count = paid_count {sign} ({ref}.payment_status IS 'paid'),
+        unpaid_count = unpaid_count {sign} ({ref}.payment_status IS 'unpaid'),
+        partial_count = partial_count {sign} ({ref}.payment_status IS 'partial'),
+        exempt_count = exempt_count {sign} ({ref}.is_exempt IS 1),
+        billable_count = billable_count {sign} ({ref}.is_exempt IS 0),
+        total_collected = total_collected {sign} COALESCE({ref}.amount_paid, 0)'''
+
+
+def _dues_totals_payment_sql(ref: str, sign: str) -> str:
+    """Apply one dues_payments row to its period's totals if it belongs to an active member"""
+    return f'''
+            UPDATE dues_period_totals SET {_dues_totals_delta(ref, sign)}
+            WHERE dues_period_id = {ref}.dues_period_id
+            AND EXISTS (SELECT 1 FROM members m WHERE m.guild_id = {ref}.guild_id
+                        AND m.user_id = {ref}.user_id AND m.status = 'Active');'''
+
+
+def _dues_totals_member_sql(ref: str, sign: str) -> str:
+    """Count a member (and all their payments) in or out of their guild's period totals"""
+    return f'''
+            UPDATE dues_period_totals SET active_members = active_members {sign} 1
+            WHERE guild_id = {ref}.guild_id;
+            UPDATE dues_period_totals SET {_dues_totals_delta('p', sign)}
+            FROM dues_payments p
+            WHERE p.dues_period_id = dues_period_totals.dues_period_id
+            AND p.guild_id = {ref}.guild_id AND p.user_id = {ref}.user_id;'''
+
+
+# Per-period dues counters behind get_dues_collection_summary and
+# get_treasury_summary, counted over the guild's Active members like those
+# summaries always were. Triggers on dues_payments, members and dues_periods
+# keep them in step inside the writing statement's transaction; expected
+# amounts are due_amount * billable_count at read time.
+DUES_TOTALS_TRIGGERS = {
+    'dues_totals_payment_insert': f'''
+        CREATE TRIGGER IF NOT EXISTS dues_totals_payment_insert AFTER INSERT ON dues_payments BEGIN
+            {_dues_totals_payment_sql('new', '+')}
+        END
+    ''',
+    'dues_totals_payment_delete': f'''
+        CREATE TRIGGER IF NOT EXISTS dues_totals_payment_delete AFTER DELETE ON dues_payments BEGIN
+            {_dues_totals_payment_sql('old', '-')}
+        END
+    ''',
+    'dues_totals_payment_update': f'''
+        CREATE TRIGGER IF NOT EXISTS dues_totals_payment_update AFTER UPDATE ON dues_payments BEGIN
+            {_dues_totals_payment_sql('old', '-')}
+            {_dues_totals_payment_sql('new', '+')}
+        END
+    ''',
+    'dues_totals_member_insert': f'''
+        CREATE TRIGGER IF NOT EXISTS dues_totals_member_insert AFTER INSERT ON members
+        WHEN new.status = 'Active' BEGIN
+            {_dues_totals_member_sql('new', '+')}
+        END
+    ''',
+    'dues_totals_member_delete': f'''
+        CREATE TRIGGER IF NOT EXISTS dues_totals_member_delete AFTER DELETE ON members
+        WHEN old.status = 'Active' BEGIN
+            {_dues_totals_member_sql('old', '-')}
+        END
+    ''',
+    'dues_totals_member_activate': f'''
+        CREATE TRIGGER IF NOT EXISTS dues_totals_member_activate AFTER UPDATE OF status ON members
+        WHEN old.status IS NOT 'Active' AND new.status = 'Active' BEGIN
+            {_dues_totals_member_sql('new', '+')}
+        END
+    ''',
+    'dues_totals_member_deactivate': f'''
+        CREATE TRIGGER IF NOT EXISTS dues_totals_member_deactivate AFTER UPDATE OF status ON members
+        WHEN old.status = 'Active' AND new.status IS NOT 'Active' BEGIN
+            {_dues_totals_member_sql('old', '-')}
+        END
+    ''',
+    'dues_totals_period_insert': '''
+        CREATE TRIGGER IF NOT EXISTS dues_totals_period_insert AFTER INSERT ON dues_periods BEGIN
+            INSERT INTO dues_period_totals (dues_period_id, guild_id, active_members)
+            VALUES (new.id, new.guild_id,
+                    (SELECT COUNT(*) FROM members WHERE guild_id = new.guild_id AND status = 'Active'));
+        END
+    ''',
+    'dues_totals_period_delete': '''
+        CREATE TRIGGER IF NOT EXISTS dues_totals_period_delete AFTER DELETE ON dues_periods BEGIN
+            DELETE FROM dues_period_totals WHERE dues_period_id = old.id;
+        END
+    ''',
+}
+
+# dues_period_totals recomputed from scratch (used to fill, rebuild and verify it)
+DUES_TOTALS_RECOMPUTE = '''
+    SELECT per.id AS dues_period_id, per.guild_id,
+           (SELECT COUNT(*) FROM members m WHERE m.guild_id = per.guild_id AND m.status = 'Active') AS active_members,
+           COUNT(dp.id) AS payment_records,
+           COALESCE(SUM(dp.payment_status IS 'paid'), 0) AS paid_count,
+           COALESCE(SUM(dp.payment_status IS 'unpaid'), 0) AS unpaid_count,
+           COALESCE(SUM(dp.payment_status IS 'partial'), 0) AS partial_count,
+           COALESCE(SUM(dp.is_exempt IS 1), 0) AS exempt_count,
+           COALESCE(SUM(dp.is_exempt IS 0), 0) AS billable_count,
+           COALESCE(SUM(dp.amount_paid), 0) AS total_collected
+    FROM dues_periods per
+    LEFT JOIN (
+        SELECT p.* FROM dues_payments p
+        JOIN members m ON m.guild_id = p.guild_id AND m.user_id = p.user_id AND m.status = 'Active'
+    ) dp ON dp.dues_period_id = per.id
+    {where}
+    GROUP BY per.id
+'''
+DUES_TOTALS_COUNTERS = ('active_members', 'payment_records', 'paid_count', 'unpaid_count', 'partial_count',
+                        'exempt_count', 'billable_count', 'total_collected')
+
+# Prospect list with task/note counts. Each count is its own correlated subquery
+# answered from idx_prospect_tasks_prospect / idx_prospect_notes_prospect, so
+# tasks and notes are never joined against each other (tasks x notes rows per prospect).
+PROSPECT_LIST_QUERY = '''
+    SELECT p.*,
+           sponsor.discord_name as sponsor_name,
+           prospect.discord_name as prospect_name,
+           (SELECT COUNT(*) FROM prospect_tasks t WHERE t.prospect_id = p.id) as total_tasks,
+           (SELECT COUNT(*) FROM prospect_tasks t WHERE t.prospect_id = p.id AND t.status = 'completed') as completed_tasks,
+           (SELECT COUNT(*) FROM prospect_tasks t WHERE t.prospect_id = p.id AND t.status = 'failed') as failed_tasks,
+           (SELECT COUNT(*) FROM prospect_notes n WHERE n.prospect_id = p.id) as total_notes,
+           (SELECT COUNT(*) FROM prospect_notes n WHERE n.prospect_id = p.id AND n.is_strike = TRUE) as strike_count
+    FROM prospects p
+    LEFT JOIN members sponsor ON p.guild_id = sponsor.guild_id AND p.sponsor_id = sponsor.user_id
+    LEFT JOIN members prospect ON p.guild_id = prospect.guild_id AND p.user_id = prospect.user_id
+    WHERE p.guild_id = ? AND {status_filter}
+    ORDER BY {order_by}
+'''
+
+# External-content FTS5 index over dm_transcripts.message, kept in sync by triggers
+TRANSCRIPT_FTS_TABLE = 'dm_transcripts_fts'
+TRANSCRIPT_FTS_TRIGGERS = {
+    'dm_transcripts_fts_insert': '''
+        CREATE TRIGGER IF NOT EXISTS dm_transcripts_fts_insert AFTER INSERT ON dm_transcripts BEGIN
+            INSERT INTO dm_transcripts_fts (rowid, message) VALUES (new.id, new.message);
+        END
+    ''',
+    'dm_transcripts_fts_delete': '''
+        CREATE TRIGGER IF NOT EXISTS dm_transcripts_fts_delete AFTER DELETE ON dm_transcripts BEGIN
+            INSERT INTO dm_transcripts_fts (dm_transcripts_fts, rowid, message) VALUES ('delete', old.id, old.message);
+        END
+    ''',
+    'dm_transcripts_fts_update': '''
+        CREATE TRIGGER IF NOT EXISTS dm_transcripts_fts_update AFTER UPDATE OF message ON dm_transcripts BEGIN
+            INSERT INTO dm_transcripts_fts (dm_transcripts_fts, rowid, message) VALUES ('delete', old.id, old.message);
+            INSERT INTO dm_transcripts_fts (rowid, message) VALUES (new.id, new.message);
+        END
+    ''',
+}
+
+# Relevance ranking scores only a guild's most recent N matches of a query, so
+# very common terms don't have to bm25-score every transcript ever logged
+TRANSCRIPT_SEARCH_WINDOW = 5000
+
+# DM transcript write-behind: queued entries are written with one executemany
+# once TRANSCRIPT_BATCH_SIZE are waiting or TRANSCRIPT_FLUSH_MS after the first.
+# A failed flush is left queued and retried by the timer with doubling delays up to
+# TRANSCRIPT_RETRY_MAX_S.
+TRANSCRIPT_BATCH_SIZE = 50
+TRANSCRIPT_FLUSH_MS = 500
+TRANSCRIPT_RETRY_MAX_S = 60
+# created_at is NULL (= CURRENT_TIMESTAMP) for direct writes; queued entries carry
+# the UTC time they were queued, in the same format
+TRANSCRIPT_INSERT = '''
+    INSERT INTO dm_transcripts (
+        guild_id, sender_id, recipient_id, role_id,
+        message, message_type, recipient_type, attachments, created_at
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+'''
+
+def _encode_page_cursor(created_at: Any, row_id: int) -> str:
+    """Encode a (created_at, id) keyset position as an opaque page cursor"""
+    payload = json.dumps([str(created_at), row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def _decode_page_cursor(cursor: str) -> Tuple[str, int]:
+    """Decode a page cursor back into its (created_at, id) keyset position"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return str(created_at), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid page cursor: {cursor!r}") from e
+
+def _redistribute_quantities(contributions: List[Tuple[int, int]],
+                             new_total: int) -> Tuple[List[Tuple[int, int]], List[Tuple[int]]]:
+    """Spread new_total over an item's contributions in proportion to their current quantities.
+    
+    contributions are (id, quantity) pairs, oldest first. Each row gets its floored
+    share and the last row takes the remainder; rows that end up at 0 are deleted.
+    Returns (updates as (quantity, id), deletes as (id,)) ready for executemany.
+    """
+    if new_total == 0:
+        return [], [(contrib_id,) for contrib_id, _ in contributions]
+    
+    total_current = sum(quantity or 0 for _, quantity in contributions)
+    if total_current <= 0:
+        # If all current quantities are 0, just update the first one
+        return [(new_total, contributions[0][0])], []
+    
+    updates, deletes = [], []
+    remaining_total = new_total
+    last_index = len(contributions) - 1
+    for i, (contrib_id, current_qty) in enumerate(contributions):
+        if i == last_index:
+            # Last contribution gets the remainder
+            new_qty = max(0, remaining_total)
+        else:
+            # Proportional distribution
+            new_qty = max(0, int(new_total * ((current_qty or 0) / total_current)))
+        remaining_total -= new_qty
+        if new_qty == 0:
+            # Remove contributions with 0 quantity
+            deletes.append((contrib_id,))
+        elif new_qty != current_qty:
+            updates.append((new_qty, contrib_id))
+    return updates, deletes
+
+_FTS_TERM_PATTERN = re.compile(r'"([^"]*)"|(\S+)')
+
+def _fts_match_query(search_term: str) -> Optional[str]:
+    """Turn user search text into a safe FTS5 MATCH expression.
+    
+    "quoted text" becomes a phrase and a trailing * makes a prefix term; every
+    other character is searched literally, so user input can't inject FTS5
+    operators. Returns None when nothing searchable is left.
+    """
+    terms = []
+    for phrase, word in _FTS_TERM_PATTERN.findall(search_term or ''):
+        text, prefix = (phrase, False) if phrase else (word.rstrip('*'), word.endswith('*'))
+        if not text.strip():
+            continue
+        quoted = '"' + text.replace('"', '""') + '"'
+        terms.append(quoted + '*' if prefix else quoted)
+    return ' '.join(terms) if terms else None
+
+
+def to_epoch(value) -> Optional[int]:
+    """Epoch seconds for a datetime or ISO timestamp string
+    
+    Naive values are local time, as written by datetime.now(); aware values
+    (and strings with a 'Z' or +HH:MM suffix) keep their offset.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return int(value.timestamp())
+
+
+def epoch_sql(column: str, naive_is_utc: bool = False) -> str:
+    """SQL expression converting a stored timestamp column to epoch seconds, like to_epoch
+    
+    Naive text is read as local time (the 'utc' modifier converts from it)
+    unless naive_is_utc, for CURRENT_TIMESTAMP defaults.
+    """
+    naive = f"strftime('%s', {column})" if naive_is_utc else f"strftime('%s', {column}, 'utc')"
+    return f'''CASE WHEN typeof({column}) IN ('integer', 'real') THEN CAST({column} AS INTEGER)
+                WHEN {column} GLOB '*[+-][0-9][0-9]:[0-9][0-9]' OR {column} GLOB '*Z'
+                THEN CAST(strftime('%s', {column}) AS INTEGER)
+                ELSE CAST({naive} AS INTEGER) END'''
+
+
+def resolve_storage_profile(profile=DEFAULT_STORAGE_PROFILE) -> Dict[str, int]:
+    """PRAGMA values for a storage profile
+    
+    Args:
+        profile: A STORAGE_PROFILES name, or a dict that overrides some of
+            the default profile's values ({'name': ...} picks the base profile)
+    """
+    overrides = {}
+    if isinstance(profile, dict):
+        overrides = {key: value for key, value in profile.items() if key != 'name'}
+        profile = profile.get('name', DEFAULT_STORAGE_PROFILE)
+    if profile not in STORAGE_PROFILES:
+        logger.warning(f"Unknown storage profile {profile!r}, using {DEFAULT_STORAGE_PROFILE!r} "
+                       f"(choose from {', '.join(STORAGE_PROFILES)})")
+        profile = DEFAULT_STORAGE_PROFILE
+    pragmas = dict(STORAGE_PROFILES[profile])
+    for key, value in overrides.items():
+        if key in pragmas:
+            pragmas[key] = int(value)
+        else:
+            logger.warning(f"Ignoring unknown storage profile setting {key!r}")
+    return pragmas
+
+
+async def backup_sqlite_file(db_path: str, dest_path: str, pages: int = BACKUP_PAGES_PER_STEP) -> Dict[str, int]:
+    """Copy a live SQLite database to a gzip file at dest_path with the online backup API
+    
+    The snapshot goes to a temp file next to dest_path and is then gzipped in
+    a worker thread, so the database is never read into memory on the event loop.
+    """
+    dest_dir = os.path.dirname(os.path.abspath(dest_path))
+    os.makedirs(dest_dir, exist_ok=True)
+    fd, snapshot_path = tempfile.mkstemp(suffix='.db', dir=dest_dir)
+    os.close(fd)
+    progress = {'pages': 0}
+    
+    def on_progress(status, remaining, total):
+        progress['pages'] = total
+    
+    try:
+        source = await aiosqlite.connect(db_path, timeout=30.0)
+        try:
+            target = await aiosqlite.connect(snapshot_path)
+            try:
+                await source.backup(target, pages=pages, progress=on_progress, sleep=BACKUP_STEP_SLEEP)
+            finally:
+                await target.close()
+        finally:
+            await source.close()
+        
+        raw_size = os.path.getsize(snapshot_path)
+        await asyncio.to_thread(_gzip_file, snapshot_path, dest_path)
+    except Exception as e:
+        logger.error(f"Database backup to {dest_path} failed: {e}")
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        raise
+    finally:
+        os.remove(snapshot_path)
+    
+    size = os.path.getsize(dest_path)
+    logger.info(f"Backed up {progress['pages']} pages ({raw_size:,} bytes) to {dest_path} ({size:,} bytes gzipped)")
+    return {'pages': progress['pages'], 'raw_size': raw_size, 'size': size}
+
+
+def _gzip_file(source_path: str, dest_path: str):
+    with open(source_path, 'rb') as source, gzip.open(dest_path, 'wb') as dest:
+        shutil.copyfileobj(source, dest, 1024 * 1024)
+
+
 class DatabaseManager:
-    def __init__(self, db_path: str = "data/thanatos.db"):
+    # File suffix of the snapshots written by backup_to
+    backup_suffix = '.db.gz'
+    
+    def __init__(self, db_path: str = "data/thanatos.db", read_pool_size: int = 4,
+                 group_commit_ms: float = 0, slow_query_ms: float = 250,
+                 query_stats: Optional[db_stats.QueryStats] = None,
+                 supervisor: Optional[db_supervisor.ConnectionSupervisor] = None,
+                 transcript_batch_size: int = TRANSCRIPT_BATCH_SIZE,
+                 transcript_flush_ms: float = TRANSCRIPT_FLUSH_MS,
+                 storage_profile=DEFAULT_STORAGE_PROFILE,
+                 server_config_cache: bool = True):
         self.db_path = db_path
         # Ensure data directory exists
         dir_path = os.path.dirname(db_path)
         if dir_path:  # Only create directory if there is one to create
             os.makedirs(dir_path, exist_ok=True)
         
-        # Connection management
+        # Connection management: one writer connection plus a pool of
+        # read-only connections so SELECTs can run concurrently under WAL
         self._connection_lock = asyncio.Lock()
         self._shared_connection = None
-        self._max_retries = 5  # Increased from 3
-        self._retry_delay = 0.1  # Start with shorter delay
+        # cache/mmap/checkpoint PRAGMAs for every connection (see STORAGE_PROFILES)
+        self._storage_pragmas = resolve_storage_profile(storage_profile)
+        self._read_pool_size = read_pool_size if db_path != ':memory:' else 0
+        self._read_pool = asyncio.Queue()
+        self._read_connections = []
+        self._read_pool_lock = asyncio.Lock()
+        # Unit-of-work transactions run one at a time on their own writer connection
+        self._transaction_lock = asyncio.Lock()
+        self._transaction_connection = None
+        # Group commit: commits requested within this window share one COMMIT (0 = off)
+        self._group_commit_delay = max(group_commit_ms, 0) / 1000
+        self._pending_commit = None
+        self._commit_stats = {'commit_requests': 0, 'commits': 0, 'transactions': 0}
+        # Every statement on every connection is timed per calling method; round
+        # trips slower than slow_query_ms are logged with their query plan (0 = off).
+        # Per-guild shards share their router's stats instead of keeping their own.
+        self._query_stats = query_stats or db_stats.QueryStats(slow_query_ms, helper_functions=QUERY_HELPER_FUNCTIONS)
+        # Retries transient errors (busy/locked) with jittered backoff, flags broken
+        # connections for replacement and keeps the health counters and circuit breaker
+        self._supervisor = supervisor or db_supervisor.ConnectionSupervisor()
+        # Parsed server configs keyed by guild_id; the generation counter stops a
+        # read that raced with an invalidation from caching the stale row. Off for
+        # processes that share the file with the bot but don't see its writes.
+        self._config_cache_enabled = server_config_cache
+        self._config_cache = {}
+        self._config_cache_generation = 0
+        self._config_cache_stats = {'hits': 0, 'misses': 0}
+        self._transaction_invalidated_guilds = set()
+        self._transcript_fts_available = None
+        # DM transcript entries waiting for their batch write (see queue_dm_transcript)
+        self._transcript_queue = []
+        self._transcript_batch_size = max(transcript_batch_size, 1)
+        self._transcript_flush_delay = max(transcript_flush_ms, 0) / 1000
+        self._transcript_flush_task = None
+        self._transcript_flush_lock = asyncio.Lock()
         self._initialized = False
+        self._init_lock = asyncio.Lock()
         
         logger.info(f"Database manager initialized with path: {db_path}")
     
     async def close(self):
         """Cleanup database resources"""
+        if self._transcript_flush_task is not None:
+            self._transcript_flush_task.cancel()
+            await asyncio.gather(self._transcript_flush_task, return_exceptions=True)
+            self._transcript_flush_task = None
+        if self._transcript_queue:
+            try:
+                await self.flush_dm_transcripts()
+            except Exception as e:
+                logger.error(f"Dropping {len(self._transcript_queue)} queued DM transcript(s): {e}")
+                self._transcript_queue = []
+        
+        if self._pending_commit is not None:
+            try:
+                await asyncio.shield(self._pending_commit)
+            except Exception as e:
+                logger.error(f"Error flushing pending group commit: {e}")
+        
+        async with self._transaction_lock:
+            if self._transaction_connection:
+                try:
+                    await self._transaction_connection.close()
+                except Exception as e:
+                    logger.error(f"Error closing database transaction connection: {e}")
+                self._transaction_connection = None
+        
+        async with self._read_pool_lock:
+            for reader in self._read_connections:
+                try:
+                    await reader.close()
+                except Exception as e:
+                    logger.error(f"Error closing database reader connection: {e}")
+            self._read_connections = []
+            self._read_pool = asyncio.Queue()
+        
         async with self._connection_lock:
             if self._shared_connection:
                 try:
@@ -38,22 +724,26 @@ class DatabaseManager:
                     logger.error(f"Error closing database connection: {e}")
     
     async def _get_shared_connection(self):
-        """Get or create shared database connection"""
+        """Get or create the shared writer connection
+        
+        All writes and read-modify-write sequences go through this connection.
+        Plain SELECTs should use _fetchall/_fetchone, which run on the reader pool.
+        Inside `async with db.transaction():` this returns the transaction's connection.
+        ShardedDatabaseManager has no shared connection (a shard can be closed
+        between calls); cogs go through DatabaseManager methods instead.
+        """
+        conn = self._current_transaction()
+        if conn is not None:
+            return conn
+        
         async with self._connection_lock:
+            if self._shared_connection is not None and not self._shared_connection.usable:
+                logger.warning("Replacing broken shared database connection")
+                await self._discard_connection(self._shared_connection)
+                self._shared_connection = None
             if self._shared_connection is None:
                 try:
-                    self._shared_connection = await aiosqlite.connect(
-                        self.db_path,
-                        timeout=30.0,
-                        check_same_thread=False
-                    )
-                    # Configure SQLite for better concurrency
-                    await self._shared_connection.execute('PRAGMA foreign_keys = ON')
-                    await self._shared_connection.execute('PRAGMA journal_mode = WAL')
-                    await self._shared_connection.execute('PRAGMA synchronous = NORMAL')
-                    await self._shared_connection.execute('PRAGMA cache_size = -2000')
-                    await self._shared_connection.execute('PRAGMA temp_store = MEMORY')
-                    await self._shared_connection.execute('PRAGMA busy_timeout = 30000')
+                    self._shared_connection = await self._open_writer()
                     logger.info("Shared database connection established")
                 except Exception as e:
                     logger.error(f"Failed to establish shared database connection: {e}")
@@ -61,292 +751,987 @@ class DatabaseManager:
                     raise
             return self._shared_connection
     
+    async def _discard_connection(self, conn):
+        """Close a broken connection, ignoring errors, and count the reconnect it forces"""
+        self._supervisor.record_reconnect()
+        try:
+            await conn.close()
+        except Exception as e:
+            logger.debug(f"Error closing broken database connection: {e}")
+    
+    async def _open_writer(self):
+        """Open a read-write connection configured for WAL concurrency"""
+        conn = await db_stats.connect(
+            self.db_path,
+            self._query_stats,
+            supervisor=self._supervisor,
+            retry_budget=db_supervisor.WRITER_RETRY_BUDGET_S,
+            timeout=db_supervisor.BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False
+        )
+        # Configure SQLite for better concurrency
+        await conn.execute('PRAGMA foreign_keys = ON')
+        await conn.execute('PRAGMA journal_mode = WAL')
+        await conn.execute('PRAGMA synchronous = NORMAL')
+        for pragma, value in self._storage_pragmas.items():
+            await conn.execute(f'PRAGMA {pragma} = {int(value)}')
+        await conn.execute('PRAGMA temp_store = MEMORY')
+        await conn.execute(f'PRAGMA busy_timeout = {db_supervisor.BUSY_TIMEOUT_MS}')
+        return conn
+    
+    async def _open_reader(self):
+        """Open a read-only (mode=ro) connection for the reader pool"""
+        reader = await db_stats.connect(
+            Path(self.db_path).absolute().as_uri() + '?mode=ro',
+            self._query_stats,
+            supervisor=self._supervisor,
+            timeout=db_supervisor.BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False,
+            uri=True
+        )
+        await reader.execute('PRAGMA query_only = ON')
+        for pragma, value in self._storage_pragmas.items():
+            if pragma not in WRITER_ONLY_PRAGMAS:
+                await reader.execute(f'PRAGMA {pragma} = {int(value)}')
+        await reader.execute('PRAGMA temp_store = MEMORY')
+        await reader.execute(f'PRAGMA busy_timeout = {db_supervisor.BUSY_TIMEOUT_MS}')
+        return reader
+    
+    @asynccontextmanager
+    async def _read_connection(self):
+        """Borrow a reader connection from the pool (falls back to the writer when pooling is off)"""
+        conn = self._current_transaction()
+        if conn is not None:
+            # Reads inside a unit of work must see its uncommitted writes
+            yield conn
+            return
+        
+        if self._read_pool_size <= 0:
+            yield await self._get_shared_connection()
+            return
+        
+        # The writer sets journal_mode=WAL, so make sure it exists before any reader
+        await self._get_shared_connection()
+        
+        try:
+            reader = self._read_pool.get_nowait()
+        except asyncio.QueueEmpty:
+            reader = None
+            async with self._read_pool_lock:
+                if len(self._read_connections) < self._read_pool_size:
+                    reader = await self._open_reader()
+                    self._read_connections.append(reader)
+                    logger.debug(f"Opened database reader connection {len(self._read_connections)}/{self._read_pool_size}")
+            if reader is None:
+                reader = await self._read_pool.get()
+        
+        try:
+            yield reader
+        finally:
+            if reader in self._read_connections:
+                if reader.usable:
+                    self._read_pool.put_nowait(reader)
+                else:
+                    # Dropped from the pool; a fresh reader opens on demand
+                    self._read_connections.remove(reader)
+                    await self._discard_connection(reader)
+    
+    @staticmethod
+    def _set_row_factory(cursor, record_type=None):
+        """Decode this cursor's rows as record_type (or aiosqlite.Row) without touching the connection"""
+        if record_type is None:
+            cursor.row_factory = aiosqlite.Row
+        else:
+            cursor.row_factory = make_row_factory(record_type, cursor.description)
+    
+    async def _fetchall(self, query, params=None, record_type=None) -> List[Any]:
+        """Run a SELECT on a pooled reader connection and return all rows
+        
+        Rows are aiosqlite.Row objects, or record_type instances when given.
+        """
+        async with self._read_connection() as conn:
+            cursor = await conn.execute(query, params or ())
+            self._set_row_factory(cursor, record_type)
+            return await cursor.fetchall()
+    
+    async def _fetchone(self, query, params=None, record_type=None) -> Optional[Any]:
+        """Run a SELECT on a pooled reader connection and return the first row"""
+        async with self._read_connection() as conn:
+            cursor = await conn.execute(query, params or ())
+            self._set_row_factory(cursor, record_type)
+            return await cursor.fetchone()
+    
+    async def _iterate(self, query, params=None, record_type=None, chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[Any]:
+        """Run a SELECT on a pooled reader connection and yield rows as they are fetched
+        
+        Rows are pulled chunk_size at a time with fetchmany, so large result
+        sets are never held in memory at once. The reader stays borrowed until
+        the iterator is exhausted or closed; consumers that stop early should
+        call aclose() on it.
+        """
+        async with self._read_connection() as conn:
+            cursor = await conn.execute(query, params or ())
+            self._set_row_factory(cursor, record_type)
+            try:
+                while True:
+                    rows = await cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield row
+            finally:
+                await cursor.close()
+    
     async def _execute_query(self, query, params=None):
-        """Execute a query with retry logic and proper connection management"""
-        current_delay = self._retry_delay
-        for attempt in range(self._max_retries):
+        """Execute a statement on the writer connection
+        
+        Busy/locked errors are retried by the connection supervisor; other
+        errors are raised as they are, and only a connection error (which
+        marks the connection broken) makes the next call reconnect.
+        """
+        conn = await self._get_shared_connection()
+        return await conn.execute(query, params or ())
+    
+    async def _execute_commit(self, guild_id: Optional[int] = None):
+        """Commit the writer's pending statements (guild_id picks the shard under ShardedDatabaseManager)
+        
+        Inside `async with db.transaction():` this is a no-op; the unit of work
+        commits once at the end. In group-commit mode the COMMIT is delayed by
+        the group window so that concurrent writers share a single commit.
+        """
+        if self._current_transaction() is not None:
+            self._commit_stats['commit_requests'] += 1
+            return
+        
+        self._commit_stats['commit_requests'] += 1
+        if self._group_commit_delay <= 0:
+            conn = await self._get_shared_connection()
+            await conn.commit()
+            self._commit_stats['commits'] += 1
+            return
+        
+        if self._pending_commit is None:
+            self._pending_commit = asyncio.get_running_loop().create_future()
+            asyncio.create_task(self._flush_group_commit(self._pending_commit))
+        await asyncio.shield(self._pending_commit)
+    
+    async def _flush_group_commit(self, pending):
+        """Commit once the group window closes and wake every waiting writer"""
+        await asyncio.sleep(self._group_commit_delay)
+        self._pending_commit = None
+        try:
+            conn = await self._get_shared_connection()
+            await conn.commit()
+            self._commit_stats['commits'] += 1
+            pending.set_result(None)
+        except Exception as e:
+            logger.error(f"Group commit failed: {e}")
+            pending.set_exception(e)
+    
+    @asynccontextmanager
+    async def transaction(self, guild_id: Optional[int] = None):
+        """Run several write methods as one unit of work with a single commit.
+        
+        Usage:
+            async with db.transaction(guild_id):
+                await db.create_loa_record(guild_id, ...)
+                await db.update_member_loa_status(guild_id, ...)
+        
+        Everything inside the block is committed together when it exits, or
+        rolled back if it raises. Nested blocks join the outer transaction.
+        Units of work run one at a time on a dedicated writer connection, so
+        concurrent writes from other tasks are never swept into them.
+        guild_id names the guild whose shard the unit of work runs on under
+        ShardedDatabaseManager; it is ignored here.
+        """
+        conn = self._current_transaction()
+        if conn is not None:
+            yield conn
+            return
+        
+        async with self._transaction_lock:
+            conn = await self._get_transaction_connection()
+            await conn.execute('BEGIN IMMEDIATE')
+            token = _active_transaction.set((self, conn, asyncio.current_task()))
+            try:
+                yield conn
+                await conn.commit()
+                self._commit_stats['commits'] += 1
+                self._commit_stats['transactions'] += 1
+            except BaseException:
+                await conn.rollback()
+                raise
+            finally:
+                _active_transaction.reset(token)
+                # Configs changed inside the unit of work are dropped once it is settled
+                for guild_id in self._transaction_invalidated_guilds:
+                    self.invalidate_server_config(guild_id)
+                self._transaction_invalidated_guilds.clear()
+    
+    def _current_transaction(self):
+        """Get the connection of the unit of work owned by the running task, if any"""
+        active = _active_transaction.get()
+        if active is not None and active[0] is self and active[2] is asyncio.current_task():
+            return active[1]
+        return None
+    
+    async def _get_transaction_connection(self):
+        """Get or create the writer connection used by transaction()"""
+        if self.db_path == ':memory:':
+            # A second connection would open a different in-memory database,
+            # so flush the shared writer and run the unit of work on it
+            conn = await self._get_shared_connection()
+            if self._pending_commit is not None:
+                await asyncio.shield(self._pending_commit)
+            if conn.in_transaction:
+                await conn.commit()
+            return conn
+        
+        if self._transaction_connection is not None and not self._transaction_connection.usable:
+            logger.warning("Replacing broken database transaction connection")
+            await self._discard_connection(self._transaction_connection)
+            self._transaction_connection = None
+        if self._transaction_connection is None:
+            # Make sure the schema exists and WAL is on before a second writer opens
+            await self._get_shared_connection()
+            self._transaction_connection = await self._open_writer()
+        return self._transaction_connection
+    
+    def get_commit_stats(self) -> Dict[str, int]:
+        """Get commit counters (commits_saved = requested commits that did not need their own COMMIT)"""
+        stats = dict(self._commit_stats)
+        stats['commits_saved'] = max(stats['commit_requests'] - stats['commits'], 0)
+        stats['group_commit_ms'] = self._group_commit_delay * 1000
+        return stats
+    
+    def get_connection_health(self) -> Dict[str, Any]:
+        """Get connection health counters and the circuit breaker state (see ConnectionSupervisor)"""
+        return dict(self._supervisor.health(), open_readers=len(self._read_connections))
+    
+    def allow_expensive_work(self) -> bool:
+        """Check the circuit breaker before starting a backup, archive or other heavy job"""
+        return self._supervisor.allow_expensive_work()
+    
+    def get_query_stats(self, limit: int = 10, key: str = 'total_ms') -> Dict[str, Any]:
+        """Get the slowest calling methods and the most recent slow queries
+        
+        Args:
+            limit: Number of methods to return
+            key: Ranking column (total_ms, max_ms, avg_ms, statements or rows)
+        """
+        stats = self._query_stats
+        return {
+            'slow_query_ms': stats.slow_query_ms,
+            'methods': len(stats.methods),
+            'top': stats.top(limit, key),
+            'slow_queries': list(stats.slow_queries)[::-1],
+        }
+    
+    def reset_query_stats(self):
+        """Clear query timings and the slow-query history"""
+        self._query_stats.reset()
+    
+    async def initialize_database(self):
+        """Bring the schema up to date by applying pending migrations.
+        
+        Runs the migration registry at most once per DatabaseManager instance;
+        later calls return immediately.
+        """
+        if self._initialized:
+            return
+        
+        async with self._init_lock:
+            if self._initialized:
+                return
             try:
+                logger.info("Initializing database schema")
                 conn = await self._get_shared_connection()
-                cursor = await conn.execute(query, params or ())
-                return cursor
+                await self._run_migrations(conn)
+                self._initialized = True
+                logger.info("Database schema initialized successfully")
             except Exception as e:
-                if attempt < self._max_retries - 1:
-                    logger.warning(f"Database query attempt {attempt + 1} failed: {e}. Retrying in {current_delay}s...")
-                    # Reset connection on error
-                    async with self._connection_lock:
-                        if self._shared_connection:
-                            try:
-                                await self._shared_connection.close()
-                            except:
-                                pass
-                            self._shared_connection = None
-                    await asyncio.sleep(current_delay)
-                    current_delay *= 2
-                else:
-                    logger.error(f"Failed to execute query after {self._max_retries} attempts: {e}")
-                    raise
+                logger.error(f"Failed to initialize database schema: {e}")
+                raise
     
-    async def _execute_commit(self):
-        """Execute commit with proper connection management"""
+    async def get_schema_version(self) -> int:
+        """Get the highest applied schema migration version (0 for an empty database)"""
         conn = await self._get_shared_connection()
-        await conn.commit()
+        await conn.execute(SCHEMA_VERSION_TABLE)
+        cursor = await conn.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version')
+        row = await cursor.fetchone()
+        return row[0]
     
-    async def initialize_database(self):
-        """Initialize all database tables"""
+    async def require_current_schema(self):
+        """Attach to a database another process keeps migrated, without migrating it.
+        
+        For processes that share the bot's database file (the dashboard): raises
+        RuntimeError if the schema is behind the latest registered migration,
+        and otherwise marks this manager initialized so initialize_database()
+        never runs migrations from here.
+        """
+        version = await self.get_schema_version()
+        latest = SCHEMA_MIGRATIONS[-1][0]
+        if version < latest:
+            raise RuntimeError(
+                f"Database schema is at version {version}, expected {latest}; "
+                "start the bot to apply its migrations first"
+            )
+        self._initialized = True
+    
+    async def _run_migrations(self, conn):
+        """Apply every registered migration newer than the stored schema version.
+        
+        Each migration runs in its own BEGIN IMMEDIATE transaction together with
+        its schema_version row. The version is re-read once the write lock is
+        held, so when two processes start against the same file the second one
+        skips whatever the first has applied in the meantime. A failed migration
+        is retried on next start. NON_TRANSACTIONAL_MIGRATIONS run on their own
+        and are recorded after. Lock waits use MIGRATION_BUSY_TIMEOUT_MS.
+        """
+        await conn.execute(f'PRAGMA busy_timeout = {MIGRATION_BUSY_TIMEOUT_MS}')
         try:
-            logger.info("Initializing database tables")
-            conn = await self._get_shared_connection()
-            
-            # Check if LOA notification columns exist and add them if not
-            await self._migrate_loa_notification_columns(conn)
-            
-            # Migrate dm_user_id to dm_users JSON array
-            await self._migrate_dm_users_column(conn)
-            
-            # Migrate forum channel columns
-            await self._migrate_forum_channel_columns(conn)
-            
-            # Migrate dues periods updated_at column
-            await self._migrate_dues_periods_updated_at(conn)
-            
-            # Server configurations table
-            await conn.execute('''
-                CREATE TABLE IF NOT EXISTS server_configs (
-                    guild_id INTEGER PRIMARY KEY,
-                    officer_role_id INTEGER,
-                    notification_channel_id INTEGER,
-                    leadership_channel_id INTEGER,
-                    dm_users TEXT,
-                    membership_roles TEXT,
-                    contribution_categories TEXT,
-                    loa_notification_role_id INTEGER,
-                    loa_notification_channel_id INTEGER,
-                    cross_server_notifications BOOLEAN DEFAULT FALSE,
-                    weapons_locker_forum_channel_id INTEGER,
-                    drug_locker_forum_channel_id INTEGER,
-                    misc_locker_forum_channel_id INTEGER,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Members table
-            await conn.execute('''
-                CREATE TABLE IF NOT EXISTS members (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    guild_id INTEGER NOT NULL,
-                    user_id INTEGER NOT NULL,
-                    discord_name TEXT NOT NULL,
-                    discord_username TEXT,
-                    rank TEXT,
-                    status TEXT DEFAULT 'Active',
-                    is_on_loa BOOLEAN DEFAULT FALSE,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(guild_id, user_id)
-                )
-            ''')
-            
-            # LOA records table
-            await conn.execute('''
-                CREATE TABLE IF NOT EXISTS loa_records (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    guild_id INTEGER NOT NULL,
-                    user_id INTEGER NOT NULL,
-                    duration TEXT NOT NULL,
-                    reason TEXT NOT NULL,
-                    start_time TIMESTAMP NOT NULL,
-                    end_time TIMESTAMP NOT NULL,
-                    is_active BOOLEAN DEFAULT TRUE,
-                    is_expired BOOLEAN DEFAULT FALSE,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Contributions table
-            await conn.execute('''
-                CREATE TABLE IF NOT EXISTS contributions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    guild_id INTEGER NOT NULL,
-                    user_id INTEGER NOT NULL,
-                    category TEXT NOT NULL,
-                    item_name TEXT NOT NULL,
-                    quantity INTEGER DEFAULT 1,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # DM transcripts table
-            await conn.execute('''
-                CREATE TABLE IF NOT EXISTS dm_transcripts (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    guild_id INTEGER NOT NULL,
-                    sender_id INTEGER NOT NULL,
-                    recipient_id INTEGER NOT NULL,
-                    role_id INTEGER,
-                    message TEXT NOT NULL,
-                    message_type TEXT NOT NULL,
-                    recipient_type TEXT NOT NULL,
-                    attachments TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Database archives table
-            await conn.execute('''
-                CREATE TABLE IF NOT EXISTS database_archives (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    guild_id INTEGER NOT NULL,
-                    archive_name TEXT NOT NULL,
-                    description TEXT NOT NULL,
-                    notes TEXT,
-                    archived_data TEXT NOT NULL,
-                    created_at TEXT NOT NULL,
-                    created_by_id INTEGER NOT NULL
-                )
-            ''')
-            
-            # Quantity change log table
-            await conn.execute('''
-                CREATE TABLE IF NOT EXISTS quantity_changes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    guild_id INTEGER NOT NULL,
-                    item_name TEXT NOT NULL,
-                    category TEXT NOT NULL,
-                    old_quantity INTEGER NOT NULL,
-                    new_quantity INTEGER NOT NULL,
-                    reason TEXT NOT NULL,
-                    notes TEXT,
-                    changed_at TEXT NOT NULL,
-                    changed_by_id INTEGER NOT NULL
-                )
-            ''')
-            
-            
-            # Modern Dues System Tables
-            # Dues periods table
-            await conn.execute('''
-                CREATE TABLE IF NOT EXISTS dues_periods (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    guild_id INTEGER NOT NULL,
-                    period_name TEXT NOT NULL,
-                    description TEXT,
-                    due_amount REAL NOT NULL DEFAULT 0.0,
-                    due_date TIMESTAMP NOT NULL,
-                    is_active BOOLEAN DEFAULT TRUE,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    created_by_id INTEGER NOT NULL,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_by_id INTEGER,
-                    UNIQUE(guild_id, period_name)
+            await self._apply_migrations(conn)
+        finally:
+            await conn.execute(f'PRAGMA busy_timeout = {db_supervisor.BUSY_TIMEOUT_MS}')
+    
+    async def _apply_migrations(self, conn):
+        await conn.execute('BEGIN IMMEDIATE')
+        try:
+            await conn.execute(SCHEMA_VERSION_TABLE)
+            current_version = await self._applied_schema_version(conn)
+            await conn.commit()
+        except BaseException:
+            await conn.rollback()
+            raise
+        
+        for version, name, method_name in SCHEMA_MIGRATIONS:
+            if version <= current_version:
+                continue
+            try:
+                await conn.execute('BEGIN IMMEDIATE')
+                current_version = await self._applied_schema_version(conn)
+                if version <= current_version:
+                    await conn.commit()
+                    continue
+                if name in NON_TRANSACTIONAL_MIGRATIONS:
+                    await conn.commit()
+                    await getattr(self, method_name)(conn)
+                    await conn.execute('BEGIN IMMEDIATE')
+                    if version <= await self._applied_schema_version(conn):
+                        await conn.commit()
+                        continue
+                else:
+                    await getattr(self, method_name)(conn)
+                await conn.execute(
+                    'INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)',
+                    (version, name, datetime.now().isoformat())
                 )
-            ''')
-            
-            # Dues payments table
-            await conn.execute('''
-                CREATE TABLE IF NOT EXISTS dues_payments (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    guild_id INTEGER NOT NULL,
-                    user_id INTEGER NOT NULL,
-                    dues_period_id INTEGER NOT NULL,
-                    amount_paid REAL NOT NULL DEFAULT 0.0,
-                    payment_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    payment_method TEXT DEFAULT 'Other',
-                    payment_status TEXT DEFAULT 'unpaid' CHECK(payment_status IN ('paid', 'unpaid', 'partial', 'exempt', 'overdue')),
-                    notes TEXT,
-                    updated_by_id INTEGER,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(guild_id, user_id, dues_period_id),
-                    FOREIGN KEY (dues_period_id) REFERENCES dues_periods (id) ON DELETE CASCADE
+                await conn.commit()
+                current_version = version
+                logger.info(f"Applied schema migration {version} ({name})")
+            except Exception as e:
+                await conn.rollback()
+                logger.error(f"Schema migration {version} ({name}) failed: {e}")
+                raise
+    
+    async def _applied_schema_version(self, conn) -> int:
+        """Read the highest recorded migration version on conn (inside the caller's transaction)"""
+        cursor = await conn.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version')
+        return (await cursor.fetchone())[0]
+    
+    async def _create_base_tables(self, conn):
+        """Create all core tables"""
+        # Server configurations table
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS server_configs (
+                guild_id INTEGER PRIMARY KEY,
+                officer_role_id INTEGER,
+                notification_channel_id INTEGER,
+                leadership_channel_id INTEGER,
+                dm_users TEXT,
+                membership_roles TEXT,
+                contribution_categories TEXT,
+                loa_notification_role_id INTEGER,
+                loa_notification_channel_id INTEGER,
+                cross_server_notifications BOOLEAN DEFAULT FALSE,
+                weapons_locker_forum_channel_id INTEGER,
+                drug_locker_forum_channel_id INTEGER,
+                misc_locker_forum_channel_id INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Members table
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS members (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                discord_name TEXT NOT NULL,
+                discord_username TEXT,
+                rank TEXT,
+                status TEXT DEFAULT 'Active',
+                is_on_loa BOOLEAN DEFAULT FALSE,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE(guild_id, user_id)
+            )
+        ''')
+        
+        # LOA records table
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS loa_records (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                duration TEXT NOT NULL,
+                reason TEXT NOT NULL,
+                start_time TIMESTAMP NOT NULL,
+                end_time TIMESTAMP NOT NULL,
+                is_active BOOLEAN DEFAULT TRUE,
+                is_expired BOOLEAN DEFAULT FALSE,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Contributions table
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS contributions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                category TEXT NOT NULL,
+                item_name TEXT NOT NULL,
+                quantity INTEGER DEFAULT 1,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # DM transcripts table
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS dm_transcripts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id INTEGER NOT NULL,
+                sender_id INTEGER NOT NULL,
+                recipient_id INTEGER NOT NULL,
+                role_id INTEGER,
+                message TEXT NOT NULL,
+                message_type TEXT NOT NULL,
+                recipient_type TEXT NOT NULL,
+                attachments TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Database archives table
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS database_archives (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id INTEGER NOT NULL,
+                archive_name TEXT NOT NULL,
+                description TEXT NOT NULL,
+                notes TEXT,
+                archived_data TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                created_by_id INTEGER NOT NULL
+            )
+        ''')
+        
+        # Quantity change log table
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS quantity_changes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id INTEGER NOT NULL,
+                item_name TEXT NOT NULL,
+                category TEXT NOT NULL,
+                old_quantity INTEGER NOT NULL,
+                new_quantity INTEGER NOT NULL,
+                reason TEXT NOT NULL,
+                notes TEXT,
+                changed_at TEXT NOT NULL,
+                changed_by_id INTEGER NOT NULL
+            )
+        ''')
+        
+        
+        # Modern Dues System Tables
+        # Dues periods table
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS dues_periods (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id INTEGER NOT NULL,
+                period_name TEXT NOT NULL,
+                description TEXT,
+                due_amount REAL NOT NULL DEFAULT 0.0,
+                due_date TIMESTAMP NOT NULL,
+                is_active BOOLEAN DEFAULT TRUE,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                created_by_id INTEGER NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_by_id INTEGER,
+                UNIQUE(guild_id, period_name)
+            )
+        ''')
+        
+        # Dues payments table
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS dues_payments (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                dues_period_id INTEGER NOT NULL,
+                amount_paid REAL NOT NULL DEFAULT 0.0,
+                payment_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                payment_method TEXT DEFAULT 'Other',
+                payment_status TEXT DEFAULT 'unpaid' CHECK(payment_status IN ('paid', 'unpaid', 'partial', 'exempt', 'overdue')),
+                notes TEXT,
+                updated_by_id INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE(guild_id, user_id, dues_period_id),
+                FOREIGN KEY (dues_period_id) REFERENCES dues_periods (id) ON DELETE CASCADE
+            )
+        ''')
+        
+        # Prospect management tables
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS prospects (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                sponsor_id INTEGER NOT NULL,
+                prospect_role_id INTEGER,
+                sponsor_role_id INTEGER,
+                start_date TIMESTAMP NOT NULL,
+                end_date TIMESTAMP,
+                status TEXT DEFAULT 'active' CHECK(status IN ('active', 'patched', 'dropped', 'archived')),
+                strikes INTEGER DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE(guild_id, user_id)
+            )
+        ''')
+        
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS prospect_tasks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id INTEGER NOT NULL,
+                prospect_id INTEGER NOT NULL,
+                assigned_by_id INTEGER NOT NULL,
+                task_name TEXT NOT NULL,
+                task_description TEXT NOT NULL,
+                due_date TIMESTAMP,
+                status TEXT DEFAULT 'assigned' CHECK(status IN ('assigned', 'completed', 'failed', 'overdue')),
+                completed_date TIMESTAMP,
+                completed_by_id INTEGER,
+                notes TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (prospect_id) REFERENCES prospects (id) ON DELETE CASCADE
+            )
+        ''')
+        
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS prospect_notes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id INTEGER NOT NULL,
+                prospect_id INTEGER NOT NULL,
+                author_id INTEGER NOT NULL,
+                note_text TEXT NOT NULL,
+                is_strike BOOLEAN DEFAULT FALSE,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (prospect_id) REFERENCES prospects (id) ON DELETE CASCADE
+            )
+        ''')
+        
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS prospect_votes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id INTEGER NOT NULL,
+                prospect_id INTEGER NOT NULL,
+                started_by_id INTEGER NOT NULL,
+                vote_type TEXT DEFAULT 'patch' CHECK(vote_type IN ('patch', 'drop')),
+                status TEXT DEFAULT 'active' CHECK(status IN ('active', 'completed', 'cancelled')),
+                started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                ended_at TIMESTAMP,
+                ended_by_id INTEGER,
+                result TEXT,
+                FOREIGN KEY (prospect_id) REFERENCES prospects (id) ON DELETE CASCADE
+            )
+        ''')
+        
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS prospect_vote_responses (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                vote_id INTEGER NOT NULL,
+                voter_id INTEGER NOT NULL,
+                vote_response TEXT NOT NULL CHECK(vote_response IN ('yes', 'no', 'abstain')),
+                voted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (vote_id) REFERENCES prospect_votes (id) ON DELETE CASCADE,
+                UNIQUE(vote_id, voter_id)
+            )
+        ''')
+
+    async def _create_indexes(self, conn):
+        """Create the managed secondary indexes if they don't exist"""
+        for index_name, (table, columns) in SECONDARY_INDEXES.items():
+            await conn.execute(f'CREATE INDEX IF NOT EXISTS {index_name} ON {table} ({columns})')
+
+    async def _create_transcript_search_index(self, conn) -> bool:
+        """Create the transcript FTS5 index and its sync triggers, then backfill it
+        
+        Returns False (and leaves search on the LIKE fallback) when this SQLite
+        build has no FTS5 module.
+        """
+        try:
+            await conn.execute(f'''
+                CREATE VIRTUAL TABLE IF NOT EXISTS {TRANSCRIPT_FTS_TABLE} USING fts5(
+                    message,
+                    content='dm_transcripts',
+                    content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2',
+                    prefix='2 3'
                 )
             ''')
-            
-            # Prospect management tables
-            await conn.execute('''
-                CREATE TABLE IF NOT EXISTS prospects (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    guild_id INTEGER NOT NULL,
-                    user_id INTEGER NOT NULL,
-                    sponsor_id INTEGER NOT NULL,
-                    prospect_role_id INTEGER,
-                    sponsor_role_id INTEGER,
-                    start_date TIMESTAMP NOT NULL,
-                    end_date TIMESTAMP,
-                    status TEXT DEFAULT 'active' CHECK(status IN ('active', 'patched', 'dropped', 'archived')),
-                    strikes INTEGER DEFAULT 0,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(guild_id, user_id)
+        except sqlite3.OperationalError as e:
+            if 'no such module' not in str(e):
+                raise
+            logger.warning(f"SQLite FTS5 is unavailable, transcript search will use LIKE: {e}")
+            return False
+        
+        for trigger_sql in TRANSCRIPT_FTS_TRIGGERS.values():
+            await conn.execute(trigger_sql)
+        await conn.execute(f"INSERT INTO {TRANSCRIPT_FTS_TABLE} ({TRANSCRIPT_FTS_TABLE}) VALUES ('rebuild')")
+        self._transcript_fts_available = None
+        return True
+    
+    async def _create_inventory_totals(self, conn):
+        """Create the inventory_totals table and its triggers, then fill it from contributions"""
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS inventory_totals (
+                guild_id INTEGER NOT NULL,
+                category TEXT NOT NULL,
+                item_name TEXT NOT NULL,
+                total_quantity INTEGER NOT NULL DEFAULT 0,
+                contribution_count INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (guild_id, category, item_name)
+            ) WITHOUT ROWID
+        ''')
+        for trigger_sql in INVENTORY_TOTALS_TRIGGERS.values():
+            await conn.execute(trigger_sql)
+        await self._fill_inventory_totals(conn)
+    
+    async def _fill_inventory_totals(self, conn, guild_id: Optional[int] = None):
+        """Recompute inventory_totals rows from contributions (all guilds or one)"""
+        where, params = ('WHERE guild_id = ?', (guild_id,)) if guild_id is not None else ('', ())
+        await conn.execute(f'DELETE FROM inventory_totals {where}', params)
+        await conn.execute(f'''
+            INSERT INTO inventory_totals (guild_id, category, item_name, total_quantity, contribution_count)
+            SELECT guild_id, category, item_name, SUM(COALESCE(quantity, 0)), COUNT(*)
+            FROM contributions
+            {where}
+            GROUP BY guild_id, category, item_name
+        ''', params)
+    
+    async def _create_dm_conversations(self, conn):
+        """Create the dm_conversations table and its triggers, then fill it from dm_transcripts"""
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS dm_conversations (
+                guild_id INTEGER NOT NULL,
+                user_low INTEGER NOT NULL,
+                user_high INTEGER NOT NULL,
+                last_created_at TIMESTAMP,
+                last_id INTEGER NOT NULL,
+                PRIMARY KEY (guild_id, user_low, user_high)
+            ) WITHOUT ROWID
+        ''')
+        await conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_dm_conversations_recent
+            ON dm_conversations (guild_id, last_created_at, last_id)
+        ''')
+        await conn.execute(f'''
+            CREATE INDEX IF NOT EXISTS idx_dm_transcripts_guild_pair
+            ON dm_transcripts (guild_id, {DM_CONVERSATION_PAIR.format(ref='')}, created_at, id)
+        ''')
+        for trigger_sql in DM_CONVERSATION_TRIGGERS.values():
+            await conn.execute(trigger_sql)
+        await conn.execute(f'''
+            INSERT INTO dm_conversations (guild_id, user_low, user_high, last_created_at, last_id)
+            SELECT guild_id, user_low, user_high, created_at, id FROM (
+                SELECT guild_id, min(sender_id, recipient_id) AS user_low, max(sender_id, recipient_id) AS user_high,
+                       created_at, id,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY guild_id, min(sender_id, recipient_id), max(sender_id, recipient_id)
+                           ORDER BY created_at DESC, id DESC
+                       ) AS row_num
+                FROM dm_transcripts
+            )
+            WHERE row_num = 1
+        ''')
+    
+    async def _create_dues_period_totals(self, conn):
+        """Add the dues columns/tables the dues methods expect, then the dues_period_totals aggregates
+        
+        dues_payments.is_exempt and dues_payment_history were written by
+        update_dues_payment but never created by the base schema.
+        """
+        cursor = await conn.execute("PRAGMA table_info(dues_payments)")
+        columns = [row[1] for row in await cursor.fetchall()]
+        if 'is_exempt' not in columns:
+            await conn.execute('ALTER TABLE dues_payments ADD COLUMN is_exempt BOOLEAN DEFAULT FALSE')
+        
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS dues_payment_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id INTEGER NOT NULL,
+                dues_payment_id INTEGER NOT NULL,
+                action_type TEXT NOT NULL,
+                old_amount REAL,
+                new_amount REAL,
+                old_status TEXT,
+                new_status TEXT,
+                old_payment_method TEXT,
+                new_payment_method TEXT,
+                old_notes TEXT,
+                new_notes TEXT,
+                changed_by_id INTEGER,
+                changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        await conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_dues_payment_history_payment
+            ON dues_payment_history (guild_id, dues_payment_id, changed_at)
+        ''')
+        
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS dues_period_totals (
+                dues_period_id INTEGER PRIMARY KEY,
+                guild_id INTEGER NOT NULL,
+                active_members INTEGER NOT NULL DEFAULT 0,
+                payment_records INTEGER NOT NULL DEFAULT 0,
+                paid_count INTEGER NOT NULL DEFAULT 0,
+                unpaid_count INTEGER NOT NULL DEFAULT 0,
+                partial_count INTEGER NOT NULL DEFAULT 0,
+                exempt_count INTEGER NOT NULL DEFAULT 0,
+                billable_count INTEGER NOT NULL DEFAULT 0,
+                total_collected REAL NOT NULL DEFAULT 0
+            )
+        ''')
+        await conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_dues_period_totals_guild ON dues_period_totals (guild_id)
+        ''')
+        for trigger_sql in DUES_TOTALS_TRIGGERS.values():
+            await conn.execute(trigger_sql)
+        await self._fill_dues_totals(conn)
+    
+    async def _fill_dues_totals(self, conn, guild_id: Optional[int] = None):
+        """Recompute dues_period_totals rows from dues_payments and members (all guilds or one)"""
+        where, params = ('WHERE guild_id = ?', (guild_id,)) if guild_id is not None else ('', ())
+        await conn.execute(f'DELETE FROM dues_period_totals {where}', params)
+        recompute = DUES_TOTALS_RECOMPUTE.format(where=where.replace('guild_id', 'per.guild_id'))
+        await conn.execute(f'''
+            INSERT INTO dues_period_totals (dues_period_id, guild_id, {', '.join(DUES_TOTALS_COUNTERS)})
+            {recompute}
+        ''', params)
+    
+    async def _migrate_archive_chunks(self, conn):
+        """Move archive payloads out of the archived_data JSON column into compressed chunks
+        
+        archived_data keeps only the small header (archived_at); the totals and
+        payload sizes become columns so archives can be listed without
+        decoding anything.
+        """
+        cursor = await conn.execute("PRAGMA table_info(database_archives)")
+        columns = [row[1] for row in await cursor.fetchall()]
+        for column in ('total_contributions', 'total_audit_events', 'raw_size', 'stored_size'):
+            if column not in columns:
+                await conn.execute(f'ALTER TABLE database_archives ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0')
+        
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS database_archive_chunks (
+                archive_id INTEGER NOT NULL REFERENCES database_archives(id) ON DELETE CASCADE,
+                section TEXT NOT NULL,
+                chunk_index INTEGER NOT NULL,
+                row_count INTEGER NOT NULL,
+                payload BLOB NOT NULL,
+                PRIMARY KEY (archive_id, section, chunk_index)
+            )
+        ''')
+        
+        # Convert existing archives one at a time to keep memory flat
+        cursor = await conn.execute('SELECT id FROM database_archives ORDER BY id')
+        archive_ids = [row[0] for row in await cursor.fetchall()]
+        converted = legacy_bytes = stored_bytes = 0
+        for archive_id in archive_ids:
+            cursor = await conn.execute('SELECT archived_data FROM database_archives WHERE id = ?', (archive_id,))
+            archived_data = (await cursor.fetchone())[0]
+            try:
+                data = json.loads(archived_data)
+            except (TypeError, ValueError):
+                logger.warning(f"Archive {archive_id} has unreadable archived_data; leaving it empty")
+                data = {}
+            if not any(section in data for section in ARCHIVE_SECTIONS):
+                continue  # already chunked
+            
+            raw_size, stored_size = 0, 0
+            for section in ARCHIVE_SECTIONS:
+                _, section_raw, section_stored = await self._write_archive_section(
+                    conn, archive_id, section, data.pop(section, None) or []
                 )
-            ''')
+                raw_size += section_raw
+                stored_size += section_stored
             
+            header = json.dumps({key: value for key, value in data.items()
+                                 if key not in ('total_contributions', 'total_audit_events')})
             await conn.execute('''
-                CREATE TABLE IF NOT EXISTS prospect_tasks (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    guild_id INTEGER NOT NULL,
-                    prospect_id INTEGER NOT NULL,
-                    assigned_by_id INTEGER NOT NULL,
-                    task_name TEXT NOT NULL,
-                    task_description TEXT NOT NULL,
-                    due_date TIMESTAMP,
-                    status TEXT DEFAULT 'assigned' CHECK(status IN ('assigned', 'completed', 'failed', 'overdue')),
-                    completed_date TIMESTAMP,
-                    completed_by_id INTEGER,
-                    notes TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (prospect_id) REFERENCES prospects (id) ON DELETE CASCADE
-                )
-            ''')
-            
+                UPDATE database_archives
+                SET archived_data = ?, total_contributions = ?, total_audit_events = ?,
+                    raw_size = ?, stored_size = ?
+                WHERE id = ?
+            ''', (header, data.get('total_contributions', 0), data.get('total_audit_events', 0),
+                  raw_size, stored_size + len(header), archive_id))
+            converted += 1
+            legacy_bytes += len(archived_data or '')
+            stored_bytes += stored_size + len(header)
+        
+        if converted:
+            logger.info(f"Compressed {converted} archive(s): {legacy_bytes:,} bytes of JSON -> {stored_bytes:,} bytes")
+    
+    async def _write_archive_section(self, conn, archive_id: int, section: str, rows) -> Tuple[int, int, int]:
+        """Store rows (dicts, from a list or an async iterator) as compressed chunks of one archive section
+        
+        Returns:
+            (row count, uncompressed bytes, compressed bytes)
+        """
+        count = raw_size = stored_size = chunk_index = 0
+        chunk, columns = [], None
+        
+        async def flush():
+            nonlocal raw_size, stored_size, chunk_index
+            encoded = json.dumps({'columns': columns, 'rows': chunk}, default=str).encode('utf-8')
+            payload = zlib.compress(encoded)
             await conn.execute('''
-                CREATE TABLE IF NOT EXISTS prospect_notes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    guild_id INTEGER NOT NULL,
-                    prospect_id INTEGER NOT NULL,
-                    author_id INTEGER NOT NULL,
-                    note_text TEXT NOT NULL,
-                    is_strike BOOLEAN DEFAULT FALSE,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (prospect_id) REFERENCES prospects (id) ON DELETE CASCADE
-                )
+                INSERT INTO database_archive_chunks (archive_id, section, chunk_index, row_count, payload)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (archive_id, section, chunk_index, len(chunk), payload))
+            raw_size += len(encoded)
+            stored_size += len(payload)
+            chunk_index += 1
+        
+        async def iterate():
+            if hasattr(rows, '__aiter__'):
+                async for row in rows:
+                    yield row
+            else:
+                for row in rows:
+                    yield row
+        
+        async for row in iterate():
+            row = dict(row)
+            if columns is None or list(row) != columns:
+                if chunk:
+                    await flush()
+                    chunk = []
+                columns = list(row)
+            chunk.append([row[column] for column in columns])
+            count += 1
+            if len(chunk) >= ARCHIVE_CHUNK_ROWS:
+                await flush()
+                chunk = []
+        if chunk:
+            await flush()
+        return count, raw_size, stored_size
+    
+    async def _migrate_retention_policies(self, conn):
+        """Add retention settings to server_configs and the quantity change summary table"""
+        cursor = await conn.execute("PRAGMA table_info(server_configs)")
+        columns = [row[1] for row in await cursor.fetchall()]
+        for column in RETENTION_COLUMNS.values():
+            if column not in columns:
+                await conn.execute(f'ALTER TABLE server_configs ADD COLUMN {column} INTEGER')
+        
+        # Audit rows past retention are rolled up here, one row per item per month
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS quantity_change_summaries (
+                guild_id INTEGER NOT NULL,
+                category TEXT NOT NULL,
+                item_name TEXT NOT NULL,
+                period TEXT NOT NULL,
+                change_count INTEGER NOT NULL,
+                net_change INTEGER NOT NULL,
+                first_changed_at TEXT NOT NULL,
+                last_changed_at TEXT NOT NULL,
+                PRIMARY KEY (guild_id, category, item_name, period)
+            ) WITHOUT ROWID
+        ''')
+        for index_name, (table, columns) in RETENTION_INDEXES.items():
+            await conn.execute(f'CREATE INDEX IF NOT EXISTS {index_name} ON {table} ({columns})')
+    
+    async def _migrate_epoch_time_columns(self, conn):
+        """Add the integer epoch columns (EPOCH_COLUMNS), backfill them and swap in their indexes"""
+        for (table, column), (epoch_column, naive_is_utc) in EPOCH_COLUMNS.items():
+            cursor = await conn.execute(f"PRAGMA table_info({table})")
+            if epoch_column not in [row[1] for row in await cursor.fetchall()]:
+                await conn.execute(f'ALTER TABLE {table} ADD COLUMN {epoch_column} INTEGER')
+            await conn.execute(f'''
+                UPDATE {table} SET {epoch_column} = {epoch_sql(column, naive_is_utc)}
+                WHERE {epoch_column} IS NULL AND {column} IS NOT NULL
             ''')
             
-            await conn.execute('''
-                CREATE TABLE IF NOT EXISTS prospect_votes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    guild_id INTEGER NOT NULL,
-                    prospect_id INTEGER NOT NULL,
-                    started_by_id INTEGER NOT NULL,
-                    vote_type TEXT DEFAULT 'patch' CHECK(vote_type IN ('patch', 'drop')),
-                    status TEXT DEFAULT 'active' CHECK(status IN ('active', 'completed', 'cancelled')),
-                    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    ended_at TIMESTAMP,
-                    ended_by_id INTEGER,
-                    result TEXT,
-                    FOREIGN KEY (prospect_id) REFERENCES prospects (id) ON DELETE CASCADE
-                )
+            # Keep the epoch column in step for writers that only set the TEXT column
+            new_epoch = epoch_sql(f'new.{column}', naive_is_utc)
+            await conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {table}_{epoch_column}_insert AFTER INSERT ON {table}
+                WHEN new.{epoch_column} IS NULL AND new.{column} IS NOT NULL BEGIN
+                    UPDATE {table} SET {epoch_column} = {new_epoch} WHERE rowid = new.rowid;
+                END
             ''')
-            
-            await conn.execute('''
-                CREATE TABLE IF NOT EXISTS prospect_vote_responses (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    vote_id INTEGER NOT NULL,
-                    voter_id INTEGER NOT NULL,
-                    vote_response TEXT NOT NULL CHECK(vote_response IN ('yes', 'no', 'abstain')),
-                    voted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (vote_id) REFERENCES prospect_votes (id) ON DELETE CASCADE,
-                    UNIQUE(vote_id, voter_id)
-                )
+            await conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {table}_{epoch_column}_update AFTER UPDATE OF {column} ON {table}
+                WHEN new.{epoch_column} IS old.{epoch_column} BEGIN
+                    UPDATE {table} SET {epoch_column} = {new_epoch} WHERE rowid = new.rowid;
+                END
             ''')
-            
-            await self._execute_commit()
-            logger.info("Database tables initialized successfully")
-        except Exception as e:
-            logger.error(f"Failed to initialize database tables: {e}")
-            raise
+        
+        for index_name in SUPERSEDED_INDEXES:
+            await conn.execute(f'DROP INDEX IF EXISTS {index_name}')
+        for index_name, (table, columns) in EPOCH_INDEXES.items():
+            await conn.execute(f'CREATE INDEX IF NOT EXISTS {index_name} ON {table} ({columns})')
+    
+    async def _enable_incremental_vacuum(self, conn):
+        """Switch the database to auto_vacuum=INCREMENTAL so pruned pages can be reclaimed
+        
+        The setting only takes effect through a VACUUM (the WAL header is
+        already written by the time this runs), so existing databases are
+        rebuilt once. That blocks startup while it runs and needs free disk
+        space of about twice the database size; for a new database it is
+        instant. Runs outside a transaction (NON_TRANSACTIONAL_MIGRATIONS).
+        
+        VACUUM cannot run inside a transaction, so the setting is re-checked
+        under the write lock first: another process started against the same
+        file may already have rebuilt it. A VACUUM that fails is accepted if
+        the setting has taken effect by then.
+        """
+        await conn.execute('BEGIN IMMEDIATE')
+        cursor = await conn.execute('PRAGMA auto_vacuum')
+        auto_vacuum = (await cursor.fetchone())[0]
+        await conn.commit()
+        if auto_vacuum == 2:
+            return
+        await conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        cursor = await conn.execute('PRAGMA page_count')
+        page_count = (await cursor.fetchone())[0]
+        if page_count > 1:
+            logger.info(f"Rebuilding database ({page_count} pages) with auto_vacuum=INCREMENTAL")
+        try:
+            await conn.execute('VACUUM')
+        except sqlite3.OperationalError:
+            cursor = await conn.execute('PRAGMA auto_vacuum')
+            if (await cursor.fetchone())[0] != 2:
+                raise
     
     async def _migrate_loa_notification_columns(self, conn):
         """Add LOA notification columns to existing server_configs table if they don't exist"""
@@ -370,7 +1755,7 @@ class DatabaseManager:
                 
         except Exception as e:
             logger.error(f"Error during LOA notification column migration: {e}")
-            # Don't raise here - table creation will handle it
+            raise
     
     async def _migrate_dm_users_column(self, conn):
         """Migrate dm_user_id to dm_users JSON array"""
@@ -409,7 +1794,7 @@ class DatabaseManager:
                 
         except Exception as e:
             logger.error(f"Error during DM users column migration: {e}")
-            # Don't raise here - table creation will handle it
+            raise
     
     async def _migrate_forum_channel_columns(self, conn):
         """Add forum channel columns to existing server_configs table if they don't exist"""
@@ -433,7 +1818,7 @@ class DatabaseManager:
                 
         except Exception as e:
             logger.error(f"Error during forum channel column migration: {e}")
-            # Don't raise here - table creation will handle it
+            raise
     
     async def _migrate_dues_periods_updated_at(self, conn):
         """Migrate dues_periods table to add updated_at column if missing"""
@@ -467,137 +1852,113 @@ class DatabaseManager:
                 
         except Exception as e:
             logger.error(f"Error during dues_periods updated_at migration: {e}")
-            # Don't raise here - table creation will handle it
-    
-    async def get_active_loas_for_guild(self, guild_id: int) -> List[Dict[str, Any]]:
-        """Get all active LOAs for a specific guild with member information"""
-        try:
-            conn = await self._get_shared_connection()
-            cursor = await conn.execute('''
-                SELECT l.*, m.discord_name, m.discord_username
-                FROM loa_records l
-                JOIN members m ON l.guild_id = m.guild_id AND l.user_id = m.user_id
-                WHERE l.guild_id = ? AND l.is_active = TRUE AND l.is_expired = FALSE
-                ORDER BY l.end_time ASC
-            ''', (guild_id,))
-            
-            rows = await cursor.fetchall()
-            
-            active_loas = []
-            for row in rows:
-                # Convert row to dictionary
-                loa_data = {
-                    'id': row[0],
-                    'guild_id': row[1],
-                    'user_id': row[2],
-                    'duration': row[3],
-                    'reason': row[4],
-                    'start_time': row[5],
-                    'end_time': row[6],
-                    'is_active': row[7],
-                    'is_expired': row[8],
-                    'created_at': row[9],
-                    'discord_name': row[10],
-                    'discord_username': row[11]
-                }
-                active_loas.append(loa_data)
-            
-            return active_loas
-            
-        except Exception as e:
-            logger.error(f"Error getting active LOAs for guild {guild_id}: {e}")
-            return []
-    
-    async def get_loa_by_id(self, loa_id: int) -> Optional[Dict[str, Any]]:
-        """Get LOA details by ID with member information"""
-        try:
-            conn = await self._get_shared_connection()
-            cursor = await conn.execute('''
-                SELECT l.*, m.discord_name, m.discord_username
-                FROM loa_records l
-                JOIN members m ON l.guild_id = m.guild_id AND l.user_id = m.user_id
-                WHERE l.id = ?
-            ''', (loa_id,))
-            
-            row = await cursor.fetchone()
-            
-            if row:
-                return {
-                    'id': row[0],
-                    'guild_id': row[1],
-                    'user_id': row[2],
-                    'duration': row[3],
-                    'reason': row[4],
-                    'start_time': row[5],
-                    'end_time': row[6],
-                    'is_active': row[7],
-                    'is_expired': row[8],
-                    'created_at': row[9],
-                    'discord_name': row[10],
-                    'discord_username': row[11]
-                }
-            
-            return None
-            
-        except Exception as e:
-            logger.error(f"Error getting LOA by ID {loa_id}: {e}")
-            return None
+            raise
     
     async def initialize_guild(self, guild_id: int):
-        """Initialize database for a specific guild"""
+        """Initialize database for a specific guild
+        
+        Schema migrations only run on the first call per process, so this is a
+        single upsert of the default server config afterwards.
+        """
         try:
             await self.initialize_database()
             
             # Create default server config if it doesn't exist
             conn = await self._get_shared_connection()
-            cursor = await conn.execute(
-                'SELECT guild_id FROM server_configs WHERE guild_id = ?',
-                (guild_id,)
-            )
-            if not await cursor.fetchone():
-                default_roles = [
-                    "President", "Vice President", "Sergeant At Arms",
-                    "Secretary", "Treasurer", "Road Captain", "Tailgunner",
-                    "Enforcer", "Full Patch", "Full Patch/Nomad"
-                ]
-                default_categories = [
-                    "Body Armour & Medical", "Pistols", "Rifles", "SMGs",
-                    "Heist Items", "Dirty Cash", "Drug Items", "Mech Shop", "Crafting Items"
-                ]
-                
-                await conn.execute('''
-                    INSERT INTO server_configs (guild_id, membership_roles, contribution_categories)
-                    VALUES (?, ?, ?)
-                ''', (guild_id, json.dumps(default_roles), json.dumps(default_categories)))
-                await self._execute_commit()
+            cursor = await conn.execute('''
+                INSERT INTO server_configs (guild_id, membership_roles, contribution_categories)
+                VALUES (?, ?, ?)
+                ON CONFLICT(guild_id) DO NOTHING
+            ''', (guild_id, DEFAULT_MEMBERSHIP_ROLES_JSON, DEFAULT_CONTRIBUTION_CATEGORIES_JSON))
+            created = cursor.rowcount > 0
+            await self._execute_commit()
+            if created:
                 logger.info(f"Default configuration created for guild {guild_id}")
         except Exception as e:
             logger.error(f"Failed to initialize guild {guild_id}: {e}")
             raise
     
     # Server Configuration Methods
+    @staticmethod
+    def _parse_server_config(row) -> Dict:
+        """Convert a server_configs row to a dict with its JSON fields decoded"""
+        config = dict(row)
+        
+        # Parse JSON fields
+        if config.get('membership_roles'):
+            config['membership_roles'] = json.loads(config['membership_roles'])
+        if config.get('contribution_categories'):
+            config['contribution_categories'] = json.loads(config['contribution_categories'])
+        return config
+    
+    @staticmethod
+    def _copy_server_config(config: Dict) -> Dict:
+        """Copy a cached config so callers can mutate its lists safely"""
+        copied = dict(config)
+        for key in ('membership_roles', 'contribution_categories'):
+            if isinstance(copied.get(key), list):
+                copied[key] = list(copied[key])
+        return copied
+    
     async def get_server_config(self, guild_id: int) -> Optional[Dict]:
-        """Get server configuration"""
-        conn = await self._get_shared_connection()
-        # Set row factory to get dictionary-like rows
-        conn.row_factory = aiosqlite.Row
-        cursor = await conn.execute(
+        """Get server configuration
+        
+        Parsed configs are cached per guild (unless server_config_cache is
+        off) and invalidated by every write that goes through this class.
+        """
+        cached = self._config_cache.get(guild_id)
+        if cached is not None:
+            self._config_cache_stats['hits'] += 1
+            return self._copy_server_config(cached)
+        
+        self._config_cache_stats['misses'] += 1
+        generation = self._config_cache_generation
+        row = await self._fetchone(
             'SELECT * FROM server_configs WHERE guild_id = ?',
             (guild_id,)
         )
-        row = await cursor.fetchone()
         if row:
-            # Convert Row object to dictionary
-            config = dict(row)
-            
-            # Parse JSON fields
-            if config.get('membership_roles'):
-                config['membership_roles'] = json.loads(config['membership_roles'])
-            if config.get('contribution_categories'):
-                config['contribution_categories'] = json.loads(config['contribution_categories'])
-            return config
+            config = self._parse_server_config(row)
+            # Don't cache reads of uncommitted data or reads that raced with a write
+            if (self._config_cache_enabled and generation == self._config_cache_generation
+                    and self._current_transaction() is None):
+                self._config_cache[guild_id] = config
+            return self._copy_server_config(config)
         return None
     
+    async def warm_server_config_cache(self) -> int:
+        """Load every guild's config into the cache with a single query"""
+        generation = self._config_cache_generation
+        rows = await self._fetchall('SELECT * FROM server_configs')
+        if self._config_cache_enabled and generation == self._config_cache_generation:
+            for row in rows:
+                config = self._parse_server_config(row)
+                self._config_cache[config['guild_id']] = config
+        logger.info(f"Server config cache warmed with {len(rows)} guild(s)")
+        return len(rows)
+    
+    def invalidate_server_config(self, guild_id: Optional[int] = None):
+        """Drop one guild's cached config (or the whole cache when guild_id is None)"""
+        self._config_cache_generation += 1
+        if self._current_transaction() is not None and guild_id is not None:
+            # Invalidate again once the unit of work commits or rolls back
+            self._transaction_invalidated_guilds.add(guild_id)
+        if guild_id is None:
+            self._config_cache.clear()
+        else:
+            self._config_cache.pop(guild_id, None)
+    
+    async def get_loa_notification_guild_ids(self) -> List[int]:
+        """Get the guilds that have an LOA notification channel configured"""
+        rows = await self._fetchall(
+            'SELECT guild_id FROM server_configs WHERE loa_notification_channel_id IS NOT NULL'
+        )
+        return [row[0] for row in rows]
+    
+    def get_server_config_cache_stats(self) -> Dict[str, int]:
+        """Get server config cache hit/miss counters"""
+        return {**self._config_cache_stats, 'size': len(self._config_cache)}
+    
     async def update_server_config(self, guild_id: int, **kwargs):
         """Update server configuration"""
         conn = await self._get_shared_connection()
@@ -616,6 +1977,23 @@ class DatabaseManager:
             WHERE guild_id = ?
         ''', values)
         await self._execute_commit()
+        self.invalidate_server_config(guild_id)
+    
+    async def reset_server_config(self, guild_id: int):
+        """Reset a guild's server configuration to the defaults"""
+        try:
+            conn = await self._get_shared_connection()
+            await conn.execute('DELETE FROM server_configs WHERE guild_id = ?', (guild_id,))
+            await conn.execute('''
+                INSERT INTO server_configs (guild_id, membership_roles, contribution_categories)
+                VALUES (?, ?, ?)
+            ''', (guild_id, DEFAULT_MEMBERSHIP_ROLES_JSON, DEFAULT_CONTRIBUTION_CATEGORIES_JSON))
+            await self._execute_commit()
+            self.invalidate_server_config(guild_id)
+            logger.info(f"Server configuration reset for guild {guild_id}")
+        except Exception as e:
+            logger.error(f"Failed to reset server configuration for guild {guild_id}: {e}")
+            raise
     
     # Member Management Methods
     async def add_or_update_member(self, guild_id: int, user_id: int, discord_name: str, rank: str = None, discord_username: str = None, status: str = 'Active'):
@@ -631,49 +2009,91 @@ class DatabaseManager:
                   discord_name, discord_username, rank, status, datetime.now()))
             await self._execute_commit()
         except Exception as e:
-            logger.error(f"Failed to add/update member {user_id} in guild {guild_id}: {e}")
+            logger.error(f"Failed to add/update member {user_id} in guild {guild_id}: {e}")
+            raise
+    
+    async def get_member(self, guild_id: int, user_id: int) -> Optional[MemberRecord]:
+        """Get a specific member
+        
+        The record exposes a backward-compatible alias 'on_loa' for 'is_on_loa'.
+        """
+        return await self._fetchone(
+            'SELECT * FROM members WHERE guild_id = ? AND user_id = ?',
+            (guild_id, user_id),
+            record_type=MemberRecord
+        )
+    
+    async def get_all_members(self, guild_id: int) -> List[MemberRecord]:
+        """Get all members for a guild
+        
+        Each record exposes a backward-compatible alias 'on_loa' for 'is_on_loa'.
+        """
+        return await self._fetchall(
+            'SELECT * FROM members WHERE guild_id = ? ORDER BY rank, discord_name',
+            (guild_id,),
+            record_type=MemberRecord
+        )
+
+    async def bulk_upsert_members(self, guild_id: int, members: List[Tuple[int, str, Optional[str], Optional[str], Optional[str]]]) -> int:
+        """Add or update many members at once
+
+        Uses the same upsert as add_or_update_member, written with one
+        executemany in a single transaction.
+
+        Args:
+            guild_id: The Discord server ID
+            members: (user_id, discord_name, discord_username, rank, status) tuples
+
+        Returns:
+            Number of members written
+        """
+        if not members:
+            return 0
+
+        now = datetime.now()
+        params = [
+            (guild_id, user_id, discord_name, discord_username, rank, status, now,
+             discord_name, discord_username, rank, status, now)
+            for user_id, discord_name, discord_username, rank, status in members
+        ]
+        try:
+            async with self.transaction() as conn:
+                await conn.executemany('''
+                    INSERT INTO members (guild_id, user_id, discord_name, discord_username, rank, status, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(guild_id, user_id)
+                    DO UPDATE SET discord_name = ?, discord_username = COALESCE(?, discord_username), rank = COALESCE(?, rank), status = COALESCE(?, status), updated_at = ?
+                ''', params)
+            logger.info(f"Upserted {len(params)} members in guild {guild_id}")
+            return len(params)
+        except Exception as e:
+            logger.error(f"Failed to bulk upsert {len(params)} members in guild {guild_id}: {e}")
+            raise
+
+    async def remove_members(self, guild_id: int, user_ids: List[int]) -> int:
+        """Delete many members at once in a single transaction
+
+        Returns:
+            Number of member rows deleted
+        """
+        if not user_ids:
+            return 0
+
+        try:
+            async with self.transaction() as conn:
+                # rowcount sums each DELETE's own changes; total_changes would also
+                # count the rows the dues total triggers touch
+                cursor = await conn.executemany(
+                    'DELETE FROM members WHERE guild_id = ? AND user_id = ?',
+                    [(guild_id, user_id) for user_id in user_ids]
+                )
+                removed = cursor.rowcount
+            logger.info(f"Removed {removed} members from guild {guild_id}")
+            return removed
+        except Exception as e:
+            logger.error(f"Failed to remove {len(user_ids)} members from guild {guild_id}: {e}")
             raise
-    
-    async def get_member(self, guild_id: int, user_id: int) -> Optional[Dict]:
-        """Get a specific member
-        
-        Returns a dict with a backward-compatible alias 'on_loa' for 'is_on_loa'.
-        """
-        conn = await self._get_shared_connection()
-        # Set row factory to get dictionary-like rows
-        conn.row_factory = aiosqlite.Row
-        cursor = await conn.execute(
-            'SELECT * FROM members WHERE guild_id = ? AND user_id = ?',
-            (guild_id, user_id)
-        )
-        row = await cursor.fetchone()
-        if row:
-            member = dict(row)
-            # Backward-compatible alias for tests/older code
-            member['on_loa'] = member.get('is_on_loa', False)
-            return member
-        return None
-    
-    async def get_all_members(self, guild_id: int) -> List[Dict]:
-        """Get all members for a guild
-        
-        Adds a backward-compatible alias 'on_loa' for each member dict.
-        """
-        conn = await self._get_shared_connection()
-        # Set row factory to get dictionary-like rows
-        conn.row_factory = aiosqlite.Row
-        cursor = await conn.execute(
-            'SELECT * FROM members WHERE guild_id = ? ORDER BY rank, discord_name',
-            (guild_id,)
-        )
-        rows = await cursor.fetchall()
-        result = []
-        for row in rows:
-            m = dict(row)
-            m['on_loa'] = m.get('is_on_loa', False)
-            result.append(m)
-        return result
-    
+
     async def update_member_loa_status(self, guild_id: int, user_id: int, is_on_loa: bool):
         """Update member's LOA status"""
         try:
@@ -730,37 +2150,35 @@ class DatabaseManager:
         """Create a new LOA record"""
         conn = await self._get_shared_connection()
         cursor = await conn.execute('''
-            INSERT INTO loa_records (guild_id, user_id, duration, reason, start_time, end_time)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (guild_id, user_id, duration, reason, start_time, end_time))
+            INSERT INTO loa_records (guild_id, user_id, duration, reason, start_time, end_time, end_time_epoch)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (guild_id, user_id, duration, reason, start_time, end_time, to_epoch(end_time)))
         await self._execute_commit()
         return cursor.lastrowid
     
-    async def get_active_loa(self, guild_id: int, user_id: int) -> Optional[Dict]:
+    async def get_active_loa(self, guild_id: int, user_id: int) -> Optional[LOARecord]:
         """Get active LOA for a user"""
-        conn = await self._get_shared_connection()
-        # Set row factory to get dictionary-like rows
-        conn.row_factory = aiosqlite.Row
-        cursor = await conn.execute('''
+        return await self._fetchone('''
             SELECT * FROM loa_records 
             WHERE guild_id = ? AND user_id = ? AND is_active = TRUE AND is_expired = FALSE
             ORDER BY created_at DESC LIMIT 1
-        ''', (guild_id, user_id))
-        row = await cursor.fetchone()
-        return dict(row) if row else None
+        ''', (guild_id, user_id), record_type=LOARecord)
     
-    async def get_expired_loas(self) -> List[Dict]:
+    async def get_expired_loas(self) -> List[LOARecord]:
         """Get all LOAs that have expired but not yet been processed"""
-        conn = await self._get_shared_connection()
-        # Set row factory to get dictionary-like rows
-        conn.row_factory = aiosqlite.Row
-        cursor = await conn.execute('''
+        return await self._fetchall('''
             SELECT * FROM loa_records 
             WHERE is_active = TRUE AND is_expired = FALSE 
-            AND end_time <= ?
-        ''', (datetime.now(),))
-        rows = await cursor.fetchall()
-        return [dict(row) for row in rows]
+            AND end_time_epoch <= ?
+        ''', (to_epoch(datetime.now()),), record_type=LOARecord)
+    
+    async def get_next_loa_expiry(self) -> Optional[datetime]:
+        """Get the end time (aware, UTC) of the earliest LOA still waiting to expire (None if there is none)"""
+        row = await self._fetchone('''
+            SELECT MIN(end_time_epoch) FROM loa_records
+            WHERE is_active = TRUE AND is_expired = FALSE
+        ''')
+        return from_epoch(row[0]) if row else None
     
     async def mark_loa_expired(self, loa_id: int):
         """Mark an LOA as expired"""
@@ -773,27 +2191,25 @@ class DatabaseManager:
     
     async def end_loa(self, loa_id: int):
         """End an LOA (mark as inactive)"""
-        conn = await self._get_shared_connection()
-        # Get the LOA record first
-        cursor = await conn.execute(
-            'SELECT guild_id, user_id FROM loa_records WHERE id = ?',
-            (loa_id,)
-        )
-        row = await cursor.fetchone()
-        
-        if row:
-            guild_id, user_id = row
-            
-            # Mark LOA as inactive
-            await conn.execute(
-                'UPDATE loa_records SET is_active = FALSE WHERE id = ?',
+        async with self.transaction() as conn:
+            # Get the LOA record first
+            cursor = await conn.execute(
+                'SELECT guild_id, user_id FROM loa_records WHERE id = ?',
                 (loa_id,)
             )
+            row = await cursor.fetchone()
             
-            # Update member's LOA status
-            await self.update_member_loa_status(guild_id, user_id, False)
-            
-            await self._execute_commit()
+            if row:
+                guild_id, user_id = row
+                
+                # Mark LOA as inactive
+                await conn.execute(
+                    'UPDATE loa_records SET is_active = FALSE WHERE id = ?',
+                    (loa_id,)
+                )
+                
+                # Update member's LOA status (commits with the rest of the unit of work)
+                await self.update_member_loa_status(guild_id, user_id, False)
     
     # Contribution Methods
     async def add_contribution(self, guild_id: int, user_id: int, category: str, 
@@ -801,65 +2217,169 @@ class DatabaseManager:
         """Add a contribution record"""
         conn = await self._get_shared_connection()
         cursor = await conn.execute('''
-            INSERT INTO contributions (guild_id, user_id, category, item_name, quantity)
-            VALUES (?, ?, ?, ?, ?)
+            INSERT INTO contributions (guild_id, user_id, category, item_name, quantity, created_at_epoch)
+            VALUES (?, ?, ?, ?, ?, CAST(strftime('%s', 'now') AS INTEGER))
         ''', (guild_id, user_id, category, item_name, quantity))
         await self._execute_commit()
         return cursor.lastrowid
     
-    async def get_contributions_by_category(self, guild_id: int, category: str) -> List[Dict]:
+    async def get_contributions_by_category(self, guild_id: int, category: str) -> List[ContributionRecord]:
         """Get all contributions for a specific category"""
-        conn = await self._get_shared_connection()
-        # Set row factory to get dictionary-like rows
-        conn.row_factory = aiosqlite.Row
-        cursor = await conn.execute('''
+        return await self._fetchall('''
             SELECT c.*, m.discord_name
             FROM contributions c
             JOIN members m ON c.guild_id = m.guild_id AND c.user_id = m.user_id
             WHERE c.guild_id = ? AND c.category = ?
             ORDER BY c.created_at DESC
-        ''', (guild_id, category))
-        rows = await cursor.fetchall()
-        return [dict(row) for row in rows]
+        ''', (guild_id, category), record_type=ContributionRecord)
     
-    async def get_all_contributions(self, guild_id: int) -> List[Dict]:
+    _ALL_CONTRIBUTIONS_QUERY = '''
+        SELECT c.*, m.discord_name
+        FROM contributions c
+        JOIN members m ON c.guild_id = m.guild_id AND c.user_id = m.user_id
+        WHERE c.guild_id = ?
+        ORDER BY c.category, c.created_at DESC
+    '''
+    
+    async def get_all_contributions(self, guild_id: int) -> List[ContributionRecord]:
         """Get all contributions for a guild"""
-        conn = await self._get_shared_connection()
-        # Set row factory to get dictionary-like rows
-        conn.row_factory = aiosqlite.Row
-        cursor = await conn.execute('''
-            SELECT c.*, m.discord_name
-            FROM contributions c
-            JOIN members m ON c.guild_id = m.guild_id AND c.user_id = m.user_id
-            WHERE c.guild_id = ?
-            ORDER BY c.category, c.created_at DESC
-        ''', (guild_id,))
-        rows = await cursor.fetchall()
-        return [dict(row) for row in rows]
+        return await self._fetchall(self._ALL_CONTRIBUTIONS_QUERY, (guild_id,), record_type=ContributionRecord)
+    
+    def iter_all_contributions(self, guild_id: int) -> AsyncIterator[ContributionRecord]:
+        """Stream all contributions for a guild (same rows and order as get_all_contributions)"""
+        return self._iterate(self._ALL_CONTRIBUTIONS_QUERY, (guild_id,), record_type=ContributionRecord)
+    
+    async def delete_latest_contribution(self, guild_id: int, user_id: int, item_name: str) -> Optional[ContributionRecord]:
+        """Delete a member's most recent contribution whose item name contains item_name
+        
+        Returns:
+            The deleted contribution (with the member's discord_name), or None if nothing matched
+        """
+        try:
+            async with self.transaction() as conn:
+                cursor = await conn.execute('''
+                    SELECT c.*, m.discord_name
+                    FROM contributions c
+                    JOIN members m ON c.guild_id = m.guild_id AND c.user_id = m.user_id
+                    WHERE c.guild_id = ? AND c.user_id = ? AND c.item_name LIKE ?
+                    ORDER BY c.created_at_epoch DESC, c.id DESC LIMIT 1
+                ''', (guild_id, user_id, f"%{item_name}%"))
+                self._set_row_factory(cursor, ContributionRecord)
+                contribution = await cursor.fetchone()
+                if contribution is not None:
+                    await conn.execute('DELETE FROM contributions WHERE id = ?', (contribution['id'],))
+            return contribution
+        except Exception as e:
+            logger.error(f"Failed to delete contribution '{item_name}' of user {user_id} in guild {guild_id}: {e}")
+            raise
+    
+    async def delete_category_records(self, guild_id: int, categories: List[str]) -> Dict[str, int]:
+        """Delete the contributions and audit log entries (quantity changes) of the given categories
+        
+        Returns:
+            {'contributions': rows deleted, 'quantity_changes': rows deleted}
+        """
+        placeholders = ','.join('?' * len(categories))
+        try:
+            async with self.transaction() as conn:
+                cursor = await conn.execute(
+                    f'DELETE FROM quantity_changes WHERE guild_id = ? AND category IN ({placeholders})',
+                    [guild_id] + list(categories)
+                )
+                quantity_changes = cursor.rowcount
+                cursor = await conn.execute(
+                    f'DELETE FROM contributions WHERE guild_id = ? AND category IN ({placeholders})',
+                    [guild_id] + list(categories)
+                )
+                contributions = cursor.rowcount
+            logger.info(f"Deleted {contributions} contribution(s) and {quantity_changes} quantity change(s) "
+                        f"in {len(categories)} categories from guild {guild_id}")
+            return {'contributions': contributions, 'quantity_changes': quantity_changes}
+        except Exception as e:
+            logger.error(f"Failed to delete category records from guild {guild_id}: {e}")
+            raise
+    
+    def iter_loa_records(self, guild_id: int) -> AsyncIterator[LOARecord]:
+        """Stream every LOA record for a guild"""
+        return self._iterate('SELECT * FROM loa_records WHERE guild_id = ?', (guild_id,), record_type=LOARecord)
     
     # Backup and Export Methods
+    async def backup_to(self, dest_path: str, pages: int = BACKUP_PAGES_PER_STEP) -> Dict[str, int]:
+        """Write a consistent, gzip-compressed copy of the database to dest_path
+        
+        Uses the SQLite online backup API from a dedicated connection, copying
+        `pages` pages per step so the writer keeps committing in between; the
+        copy includes everything committed to the WAL. See backup_sqlite_file.
+        
+        Returns:
+            {'pages': pages copied, 'raw_size': snapshot bytes, 'size': gzip bytes}
+        """
+        return await backup_sqlite_file(self.db_path, dest_path, pages)
+    
     async def export_guild_data(self, guild_id: int) -> Dict:
-        """Export all data for a guild"""
+        """Export all data for a guild
+        
+        Builds the whole export in memory; write_guild_export streams the
+        same document to a file instead.
+        """
         data = {
             'guild_id': guild_id,
             'export_timestamp': datetime.now().isoformat(),
             'server_config': await self.get_server_config(guild_id),
-            'members': await self.get_all_members(guild_id),
-            'contributions': await self.get_all_contributions(guild_id)
+            'members': [dict(member) for member in await self.get_all_members(guild_id)],
+            'contributions': [dict(contribution) for contribution in await self.get_all_contributions(guild_id)]
         }
         
         # Get LOA records
-        conn = await self._get_shared_connection()
-        # Set row factory to get dictionary-like rows
-        conn.row_factory = aiosqlite.Row
-        cursor = await conn.execute(
+        rows = await self._fetchall(
             'SELECT * FROM loa_records WHERE guild_id = ?',
-            (guild_id,)
+            (guild_id,), record_type=LOARecord
         )
-        rows = await cursor.fetchall()
         data['loa_records'] = [dict(row) for row in rows]
         
         return data
+    
+    async def write_guild_export(self, guild_id: int, fp: TextIO) -> Dict[str, int]:
+        """Stream the export_guild_data document to a text file as indented JSON
+        
+        Members, contributions and LOA records are written row by row as they
+        are fetched, so only one chunk of rows is in memory at a time. The
+        output parses to the same document as
+        json.dumps(export_guild_data(...), indent=2, default=str).
+        
+        Returns:
+            Rows written per section
+        """
+        def indented(value, depth):
+            return json.dumps(value, indent=2, default=str).replace('\n', '\n' + '  ' * depth)
+        
+        header = {
+            'guild_id': guild_id,
+            'export_timestamp': datetime.now().isoformat(),
+            'server_config': await self.get_server_config(guild_id),
+        }
+        fp.write('{')
+        for key, value in header.items():
+            fp.write(f'\n  {json.dumps(key)}: {indented(value, 1)},')
+        
+        sections = [
+            ('members', self._iterate('SELECT * FROM members WHERE guild_id = ? ORDER BY rank, discord_name', (guild_id,), record_type=MemberRecord)),
+            ('contributions', self.iter_all_contributions(guild_id)),
+            ('loa_records', self.iter_loa_records(guild_id)),
+        ]
+        counts = {}
+        for index, (key, rows) in enumerate(sections):
+            fp.write(f'\n  {json.dumps(key)}: [')
+            count = 0
+            async for row in rows:
+                fp.write(',\n    ' if count else '\n    ')
+                fp.write(indented(dict(row), 2))
+                count += 1
+            fp.write('\n  ]' if count else ']')
+            fp.write(',' if index < len(sections) - 1 else '')
+            counts[key] = count
+        fp.write('\n}')
+        return counts
 
     # DM Transcript Methods
     async def log_dm_transcript(self, guild_id: int, sender_id: int, recipient_id: int, 
@@ -884,14 +2404,9 @@ class DatabaseManager:
             conn = await self._get_shared_connection()
             attachments_json = json.dumps(attachments) if attachments else None
             
-            cursor = await conn.execute('''
-                INSERT INTO dm_transcripts (
-                    guild_id, sender_id, recipient_id, role_id, 
-                    message, message_type, recipient_type, attachments
-                )
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (guild_id, sender_id, recipient_id, role_id, 
-                  message, message_type, recipient_type, attachments_json))
+            cursor = await conn.execute(TRANSCRIPT_INSERT, (guild_id, sender_id, recipient_id, role_id, 
+                                                            message, message_type, recipient_type, attachments_json,
+                                                            None))
             
             await self._execute_commit()
             return cursor.lastrowid
@@ -899,8 +2414,141 @@ class DatabaseManager:
             logger.error(f"Failed to log DM transcript: {e}")
             raise
     
+    async def log_dm_transcripts(self, entries: List[Dict]) -> int:
+        """Log several DM transcript entries with one executemany and one commit
+        
+        Args:
+            entries: Dicts with log_dm_transcript's keyword arguments, plus an
+                optional created_at (UTC 'YYYY-MM-DD HH:MM:SS'; default now)
+            
+        Returns:
+            The number of entries written
+        
+        The batch is its own unit of work, so a failed write is rolled back
+        without touching other writers' statements. If an entry violates a
+        constraint the rest are written one at a time and the rejected entries
+        are logged and dropped.
+        """
+        if not entries:
+            return 0
+        rows = [
+            (entry['guild_id'], entry['sender_id'], entry['recipient_id'], entry.get('role_id'),
+             entry['message'], entry['message_type'], entry['recipient_type'],
+             json.dumps(entry['attachments']) if entry.get('attachments') else None,
+             entry.get('created_at'))
+            for entry in entries
+        ]
+        try:
+            async with self.transaction() as conn:
+                # The savepoint undoes a partial batch even when it joins an outer unit of work
+                await conn.execute('SAVEPOINT transcript_batch')
+                try:
+                    try:
+                        await conn.executemany(TRANSCRIPT_INSERT, rows)
+                        written = len(rows)
+                    except sqlite3.IntegrityError:
+                        await conn.execute('ROLLBACK TO transcript_batch')
+                        written = 0
+                        for row in rows:
+                            try:
+                                await conn.execute(TRANSCRIPT_INSERT, row)
+                                written += 1
+                            except sqlite3.IntegrityError as e:
+                                logger.error(f"Dropping DM transcript from {row[1]} to {row[2]} "
+                                             f"in guild {row[0]}: {e}")
+                except BaseException:
+                    await conn.execute('ROLLBACK TO transcript_batch')
+                    raise
+                await conn.execute('RELEASE transcript_batch')
+            return written
+        except Exception as e:
+            logger.error(f"Failed to log {len(rows)} DM transcript(s): {e}")
+            raise
+    
+    async def queue_dm_transcript(self, guild_id: int, sender_id: int, recipient_id: int,
+                                  message: str, message_type: str, recipient_type: str,
+                                  role_id: int = None, attachments: List[Dict] = None):
+        """Queue a DM transcript entry for the next batch write instead of writing it now
+        
+        Takes log_dm_transcript's arguments. The queue is written with
+        log_dm_transcripts once transcript_batch_size entries are waiting (by
+        the call that fills it) or transcript_flush_ms after the first one.
+        Each entry keeps the time it was queued as its created_at. Transcript
+        reads and close() flush it first, so nothing queued is missed or lost
+        on shutdown. A failed flush is logged, never raised to the caller that
+        triggered it, and retried by the timer with backoff.
+        """
+        self._transcript_queue.append({
+            'guild_id': guild_id, 'sender_id': sender_id, 'recipient_id': recipient_id,
+            'role_id': role_id, 'message': message, 'message_type': message_type,
+            'recipient_type': recipient_type, 'attachments': attachments,
+            'created_at': datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S'),
+        })
+        if len(self._transcript_queue) >= self._transcript_batch_size:
+            await self._flush_queued_transcripts()
+        elif self._transcript_flush_task is None:
+            self._transcript_flush_task = asyncio.create_task(
+                self._flush_transcripts_later(self._transcript_flush_delay)
+            )
+    
+    async def _flush_queued_transcripts(self):
+        """Flush the transcript queue for a caller that only needs a best effort
+        
+        On failure the entries stay queued, the error is logged and the timer
+        retries the flush.
+        """
+        try:
+            await self.flush_dm_transcripts()
+        except Exception as e:
+            logger.error(f"Could not write {len(self._transcript_queue)} queued DM transcript(s), "
+                         f"retrying later: {e}")
+            if self._transcript_flush_task is None and self._transcript_queue:
+                self._transcript_flush_task = asyncio.create_task(
+                    self._flush_transcripts_later(self._transcript_flush_delay, 1)
+                )
+    
+    async def _flush_transcripts_later(self, delay: float, attempt: int = 0):
+        await asyncio.sleep(delay)
+        self._transcript_flush_task = None
+        try:
+            # Shielded so close() cancelling the timer never interrupts a write
+            await asyncio.shield(self.flush_dm_transcripts())
+        except Exception as e:
+            if self._transcript_flush_task is not None or not self._transcript_queue:
+                return
+            retry_delay = min(max(self._transcript_flush_delay, TRANSCRIPT_FLUSH_MS / 1000) * 2 ** attempt,
+                              TRANSCRIPT_RETRY_MAX_S)
+            logger.error(f"Queued DM transcript flush failed, retrying in {retry_delay:.1f}s: {e}")
+            self._transcript_flush_task = asyncio.create_task(
+                self._flush_transcripts_later(retry_delay, attempt + 1)
+            )
+    
+    async def flush_dm_transcripts(self) -> int:
+        """Write every queued DM transcript entry now
+        
+        Entries are put back at the front of the queue if the write fails;
+        entries a constraint rejects are dropped by log_dm_transcripts.
+        
+        Returns:
+            The number of entries written
+        """
+        if self._current_transaction() is not None:
+            # Write inside this task's unit of work. Waiting for the flush lock
+            # here could deadlock against a flush waiting for the unit of work.
+            return await self._write_transcript_queue()
+        async with self._transcript_flush_lock:
+            return await self._write_transcript_queue()
+    
+    async def _write_transcript_queue(self) -> int:
+        entries, self._transcript_queue = self._transcript_queue, []
+        try:
+            return await self.log_dm_transcripts(entries)
+        except BaseException:
+            self._transcript_queue[:0] = entries
+            raise
+    
     async def get_user_transcript(self, guild_id: int, user_id: int, limit: int = 100, 
-                                offset: int = 0) -> List[Dict]:
+                                offset: int = 0) -> List[TranscriptRecord]:
         """Get DM transcript entries for a specific user
         
         Args:
@@ -912,65 +2560,137 @@ class DatabaseManager:
         Returns:
             List of transcript entries
         """
-        conn = await self._get_shared_connection()
-        conn.row_factory = aiosqlite.Row
-        
-        cursor = await conn.execute('''
+        await self._flush_queued_transcripts()
+        return await self._fetchall('''
             SELECT * FROM dm_transcripts
             WHERE guild_id = ? AND (sender_id = ? OR recipient_id = ?)
             ORDER BY created_at DESC
             LIMIT ? OFFSET ?
-        ''', (guild_id, user_id, user_id, limit, offset))
+        ''', (guild_id, user_id, user_id, limit, offset), record_type=TranscriptRecord)
+    
+    async def get_user_transcript_page(self, guild_id: int, user_id: int, limit: int = 10,
+                                       cursor: Optional[str] = None) -> Tuple[List[TranscriptRecord], Optional[str]]:
+        """Get one page of a user's DM transcript, newest first
         
-        rows = await cursor.fetchall()
-        result = []
+        Pages are keyed on (created_at, id) rather than OFFSET, so every page
+        costs the same as the first.
         
-        for row in rows:
-            entry = dict(row)
-            # Parse attachments JSON if present
-            if entry.get('attachments'):
-                entry['attachments'] = json.loads(entry['attachments'])
-            result.append(entry)
+        Args:
+            guild_id: The Discord server ID
+            user_id: User ID to get transcript for
+            limit: Entries per page
+            cursor: Opaque cursor returned with the previous page (None for the first page)
             
-        return result
+        Returns:
+            (entries, next_cursor) - next_cursor is None on the last page
+        """
+        await self._flush_queued_transcripts()
+        params = [guild_id, user_id, limit + 1]
+        keyset = ''
+        if cursor:
+            params.extend(_decode_page_cursor(cursor))
+            keyset = 'AND (created_at, id) < (?4, ?5)'
+        
+        # One index-backed branch per side of the conversation instead of an OR
+        rows = await self._fetchall(f'''
+            SELECT * FROM (
+                SELECT * FROM dm_transcripts
+                WHERE guild_id = ?1 AND sender_id = ?2 {keyset}
+                ORDER BY created_at DESC, id DESC
+                LIMIT ?3
+            )
+            UNION ALL
+            SELECT * FROM (
+                SELECT * FROM dm_transcripts
+                WHERE guild_id = ?1 AND recipient_id = ?2 AND sender_id != ?2 {keyset}
+                ORDER BY created_at DESC, id DESC
+                LIMIT ?3
+            )
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?3
+        ''', params, record_type=TranscriptRecord)
+        return self._split_page(rows, limit)
+    
+    @staticmethod
+    def _split_page(rows: List[Any], limit: int) -> Tuple[List[Any], Optional[str]]:
+        """Trim a limit + 1 fetch to one page and build the cursor for the next one"""
+        if len(rows) <= limit:
+            return rows, None
+        page = rows[:limit]
+        return page, _encode_page_cursor(page[-1]['created_at'], page[-1]['id'])
     
-    async def search_transcripts(self, guild_id: int, query: str, limit: int = 50) -> List[Dict]:
+    async def search_transcripts(self, guild_id: int, search_term: str, limit: int = 50) -> List[TranscriptRecord]:
         """Search DM transcripts by content
         
+        Uses the FTS5 transcript index: the guild's most recent
+        TRANSCRIPT_SEARCH_WINDOW matches are ranked by relevance and each result carries a 'snippet' with
+        the matches wrapped in ** for Discord markdown. "quoted phrases" and
+        prefix* terms are supported.
+        
         Args:
             guild_id: The Discord server ID
-            query: Text to search for in messages
+            search_term: Text to search for in messages
             limit: Maximum number of results to return
             
         Returns:
             List of matching transcript entries
         """
-        conn = await self._get_shared_connection()
-        conn.row_factory = aiosqlite.Row
-        
-        # Format the query for LIKE search with wildcards
-        search_term = f"%{query}%"
+        await self._flush_queued_transcripts()
+        if not await self._has_transcript_search_index():
+            # Format the query for LIKE search with wildcards
+            return await self._fetchall('''
+                SELECT *, NULL AS snippet FROM dm_transcripts
+                WHERE guild_id = ? AND message LIKE ?
+                ORDER BY created_at DESC
+                LIMIT ?
+            ''', (guild_id, f"%{search_term}%", limit), record_type=TranscriptRecord)
         
-        cursor = await conn.execute('''
-            SELECT * FROM dm_transcripts
-            WHERE guild_id = ? AND message LIKE ?
-            ORDER BY created_at DESC
-            LIMIT ?
-        ''', (guild_id, search_term, limit))
+        match = _fts_match_query(search_term)
+        if match is None:
+            return []
         
-        rows = await cursor.fetchall()
-        result = []
+        return await self._fetchall(f'''
+            SELECT t.*, snippet({TRANSCRIPT_FTS_TABLE}, 0, '**', '**', '…', 16) AS snippet
+            FROM {TRANSCRIPT_FTS_TABLE}
+            JOIN dm_transcripts t ON t.id = {TRANSCRIPT_FTS_TABLE}.rowid
+            WHERE {TRANSCRIPT_FTS_TABLE} MATCH ?1 AND t.guild_id = ?2
+            AND {TRANSCRIPT_FTS_TABLE}.rowid >= COALESCE((
+                SELECT {TRANSCRIPT_FTS_TABLE}.rowid FROM {TRANSCRIPT_FTS_TABLE}
+                JOIN dm_transcripts w ON w.id = {TRANSCRIPT_FTS_TABLE}.rowid
+                WHERE {TRANSCRIPT_FTS_TABLE} MATCH ?1 AND w.guild_id = ?2
+                ORDER BY {TRANSCRIPT_FTS_TABLE}.rowid DESC LIMIT 1 OFFSET ?4
+            ), 0)
+            ORDER BY {TRANSCRIPT_FTS_TABLE}.rank
+            LIMIT ?3
+        ''', (match, guild_id, limit, TRANSCRIPT_SEARCH_WINDOW - 1), record_type=TranscriptRecord)
+    
+    async def _has_transcript_search_index(self) -> bool:
+        """Check (once) whether the transcript FTS5 index exists"""
+        if self._transcript_fts_available is None:
+            row = await self._fetchone(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                (TRANSCRIPT_FTS_TABLE,)
+            )
+            self._transcript_fts_available = row is not None
+        return self._transcript_fts_available
+    
+    async def rebuild_transcript_search_index(self) -> int:
+        """Backfill or repair the transcript full-text index from dm_transcripts
         
-        for row in rows:
-            entry = dict(row)
-            # Parse attachments JSON if present
-            if entry.get('attachments'):
-                entry['attachments'] = json.loads(entry['attachments'])
-            result.append(entry)
-            
-        return result
+        Creates the index and triggers if they are missing, re-indexes every
+        row and merges the index segments. Returns the number of rows indexed.
+        """
+        await self.initialize_database()
+        async with self.transaction() as conn:
+            if not await self._create_transcript_search_index(conn):
+                raise RuntimeError("SQLite FTS5 is not available in this build")
+            await conn.execute(f"INSERT INTO {TRANSCRIPT_FTS_TABLE} ({TRANSCRIPT_FTS_TABLE}) VALUES ('optimize')")
+            cursor = await conn.execute('SELECT COUNT(*) FROM dm_transcripts')
+            indexed = (await cursor.fetchone())[0]
+        logger.info(f"Transcript search index rebuilt with {indexed} row(s)")
+        return indexed
     
-    async def get_recent_dm_conversations(self, guild_id: int, limit: int = 20) -> List[Dict]:
+    async def get_recent_dm_conversations(self, guild_id: int, limit: int = 20) -> List[TranscriptRecord]:
         """Get recent DM conversations, grouped by user
         
         Args:
@@ -980,42 +2700,37 @@ class DatabaseManager:
         Returns:
             List of recent DM conversations with latest message info
         """
-        conn = await self._get_shared_connection()
-        conn.row_factory = aiosqlite.Row
-        
-        # This query gets the most recent message for each unique sender/recipient pair
-        cursor = await conn.execute('''
-            WITH RankedMessages AS (
-                SELECT 
-                    t.*,
-                    ROW_NUMBER() OVER (
-                        PARTITION BY 
-                            CASE 
-                                WHEN sender_id < recipient_id THEN sender_id || '-' || recipient_id
-                                ELSE recipient_id || '-' || sender_id
-                            END
-                        ORDER BY created_at DESC
-                    ) as row_num
-                FROM dm_transcripts t
-                WHERE guild_id = ?
-            )
-            SELECT * FROM RankedMessages
-            WHERE row_num = 1
-            ORDER BY created_at DESC
-            LIMIT ?
-        ''', (guild_id, limit))
-        
-        rows = await cursor.fetchall()
-        result = []
+        conversations, _ = await self.get_recent_dm_conversations_page(guild_id, limit)
+        return conversations
+    
+    async def get_recent_dm_conversations_page(self, guild_id: int, limit: int = 10,
+                                               cursor: Optional[str] = None) -> Tuple[List[TranscriptRecord], Optional[str]]:
+        """Get one page of recent DM conversations (latest message per user pair)
         
-        for row in rows:
-            entry = dict(row)
-            # Parse attachments JSON if present
-            if entry.get('attachments'):
-                entry['attachments'] = json.loads(entry['attachments'])
-            result.append(entry)
+        Args:
+            guild_id: The Discord server ID
+            limit: Conversations per page
+            cursor: Opaque cursor returned with the previous page (None for the first page)
             
-        return result
+        Returns:
+            (conversations, next_cursor) - next_cursor is None on the last page
+        """
+        await self._flush_queued_transcripts()
+        params = [guild_id, limit + 1]
+        keyset = ''
+        if cursor:
+            params.extend(_decode_page_cursor(cursor))
+            keyset = 'AND (c.last_created_at, c.last_id) < (?3, ?4)'
+        
+        # dm_conversations holds the most recent message for each unique sender/recipient pair
+        rows = await self._fetchall(f'''
+            SELECT t.* FROM dm_conversations c
+            JOIN dm_transcripts t ON t.id = c.last_id
+            WHERE c.guild_id = ?1 {keyset}
+            ORDER BY c.last_created_at DESC, c.last_id DESC
+            LIMIT ?2
+        ''', params, record_type=TranscriptRecord)
+        return self._split_page(rows, limit)
     
     # DM Users Management Methods
     async def add_dm_user(self, guild_id: int, user_id: int) -> bool:
@@ -1146,40 +2861,45 @@ class DatabaseManager:
     # Database Archive Methods
     async def create_database_archive(self, guild_id: int, archive_name: str, 
                                     description: str, notes: str, created_by_id: int) -> int:
-        """Create a database archive with current contribution data and clear audit logs"""
+        """Create a database archive with current contribution data and clear audit logs
+        
+        Contributions and up to 1000 of the most recent audit events are
+        streamed into compressed chunks (see ARCHIVE_SECTIONS). The snapshot,
+        the archive row and the reset commit together, so inventory_totals
+        never sees a half-cleared guild.
+        """
         try:
-            # Get current contribution summary
-            contributions = await self.get_all_contributions(guild_id)
-            
-            # Get audit events for archiving
-            audit_events = await self.get_all_audit_events(guild_id, limit=None)
-            
-            # Create summary data
-            archive_data = {
-                'archived_at': datetime.now().isoformat(),
-                'total_contributions': len(contributions),
-                'total_audit_events': len(audit_events),
-                'contributions': contributions,
-                'audit_events': audit_events[:1000]  # Store up to 1000 most recent audit events
-            }
-            
-            conn = await self._get_shared_connection()
-            cursor = await conn.execute('''
-                INSERT INTO database_archives (guild_id, archive_name, description, notes, 
-                                              archived_data, created_at, created_by_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (guild_id, archive_name, description, notes, json.dumps(archive_data), 
-                  datetime.now().isoformat(), created_by_id))
-            
-            archive_id = cursor.lastrowid
-            
-            # Clear current contributions and audit logs (archive and reset)
-            await conn.execute('DELETE FROM contributions WHERE guild_id = ?', (guild_id,))
-            await self.clear_audit_logs(guild_id)
-            
-            await self._execute_commit()
+            async with self.transaction() as conn:
+                header = json.dumps({'archived_at': datetime.now().isoformat()})
+                cursor = await conn.execute('''
+                    INSERT INTO database_archives (guild_id, archive_name, description, notes, 
+                                                  archived_data, created_at, created_by_id)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (guild_id, archive_name, description, notes, header, 
+                      datetime.now().isoformat(), created_by_id))
+                archive_id = cursor.lastrowid
+                
+                total_contributions, contributions_raw, contributions_stored = await self._write_archive_section(
+                    conn, archive_id, 'contributions', self.iter_all_contributions(guild_id)
+                )
+                _, events_raw, events_stored = await self._write_archive_section(
+                    conn, archive_id, 'audit_events', self.iter_audit_events(guild_id, limit=1000)
+                )
+                total_audit_events = await self.count_audit_events(guild_id)
+                raw_size = contributions_raw + events_raw
+                stored_size = contributions_stored + events_stored + len(header)
+                
+                await conn.execute('''
+                    UPDATE database_archives
+                    SET total_contributions = ?, total_audit_events = ?, raw_size = ?, stored_size = ?
+                    WHERE id = ?
+                ''', (total_contributions, total_audit_events, raw_size, stored_size, archive_id))
+                
+                # Clear current contributions and audit logs (archive and reset)
+                await conn.execute('DELETE FROM contributions WHERE guild_id = ?', (guild_id,))
+                await self.clear_audit_logs(guild_id)
             
-            logger.info(f"Created archive '{archive_name}' (ID: {archive_id}) for guild {guild_id} - cleared {len(contributions)} contributions and {len(audit_events)} audit events")
+            logger.info(f"Created archive '{archive_name}' (ID: {archive_id}) for guild {guild_id} - cleared {total_contributions} contributions and {total_audit_events} audit events ({raw_size:,} bytes compressed to {stored_size:,})")
             return archive_id
             
         except Exception as e:
@@ -1187,33 +2907,344 @@ class DatabaseManager:
             raise
     
     async def get_database_archives(self, guild_id: int) -> List[Dict]:
-        """Get all database archives for a guild"""
-        conn = await self._get_shared_connection()
-        conn.row_factory = aiosqlite.Row
-        cursor = await conn.execute('''
-            SELECT * FROM database_archives 
+        """Get all database archives for a guild (metadata only, no payloads are read)"""
+        rows = await self._fetchall(f'''
+            SELECT {ARCHIVE_METADATA_COLUMNS} FROM database_archives 
             WHERE guild_id = ? 
             ORDER BY created_at DESC
         ''', (guild_id,))
+        return [dict(row) for row in rows]
+    
+    async def get_archive_by_id(self, archive_id: int, sections: Tuple[str, ...] = ARCHIVE_SECTIONS) -> Optional[Dict]:
+        """Get a specific archive by ID
+        
+        archive['archived_data'] holds archived_at, the totals and one list per
+        requested section; sections that were not requested are left out and
+        never decompressed. Pass sections=() for metadata only.
+        """
+        row = await self._fetchone(f'''
+            SELECT {ARCHIVE_METADATA_COLUMNS}, archived_data FROM database_archives WHERE id = ?
+        ''', (archive_id,))
+        if not row:
+            return None
+        
+        archive = dict(row)
+        archived_data = json.loads(archive['archived_data'] or '{}')
+        archived_data['total_contributions'] = archive['total_contributions']
+        archived_data['total_audit_events'] = archive['total_audit_events']
+        for section in sections:
+            archived_data[section] = [item async for item in self.iter_archive_section(archive_id, section)]
+        archive['archived_data'] = archived_data
+        return archive
+    
+    async def iter_archive_section(self, archive_id: int, section: str) -> AsyncIterator[Dict]:
+        """Stream one section of an archive, decompressing a chunk at a time"""
+        if section not in ARCHIVE_SECTIONS:
+            raise ValueError(f"Unknown archive section: {section}")
+        
+        async with aclosing(self._iterate('''
+            SELECT payload FROM database_archive_chunks
+            WHERE archive_id = ? AND section = ?
+            ORDER BY chunk_index
+        ''', (archive_id, section), chunk_size=1)) as chunks:
+            async for chunk in chunks:
+                decoded = json.loads(zlib.decompress(chunk[0]))
+                columns = decoded['columns']
+                for values in decoded['rows']:
+                    yield dict(zip(columns, values))
+    
+    # Retention Methods
+    async def get_retention_policy(self, guild_id: int) -> Dict[str, Optional[int]]:
+        """Get a guild's retention policy in days per kind (None = keep forever)"""
+        config = await self.get_server_config(guild_id) or {}
+        return {kind: config.get(column) for kind, column in RETENTION_COLUMNS.items()}
+    
+    async def set_retention_policy(self, guild_id: int, **days: Optional[int]):
+        """Set retention days for transcripts, audit and/or loa (None or 0 = keep forever)"""
+        unknown = set(days) - set(RETENTION_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown retention policy kind(s): {', '.join(sorted(unknown))}")
+        await self.update_server_config(guild_id, **{
+            RETENTION_COLUMNS[kind]: value or None for kind, value in days.items()
+        })
+    
+    async def _delete_in_batches(self, select_ids_sql: str, params: tuple, delete_sql: str,
+                                 batch_size: int) -> int:
+        """Delete rows a batch at a time, each batch in its own short write transaction"""
+        deleted = 0
+        while True:
+            async with self.transaction() as conn:
+                cursor = await conn.execute(select_ids_sql, params + (batch_size,))
+                ids = [row[0] for row in await cursor.fetchall()]
+                if ids:
+                    await conn.execute(delete_sql, (json.dumps(ids),))
+            deleted += len(ids)
+            if len(ids) < batch_size:
+                return deleted
+            await asyncio.sleep(0)  # let queued writers in between batches
+    
+    async def apply_retention(self, guild_id: int, policy: Optional[Dict[str, Optional[int]]] = None,
+                              batch_size: int = RETENTION_BATCH_SIZE) -> Dict[str, int]:
+        """Prune one guild's rows older than its retention policy
+        
+        - transcripts: dm_transcripts rows older than the cutoff are deleted
+        - audit: quantity_changes rows are rolled into quantity_change_summaries
+          (per item per month), then deleted; contributions are never touched
+        - loa: ended LOA records whose end_time is past the cutoff are deleted
+        
+        Transcript cutoffs are whole UTC days, matching the UTC created_at
+        text in every format it is written in; audit and LOA cutoffs compare
+        the indexed epoch columns.
+        """
+        if policy is None:
+            policy = await self.get_retention_policy(guild_id)
+        
+        def cutoff(kind):
+            days = policy.get(kind)
+            return datetime.now(timezone.utc) - timedelta(days=days) if days else None
+        
+        result = {'transcripts': 0, 'audit': 0, 'loa': 0}
+        try:
+            transcript_cutoff = cutoff('transcripts')
+            if transcript_cutoff:
+                result['transcripts'] = await self._delete_in_batches(
+                    'SELECT id FROM dm_transcripts WHERE guild_id = ? AND created_at < ? ORDER BY created_at LIMIT ?',
+                    (guild_id, transcript_cutoff.strftime('%Y-%m-%d')),
+                    'DELETE FROM dm_transcripts WHERE id IN (SELECT value FROM json_each(?))',
+                    batch_size
+                )
+            
+            audit_cutoff = cutoff('audit')
+            while audit_cutoff:
+                async with self.transaction() as conn:
+                    cursor = await conn.execute('''
+                        SELECT id FROM quantity_changes
+                        WHERE guild_id = ? AND changed_at_epoch < ?
+                        ORDER BY changed_at_epoch LIMIT ?
+                    ''', (guild_id, to_epoch(audit_cutoff), batch_size))
+                    ids = json.dumps([row[0] for row in await cursor.fetchall()])
+                    await conn.execute('''
+                        INSERT INTO quantity_change_summaries (guild_id, category, item_name, period, change_count,
+                                                               net_change, first_changed_at, last_changed_at)
+                        SELECT guild_id, category, item_name, substr(changed_at, 1, 7), COUNT(*),
+                               SUM(new_quantity - old_quantity), MIN(changed_at), MAX(changed_at)
+                        FROM quantity_changes
+                        WHERE id IN (SELECT value FROM json_each(?))
+                        GROUP BY guild_id, category, item_name, substr(changed_at, 1, 7)
+                        ON CONFLICT (guild_id, category, item_name, period) DO UPDATE SET
+                            change_count = change_count + excluded.change_count,
+                            net_change = net_change + excluded.net_change,
+                            first_changed_at = MIN(first_changed_at, excluded.first_changed_at),
+                            last_changed_at = MAX(last_changed_at, excluded.last_changed_at)
+                    ''', (ids,))
+                    cursor = await conn.execute(
+                        'DELETE FROM quantity_changes WHERE id IN (SELECT value FROM json_each(?))', (ids,)
+                    )
+                    rolled_up = cursor.rowcount
+                result['audit'] += rolled_up
+                if rolled_up < batch_size:
+                    break
+                await asyncio.sleep(0)
+            
+            loa_cutoff = cutoff('loa')
+            if loa_cutoff:
+                result['loa'] = await self._delete_in_batches(
+                    # The IN lists let the OR seek idx_loa_records_pending_expiry_epoch on every flag pair
+                    '''SELECT id FROM loa_records
+                       WHERE is_active IN (0, 1) AND is_expired IN (0, 1) AND (is_active = 0 OR is_expired = 1)
+                       AND end_time_epoch < ? AND guild_id = ?
+                       LIMIT ?''',
+                    (to_epoch(loa_cutoff), guild_id),
+                    'DELETE FROM loa_records WHERE id IN (SELECT value FROM json_each(?))',
+                    batch_size
+                )
+        except Exception as e:
+            logger.error(f"Failed to apply retention for guild {guild_id}: {e}")
+            raise
+        
+        if any(result.values()):
+            logger.info(f"Retention for guild {guild_id}: removed {result['transcripts']} transcript(s), "
+                        f"rolled up {result['audit']} audit row(s), removed {result['loa']} LOA record(s)")
+        return result
+    
+    async def incremental_vacuum(self, max_pages: Optional[int] = None,
+                                 pages_per_step: int = VACUUM_PAGES_PER_STEP) -> int:
+        """Return free pages to the filesystem a step at a time; returns the pages reclaimed
+        
+        Needs auto_vacuum=INCREMENTAL (set by initialize_database); otherwise
+        this is a no-op returning 0.
+        """
+        conn = await self._get_shared_connection()
+        cursor = await conn.execute('PRAGMA freelist_count')
+        start = free = (await cursor.fetchone())[0]
+        target = start if max_pages is None else min(start, max_pages)
+        
+        while start - free < target:
+            step = min(target - (start - free), pages_per_step)
+            # The pragma frees one page per step; fetchall drives it to completion
+            cursor = await conn.execute(f'PRAGMA incremental_vacuum({step})')
+            await cursor.fetchall()
+            await self._execute_commit()
+            cursor = await conn.execute('PRAGMA freelist_count')
+            previous, free = free, (await cursor.fetchone())[0]
+            if free >= previous:
+                break  # auto_vacuum is not INCREMENTAL
+            await asyncio.sleep(0)
+        return start - free
+    
+    async def run_retention(self, batch_size: int = RETENTION_BATCH_SIZE) -> Dict[str, int]:
+        """Apply every guild's retention policy, then reclaim the freed pages
+        
+        Returns totals across guilds plus 'guilds' and 'reclaimed_pages'.
+        """
+        columns = ', '.join(RETENTION_COLUMNS.values())
+        rows = await self._fetchall(f'''
+            SELECT guild_id, {columns} FROM server_configs
+            WHERE COALESCE({columns}) IS NOT NULL
+        ''')
+        totals = {'guilds': 0, 'transcripts': 0, 'audit': 0, 'loa': 0}
+        for row in rows:
+            policy = {kind: row[column] for kind, column in RETENTION_COLUMNS.items()}
+            try:
+                result = await self.apply_retention(row['guild_id'], policy, batch_size)
+            except Exception:
+                continue  # logged by apply_retention; keep going with the other guilds
+            totals['guilds'] += 1
+            for kind, count in result.items():
+                totals[kind] += count
+        
+        totals['reclaimed_pages'] = await self.incremental_vacuum()
+        logger.info(f"Retention run: {totals}")
+        return totals
+    
+    async def optimize(self, analysis_limit: int = OPTIMIZE_ANALYSIS_LIMIT) -> List[str]:
+        """Refresh the query planner's statistics (sqlite_stat1); returns the tables analyzed
+        
+        PRAGMA optimize only revisits tables this connection has queried, so
+        tables that have indexes but no statistics yet (a database that was
+        never analyzed, or tables added by a migration) are ANALYZEd outright
+        once they have rows. PRAGMA optimize then re-analyzes whatever has grown enough to
+        need it. analysis_limit caps the rows sampled per index.
+        """
+        conn = await self._get_shared_connection()
+        await conn.execute(f'PRAGMA analysis_limit = {int(analysis_limit)}')
+        cursor = await conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+        unanalyzed_only = 'AND tbl_name NOT IN (SELECT tbl FROM sqlite_stat1)' if await cursor.fetchone() else ''
+        cursor = await conn.execute(f'''
+            SELECT DISTINCT tbl_name FROM sqlite_master
+            WHERE type = 'index' AND tbl_name NOT LIKE 'sqlite_%' {unanalyzed_only}
+            ORDER BY tbl_name
+        ''')
+        analyzed = []
+        for (table,) in await cursor.fetchall():
+            # An empty table gets no statistics; leave it for a later pass
+            cursor = await conn.execute(f'SELECT 1 FROM "{table}" LIMIT 1')
+            if await cursor.fetchone():
+                await conn.execute(f'ANALYZE "{table}"')
+                analyzed.append(table)
+        
+        # Mask 0x03 lists what the plain PRAGMA optimize below is about to analyze
+        cursor = await conn.execute('PRAGMA optimize(0x03)')
+        for (statement,) in await cursor.fetchall():
+            table = statement.rsplit('.', 1)[-1].strip('"')
+            if table not in analyzed:
+                analyzed.append(table)
+        await conn.execute('PRAGMA optimize')
+        await self._execute_commit()
+        logger.info(f"Optimized database: analyzed {len(analyzed)} table(s)")
+        return analyzed
+    
+    async def get_storage_stats(self) -> Dict[str, Any]:
+        """Get row counts and page usage per table, and the file, WAL and freelist sizes
+        
+        Page usage comes from the dbstat virtual table, which reads every
+        page of the file, so this is meant for the owner /db_storage command
+        rather than anything on a hot path.
+        
+        Returns:
+            {'page_size', 'page_count', 'freelist_count', 'file_bytes',
+             'wal_bytes', 'analyzed', 'tables'}, where tables is a list of
+            {'name', 'rows', 'pages', 'bytes', 'unused_bytes', 'index_bytes'}
+            ordered by bytes + index_bytes, largest first
+        """
+        stats = {}
+        for pragma in ('page_size', 'page_count', 'freelist_count'):
+            stats[pragma] = (await self._fetchone(f'PRAGMA {pragma}'))[0]
+        stats['file_bytes'] = stats['page_size'] * stats['page_count']
+        wal_path = self.db_path + '-wal'
+        stats['wal_bytes'] = os.path.getsize(wal_path) if os.path.exists(wal_path) else 0
         
-        rows = await cursor.fetchall()
-        return [dict(row) for row in rows]
+        schema = await self._fetchall('''
+            SELECT type, name, tbl_name, sql FROM sqlite_master
+            WHERE type IN ('table', 'index') AND name NOT LIKE 'sqlite_stat%'
+        ''')
+        stats['analyzed'] = await self._fetchone(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+        ) is not None
+        table_of = {row['name']: row['tbl_name'] for row in schema}
+        tables = {
+            row['name']: {'name': row['name'], 'rows': None, 'pages': 0, 'bytes': 0, 'unused_bytes': 0, 'index_bytes': 0}
+            for row in schema if row['type'] == 'table'
+        }
+        for row in schema:
+            # Virtual tables hold no pages of their own (their shadow tables do)
+            if row['type'] == 'table' and not (row['sql'] or '').upper().startswith('CREATE VIRTUAL'):
+                tables[row['name']]['rows'] = (await self._fetchone(f'SELECT COUNT(*) FROM "{row["name"]}"'))[0]
+        
+        try:
+            pages = await self._fetchall('''
+                SELECT name, COUNT(*) AS pages, SUM(pgsize) AS bytes, SUM(unused) AS unused_bytes
+                FROM dbstat GROUP BY name
+            ''')
+        except sqlite3.OperationalError as e:
+            logger.warning(f"dbstat is not available in this SQLite build: {e}")
+            pages = []
+        for row in pages:
+            table = tables.get(table_of.get(row['name'], row['name']))
+            if table is None:
+                continue  # sqlite_schema, sqlite_stat1
+            if row['name'] == table['name']:
+                table.update(pages=row['pages'], bytes=row['bytes'], unused_bytes=row['unused_bytes'])
+            else:
+                table['index_bytes'] += row['bytes']
+        stats['tables'] = sorted(tables.values(), key=lambda table: table['bytes'] + table['index_bytes'], reverse=True)
+        return stats
     
-    async def get_archive_by_id(self, archive_id: int) -> Optional[Dict]:
-        """Get a specific archive by ID"""
-        conn = await self._get_shared_connection()
-        conn.row_factory = aiosqlite.Row
-        cursor = await conn.execute('''
-            SELECT * FROM database_archives WHERE id = ?
-        ''', (archive_id,))
+    async def get_index_usage(self) -> List[Dict[str, Any]]:
+        """Get every index with the number of statements (and executions) whose plan uses it
         
-        row = await cursor.fetchone()
-        if row:
-            archive = dict(row)
-            # Parse archived data JSON
-            archive['archived_data'] = json.loads(archive['archived_data'])
-            return archive
-        return None
+        Works from the distinct statements counted by query timing since the
+        last reset_query_stats(): each is run through EXPLAIN QUERY PLAN once
+        and its executions are charged to the indexes the plan names. An index
+        with no executions is either unused or being skipped by the planner.
+        """
+        rows = await self._fetchall('''
+            SELECT name, tbl_name FROM sqlite_master WHERE type = 'index' ORDER BY tbl_name, name
+        ''')
+        usage = {row['name']: {'name': row['name'], 'table': row['tbl_name'], 'statements': 0, 'executions': 0}
+                 for row in rows}
+        async with self._read_connection() as conn:
+            for sql, (executions, parameters) in list(self._query_stats.statements.items()):
+                try:
+                    cursor = await conn.execute(f'EXPLAIN QUERY PLAN {sql}', parameters)
+                    plan = await cursor.fetchall()
+                except sqlite3.Error:
+                    continue  # e.g. refers to an ATTACHed database
+                for name in {name for step in plan for name in INDEX_IN_PLAN.findall(step[-1])}:
+                    if name in usage:
+                        usage[name]['statements'] += 1
+                        usage[name]['executions'] += executions
+        return sorted(usage.values(), key=lambda index: index['executions'], reverse=True)
+    
+    async def get_quantity_change_summaries(self, guild_id: int, item_name: Optional[str] = None) -> List[Dict]:
+        """Get the monthly roll-ups of audit rows pruned by retention"""
+        query = 'SELECT * FROM quantity_change_summaries WHERE guild_id = ?'
+        params = [guild_id]
+        if item_name:
+            query += ' AND item_name = ?'
+            params.append(item_name)
+        rows = await self._fetchall(query + ' ORDER BY period DESC, category, item_name', tuple(params))
+        return [dict(row) for row in rows]
     
     # Quantity Change Methods
     async def log_quantity_change(self, guild_id: int, item_name: str, category: str,
@@ -1222,12 +3253,14 @@ class DatabaseManager:
         """Log a quantity change"""
         try:
             conn = await self._get_shared_connection()
+            changed_at = datetime.now()
             cursor = await conn.execute('''
                 INSERT INTO quantity_changes (guild_id, item_name, category, old_quantity,
-                                             new_quantity, reason, notes, changed_at, changed_by_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                                             new_quantity, reason, notes, changed_at, changed_at_epoch,
+                                             changed_by_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (guild_id, item_name, category, old_quantity, new_quantity, reason,
-                  notes, datetime.now().isoformat(), changed_by_id))
+                  notes, changed_at.isoformat(), to_epoch(changed_at), changed_by_id))
             
             change_id = cursor.lastrowid
             await self._execute_commit()
@@ -1241,25 +3274,18 @@ class DatabaseManager:
     
     async def get_quantity_change_history(self, guild_id: int, item_name: str) -> List[Dict]:
         """Get quantity change history for a specific item"""
-        conn = await self._get_shared_connection()
-        conn.row_factory = aiosqlite.Row
-        cursor = await conn.execute('''
+        rows = await self._fetchall('''
             SELECT qc.*, m.discord_name as changed_by_name
             FROM quantity_changes qc
             LEFT JOIN members m ON qc.guild_id = m.guild_id AND qc.changed_by_id = m.user_id
             WHERE qc.guild_id = ? AND qc.item_name = ?
             ORDER BY qc.changed_at DESC
         ''', (guild_id, item_name))
-        
-        rows = await cursor.fetchall()
         return [dict(row) for row in rows]
     
-    async def get_all_audit_events(self, guild_id: int, item_name: Optional[str] = None, category: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
-        """Get a unified list of all audit events (contributions and quantity changes) ordered by time desc"""
-        conn = await self._get_shared_connection()
-        conn.row_factory = aiosqlite.Row
-        
-        conditions = ["guild_id = ?"]
+    def _audit_events_query(self, guild_id: int, item_name: Optional[str] = None, category: Optional[str] = None,
+                            limit: Optional[int] = None, category_order: Optional[List[str]] = None) -> Tuple[str, tuple]:
+        """Build the unified audit events query shared by get_all_audit_events and iter_audit_events"""
         params_base = [guild_id]
         filters_contrib = []
         filters_qc = []
@@ -1286,6 +3312,7 @@ class DatabaseManager:
                    NULL AS reason,
                    NULL AS notes,
                    c.created_at AS occurred_at,
+                   c.created_at_epoch AS occurred_epoch,
                    c.user_id AS actor_id
             FROM contributions c
             WHERE {contrib_where}
@@ -1299,10 +3326,11 @@ class DatabaseManager:
                    qc.reason AS reason,
                    qc.notes AS notes,
                    qc.changed_at AS occurred_at,
+                   qc.changed_at_epoch AS occurred_epoch,
                    qc.changed_by_id AS actor_id
             FROM quantity_changes qc
             WHERE {qc_where}
-            ORDER BY occurred_at DESC
+            ORDER BY occurred_epoch DESC
         '''
         
         params = params_base + params_base  # for both parts of UNION
@@ -1310,105 +3338,135 @@ class DatabaseManager:
             sql += "\n            LIMIT ?"
             params.append(limit)
         
-        cursor = await conn.execute(sql, tuple(params))
-        rows = await cursor.fetchall()
-        return [dict(row) for row in rows]
+        if category_order is not None:
+            # Regroup the (possibly limited) events by category, listed categories
+            # first, oldest first within each category
+            ranks = " ".join(f"WHEN ? THEN {rank}" for rank in range(len(category_order)))
+            order_by = f"CASE category {ranks} ELSE {len(category_order)} END, " if category_order else ""
+            sql = f'''
+            SELECT * FROM ({sql})
+            ORDER BY {order_by}category, occurred_epoch ASC
+            '''
+            params.extend(category_order)
+        
+        return sql, tuple(params)
+    
+    @staticmethod
+    def _audit_event(row) -> Dict:
+        """Audit event row as a dict, with occurred_epoch as the aware datetime occurred_at_utc"""
+        event = dict(row)
+        event['occurred_at_utc'] = from_epoch(event.pop('occurred_epoch'))
+        return event
+    
+    async def get_all_audit_events(self, guild_id: int, item_name: Optional[str] = None, category: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+        """Get a unified list of all audit events (contributions and quantity changes) ordered by time desc"""
+        sql, params = self._audit_events_query(guild_id, item_name, category, limit)
+        rows = await self._fetchall(sql, params)
+        return [self._audit_event(row) for row in rows]
+    
+    async def iter_audit_events(self, guild_id: int, item_name: Optional[str] = None, category: Optional[str] = None,
+                                limit: Optional[int] = None, category_order: Optional[List[str]] = None) -> AsyncIterator[Dict]:
+        """Stream audit events as dicts without materializing the full list
+        
+        Ordered by time desc like get_all_audit_events, unless category_order is
+        given: then events are grouped by category (those listed first, the rest
+        alphabetically) and ordered oldest first within each category.
+        """
+        sql, params = self._audit_events_query(guild_id, item_name, category, limit, category_order)
+        async with aclosing(self._iterate(sql, params)) as rows:
+            async for row in rows:
+                yield self._audit_event(row)
+    
+    async def count_audit_events(self, guild_id: int) -> int:
+        """Count a guild's audit events (contributions plus quantity changes)"""
+        row = await self._fetchone('''
+            SELECT (SELECT COUNT(*) FROM contributions WHERE guild_id = ?)
+                 + (SELECT COUNT(*) FROM quantity_changes WHERE guild_id = ?)
+        ''', (guild_id, guild_id))
+        return row[0]
     
     async def update_item_quantities(self, guild_id: int, item_name: str, category: str, new_total: int):
         """Update item quantities across all contributions to match new total"""
-        try:
-            conn = await self._get_shared_connection()
-            
-            # Get all contributions for this item
-            cursor = await conn.execute('''
-                SELECT id, quantity FROM contributions
-                WHERE guild_id = ? AND item_name = ? AND category = ?
-                ORDER BY created_at ASC
-            ''', (guild_id, item_name, category))
-            
-            contributions = await cursor.fetchall()
-            
-            if not contributions:
-                return
+        await self.update_item_quantities_bulk(guild_id, [(item_name, category, new_total)])
+    
+    async def update_item_quantities_bulk(self, guild_id: int, edits: List[Tuple[str, str, int]]) -> int:
+        """Set new totals for many items at once
+        
+        Each item's new total is redistributed over its contributions (see
+        _redistribute_quantities). All items are loaded with one query and
+        written with two executemany calls in a single transaction.
+        
+        Args:
+            guild_id: The Discord server ID
+            edits: (item_name, category, new_total) tuples; a later edit of the same item wins
             
-            # Calculate how to distribute the new total across contributions
-            if new_total == 0:
-                # If new total is 0, delete all contributions for this item
-                await conn.execute('''
-                    DELETE FROM contributions
-                    WHERE guild_id = ? AND item_name = ? AND category = ?
-                ''', (guild_id, item_name, category))
-            else:
-                # Distribute the new total proportionally
-                total_current = sum(contrib[1] for contrib in contributions)
+        Returns:
+            Number of contribution rows updated or deleted
+        """
+        targets = {(item_name, category): new_total for item_name, category, new_total in edits}
+        if not targets:
+            return 0
+        
+        try:
+            async with self.transaction() as conn:
+                rows_by_item = {key: [] for key in targets}
+                keys = list(targets)
+                # Stay well below SQLite's bound-parameter limit
+                for start in range(0, len(keys), 400):
+                    chunk = keys[start:start + 400]
+                    values = ', '.join('(?, ?)' for _ in chunk)
+                    cursor = await conn.execute(f'''
+                        WITH targets (item_name, category) AS (VALUES {values})
+                        SELECT c.item_name, c.category, c.id, c.quantity
+                        FROM targets t
+                        JOIN contributions c
+                          ON c.guild_id = ? AND c.category = t.category AND c.item_name = t.item_name
+                        ORDER BY c.created_at ASC, c.id ASC
+                    ''', [value for key in chunk for value in key] + [guild_id])
+                    for item_name, category, contrib_id, quantity in await cursor.fetchall():
+                        rows_by_item[(item_name, category)].append((contrib_id, quantity))
                 
-                if total_current > 0:
-                    # Calculate proportional quantities
-                    new_quantities = []
-                    remaining_total = new_total
-                    
-                    for i, (contrib_id, current_qty) in enumerate(contributions):
-                        if i == len(contributions) - 1:
-                            # Last contribution gets the remainder
-                            new_qty = max(0, remaining_total)
-                        else:
-                            # Proportional distribution
-                            proportion = current_qty / total_current
-                            new_qty = max(0, int(new_total * proportion))
-                        
-                        new_quantities.append((contrib_id, new_qty))
-                        remaining_total -= new_qty
-                    
-                    # Update each contribution
-                    for contrib_id, new_qty in new_quantities:
-                        if new_qty == 0:
-                            # Remove contributions with 0 quantity
-                            await conn.execute(
-                                'DELETE FROM contributions WHERE id = ?',
-                                (contrib_id,)
-                            )
-                        else:
-                            await conn.execute(
-                                'UPDATE contributions SET quantity = ? WHERE id = ?',
-                                (new_qty, contrib_id)
-                            )
-                else:
-                    # If all current quantities are 0, just update the first one
-                    await conn.execute(
-                        'UPDATE contributions SET quantity = ? WHERE id = ?',
-                        (new_total, contributions[0][0])
-                    )
-            
-            await self._execute_commit()
-            
-            logger.info(f"Updated quantities for {item_name} in guild {guild_id} to total {new_total}")
+                updates, deletes = [], []
+                for key, contributions in rows_by_item.items():
+                    if not contributions:
+                        continue
+                    item_updates, item_deletes = _redistribute_quantities(contributions, targets[key])
+                    updates.extend(item_updates)
+                    deletes.extend(item_deletes)
+                
+                if updates:
+                    await conn.executemany('UPDATE contributions SET quantity = ? WHERE id = ?', updates)
+                if deletes:
+                    await conn.executemany('DELETE FROM contributions WHERE id = ?', deletes)
+            
+            if len(targets) == 1:
+                (item_name, _), new_total = next(iter(targets.items()))
+                logger.info(f"Updated quantities for {item_name} in guild {guild_id} to total {new_total}")
+            else:
+                logger.info(f"Updated quantities for {len(targets)} items in guild {guild_id}")
+            return len(updates) + len(deletes)
             
         except Exception as e:
-            logger.error(f"Failed to update item quantities for {item_name} in guild {guild_id}: {e}")
+            logger.error(f"Failed to update item quantities for {len(targets)} item(s) in guild {guild_id}: {e}")
             raise
     
     async def get_current_item_quantity(self, guild_id: int, item_name: str, category: str) -> int:
-        """Get the current quantity for an item from contributions table
+        """Get the current quantity for an item from the inventory_totals table
         
-        The contributions table already reflects the current state after all quantity changes,
-        since update_item_quantities() modifies contributions to match the new totals.
+        inventory_totals is maintained by triggers on contributions, which already
+        reflects the current state after all quantity changes, since
+        update_item_quantities() modifies contributions to match the new totals.
         The quantity_changes table is purely an audit log and should not be added to contributions.
         """
         try:
-            conn = await self._get_shared_connection()
-            
-            # Get sum of all contributions for this item (already reflects current state)
-            cursor = await conn.execute('''
-                SELECT COALESCE(SUM(quantity), 0) as current_quantity
-                FROM contributions
-                WHERE guild_id = ? AND item_name = ? AND category = ?
-            ''', (guild_id, item_name, category))
-            
-            row = await cursor.fetchone()
+            row = await self._fetchone('''
+                SELECT total_quantity FROM inventory_totals
+                WHERE guild_id = ? AND category = ? AND item_name = ?
+            ''', (guild_id, category, item_name))
             current_quantity = row[0] if row else 0
             
             logger.debug(f"Current quantity for {item_name} in guild {guild_id}: {current_quantity} "
-                        f"(from contributions table)")
+                        f"(from inventory_totals)")
             
             return max(0, current_quantity)  # Ensure non-negative
             
@@ -1417,25 +3475,17 @@ class DatabaseManager:
             raise
     
     async def get_all_current_item_quantities(self, guild_id: int) -> Dict[str, Dict]:
-        """Get current quantities for all items from contributions table
+        """Get current quantities for all items from the inventory_totals table
         
-        The contributions table already reflects current state after quantity changes.
         Returns a dictionary with keys as 'item_name|category' and values as item info with current_quantity
         """
         try:
-            conn = await self._get_shared_connection()
-            
-            # Get all items from contributions table (already reflects current state)
-            cursor = await conn.execute('''
-                SELECT item_name, category, SUM(quantity) as current_quantity
-                FROM contributions
-                WHERE guild_id = ?
-                GROUP BY item_name, category
-                HAVING SUM(quantity) > 0
+            items = await self._fetchall('''
+                SELECT item_name, category, total_quantity
+                FROM inventory_totals
+                WHERE guild_id = ? AND total_quantity > 0
                 ORDER BY category, item_name
             ''', (guild_id,))
-            
-            items = await cursor.fetchall()
             result = {}
             
             for item_name, category, current_qty in items:
@@ -1454,6 +3504,71 @@ class DatabaseManager:
             logger.error(f"Failed to get all current item quantities for guild {guild_id}: {e}")
             raise
     
+    async def verify_inventory_totals(self, guild_id: Optional[int] = None) -> List[Dict]:
+        """Compare inventory_totals with totals recomputed from the raw contributions
+        
+        Args:
+            guild_id: Limit the check to one guild (all guilds when None)
+            
+        Returns:
+            One dict per mismatched item with expected and stored quantity/count
+            (an empty list means the table is consistent)
+        """
+        where, params = ('WHERE guild_id = ?', (guild_id,)) if guild_id is not None else ('', ())
+        rows = await self._fetchall(f'''
+            WITH expected AS (
+                SELECT guild_id, category, item_name,
+                       SUM(COALESCE(quantity, 0)) AS total_quantity, COUNT(*) AS contribution_count
+                FROM contributions
+                {where}
+                GROUP BY guild_id, category, item_name
+            ),
+            stored AS (
+                SELECT guild_id, category, item_name, total_quantity, contribution_count
+                FROM inventory_totals
+                {where}
+            )
+            SELECT e.guild_id, e.category, e.item_name,
+                   e.total_quantity AS expected_quantity, s.total_quantity AS stored_quantity,
+                   e.contribution_count AS expected_count, s.contribution_count AS stored_count
+            FROM expected e
+            LEFT JOIN stored s USING (guild_id, category, item_name)
+            WHERE s.total_quantity IS NOT e.total_quantity OR s.contribution_count IS NOT e.contribution_count
+            UNION ALL
+            SELECT s.guild_id, s.category, s.item_name,
+                   NULL, s.total_quantity, NULL, s.contribution_count
+            FROM stored s
+            LEFT JOIN expected e USING (guild_id, category, item_name)
+            WHERE e.guild_id IS NULL
+        ''', params * 2)
+        mismatches = [dict(row) for row in rows]
+        if mismatches:
+            logger.warning(f"inventory_totals has {len(mismatches)} mismatched item(s)"
+                           + (f" in guild {guild_id}" if guild_id is not None else ""))
+        return mismatches
+    
+    async def rebuild_inventory_totals(self, guild_id: Optional[int] = None) -> int:
+        """Recompute inventory_totals from the raw contributions
+        
+        Args:
+            guild_id: Limit the rebuild to one guild (all guilds when None)
+            
+        Returns:
+            Number of item totals written
+        """
+        try:
+            async with self.transaction() as conn:
+                await self._fill_inventory_totals(conn, guild_id)
+                where, params = ('WHERE guild_id = ?', (guild_id,)) if guild_id is not None else ('', ())
+                cursor = await conn.execute(f'SELECT COUNT(*) FROM inventory_totals {where}', params)
+                rebuilt = (await cursor.fetchone())[0]
+            logger.info(f"Rebuilt {rebuilt} inventory total(s)"
+                        + (f" for guild {guild_id}" if guild_id is not None else ""))
+            return rebuilt
+        except Exception as e:
+            logger.error(f"Failed to rebuild inventory totals: {e}")
+            raise
+    
     async def clear_audit_logs(self, guild_id: int):
         """Clear all audit logs (quantity changes) for a guild"""
         try:
@@ -1525,18 +3640,15 @@ class DatabaseManager:
             Dict with entry details or None if not found
         """
         try:
-            conn = await self._get_shared_connection()
-            conn.row_factory = aiosqlite.Row
-            
             if event_type == 'contribution':
-                cursor = await conn.execute('''
+                row = await self._fetchone('''
                     SELECT c.*, m.discord_name as contributor_name
                     FROM contributions c
                     LEFT JOIN members m ON c.guild_id = m.guild_id AND c.user_id = m.user_id
                     WHERE c.guild_id = ? AND c.id = ?
                 ''', (guild_id, entry_id))
             elif event_type == 'quantity_change':
-                cursor = await conn.execute('''
+                row = await self._fetchone('''
                     SELECT qc.*, m.discord_name as changed_by_name
                     FROM quantity_changes qc
                     LEFT JOIN members m ON qc.guild_id = m.guild_id AND qc.changed_by_id = m.user_id
@@ -1545,7 +3657,6 @@ class DatabaseManager:
             else:
                 return None
             
-            row = await cursor.fetchone()
             return dict(row) if row else None
                 
         except Exception as e:
@@ -1621,52 +3732,47 @@ class DatabaseManager:
             logger.error(f"Failed to bulk remove audit entries from guild {guild_id}: {e}")
             raise
     
-    async def get_active_loas_for_guild(self, guild_id: int) -> List[Dict]:
+    async def get_active_loas_for_guild(self, guild_id: int) -> List[LOARecord]:
         """Get all active LOAs for a guild with member information"""
         try:
-            conn = await self._get_shared_connection()
-            conn.row_factory = aiosqlite.Row
-            
-            cursor = await conn.execute('''
+            return await self._fetchall('''
                 SELECT l.*, m.discord_name, m.discord_username
                 FROM loa_records l
                 LEFT JOIN members m ON l.guild_id = m.guild_id AND l.user_id = m.user_id
                 WHERE l.guild_id = ? AND l.is_active = TRUE AND l.is_expired = FALSE
-                ORDER BY l.end_time ASC
-            ''', (guild_id,))
-            
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+                ORDER BY l.end_time_epoch ASC
+            ''', (guild_id,), record_type=LOARecord)
                 
         except Exception as e:
             logger.error(f"Failed to get active LOAs for guild {guild_id}: {e}")
             return []
     
-    async def get_loa_by_id(self, loa_id: int) -> Optional[Dict]:
+    async def get_loa_counts(self, guild_id: int) -> Dict[str, int]:
+        """Count a guild's LOA records: {'active': not yet ended or expired, 'total': all records}"""
+        try:
+            row = await self._fetchone('''
+                SELECT COUNT(*), COALESCE(SUM(is_active = TRUE AND is_expired = FALSE), 0)
+                FROM loa_records WHERE guild_id = ?
+            ''', (guild_id,))
+            return {'active': row[1], 'total': row[0]}
+        except Exception as e:
+            logger.error(f"Failed to count LOAs for guild {guild_id}: {e}")
+            return {'active': 0, 'total': 0}
+    
+    async def get_loa_by_id(self, loa_id: int) -> Optional[LOARecord]:
         """Get a specific LOA by ID with member information"""
         try:
-            conn = await self._get_shared_connection()
-            conn.row_factory = aiosqlite.Row
-            
-            cursor = await conn.execute('''
+            return await self._fetchone('''
                 SELECT l.*, m.discord_name, m.discord_username
                 FROM loa_records l
                 LEFT JOIN members m ON l.guild_id = m.guild_id AND l.user_id = m.user_id
                 WHERE l.id = ?
-            ''', (loa_id,))
-            
-            row = await cursor.fetchone()
-            return dict(row) if row else None
+            ''', (loa_id,), record_type=LOARecord)
                 
         except Exception as e:
             logger.error(f"Failed to get LOA {loa_id}: {e}")
             return None
-    
-    
-    
-    
-            
-    
+
     # Dues Tracking Methods
     async def create_dues_period(self, guild_id: int, period_name: str, description: str = None, 
                                due_amount: float = 0.0, due_date: datetime = None, 
@@ -1692,17 +3798,13 @@ class DatabaseManager:
     async def get_active_dues_periods(self, guild_id: int) -> List[Dict]:
         """Get all active dues periods for a guild"""
         try:
-            conn = await self._get_shared_connection()
-            conn.row_factory = aiosqlite.Row
-            cursor = await conn.execute('''
+            rows = await self._fetchall('''
                 SELECT dp.*, m.discord_name as created_by_name
                 FROM dues_periods dp
                 LEFT JOIN members m ON dp.guild_id = m.guild_id AND dp.created_by_id = m.user_id
                 WHERE dp.guild_id = ? AND dp.is_active = TRUE
                 ORDER BY dp.due_date DESC, dp.created_at DESC
             ''', (guild_id,))
-            
-            rows = await cursor.fetchall()
             return [dict(row) for row in rows]
             
         except Exception as e:
@@ -1712,16 +3814,12 @@ class DatabaseManager:
     async def get_dues_period_by_id(self, period_id: int) -> Optional[Dict]:
         """Get a specific dues period by ID"""
         try:
-            conn = await self._get_shared_connection()
-            conn.row_factory = aiosqlite.Row
-            cursor = await conn.execute('''
+            row = await self._fetchone('''
                 SELECT dp.*, m.discord_name as created_by_name
                 FROM dues_periods dp
                 LEFT JOIN members m ON dp.guild_id = m.guild_id AND dp.created_by_id = m.user_id
                 WHERE dp.id = ?
             ''', (period_id,))
-            
-            row = await cursor.fetchone()
             return dict(row) if row else None
             
         except Exception as e:
@@ -1733,68 +3831,70 @@ class DatabaseManager:
                                 payment_method: str = None, payment_status: str = 'unpaid', 
                                 notes: str = None, is_exempt: bool = False, 
                                 updated_by_id: int = None) -> int:
-        """Update or create a dues payment record"""
+        """Update or create a dues payment record
+        
+        The payment, its history row and the period's dues_period_totals
+        (via triggers) commit together.
+        """
         try:
-            conn = await self._get_shared_connection()
-            
-            # Get existing payment record if it exists
-            cursor = await conn.execute('''
-                SELECT * FROM dues_payments 
-                WHERE guild_id = ? AND user_id = ? AND dues_period_id = ?
-            ''', (guild_id, user_id, dues_period_id))
-            existing = await cursor.fetchone()
-            
-            if existing:
-                # Update existing record and log history
-                old_amount = existing[4]  # amount_paid
-                old_status = existing[7]  # payment_status
-                old_method = existing[6]  # payment_method
-                old_notes = existing[8]   # notes
-                
+            async with self.transaction() as conn:
+                # Get existing payment record if it exists
                 cursor = await conn.execute('''
-                    UPDATE dues_payments 
-                    SET amount_paid = ?, payment_date = ?, payment_method = ?, 
-                        payment_status = ?, notes = ?, is_exempt = ?, 
-                        updated_by_id = ?, updated_at = ?
+                    SELECT * FROM dues_payments 
                     WHERE guild_id = ? AND user_id = ? AND dues_period_id = ?
-                ''', (amount_paid, payment_date, payment_method, payment_status, 
-                      notes, is_exempt, updated_by_id, datetime.now(),
-                      guild_id, user_id, dues_period_id))
+                ''', (guild_id, user_id, dues_period_id))
+                existing = await cursor.fetchone()
+            
+                if existing:
+                    # Update existing record and log history
+                    old_amount = existing[4]  # amount_paid
+                    old_status = existing[7]  # payment_status
+                    old_method = existing[6]  # payment_method
+                    old_notes = existing[8]   # notes
                 
-                payment_id = existing[0]  # id
+                    cursor = await conn.execute('''
+                        UPDATE dues_payments 
+                        SET amount_paid = ?, payment_date = ?, payment_method = ?, 
+                            payment_status = ?, notes = ?, is_exempt = ?, 
+                            updated_by_id = ?, updated_at = ?
+                        WHERE guild_id = ? AND user_id = ? AND dues_period_id = ?
+                    ''', (amount_paid, payment_date, payment_method, payment_status, 
+                          notes, is_exempt, updated_by_id, datetime.now(),
+                          guild_id, user_id, dues_period_id))
                 
-                # Log the change to history
-                await conn.execute('''
-                    INSERT INTO dues_payment_history 
-                    (guild_id, dues_payment_id, action_type, old_amount, new_amount, 
-                     old_status, new_status, old_payment_method, new_payment_method,
-                     old_notes, new_notes, changed_by_id)
-                    VALUES (?, ?, 'updated', ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (guild_id, payment_id, old_amount, amount_paid, 
-                      old_status, payment_status, old_method, payment_method,
-                      old_notes, notes, updated_by_id))
-            else:
-                # Create new payment record
-                cursor = await conn.execute('''
-                    INSERT INTO dues_payments 
-                    (guild_id, user_id, dues_period_id, amount_paid, payment_date, 
-                     payment_method, payment_status, notes, is_exempt, updated_by_id)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (guild_id, user_id, dues_period_id, amount_paid, payment_date,
-                      payment_method, payment_status, notes, is_exempt, updated_by_id))
+                    payment_id = existing[0]  # id
                 
-                payment_id = cursor.lastrowid
+                    # Log the change to history
+                    await conn.execute('''
+                        INSERT INTO dues_payment_history 
+                        (guild_id, dues_payment_id, action_type, old_amount, new_amount, 
+                         old_status, new_status, old_payment_method, new_payment_method,
+                         old_notes, new_notes, changed_by_id)
+                        VALUES (?, ?, 'updated', ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', (guild_id, payment_id, old_amount, amount_paid, 
+                          old_status, payment_status, old_method, payment_method,
+                          old_notes, notes, updated_by_id))
+                else:
+                    # Create new payment record
+                    cursor = await conn.execute('''
+                        INSERT INTO dues_payments 
+                        (guild_id, user_id, dues_period_id, amount_paid, payment_date, 
+                         payment_method, payment_status, notes, is_exempt, updated_by_id)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', (guild_id, user_id, dues_period_id, amount_paid, payment_date,
+                          payment_method, payment_status, notes, is_exempt, updated_by_id))
                 
-                # Log the creation to history
-                await conn.execute('''
-                    INSERT INTO dues_payment_history 
-                    (guild_id, dues_payment_id, action_type, new_amount, new_status, 
-                     new_payment_method, new_notes, changed_by_id)
-                    VALUES (?, ?, 'created', ?, ?, ?, ?, ?)
-                ''', (guild_id, payment_id, amount_paid, payment_status, 
-                      payment_method, notes, updated_by_id))
+                    payment_id = cursor.lastrowid
+                
+                    # Log the creation to history
+                    await conn.execute('''
+                        INSERT INTO dues_payment_history 
+                        (guild_id, dues_payment_id, action_type, new_amount, new_status, 
+                         new_payment_method, new_notes, changed_by_id)
+                        VALUES (?, ?, 'created', ?, ?, ?, ?, ?)
+                    ''', (guild_id, payment_id, amount_paid, payment_status, 
+                          payment_method, notes, updated_by_id))
             
-            await self._execute_commit()
             logger.info(f"Updated dues payment for user {user_id} in period {dues_period_id}")
             return payment_id
             
@@ -1802,12 +3902,10 @@ class DatabaseManager:
             logger.error(f"Failed to update dues payment: {e}")
             raise
     
-    async def get_dues_payments_for_period(self, guild_id: int, dues_period_id: int) -> List[Dict]:
+    async def get_dues_payments_for_period(self, guild_id: int, dues_period_id: int) -> List[DuesPaymentRecord]:
         """Get all dues payments for a specific period with member information"""
         try:
-            conn = await self._get_shared_connection()
-            conn.row_factory = aiosqlite.Row
-            cursor = await conn.execute('''
+            return await self._fetchall('''
                 SELECT dp.*, m.discord_name, m.discord_username, m.rank,
                        updater.discord_name as updated_by_name,
                        per.period_name, per.due_amount
@@ -1817,10 +3915,7 @@ class DatabaseManager:
                 LEFT JOIN dues_periods per ON dp.dues_period_id = per.id
                 WHERE dp.guild_id = ? AND dp.dues_period_id = ?
                 ORDER BY m.rank, m.discord_name
-            ''', (guild_id, dues_period_id))
-            
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+            ''', (guild_id, dues_period_id), record_type=DuesPaymentRecord)
             
         except Exception as e:
             logger.error(f"Failed to get dues payments for period {dues_period_id}: {e}")
@@ -1829,9 +3924,7 @@ class DatabaseManager:
     async def get_all_dues_payments_with_members(self, guild_id: int, dues_period_id: int) -> List[Dict]:
         """Get all active members with their dues payment status for a period"""
         try:
-            conn = await self._get_shared_connection()
-            conn.row_factory = aiosqlite.Row
-            cursor = await conn.execute('''
+            rows = await self._fetchall('''
                 SELECT m.*, 
                        dp.amount_paid, dp.payment_date, dp.payment_method, 
                        dp.payment_status, dp.notes, dp.is_exempt,
@@ -1858,8 +3951,6 @@ class DatabaseManager:
                     END,
                     m.discord_name
             ''', (dues_period_id, dues_period_id, guild_id))
-            
-            rows = await cursor.fetchall()
             result = []
             for row in rows:
                 member_data = dict(row)
@@ -1881,17 +3972,13 @@ class DatabaseManager:
     async def get_dues_payment_history(self, guild_id: int, dues_payment_id: int) -> List[Dict]:
         """Get payment history for a specific dues payment"""
         try:
-            conn = await self._get_shared_connection()
-            conn.row_factory = aiosqlite.Row
-            cursor = await conn.execute('''
+            rows = await self._fetchall('''
                 SELECT dph.*, m.discord_name as changed_by_name
                 FROM dues_payment_history dph
                 LEFT JOIN members m ON dph.guild_id = m.guild_id AND dph.changed_by_id = m.user_id
                 WHERE dph.guild_id = ? AND dph.dues_payment_id = ?
                 ORDER BY dph.changed_at DESC
             ''', (guild_id, dues_payment_id))
-            
-            rows = await cursor.fetchall()
             return [dict(row) for row in rows]
             
         except Exception as e:
@@ -1899,60 +3986,42 @@ class DatabaseManager:
             return []
     
     async def get_dues_collection_summary(self, guild_id: int, dues_period_id: int) -> Dict:
-        """Get collection summary for a dues period"""
+        """Get collection summary for a dues period (one dues_period_totals lookup)"""
         try:
-            conn = await self._get_shared_connection()
-            conn.row_factory = aiosqlite.Row
-            
-            # Get period info
-            cursor = await conn.execute('''
-                SELECT * FROM dues_periods WHERE id = ? AND guild_id = ?
+            row = await self._fetchone(f'''
+                SELECT per.*, {', '.join(f't.{column}' for column in DUES_TOTALS_COUNTERS)}
+                FROM dues_periods per
+                JOIN dues_period_totals t ON t.dues_period_id = per.id
+                WHERE per.id = ? AND per.guild_id = ?
             ''', (dues_period_id, guild_id))
-            period = await cursor.fetchone()
             
-            if not period:
+            if not row:
                 return {}
             
-            period = dict(period)
-            
-            # Get payment statistics
-            cursor = await conn.execute('''
-                SELECT 
-                    COUNT(DISTINCT m.user_id) as total_members,
-                    COUNT(dp.id) as members_with_records,
-                    COUNT(CASE WHEN dp.payment_status = 'paid' THEN 1 END) as paid_count,
-                    COUNT(CASE WHEN dp.payment_status = 'unpaid' THEN 1 END) as unpaid_count,
-                    COUNT(CASE WHEN dp.payment_status = 'partial' THEN 1 END) as partial_count,
-                    COUNT(CASE WHEN dp.is_exempt = TRUE THEN 1 END) as exempt_count,
-                    COALESCE(SUM(dp.amount_paid), 0) as total_collected,
-                    COALESCE(SUM(CASE WHEN dp.is_exempt = FALSE THEN ? ELSE 0 END), 0) as total_expected
-                FROM members m
-                LEFT JOIN dues_payments dp ON m.guild_id = dp.guild_id AND m.user_id = dp.user_id AND dp.dues_period_id = ?
-                WHERE m.guild_id = ? AND m.status = 'Active'
-            ''', (period['due_amount'], dues_period_id, guild_id))
-            
-            stats = dict(await cursor.fetchone())
+            period = dict(row)
+            stats = {column: period.pop(column) for column in DUES_TOTALS_COUNTERS}
+            total_collected = round(stats['total_collected'], 2)
+            total_expected = period['due_amount'] * stats['billable_count']
             
-            # Calculate members without records (default to unpaid)
-            members_without_records = stats['total_members'] - stats['members_with_records']
-            stats['unpaid_count'] += members_without_records
+            # Active members without a payment record count as unpaid
+            unpaid_count = stats['unpaid_count'] + stats['active_members'] - stats['payment_records']
             
             # Calculate collection percentage
             collection_percentage = 0.0
-            if stats['total_expected'] > 0:
-                collection_percentage = (stats['total_collected'] / stats['total_expected']) * 100
+            if total_expected > 0:
+                collection_percentage = (total_collected / total_expected) * 100
             
             return {
                 'period': period,
-                'total_members': stats['total_members'],
+                'total_members': stats['active_members'],
                 'paid_count': stats['paid_count'],
-                'unpaid_count': stats['unpaid_count'],
+                'unpaid_count': unpaid_count,
                 'partial_count': stats['partial_count'],
                 'exempt_count': stats['exempt_count'],
-                'total_collected': stats['total_collected'],
-                'total_expected': stats['total_expected'],
+                'total_collected': total_collected,
+                'total_expected': total_expected,
                 'collection_percentage': round(collection_percentage, 1),
-                'outstanding_amount': max(0, stats['total_expected'] - stats['total_collected'])
+                'outstanding_amount': max(0, total_expected - total_collected)
             }
             
         except Exception as e:
@@ -1960,19 +4029,24 @@ class DatabaseManager:
             return {}
     
     async def get_treasury_summary(self, guild_id: int) -> Dict:
-        """Get overall treasury summary across all active dues periods"""
+        """Get overall treasury summary across all active dues periods (one totals row per period)"""
         try:
-            conn = await self._get_shared_connection()
-            conn.row_factory = aiosqlite.Row
-            
-            # Get all active dues periods for the guild
-            cursor = await conn.execute('''
-                SELECT * FROM dues_periods 
-                WHERE guild_id = ? AND is_active = TRUE
-                ORDER BY created_at DESC
+            rows = await self._fetchall('''
+                SELECT per.*, t.active_members, t.total_collected
+                FROM dues_periods per
+                JOIN dues_period_totals t ON t.dues_period_id = per.id
+                WHERE per.guild_id = ? AND per.is_active = TRUE
+                ORDER BY per.created_at DESC
             ''', (guild_id,))
-            
-            periods = [dict(row) for row in await cursor.fetchall()]
+            periods = []
+            total_collected = 0.0
+            total_expected = 0.0
+            for row in rows:
+                period = dict(row)
+                total_collected += period.pop('total_collected')
+                # Every active member owes each active period's due amount
+                total_expected += period['due_amount'] * period.pop('active_members')
+                periods.append(period)
             
             if not periods:
                 return {
@@ -1984,47 +4058,20 @@ class DatabaseManager:
                     'collection_percentage': 0.0
                 }
             
-            # Get aggregated payment statistics across all active periods
-            period_ids = [period['id'] for period in periods]
-            placeholders = ','.join(['?' for _ in period_ids])
-            
-            cursor = await conn.execute(f'''
-                SELECT 
-                    COUNT(DISTINCT m.user_id) as total_members,
-                    COALESCE(SUM(dp.amount_paid), 0) as total_collected,
-                    COUNT(CASE WHEN dp.payment_status = 'paid' THEN 1 END) as total_paid,
-                    COUNT(CASE WHEN dp.payment_status IN ('unpaid', 'partial') THEN 1 END) as total_outstanding_members
-                FROM members m
-                LEFT JOIN dues_payments dp ON m.guild_id = dp.guild_id AND m.user_id = dp.user_id 
-                    AND dp.dues_period_id IN ({placeholders})
-                WHERE m.guild_id = ? AND m.status = 'Active'
-            ''', (*period_ids, guild_id))
-            
-            stats = dict(await cursor.fetchone())
-            
-            # Calculate total expected across all periods
-            total_expected = 0.0
-            for period in periods:
-                # For each period, multiply the due amount by the number of active members
-                total_expected += period['due_amount'] * stats['total_members']
-            
             # Calculate outstanding amount
-            outstanding_amount = max(0, total_expected - stats['total_collected'])
+            outstanding_amount = max(0, total_expected - total_collected)
             
             # Calculate collection percentage
             collection_percentage = 0.0
             if total_expected > 0:
-                collection_percentage = (stats['total_collected'] / total_expected) * 100
-            
-            # Get the most recent period name for display
-            recent_period_name = periods[0]['period_name'] if periods else None
+                collection_percentage = (total_collected / total_expected) * 100
             
             return {
-                'total_collected': round(stats['total_collected'], 2),
+                'total_collected': round(total_collected, 2),
                 'total_expected': round(total_expected, 2),
                 'outstanding_amount': round(outstanding_amount, 2),
                 'active_periods_count': len(periods),
-                'recent_period_name': recent_period_name,
+                'recent_period_name': periods[0]['period_name'],
                 'collection_percentage': round(collection_percentage, 1),
                 'periods': periods  # Include period details for reference
             }
@@ -2040,19 +4087,76 @@ class DatabaseManager:
                 'collection_percentage': 0.0
             }
     
+    async def verify_dues_totals(self, guild_id: Optional[int] = None) -> List[Dict]:
+        """Compare dues_period_totals with counters recomputed from dues_payments and members
+        
+        Args:
+            guild_id: Limit the check to one guild (all guilds when None)
+            
+        Returns:
+            One dict per mismatched period with 'expected' and 'stored' counters
+            (stored is None when the period has no totals row); an empty list
+            means the table is consistent
+        """
+        where, params = ('WHERE per.guild_id = ?', (guild_id,)) if guild_id is not None else ('', ())
+        expected_rows = await self._fetchall(DUES_TOTALS_RECOMPUTE.format(where=where), params)
+        stored_rows = await self._fetchall(
+            'SELECT * FROM dues_period_totals' + (' WHERE guild_id = ?' if guild_id is not None else ''), params
+        )
+        stored = {row['dues_period_id']: dict(row) for row in stored_rows}
+        
+        mismatches = []
+        for row in expected_rows:
+            expected = dict(row)
+            actual = stored.pop(expected['dues_period_id'], None)
+            if actual is None or any(
+                abs(actual[column] - expected[column]) > 0.005 if column == 'total_collected'
+                else actual[column] != expected[column]
+                for column in DUES_TOTALS_COUNTERS
+            ):
+                mismatches.append({'dues_period_id': expected['dues_period_id'], 'guild_id': expected['guild_id'],
+                                   'expected': expected, 'stored': actual})
+        for actual in stored.values():  # totals left behind by a deleted period
+            mismatches.append({'dues_period_id': actual['dues_period_id'], 'guild_id': actual['guild_id'],
+                               'expected': None, 'stored': actual})
+        
+        if mismatches:
+            logger.warning(f"dues_period_totals has {len(mismatches)} mismatched period(s)"
+                           + (f" in guild {guild_id}" if guild_id is not None else ""))
+        return mismatches
+    
+    async def rebuild_dues_totals(self, guild_id: Optional[int] = None) -> int:
+        """Recompute dues_period_totals from dues_payments and members
+        
+        Args:
+            guild_id: Limit the rebuild to one guild (all guilds when None)
+            
+        Returns:
+            Number of period totals written
+        """
+        try:
+            async with self.transaction() as conn:
+                await self._fill_dues_totals(conn, guild_id)
+                where, params = ('WHERE guild_id = ?', (guild_id,)) if guild_id is not None else ('', ())
+                cursor = await conn.execute(f'SELECT COUNT(*) FROM dues_period_totals {where}', params)
+                rebuilt = (await cursor.fetchone())[0]
+            logger.info(f"Rebuilt {rebuilt} dues period total(s)"
+                        + (f" for guild {guild_id}" if guild_id is not None else ""))
+            return rebuilt
+        except Exception as e:
+            logger.error(f"Failed to rebuild dues totals: {e}")
+            raise
+    
     async def reset_dues_period(self, guild_id: int, dues_period_id: int, reset_by_id: int) -> bool:
         """Reset all payments for a dues period (manual reset)"""
         try:
-            conn = await self._get_shared_connection()
-            
-            # Delete all payments for this period
-            cursor = await conn.execute('''
-                DELETE FROM dues_payments 
-                WHERE guild_id = ? AND dues_period_id = ?
-            ''', (guild_id, dues_period_id))
-            
-            deleted_count = cursor.rowcount
-            await self._execute_commit()
+            # Delete all payments for this period (the period's totals follow via triggers)
+            async with self.transaction() as conn:
+                cursor = await conn.execute('''
+                    DELETE FROM dues_payments 
+                    WHERE guild_id = ? AND dues_period_id = ?
+                ''', (guild_id, dues_period_id))
+                deleted_count = cursor.rowcount
             
             logger.info(f"Reset dues period {dues_period_id} - deleted {deleted_count} payment records by user {reset_by_id}")
             return True
@@ -2085,9 +4189,7 @@ class DatabaseManager:
     async def get_prospect_by_user(self, guild_id: int, user_id: int) -> Optional[Dict]:
         """Get prospect record by user ID"""
         try:
-            conn = await self._get_shared_connection()
-            conn.row_factory = aiosqlite.Row
-            cursor = await conn.execute('''
+            row = await self._fetchone('''
                 SELECT p.*, 
                        sponsor.discord_name as sponsor_name,
                        prospect.discord_name as prospect_name
@@ -2096,8 +4198,6 @@ class DatabaseManager:
                 LEFT JOIN members prospect ON p.guild_id = prospect.guild_id AND p.user_id = prospect.user_id
                 WHERE p.guild_id = ? AND p.user_id = ?
             ''', (guild_id, user_id))
-            
-            row = await cursor.fetchone()
             return dict(row) if row else None
             
         except Exception as e:
@@ -2107,28 +4207,10 @@ class DatabaseManager:
     async def get_active_prospects(self, guild_id: int) -> List[Dict]:
         """Get all active prospects for a guild"""
         try:
-            conn = await self._get_shared_connection()
-            conn.row_factory = aiosqlite.Row
-            cursor = await conn.execute('''
-                SELECT p.*,
-                       sponsor.discord_name as sponsor_name,
-                       prospect.discord_name as prospect_name,
-                       COUNT(t.id) as total_tasks,
-                       COUNT(CASE WHEN t.status = 'completed' THEN 1 END) as completed_tasks,
-                       COUNT(CASE WHEN t.status = 'failed' THEN 1 END) as failed_tasks,
-                       COUNT(n.id) as total_notes,
-                       COUNT(CASE WHEN n.is_strike = TRUE THEN 1 END) as strike_count
-                FROM prospects p
-                LEFT JOIN members sponsor ON p.guild_id = sponsor.guild_id AND p.sponsor_id = sponsor.user_id
-                LEFT JOIN members prospect ON p.guild_id = prospect.guild_id AND p.user_id = prospect.user_id
-                LEFT JOIN prospect_tasks t ON p.id = t.prospect_id
-                LEFT JOIN prospect_notes n ON p.id = n.prospect_id
-                WHERE p.guild_id = ? AND p.status = 'active'
-                GROUP BY p.id
-                ORDER BY p.start_date DESC
-            ''', (guild_id,))
-            
-            rows = await cursor.fetchall()
+            rows = await self._fetchall(PROSPECT_LIST_QUERY.format(
+                status_filter="p.status = 'active'",
+                order_by='p.start_date DESC'
+            ), (guild_id,))
             return [dict(row) for row in rows]
             
         except Exception as e:
@@ -2138,28 +4220,10 @@ class DatabaseManager:
     async def get_archived_prospects(self, guild_id: int) -> List[Dict]:
         """Get all archived prospects (patched/dropped) for a guild"""
         try:
-            conn = await self._get_shared_connection()
-            conn.row_factory = aiosqlite.Row
-            cursor = await conn.execute('''
-                SELECT p.*,
-                       sponsor.discord_name as sponsor_name,
-                       prospect.discord_name as prospect_name,
-                       COUNT(t.id) as total_tasks,
-                       COUNT(CASE WHEN t.status = 'completed' THEN 1 END) as completed_tasks,
-                       COUNT(CASE WHEN t.status = 'failed' THEN 1 END) as failed_tasks,
-                       COUNT(n.id) as total_notes,
-                       COUNT(CASE WHEN n.is_strike = TRUE THEN 1 END) as strike_count
-                FROM prospects p
-                LEFT JOIN members sponsor ON p.guild_id = sponsor.guild_id AND p.sponsor_id = sponsor.user_id
-                LEFT JOIN members prospect ON p.guild_id = prospect.guild_id AND p.user_id = prospect.user_id
-                LEFT JOIN prospect_tasks t ON p.id = t.prospect_id
-                LEFT JOIN prospect_notes n ON p.id = n.prospect_id
-                WHERE p.guild_id = ? AND p.status IN ('patched', 'dropped', 'archived')
-                GROUP BY p.id
-                ORDER BY p.end_date DESC, p.updated_at DESC
-            ''', (guild_id,))
-            
-            rows = await cursor.fetchall()
+            rows = await self._fetchall(PROSPECT_LIST_QUERY.format(
+                status_filter="p.status IN ('patched', 'dropped', 'archived')",
+                order_by='p.end_date DESC, p.updated_at DESC'
+            ), (guild_id,))
             return [dict(row) for row in rows]
             
         except Exception as e:
@@ -2214,9 +4278,10 @@ class DatabaseManager:
             conn = await self._get_shared_connection()
             cursor = await conn.execute('''
                 INSERT INTO prospect_tasks (guild_id, prospect_id, assigned_by_id, task_name, 
-                                          task_description, due_date)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (guild_id, prospect_id, assigned_by_id, task_name, task_description, due_date))
+                                          task_description, due_date, due_date_epoch)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (guild_id, prospect_id, assigned_by_id, task_name, task_description, due_date,
+                  to_epoch(due_date)))
             
             task_id = cursor.lastrowid
             await self._execute_commit()
@@ -2231,9 +4296,7 @@ class DatabaseManager:
     async def get_prospect_tasks(self, prospect_id: int) -> List[Dict]:
         """Get all tasks for a prospect"""
         try:
-            conn = await self._get_shared_connection()
-            conn.row_factory = aiosqlite.Row
-            cursor = await conn.execute('''
+            rows = await self._fetchall('''
                 SELECT t.*,
                        assigned_by.discord_name as assigned_by_name,
                        completed_by.discord_name as completed_by_name
@@ -2243,8 +4306,6 @@ class DatabaseManager:
                 WHERE t.prospect_id = ?
                 ORDER BY t.created_at DESC
             ''', (prospect_id,))
-            
-            rows = await cursor.fetchall()
             return [dict(row) for row in rows]
             
         except Exception as e:
@@ -2254,9 +4315,7 @@ class DatabaseManager:
     async def get_overdue_tasks(self, guild_id: int) -> List[Dict]:
         """Get all overdue prospect tasks"""
         try:
-            conn = await self._get_shared_connection()
-            conn.row_factory = aiosqlite.Row
-            cursor = await conn.execute('''
+            rows = await self._fetchall('''
                 SELECT t.*,
                        p.user_id as prospect_user_id,
                        p.sponsor_id,
@@ -2270,13 +4329,11 @@ class DatabaseManager:
                 LEFT JOIN members assigned_by ON t.guild_id = assigned_by.guild_id AND t.assigned_by_id = assigned_by.user_id
                 WHERE t.guild_id = ? 
                   AND t.status = 'assigned' 
-                  AND t.due_date <= ?
+                  AND t.due_date_epoch <= ?
                   AND p.status = 'active'
-                ORDER BY t.due_date ASC
-            ''', (guild_id, datetime.now()))
-            
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+                ORDER BY t.due_date_epoch ASC
+            ''', (guild_id, to_epoch(datetime.now())))
+            return [dict(row, due_date_utc=from_epoch(row['due_date_epoch'])) for row in rows]
             
         except Exception as e:
             logger.error(f"Failed to get overdue tasks: {e}")
@@ -2353,17 +4410,13 @@ class DatabaseManager:
     async def get_prospect_notes(self, prospect_id: int) -> List[Dict]:
         """Get all notes for a prospect"""
         try:
-            conn = await self._get_shared_connection()
-            conn.row_factory = aiosqlite.Row
-            cursor = await conn.execute('''
+            rows = await self._fetchall('''
                 SELECT n.*, m.discord_name as author_name, m.rank as author_rank
                 FROM prospect_notes n
                 LEFT JOIN members m ON n.guild_id = m.guild_id AND n.author_id = m.user_id
                 WHERE n.prospect_id = ?
                 ORDER BY n.created_at DESC
             ''', (prospect_id,))
-            
-            rows = await cursor.fetchall()
             return [dict(row) for row in rows]
             
         except Exception as e:
@@ -2404,9 +4457,7 @@ class DatabaseManager:
     async def get_active_prospect_vote(self, prospect_id: int) -> Optional[Dict]:
         """Get active vote for a prospect"""
         try:
-            conn = await self._get_shared_connection()
-            conn.row_factory = aiosqlite.Row
-            cursor = await conn.execute('''
+            row = await self._fetchone('''
                 SELECT v.*, 
                        starter.discord_name as started_by_name,
                        p.user_id as prospect_user_id,
@@ -2417,8 +4468,6 @@ class DatabaseManager:
                 LEFT JOIN members prospect ON p.guild_id = prospect.guild_id AND p.user_id = prospect.user_id
                 WHERE v.prospect_id = ? AND v.status = 'active'
             ''', (prospect_id,))
-            
-            row = await cursor.fetchone()
             return dict(row) if row else None
             
         except Exception as e:
@@ -2447,33 +4496,28 @@ class DatabaseManager:
     async def get_vote_responses(self, vote_id: int, include_voter_ids: bool = False) -> Dict:
         """Get vote responses summary (anonymous unless include_voter_ids is True)"""
         try:
-            conn = await self._get_shared_connection()
-            conn.row_factory = aiosqlite.Row
-            
             if include_voter_ids:
                 # Include voter information (for bot owner)
-                cursor = await conn.execute('''
+                rows = await self._fetchall('''
                     SELECT vr.*, m.discord_name as voter_name
                     FROM prospect_vote_responses vr
                     LEFT JOIN members m ON vr.voter_id = m.user_id
                     WHERE vr.vote_id = ?
                     ORDER BY vr.voted_at ASC
                 ''', (vote_id,))
-                
-                responses = [dict(row) for row in await cursor.fetchall()]
+                responses = [dict(row) for row in rows]
             else:
                 # Anonymous summary only
                 responses = []
             
             # Get vote counts
-            cursor = await conn.execute('''
+            rows = await self._fetchall('''
                 SELECT vote_response, COUNT(*) as count
                 FROM prospect_vote_responses
                 WHERE vote_id = ?
                 GROUP BY vote_response
             ''', (vote_id,))
-            
-            counts = {row[0]: row[1] for row in await cursor.fetchall()}
+            counts = {row[0]: row[1] for row in rows}
             
             return {
                 'yes': counts.get('yes', 0),
@@ -2521,9 +4565,7 @@ class DatabaseManager:
     async def get_prospect_vote_history(self, prospect_id: int) -> List[Dict]:
         """Get all votes (active and completed) for a prospect"""
         try:
-            conn = await self._get_shared_connection()
-            conn.row_factory = aiosqlite.Row
-            cursor = await conn.execute('''
+            rows = await self._fetchall('''
                 SELECT v.*, 
                        starter.discord_name as started_by_name,
                        ender.discord_name as ended_by_name
@@ -2533,8 +4575,6 @@ class DatabaseManager:
                 WHERE v.prospect_id = ?
                 ORDER BY v.started_at DESC
             ''', (prospect_id,))
-            
-            rows = await cursor.fetchall()
             return [dict(row) for row in rows]
             
         except Exception as e:
@@ -2547,16 +4587,12 @@ class DatabaseManager:
     async def get_user_dues_payment(self, guild_id: int, user_id: int, dues_period_id: int):
         """Get a user's payment for a specific dues period"""
         try:
-            conn = await self._get_shared_connection()
-            conn.row_factory = aiosqlite.Row
-            cursor = await conn.execute('''
+            row = await self._fetchone('''
                 SELECT id, user_id, dues_period_id, amount_paid, payment_date, payment_method,
                        payment_status, notes, updated_by_id, updated_at
                 FROM dues_payments 
                 WHERE guild_id = ? AND user_id = ? AND dues_period_id = ?
             ''', (guild_id, user_id, dues_period_id))
-            
-            row = await cursor.fetchone()
             if row:
                 return {
                     'id': row['id'],
@@ -2575,9 +4611,7 @@ class DatabaseManager:
         except Exception as e:
             logger.error(f"Failed to get user dues payment: {e}")
             return None
-    
-    
-    
+
     async def deactivate_dues_period(self, guild_id: int, period_id: int, updated_by_id: int):
         """Deactivate a dues period"""
         try:
@@ -2628,10 +4662,10 @@ class DatabaseManager:
             
             cursor = await conn.execute('''
                 INSERT INTO prospect_tasks (guild_id, prospect_id, assigned_by_id, task_name, 
-                                          task_description, due_date, status)
-                VALUES (?, ?, ?, ?, ?, ?, 'assigned')
+                                          task_description, due_date, due_date_epoch, status)
+                VALUES (?, ?, ?, ?, ?, ?, ?, 'assigned')
             ''', (guild_id, prospect_id, assigned_by_id, task_name, task_description, 
-                  due_date.isoformat() if due_date else None))
+                  due_date.isoformat() if due_date else None, to_epoch(due_date)))
             
             task_id = cursor.lastrowid
             await self._execute_commit()
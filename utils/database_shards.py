@@ -0,0 +1,776 @@
+import asyncio
+import inspect
+import logging
+import os
+import shutil
+import tarfile
+import tempfile
+from collections import OrderedDict
+from contextlib import aclosing, asynccontextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiosqlite
+
+from utils import db_stats, db_supervisor
+from utils.database import (
+    BACKUP_PAGES_PER_STEP, DEFAULT_STORAGE_PROFILE, OPTIMIZE_ANALYSIS_LIMIT, QUERY_HELPER_FUNCTIONS, RETENTION_BATCH_SIZE,
+    TRANSCRIPT_BATCH_SIZE, TRANSCRIPT_FLUSH_MS, TRANSCRIPT_FTS_TABLE, VACUUM_PAGES_PER_STEP, DatabaseManager,
+    backup_sqlite_file, epoch_sql, to_epoch,
+)
+from utils.db_records import from_epoch
+
+logger = logging.getLogger(__name__)
+
+# Row ids in a shard start at shard_index << SHARD_ID_BITS, so a bare id passed
+# to get_loa_by_id, end_prospect_vote etc. says which shard it lives in
+SHARD_ID_BITS = 32
+
+CATALOG_FILE = 'catalog.db'
+CATALOG_SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS guild_shards (
+        guild_id INTEGER PRIMARY KEY,
+        shard_index INTEGER NOT NULL UNIQUE,
+        file_name TEXT NOT NULL,
+        loa_notification_channel_id INTEGER,
+        next_loa_expiry INTEGER,  -- epoch seconds
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_guild_shards_loa_expiry ON guild_shards (next_loa_expiry)',
+)
+CATALOG_HELPER_FUNCTIONS = QUERY_HELPER_FUNCTIONS | {'_catalog_execute', '_catalog_fetchall'}
+
+# Tables split_database rebuilds in each shard instead of copying
+SPLIT_DERIVED_TABLES = ('schema_version', 'inventory_totals', 'dues_period_totals', 'dm_conversations')
+# Row-id references that have no declared foreign key
+SPLIT_ID_REFERENCES = {'dues_payment_history': ('dues_payment_id',)}
+
+
+def shard_id_base(shard_index: int) -> int:
+    """Row id after which the shard's AUTOINCREMENT ids start"""
+    return shard_index << SHARD_ID_BITS
+
+
+def shard_index_of(row_id: int) -> int:
+    """Shard index encoded in a row id"""
+    return row_id >> SHARD_ID_BITS
+
+
+def _route(function) -> Optional[Tuple[str, str]]:
+    """How a DatabaseManager method finds its shard, from its first parameter
+
+    ('guild', name) when it takes a guild_id, ('all_guilds', name) when the
+    guild_id is optional and None means every guild, ('row', name) when it
+    takes a row id; None for methods ShardedDatabaseManager implements itself.
+    """
+    parameters = list(inspect.signature(function).parameters.values())[1:]
+    if not parameters:
+        return None
+    first = parameters[0]
+    if first.name == 'guild_id':
+        return ('all_guilds' if first.default is None else 'guild'), first.name
+    if first.name.endswith('_id'):
+        return 'row', first.name
+    return None
+
+
+def _is_iterator(name: str, function) -> bool:
+    """Async generators, and the iter_* methods that return one from _iterate"""
+    return inspect.isasyncgenfunction(function) or (name.startswith('iter_') and inspect.isfunction(function))
+
+
+# DatabaseManager coroutines and async iterators that are forwarded to one shard (or each)
+ROUTED_METHODS = {
+    name: (_route(function), _is_iterator(name, function))
+    for name, function in vars(DatabaseManager).items()
+    if not name.startswith('_')
+    and (inspect.iscoroutinefunction(function) or _is_iterator(name, function))
+    and _route(function) is not None
+}
+
+
+def _combine(results: List[Any]) -> Any:
+    """Merge per-shard results of an all-guilds call (lists are concatenated, counts summed)"""
+    if all(isinstance(result, list) for result in results):
+        return [item for result in results for item in result]
+    return sum(results)
+
+
+class ShardedDatabaseManager:
+    """
+    DatabaseManager with each guild stored in its own SQLite file.
+
+    Methods keep DatabaseManager's signatures. Guild-keyed methods run on the
+    guild's shard, which is opened (and migrated) on first use; at most
+    max_open_shards stay open, the least recently used idle one closing
+    first, and a shard is never closed while a call, iterator or unit of work
+    is using it. Methods keyed by a row id find the shard from the id itself
+    (see SHARD_ID_BITS).
+
+    A small catalog database maps guilds to shard files and holds what the
+    cross-guild features need without opening every shard: each guild's next
+    pending LOA expiry (for the expiry loop) and its LOA notification channel
+    (for cross-server notifications).
+    """
+
+    # File suffix of the archives written by backup_to
+    backup_suffix = '.tar'
+
+    def __init__(self, directory: str = "data/guilds", max_open_shards: int = 16,
+                 read_pool_size: int = 2, group_commit_ms: float = 0, slow_query_ms: float = 250,
+                 transcript_batch_size: int = TRANSCRIPT_BATCH_SIZE, transcript_flush_ms: float = TRANSCRIPT_FLUSH_MS,
+                 storage_profile=DEFAULT_STORAGE_PROFILE):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.db_path = os.path.join(directory, CATALOG_FILE)
+        self.max_open_shards = max(max_open_shards, 1)
+        self._shard_options = {'read_pool_size': read_pool_size, 'group_commit_ms': group_commit_ms,
+                               'transcript_batch_size': transcript_batch_size,
+                               'transcript_flush_ms': transcript_flush_ms,
+                               'storage_profile': storage_profile}
+        # One set of query timings across the catalog and every shard
+        self._query_stats = db_stats.QueryStats(slow_query_ms, helper_functions=CATALOG_HELPER_FUNCTIONS)
+        # ...and one set of health counters and one circuit breaker
+        self._supervisor = db_supervisor.ConnectionSupervisor()
+
+        # guild_id -> open DatabaseManager, least recently used first, and how
+        # many calls are using each one right now (pinned shards are never closed)
+        self._shards = OrderedDict()
+        self._pins = {}
+        self._open_lock = asyncio.Lock()
+        self._closed_commit_stats = {'commit_requests': 0, 'commits': 0, 'transactions': 0}
+
+        self._catalog = None
+        self._catalog_lock = asyncio.Lock()
+        self._guild_by_index = {}
+        self._index_by_guild = {}
+
+        logger.info(f"Sharded database manager initialized in {directory} (max {self.max_open_shards} open shards)")
+
+    def __getattr__(self, name: str):
+        route = ROUTED_METHODS.get(name)
+        if route is None:
+            raise AttributeError(f"{type(self).__name__} has no attribute {name!r}")
+        (kind, key), is_iterator = route
+        method = self._route_iterator(name, kind, key) if is_iterator else self._route_call(name, kind, key)
+        method.__name__ = name
+        setattr(self, name, method)
+        return method
+
+    def _route_call(self, name: str, kind: str, key: str):
+        async def call(*args, **kwargs):
+            value = kwargs[key] if key in kwargs else (args[0] if args else None)
+            if kind == 'row':
+                guild_id = await self._guild_for_row(value)
+                if guild_id is None:
+                    logger.warning(f"{name}: id {value} does not belong to any guild shard")
+                    return None
+            elif value is None and kind == 'all_guilds':
+                results = []
+                for guild_id in await self.get_guild_ids():
+                    async with self._pinned(guild_id) as shard:
+                        results.append(await getattr(shard, name)(*args, **kwargs))
+                return _combine(results)
+            else:
+                guild_id = value
+            async with self._pinned(guild_id) as shard:
+                return await getattr(shard, name)(*args, **kwargs)
+        return call
+
+    def _route_iterator(self, name: str, kind: str, key: str):
+        async def iterate(*args, **kwargs):
+            value = kwargs[key] if key in kwargs else args[0]
+            guild_id = await self._guild_for_row(value) if kind == 'row' else value
+            if guild_id is None:
+                logger.warning(f"{name}: id {value} does not belong to any guild shard")
+                return
+            async with self._pinned(guild_id) as shard:
+                async with aclosing(getattr(shard, name)(*args, **kwargs)) as rows:
+                    async for row in rows:
+                        yield row
+        return iterate
+
+    # Catalog
+
+    async def initialize_database(self):
+        """Open the catalog; shards are opened and migrated on first use"""
+        await self._get_catalog()
+
+    async def _get_catalog(self):
+        if self._catalog is not None and self._catalog.usable:
+            return self._catalog
+        async with self._catalog_lock:
+            if self._catalog is not None and not self._catalog.usable:
+                logger.warning("Replacing broken shard catalog connection")
+                self._supervisor.record_reconnect()
+                try:
+                    await self._catalog.close()
+                except Exception as e:
+                    logger.debug(f"Error closing broken catalog connection: {e}")
+                self._catalog = None
+            if self._catalog is None:
+                conn = await db_stats.connect(self.db_path, self._query_stats, supervisor=self._supervisor,
+                                              retry_budget=db_supervisor.WRITER_RETRY_BUDGET_S,
+                                              timeout=db_supervisor.BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+                await conn.execute('PRAGMA journal_mode = WAL')
+                await conn.execute(f'PRAGMA busy_timeout = {db_supervisor.BUSY_TIMEOUT_MS}')
+                for statement in CATALOG_SCHEMA:
+                    await conn.execute(statement)
+                # Catalogs written before expiries were stored as epoch seconds
+                await conn.execute(f'''
+                    UPDATE guild_shards SET next_loa_expiry = {epoch_sql('next_loa_expiry')}
+                    WHERE typeof(next_loa_expiry) = 'text'
+                ''')
+                await conn.commit()
+                cursor = await conn.execute('SELECT guild_id, shard_index FROM guild_shards')
+                for guild_id, shard_index in await cursor.fetchall():
+                    self._guild_by_index[shard_index] = guild_id
+                    self._index_by_guild[guild_id] = shard_index
+                self._catalog = conn
+                logger.info(f"Shard catalog opened with {len(self._index_by_guild)} guild(s)")
+        return self._catalog
+
+    async def _catalog_execute(self, query: str, params=()):
+        """Run one write against the catalog and commit it"""
+        conn = await self._get_catalog()
+        async with self._catalog_lock:
+            cursor = await conn.execute(query, params)
+            await conn.commit()
+            return cursor
+
+    async def _catalog_fetchall(self, query: str, params=()) -> List[Any]:
+        conn = await self._get_catalog()
+        cursor = await conn.execute(query, params)
+        return await cursor.fetchall()
+
+    async def _register_guild(self, guild_id: int) -> Tuple[int, str]:
+        """(shard index, file name) of a guild, adding it to the catalog on first use"""
+        conn = await self._get_catalog()
+        async with self._catalog_lock:
+            cursor = await conn.execute(
+                'SELECT shard_index, file_name FROM guild_shards WHERE guild_id = ?', (guild_id,)
+            )
+            row = await cursor.fetchone()
+            if row is None:
+                await conn.execute('''
+                    INSERT INTO guild_shards (guild_id, shard_index, file_name)
+                    SELECT ?, COALESCE(MAX(shard_index), 0) + 1, ? FROM guild_shards
+                ''', (guild_id, f'guild_{guild_id}.db'))
+                await conn.commit()
+                cursor = await conn.execute(
+                    'SELECT shard_index, file_name FROM guild_shards WHERE guild_id = ?', (guild_id,)
+                )
+                row = await cursor.fetchone()
+                logger.info(f"Added guild {guild_id} to the shard catalog as shard {row[0]}")
+        self._guild_by_index[row[0]] = guild_id
+        self._index_by_guild[guild_id] = row[0]
+        return row[0], row[1]
+
+    async def _guild_for_row(self, row_id) -> Optional[int]:
+        if not isinstance(row_id, int):
+            return None
+        await self._get_catalog()
+        return self._guild_by_index.get(shard_index_of(row_id))
+
+    async def get_guild_ids(self) -> List[int]:
+        """Get every guild that has a shard"""
+        rows = await self._catalog_fetchall('SELECT guild_id FROM guild_shards ORDER BY shard_index')
+        return [row[0] for row in rows]
+
+    async def _sync_catalog_config(self, guild_id: int, shard: DatabaseManager):
+        """Mirror the guild's LOA notification channel into the catalog"""
+        config = await shard.get_server_config(guild_id)
+        channel_id = config.get('loa_notification_channel_id') if config else None
+        await self._catalog_execute(
+            'UPDATE guild_shards SET loa_notification_channel_id = ? WHERE guild_id = ?', (channel_id, guild_id)
+        )
+
+    async def _set_next_loa_expiry(self, guild_id: int, end_time):
+        await self._catalog_execute(
+            'UPDATE guild_shards SET next_loa_expiry = ? WHERE guild_id = ?', (to_epoch(end_time), guild_id)
+        )
+
+    # Shard handles
+
+    async def _open_shard(self, guild_id: int) -> DatabaseManager:
+        shard_index, file_name = await self._register_guild(guild_id)
+        shard = DatabaseManager(os.path.join(self.directory, file_name), query_stats=self._query_stats,
+                                supervisor=self._supervisor, **self._shard_options)
+        try:
+            await shard.initialize_database()
+            await self._seed_row_ids(shard, shard_id_base(shard_index))
+        except Exception as e:
+            logger.error(f"Failed to open shard for guild {guild_id}: {e}")
+            await shard.close()
+            raise
+        return shard
+
+    @staticmethod
+    async def _seed_row_ids(shard: DatabaseManager, base: int):
+        """Start every AUTOINCREMENT table of the shard above base (no-op once they are)"""
+        conn = await shard._get_shared_connection()
+        cursor = await conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND sql LIKE '%AUTOINCREMENT%'"
+        )
+        for (table,) in await cursor.fetchall():
+            await conn.execute('''
+                INSERT INTO sqlite_sequence (name, seq)
+                SELECT ?, ? WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = ?)
+            ''', (table, base, table))
+            await conn.execute('UPDATE sqlite_sequence SET seq = ? WHERE name = ? AND seq < ?', (base, table, base))
+        await conn.commit()
+
+    async def _acquire(self, guild_id: int) -> DatabaseManager:
+        """Open (or reuse) a guild's shard and pin it until _release"""
+        if guild_id is None:
+            raise ValueError("A guild_id is required with sharded database storage")
+        shard = self._shards.get(guild_id)
+        if shard is None:
+            async with self._open_lock:
+                shard = self._shards.get(guild_id)
+                if shard is None:
+                    shard = await self._open_shard(guild_id)
+                    self._shards[guild_id] = shard
+        self._shards.move_to_end(guild_id)
+        self._pins[guild_id] = self._pins.get(guild_id, 0) + 1
+        await self._evict_idle()
+        return shard
+
+    async def _release(self, guild_id: int):
+        self._pins[guild_id] -= 1
+        if not self._pins[guild_id]:
+            del self._pins[guild_id]
+        await self._evict_idle()
+
+    @asynccontextmanager
+    async def _pinned(self, guild_id: int):
+        shard = await self._acquire(guild_id)
+        try:
+            yield shard
+        finally:
+            await self._release(guild_id)
+
+    async def _evict_idle(self):
+        """Close least recently used idle shards until at most max_open_shards are open"""
+        while len(self._shards) > self.max_open_shards:
+            guild_id = next((guild_id for guild_id in self._shards if not self._pins.get(guild_id)), None)
+            if guild_id is None:
+                return  # every open shard is in use; trimmed again on release
+            await self._close_shard(guild_id, self._shards.pop(guild_id))
+
+    async def _close_shard(self, guild_id: int, shard: DatabaseManager):
+        for key, value in shard.get_commit_stats().items():
+            if key in self._closed_commit_stats:
+                self._closed_commit_stats[key] += value
+        await shard.close()
+        logger.debug(f"Closed shard for guild {guild_id}")
+
+    def get_open_shard_ids(self) -> List[int]:
+        """Guilds whose shard is open, least recently used first"""
+        return list(self._shards)
+
+    async def close(self):
+        """Close every open shard and the catalog"""
+        while self._shards:
+            guild_id, shard = self._shards.popitem(last=False)
+            await self._close_shard(guild_id, shard)
+        self._pins.clear()
+        async with self._catalog_lock:
+            if self._catalog is not None:
+                await self._catalog.close()
+                self._catalog = None
+                logger.info("Shard catalog closed")
+
+    # Per-guild connections and units of work
+
+    async def _execute_commit(self, guild_id: Optional[int] = None):
+        async with self._pinned(guild_id) as shard:
+            await shard._execute_commit()
+
+    @asynccontextmanager
+    async def transaction(self, guild_id: Optional[int] = None):
+        """Unit of work on one guild's shard (see DatabaseManager.transaction)"""
+        async with self._pinned(guild_id) as shard:
+            async with shard.transaction() as conn:
+                yield conn
+
+    # Cross-guild features, answered from the catalog
+
+    async def create_loa_record(self, guild_id: int, user_id: int, duration: str,
+                                reason: str, start_time: datetime, end_time: datetime) -> int:
+        """Create a new LOA record and bring the guild's next expiry forward if needed"""
+        async with self._pinned(guild_id) as shard:
+            loa_id = await shard.create_loa_record(guild_id, user_id, duration, reason, start_time, end_time)
+        end_epoch = to_epoch(end_time)
+        await self._catalog_execute('''
+            UPDATE guild_shards SET next_loa_expiry = ?
+            WHERE guild_id = ? AND (next_loa_expiry IS NULL OR next_loa_expiry > ?)
+        ''', (end_epoch, guild_id, end_epoch))
+        return loa_id
+
+    async def get_expired_loas(self) -> List[Any]:
+        """Get expired, unprocessed LOAs from the shards whose next expiry has passed
+
+        Only those shards are opened. Their catalog entry is reset to the
+        earliest LOA still pending, which stays due until the returned LOAs
+        are marked expired.
+        """
+        rows = await self._catalog_fetchall(
+            'SELECT guild_id FROM guild_shards WHERE next_loa_expiry <= ?', (to_epoch(datetime.now()),)
+        )
+        expired = []
+        for (guild_id,) in rows:
+            async with self._pinned(guild_id) as shard:
+                expired.extend(await shard.get_expired_loas())
+                await self._set_next_loa_expiry(guild_id, await shard.get_next_loa_expiry())
+        return expired
+
+    async def get_next_loa_expiry(self) -> Optional[datetime]:
+        """Get the end time (aware, UTC) of the earliest LOA still waiting to expire in any guild"""
+        rows = await self._catalog_fetchall('SELECT MIN(next_loa_expiry) FROM guild_shards')
+        return from_epoch(rows[0][0]) if rows else None
+
+    async def get_loa_notification_guild_ids(self) -> List[int]:
+        """Get the guilds that have an LOA notification channel configured"""
+        rows = await self._catalog_fetchall(
+            'SELECT guild_id FROM guild_shards WHERE loa_notification_channel_id IS NOT NULL'
+        )
+        return [row[0] for row in rows]
+
+    async def update_server_config(self, guild_id: int, **kwargs):
+        """Update server configuration"""
+        async with self._pinned(guild_id) as shard:
+            await shard.update_server_config(guild_id, **kwargs)
+            if 'loa_notification_channel_id' in kwargs:
+                await self._sync_catalog_config(guild_id, shard)
+
+    async def reset_server_config(self, guild_id: int):
+        """Reset a guild's server configuration to the defaults"""
+        async with self._pinned(guild_id) as shard:
+            result = await shard.reset_server_config(guild_id)
+            await self._sync_catalog_config(guild_id, shard)
+        return result
+
+    # DM transcript batches (each shard queues its own; closing a shard flushes it)
+
+    async def log_dm_transcripts(self, entries: List[Dict]) -> int:
+        """Log several DM transcript entries, one batch per guild shard"""
+        by_guild = {}
+        for entry in entries:
+            by_guild.setdefault(entry['guild_id'], []).append(entry)
+        written = 0
+        for guild_id, guild_entries in by_guild.items():
+            async with self._pinned(guild_id) as shard:
+                written += await shard.log_dm_transcripts(guild_entries)
+        return written
+
+    async def flush_dm_transcripts(self) -> int:
+        """Write the queued DM transcript entries of every open shard now"""
+        written = 0
+        for guild_id in list(self._shards):
+            async with self._pinned(guild_id) as shard:
+                written += await shard.flush_dm_transcripts()
+        return written
+
+    # Maintenance across every shard
+
+    async def _each_shard(self):
+        """Yield (guild_id, shard) for every guild, pinning one shard at a time"""
+        for guild_id in await self.get_guild_ids():
+            async with self._pinned(guild_id) as shard:
+                yield guild_id, shard
+
+    async def run_retention(self, batch_size: int = RETENTION_BATCH_SIZE) -> Dict[str, int]:
+        """Apply every guild's retention policy and reclaim freed pages, shard by shard"""
+        totals = {}
+        async with aclosing(self._each_shard()) as shards:
+            async for guild_id, shard in shards:
+                for key, value in (await shard.run_retention(batch_size)).items():
+                    totals[key] = totals.get(key, 0) + value
+        return totals
+
+    async def incremental_vacuum(self, max_pages: Optional[int] = None,
+                                 pages_per_step: int = VACUUM_PAGES_PER_STEP) -> int:
+        """Reclaim free pages in every shard; returns the pages reclaimed"""
+        reclaimed = 0
+        async with aclosing(self._each_shard()) as shards:
+            async for guild_id, shard in shards:
+                reclaimed += await shard.incremental_vacuum(max_pages, pages_per_step)
+        return reclaimed
+
+    async def optimize(self, analysis_limit: int = OPTIMIZE_ANALYSIS_LIMIT) -> List[str]:
+        """Refresh planner statistics in every open shard; returns the tables analyzed
+
+        Closed shards are left alone; they are optimized the next time they
+        are open when this runs.
+        """
+        analyzed = []
+        for guild_id in list(self._shards):
+            async with self._pinned(guild_id) as shard:
+                analyzed.extend(await shard.optimize(analysis_limit))
+        return analyzed
+
+    async def get_storage_stats(self) -> Dict[str, Any]:
+        """Get storage statistics summed over every shard (see DatabaseManager.get_storage_stats)"""
+        totals = {'shards': 0, 'page_count': 0, 'freelist_count': 0, 'file_bytes': 0, 'wal_bytes': 0,
+                  'analyzed': True}
+        tables = {}
+        async with aclosing(self._each_shard()) as shards:
+            async for guild_id, shard in shards:
+                stats = await shard.get_storage_stats()
+                totals['shards'] += 1
+                totals['page_size'] = stats['page_size']
+                totals['analyzed'] = totals['analyzed'] and stats['analyzed']
+                for key in ('page_count', 'freelist_count', 'file_bytes', 'wal_bytes'):
+                    totals[key] += stats[key]
+                for table in stats['tables']:
+                    merged = tables.setdefault(table['name'], dict(table, rows=None, pages=0, bytes=0,
+                                                                   unused_bytes=0, index_bytes=0))
+                    if table['rows'] is not None:
+                        merged['rows'] = (merged['rows'] or 0) + table['rows']
+                    for key in ('pages', 'bytes', 'unused_bytes', 'index_bytes'):
+                        merged[key] += table[key]
+        totals['tables'] = sorted(tables.values(), key=lambda table: table['bytes'] + table['index_bytes'],
+                                  reverse=True)
+        return totals
+
+    async def get_index_usage(self) -> List[Dict[str, Any]]:
+        """Get index usage from the statements timed across all shards
+
+        Every shard has the same schema and the statements are counted once
+        for all of them, so the plans are taken from a single shard.
+        """
+        async with aclosing(self._each_shard()) as shards:
+            async for guild_id, shard in shards:
+                return await shard.get_index_usage()
+        return []
+
+    async def rebuild_transcript_search_index(self) -> int:
+        """Rebuild the transcript full-text index in every shard"""
+        indexed = 0
+        async with aclosing(self._each_shard()) as shards:
+            async for guild_id, shard in shards:
+                indexed += await shard.rebuild_transcript_search_index()
+        return indexed
+
+    async def backup_to(self, dest_path: str, pages: int = BACKUP_PAGES_PER_STEP) -> Dict[str, int]:
+        """Back up the catalog and every shard into one tar at dest_path
+
+        Each member (catalog.db.gz, guild_<id>.db.gz) is an online backup as
+        written by DatabaseManager.backup_to, so closed shards are copied
+        without being opened. Restore by extracting the tar into the shard
+        directory and gunzipping every member.
+
+        Returns:
+            {'pages', 'raw_size', 'size' (tar bytes), 'shards'}
+        """
+        await self._get_catalog()
+        rows = await self._catalog_fetchall('SELECT file_name FROM guild_shards ORDER BY shard_index')
+        files = [CATALOG_FILE] + [row[0] for row in rows
+                                  if os.path.exists(os.path.join(self.directory, row[0]))]
+        dest_dir = os.path.dirname(os.path.abspath(dest_path))
+        os.makedirs(dest_dir, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix='shard_backup_', dir=dest_dir)
+        totals = {'pages': 0, 'raw_size': 0}
+        try:
+            for file_name in files:
+                result = await backup_sqlite_file(os.path.join(self.directory, file_name),
+                                                  os.path.join(staging, file_name + '.gz'), pages)
+                totals['pages'] += result['pages']
+                totals['raw_size'] += result['raw_size']
+            await asyncio.to_thread(self._write_tar, dest_path, staging, [name + '.gz' for name in files])
+        except Exception as e:
+            logger.error(f"Sharded backup to {dest_path} failed: {e}")
+            if os.path.exists(dest_path):
+                os.remove(dest_path)
+            raise
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        return dict(totals, size=os.path.getsize(dest_path), shards=len(files) - 1)
+
+    @staticmethod
+    def _write_tar(dest_path: str, staging: str, names: List[str]):
+        with tarfile.open(dest_path, 'w') as archive:
+            for name in names:
+                archive.add(os.path.join(staging, name), arcname=name)
+
+    # Caches and statistics
+
+    async def warm_server_config_cache(self) -> int:
+        """Warm the config cache of the shards that are open (others warm as they open)"""
+        warmed = 0
+        for shard in list(self._shards.values()):
+            warmed += await shard.warm_server_config_cache()
+        return warmed
+
+    def invalidate_server_config(self, guild_id: Optional[int] = None):
+        """Drop one guild's cached config (or every open shard's cache when guild_id is None)"""
+        for shard_guild_id, shard in self._shards.items():
+            if guild_id is None or shard_guild_id == guild_id:
+                shard.invalidate_server_config(guild_id)
+
+    def get_server_config_cache_stats(self) -> Dict[str, int]:
+        """Get server config cache counters summed over the open shards"""
+        totals = {'hits': 0, 'misses': 0, 'size': 0}
+        for shard in self._shards.values():
+            for key, value in shard.get_server_config_cache_stats().items():
+                totals[key] += value
+        return totals
+
+    def get_commit_stats(self) -> Dict[str, int]:
+        """Get commit counters summed over every shard opened by this process"""
+        stats = dict(self._closed_commit_stats)
+        for shard in self._shards.values():
+            for key, value in shard.get_commit_stats().items():
+                if key in stats:
+                    stats[key] += value
+        stats['commits_saved'] = max(stats['commit_requests'] - stats['commits'], 0)
+        stats['group_commit_ms'] = self._shard_options['group_commit_ms']
+        return stats
+
+    def get_query_stats(self, limit: int = 10, key: str = 'total_ms') -> Dict[str, Any]:
+        """Get the slowest calling methods and the most recent slow queries across all shards"""
+        stats = self._query_stats
+        return {
+            'slow_query_ms': stats.slow_query_ms,
+            'methods': len(stats.methods),
+            'top': stats.top(limit, key),
+            'slow_queries': list(stats.slow_queries)[::-1],
+        }
+
+    def reset_query_stats(self):
+        """Clear query timings and the slow-query history"""
+        self._query_stats.reset()
+
+    def get_connection_health(self) -> Dict[str, Any]:
+        """Get connection health counters and the circuit breaker state across the catalog and all shards"""
+        open_readers = sum(len(shard._read_connections) for shard in self._shards.values())
+        return dict(self._supervisor.health(), open_readers=open_readers)
+
+    def allow_expensive_work(self) -> bool:
+        """Check the circuit breaker before starting a backup, archive or other heavy job"""
+        return self._supervisor.allow_expensive_work()
+
+    # Splitting a single-file database
+
+    async def _import_guild(self, source_path: str, guild_id: int, plan: List[Tuple]) -> int:
+        """Copy one guild's rows from a single-file database into its (new) shard"""
+        async with self._pinned(guild_id) as shard:
+            base = shard_id_base(self._index_by_guild[guild_id])
+            conn = await shard._get_shared_connection()
+            await conn.execute('ATTACH DATABASE ? AS monolith', (source_path,))
+            copied = 0
+            try:
+                await conn.execute('BEGIN IMMEDIATE')
+                try:
+                    for table, columns, id_columns, condition in plan:
+                        cursor = await conn.execute(f'PRAGMA main.table_info({table})')
+                        shard_columns = {row[1] for row in await cursor.fetchall()}
+                        names = [column for column in columns if column in shard_columns]
+                        values = [f'{column} + {base}' if column in id_columns else column for column in names]
+                        cursor = await conn.execute(f'''
+                            INSERT INTO main.{table} ({', '.join(names)})
+                            SELECT {', '.join(values)} FROM monolith.{table} WHERE {condition}
+                        ''', (guild_id,))
+                        copied += max(cursor.rowcount, 0)
+                    await conn.commit()
+                except BaseException:
+                    await conn.rollback()
+                    raise
+            finally:
+                await conn.execute('DETACH DATABASE monolith')
+
+            await shard.rebuild_inventory_totals(guild_id)
+            await shard.rebuild_dues_totals(guild_id)
+            shard.invalidate_server_config(guild_id)
+            await self._sync_catalog_config(guild_id, shard)
+            await self._set_next_loa_expiry(guild_id, await shard.get_next_loa_expiry())
+        return copied
+
+
+async def _plan_split(source_path: str) -> Tuple[List[Tuple[str, List[str], set, str]], List[int]]:
+    """Copy plan [(table, columns, id columns, row filter)] parents first, and every guild id in the source"""
+    async with aiosqlite.connect(source_path) as conn:
+        tables = [row[0] for row in await conn.execute_fetchall(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY rowid"
+        )]
+        info = {}
+        for table in tables:
+            if table in SPLIT_DERIVED_TABLES or table.startswith(TRANSCRIPT_FTS_TABLE):
+                continue
+            columns = [row[1] for row in await conn.execute_fetchall(f'PRAGMA table_info({table})')]
+            parents = {row[3]: row[2] for row in await conn.execute_fetchall(f'PRAGMA foreign_key_list({table})')
+                       if row[4] == 'id'}
+            info[table] = (columns, parents)
+
+        plan = []
+        guild_ids = set()
+        for table, (columns, parents) in info.items():
+            if 'guild_id' in columns:
+                condition = 'guild_id = ?'
+                guild_ids.update(row[0] for row in await conn.execute_fetchall(
+                    f'SELECT DISTINCT guild_id FROM {table} WHERE guild_id IS NOT NULL'
+                ))
+            else:
+                owner = next(((column, parent) for column, parent in parents.items()
+                              if 'guild_id' in info.get(parent, ((), {}))[0]), None)
+                if owner is None:
+                    logger.warning(f"Not splitting table {table}: it has no guild_id and no guild-owned parent")
+                    continue
+                condition = f'{owner[0]} IN (SELECT id FROM monolith.{owner[1]} WHERE guild_id = ?)'
+            id_columns = set(parents) | set(SPLIT_ID_REFERENCES.get(table, ()))
+            if 'id' in columns:
+                id_columns.add('id')
+                max_id = (await conn.execute_fetchall(f'SELECT MAX(id) FROM {table}'))[0][0]
+                if max_id is not None and max_id >= shard_id_base(1):
+                    raise ValueError(f"{table} ids exceed the {SHARD_ID_BITS}-bit per-shard id range")
+            plan.append((table, columns, id_columns, condition))
+
+    # Parents before children so foreign keys hold while copying
+    ordered, placed = [], set()
+    while plan:
+        ready = [entry for entry in plan if set(info[entry[0]][1].values()) - {entry[0]} <= placed]
+        if not ready:
+            ready = plan[:1]  # cycle; let SQLite report it
+        for entry in ready:
+            ordered.append(entry)
+            placed.add(entry[0])
+            plan.remove(entry)
+    return ordered, sorted(guild_ids)
+
+
+async def split_database(source_path: str, directory: str = "data/guilds", **options) -> Dict[int, int]:
+    """Split a single-file database into per-guild shards under directory
+
+    Brings the source schema up to date, then copies each guild's rows into a
+    new shard, shifting every row id and reference to one into the shard's id
+    range (shown ids such as LOA or archive numbers change accordingly).
+    Inventory and dues totals and the transcript search index are rebuilt in
+    each shard. Guilds that already have a shard are skipped, and the source
+    file is left in place.
+
+    Returns:
+        {guild_id: rows copied}
+    """
+    source = DatabaseManager(source_path, read_pool_size=0)
+    try:
+        await source.initialize_database()
+    finally:
+        await source.close()
+
+    plan, guild_ids = await _plan_split(source_path)
+    sharded = ShardedDatabaseManager(directory, **options)
+    copied = {}
+    try:
+        existing = set(await sharded.get_guild_ids())
+        for guild_id in guild_ids:
+            if guild_id in existing:
+                logger.warning(f"Guild {guild_id} already has a shard, not splitting it again")
+                continue
+            copied[guild_id] = await sharded._import_guild(source_path, guild_id, plan)
+            logger.info(f"Split {copied[guild_id]} row(s) of guild {guild_id} into its shard")
+    finally:
+        await sharded.close()
+    return copied
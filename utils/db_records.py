@@ -0,0 +1,182 @@
+import json
+from collections.abc import MutableMapping
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional, Sequence
+
+def from_epoch(value) -> Optional[datetime]:
+    """Aware UTC datetime for integer epoch seconds (None stays None)"""
+    return None if value is None else datetime.fromtimestamp(value, timezone.utc)
+
+class Record(MutableMapping):
+    """
+    Compact, dict-compatible row record.
+
+    Table columns live in __slots__ instead of a per-row dict. Columns that are
+    not part of the table (e.g. joined discord_name) go into a small overflow
+    dict. Records support the mapping API the cogs already use (record['x'],
+    .get(), 'x' in record, dict(record)), so they can replace the old dict rows.
+
+    Columns listed in _json_fields are stored as raw JSON text and decoded on
+    first mapping access; the decoded value is cached next to the slot, so
+    attribute access (record.attachments) always returns the stored text.
+
+    _aliases are alternative keys for columns that the old dict rows carried
+    (they are part of dict(record)). _epoch_aliases maps read-only keys to
+    integer epoch columns; record[key] returns the column as an aware UTC
+    datetime (e.g. record['end_time_utc'] for end_time_epoch). They are only
+    computed on access and are not part of dict(record).
+    """
+    __slots__ = ('_extra', '_decoded')
+
+    _fields: Sequence[str] = ()
+    _slot_set: frozenset = frozenset()
+    _descriptors: dict = {}
+    _json_fields: frozenset = frozenset()
+    _aliases: dict = {}
+    _epoch_aliases: dict = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._fields = tuple(cls.__dict__.get('__slots__', ()))
+        cls._slot_set = frozenset(cls._fields)
+        cls._descriptors = {name: cls.__dict__[name] for name in cls._fields}
+
+    def __getitem__(self, key):
+        if key in self._slot_set:
+            try:
+                value = getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+            if value and key in self._json_fields and isinstance(value, str):
+                if self._decoded is None:
+                    self._decoded = {}
+                if key not in self._decoded:
+                    self._decoded[key] = json.loads(value)
+                return self._decoded[key]
+            return value
+        if key in self._aliases:
+            return self[self._aliases[key]]
+        if key in self._epoch_aliases:
+            return from_epoch(self[self._epoch_aliases[key]])
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in self._aliases:
+            key = self._aliases[key]
+        if key in self._slot_set:
+            setattr(self, key, value)
+            if self._decoded is not None:
+                self._decoded.pop(key, None)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in self._slot_set:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+            if self._decoded is not None:
+                self._decoded.pop(key, None)
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        if key in self._slot_set:
+            return hasattr(self, key)
+        if key in self._aliases:
+            return self._aliases[key] in self
+        if key in self._epoch_aliases:
+            return self._epoch_aliases[key] in self
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self):
+        for name in self._fields:
+            if hasattr(self, name):
+                yield name
+        for alias, target in self._aliases.items():
+            if hasattr(self, target):
+                yield alias
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({dict(self)!r})"
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def copy(self) -> dict:
+        """Return a plain dict copy (same as dict.copy() on the old rows)"""
+        return dict(self)
+
+def make_row_factory(record_type: type, description: Sequence[tuple]) -> Callable[[Any, tuple], Record]:
+    """
+    Build a sqlite3 row factory that decodes one result set into record_type.
+
+    The column-to-slot mapping is resolved once from cursor.description, so
+    decoding a row is a straight loop over slot descriptors.
+    """
+    setters = []
+    extras = []
+    assigned = set()
+    for index, column in enumerate(d[0] for d in description):
+        if column in record_type._slot_set and column not in assigned:
+            setters.append((index, record_type._descriptors[column].__set__))
+            assigned.add(column)
+        else:
+            extras.append((index, column))
+
+    new = object.__new__
+
+    def factory(cursor, row):
+        record = new(record_type)
+        for index, set_value in setters:
+            set_value(record, row[index])
+        record._extra = {column: row[index] for index, column in extras} if extras else None
+        record._decoded = None
+        return record
+
+    return factory
+
+class MemberRecord(Record):
+    """Row from the members table ('on_loa' is a backward-compatible alias for 'is_on_loa')"""
+    __slots__ = ('id', 'guild_id', 'user_id', 'discord_name', 'discord_username', 'rank',
+                 'status', 'is_on_loa', 'created_at', 'updated_at')
+    _aliases = {'on_loa': 'is_on_loa'}
+
+class LOARecord(Record):
+    """Row from the loa_records table ('end_time_utc' is end_time_epoch as an aware datetime)"""
+    __slots__ = ('id', 'guild_id', 'user_id', 'duration', 'reason', 'start_time', 'end_time',
+                 'is_active', 'is_expired', 'created_at', 'end_time_epoch')
+    _epoch_aliases = {'end_time_utc': 'end_time_epoch'}
+
+class ContributionRecord(Record):
+    """Row from the contributions table ('created_at_utc' is created_at_epoch as an aware datetime)"""
+    __slots__ = ('id', 'guild_id', 'user_id', 'category', 'item_name', 'quantity', 'created_at',
+                 'created_at_epoch')
+    _epoch_aliases = {'created_at_utc': 'created_at_epoch'}
+
+class DuesPaymentRecord(Record):
+    """Row from the dues_payments table"""
+    __slots__ = ('id', 'guild_id', 'user_id', 'dues_period_id', 'amount_paid', 'payment_date',
+                 'payment_method', 'payment_status', 'notes', 'is_exempt', 'updated_by_id',
+                 'created_at', 'updated_at')
+
+class TranscriptRecord(Record):
+    """Row from the dm_transcripts table (attachments JSON is decoded lazily)"""
+    __slots__ = ('id', 'guild_id', 'sender_id', 'recipient_id', 'role_id', 'message',
+                 'message_type', 'recipient_type', 'attachments', 'created_at')
+    _json_fields = frozenset({'attachments'})
@@ -0,0 +1,95 @@
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from typing import Any, Awaitable, Optional
+
+from utils.database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseService:
+    """
+    A DatabaseManager owned by one long-lived event loop on a background thread.
+
+    For synchronous callers such as the Flask dashboard: instead of building
+    an event loop (and often a DatabaseManager) per request, callers hand
+    coroutines to run() or submit(). The manager's connections, read pool and
+    server config cache therefore live as long as the process. The service
+    never migrates the schema: that is left to the bot, and the service
+    refuses to start while the schema is behind. Reads go through the
+    manager's pool of read-only (mode=ro) connections, each seeing a
+    consistent WAL snapshot; the few writes (ending an LOA, removing audit
+    entries, logging mass DMs) use its single writer connection.
+
+    The server config cache is off by default: the bot writes configs from
+    another process, and those writes would never invalidate it here.
+    """
+
+    def __init__(self, db_path: str = "data/thanatos.db", read_pool_size: int = 4, **options):
+        options.setdefault('server_config_cache', False)
+        self.db = DatabaseManager(db_path, read_pool_size=read_pool_size, **options)
+        self._loop = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        """Start the loop thread and check the schema is current (no-op once started)"""
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=self._run_loop, args=(loop,), name='database-service', daemon=True)
+            thread.start()
+            try:
+                asyncio.run_coroutine_threadsafe(self._attach(), loop).result()
+            except Exception as e:
+                logger.error(f"Database service failed to start: {e}")
+                loop.call_soon_threadsafe(loop.stop)
+                thread.join()
+                loop.close()
+                raise
+            self._loop, self._thread = loop, thread
+            logger.info(f"Database service started for {self.db.db_path}")
+
+    async def _attach(self):
+        try:
+            await self.db.require_current_schema()
+        except Exception:
+            await self.db.close()
+            raise
+
+    @staticmethod
+    def _run_loop(loop: asyncio.AbstractEventLoop):
+        asyncio.set_event_loop(loop)
+        loop.run_forever()
+
+    def submit(self, coro: Awaitable) -> concurrent.futures.Future:
+        """Schedule a coroutine on the service loop, starting the service if needed"""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def run(self, coro: Awaitable, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the service loop and wait for its result"""
+        return self.submit(coro).result(timeout)
+
+    def stop(self):
+        """Close the database (flushing queued writes) and stop the loop thread"""
+        with self._start_lock:
+            if self._thread is None:
+                return
+            loop, thread = self._loop, self._thread
+            try:
+                asyncio.run_coroutine_threadsafe(self.db.close(), loop).result()
+            except Exception as e:
+                logger.error(f"Error closing database service: {e}")
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+            self._loop, self._thread = None, None
+            logger.info("Database service stopped")
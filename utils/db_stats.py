@@ -0,0 +1,292 @@
+import asyncio
+import contextlib
+import logging
+import os
+import sqlite3
+import sys
+import time
+import weakref
+from collections import deque
+from typing import Any, Dict, FrozenSet, List, Optional
+
+import aiosqlite
+
+from utils.db_supervisor import CONNECTION, TRANSIENT, classify_error
+
+slow_query_logger = logging.getLogger('utils.database.slow_queries')
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000)
+
+# sqlite3 calls that run a statement (COMMIT and ROLLBACK are timed as statements too)
+_STATEMENT_CALLS = frozenset({'execute', 'executemany', 'executescript', '_execute_insert', '_execute_fetchall'})
+_FETCH_CALLS = frozenset({'fetchone', 'fetchmany', 'fetchall'})
+# Calls a supervisor may retry on a transient error (re-running them repeats exactly one statement)
+_RETRYABLE_CALLS = frozenset({'execute', 'executemany', '_execute_insert', '_execute_fetchall', 'commit'})
+
+# Statements worth an EXPLAIN QUERY PLAN in the slow-query log
+_EXPLAINABLE = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+# Frames from these files never name the caller of a statement
+_SKIPPED_FILES = (
+    os.path.dirname(aiosqlite.__file__),
+    os.path.dirname(asyncio.__file__),
+    contextlib.__file__,
+    __file__,
+)
+
+
+class MethodStats:
+    """Latency histogram and row count for the statements issued by one calling method"""
+    __slots__ = ('statements', 'round_trips', 'total_ms', 'max_ms', 'rows', 'buckets')
+
+    def __init__(self):
+        self.statements = 0
+        self.round_trips = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def record(self, elapsed_ms: float, rows: int, statement: bool):
+        if statement:
+            self.statements += 1
+        self.round_trips += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.rows += rows
+        for index, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms < bound:
+                self.buckets[index] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    def percentile_ms(self, fraction: float) -> Optional[float]:
+        """Upper bound of the bucket holding the given fraction of round trips (None = open-ended)"""
+        target = fraction * self.round_trips
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= target:
+                return LATENCY_BUCKETS_MS[index] if index < len(LATENCY_BUCKETS_MS) else None
+        return None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'statements': self.statements,
+            'round_trips': self.round_trips,
+            'total_ms': round(self.total_ms, 3),
+            'avg_ms': round(self.total_ms / self.round_trips, 3) if self.round_trips else 0.0,
+            'max_ms': round(self.max_ms, 3),
+            'p95_ms': self.percentile_ms(0.95),
+            'rows': self.rows,
+            'buckets': dict(zip([f'<{bound}ms' for bound in LATENCY_BUCKETS_MS] + [f'>={LATENCY_BUCKETS_MS[-1]}ms'],
+                                self.buckets)),
+        }
+
+
+class QueryStats:
+    """
+    Per-method query timing shared by all of a DatabaseManager's connections.
+
+    Every round trip to SQLite (execute, fetch, commit) is timed and charged to
+    the method that issued the statement: the first frame up the stack that is
+    not aiosqlite, this module or one of helper_functions (e.g. _fetchall). Round
+    trips slower than slow_query_ms are logged with their EXPLAIN QUERY PLAN to
+    the utils.database.slow_queries logger and kept in slow_queries.
+
+    The first distinct_statements distinct SQL texts are counted in
+    statements (sql -> [executions, sample parameters]) so index usage can be
+    worked out later from their query plans (see DatabaseManager.get_index_usage).
+    """
+
+    def __init__(self, slow_query_ms: float = 250, helper_functions: FrozenSet[str] = frozenset(),
+                 slow_query_history: int = 50, distinct_statements: int = 500):
+        self.slow_query_ms = slow_query_ms
+        self.helper_functions = helper_functions
+        self.methods: Dict[str, MethodStats] = {}
+        self.slow_queries = deque(maxlen=slow_query_history)
+        self.statements: Dict[str, list] = {}
+        self.distinct_statements = distinct_statements
+        # sqlite3 cursor -> (method, sql, parameters) so fetches are charged to their statement
+        self._cursors = weakref.WeakKeyDictionary()
+
+    def caller(self) -> str:
+        """Name the method that issued the statement currently being executed"""
+        frame = sys._getframe(2)
+        while frame is not None:
+            code = frame.f_code
+            if not code.co_filename.startswith(_SKIPPED_FILES) and code.co_name not in self.helper_functions:
+                return getattr(code, 'co_qualname', code.co_name)
+            frame = frame.f_back
+        return 'unknown'
+
+    def record(self, method: str, elapsed_ms: float, rows: int = 0, statement: bool = True):
+        stats = self.methods.get(method)
+        if stats is None:
+            stats = self.methods[method] = MethodStats()
+        stats.record(elapsed_ms, rows, statement)
+
+    def count_statement(self, sql: str, parameters):
+        entry = self.statements.get(sql)
+        if entry is not None:
+            entry[0] += 1
+        elif len(self.statements) < self.distinct_statements and sql.lstrip().upper().startswith(_EXPLAINABLE):
+            self.statements[sql] = [1, parameters]
+
+    def top(self, limit: int = 10, key: str = 'total_ms') -> List[Dict[str, Any]]:
+        """Methods with the highest value of key (total_ms, max_ms, avg_ms, statements, rows)"""
+        rows = [dict(stats.as_dict(), method=method) for method, stats in self.methods.items()]
+        rows.sort(key=lambda row: row[key], reverse=True)
+        return rows[:limit]
+
+    def reset(self):
+        self.methods.clear()
+        self.slow_queries.clear()
+        self.statements.clear()
+
+
+class TimedConnection(aiosqlite.Connection):
+    """aiosqlite connection that reports every round trip to a QueryStats
+
+    With a ConnectionSupervisor, every round trip's outcome is reported to it
+    as well: transient errors on retryable calls are retried with its backoff,
+    and a connection error marks the connection broken. Statements are only
+    retried when no transaction was open before them (a commit always is);
+    a statement that started the transaction itself has it rolled back first.
+    retry_budget (seconds) lets a writer keep retrying until that much time
+    has passed instead of stopping after the supervisor's max_retries.
+
+    This hooks aiosqlite internals (the constructor, _execute, _running,
+    _connection, _conn), so requirements.txt pins aiosqlite to the releases
+    it has been tested against; re-run the database tests before widening it.
+    """
+
+    def __init__(self, connector, iter_chunk_size: int, stats: QueryStats, supervisor=None,
+                 retry_budget: Optional[float] = None):
+        super().__init__(connector, iter_chunk_size)
+        self._query_stats = stats
+        self._supervisor = supervisor
+        self.retry_budget = retry_budget
+        self.broken = False
+
+    @property
+    def usable(self) -> bool:
+        """False once the connection is closed, its thread has stopped or a connection error hit it"""
+        return not self.broken and self._running and self._connection is not None
+
+    async def _execute(self, fn, *args, **kwargs):
+        stats = self._query_stats
+        name = getattr(fn, '__name__', '')
+        if name in _STATEMENT_CALLS:
+            method = stats.caller()
+            sql = args[0] if args else ''
+            parameters = args[1] if len(args) > 1 else ()
+            if name == 'executemany':
+                parameters = parameters[0] if isinstance(parameters, (list, tuple)) and parameters else None
+            if parameters is not None:
+                stats.count_statement(sql, parameters)
+        elif name in _FETCH_CALLS:
+            method, sql, parameters = stats._cursors.get(fn.__self__, (None, '', ()))
+            if method is None:
+                method = stats.caller()
+        elif name in ('commit', 'rollback'):
+            method, sql, parameters = stats.caller(), name.upper(), ()
+        else:
+            return await super()._execute(fn, *args, **kwargs)
+
+        start = time.perf_counter()
+        result = await self._supervised(name, fn, *args, **kwargs)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        rows = 0
+        if name in ('fetchmany', 'fetchall', '_execute_fetchall'):
+            rows = len(result)
+        elif name == 'fetchone':
+            rows = 0 if result is None else 1
+        elif name in ('execute', 'executemany'):
+            if result.description is not None:
+                stats._cursors[result] = (method, sql, parameters)
+            elif result.rowcount > 0:
+                rows = result.rowcount
+        stats.record(method, elapsed_ms, rows, statement=name not in _FETCH_CALLS)
+
+        if stats.slow_query_ms and elapsed_ms >= stats.slow_query_ms:
+            await self._log_slow_query(method, name, sql, parameters, elapsed_ms)
+        return result
+
+    async def _supervised(self, name: str, fn, *args, **kwargs):
+        supervisor = self._supervisor
+        if supervisor is None:
+            return await super()._execute(fn, *args, **kwargs)
+        retryable = name in _RETRYABLE_CALLS
+        deadline = time.monotonic() + self.retry_budget if self.retry_budget else None
+
+        def attempt_call():
+            # Runs on the connection's thread, so no other coroutine's statement can
+            # run between the transaction check, the statement and the rollback.
+            # Re-running a statement mid-transaction would retry it against a
+            # snapshot or lock state the rest of the transaction already depends on.
+            connection = self._conn
+            started = name == 'commit' or not connection.in_transaction
+            try:
+                return fn(*args, **kwargs), None, started
+            except Exception as e:
+                if (retryable and started and name != 'commit' and connection.in_transaction
+                        and classify_error(e) == TRANSIENT):
+                    # The implicit BEGIN sqlite3 issued for this statement holds nothing else
+                    connection.rollback()
+                return None, e, started
+
+        attempt = 0
+        while True:
+            try:
+                result, error, started = await super()._execute(attempt_call)
+            except Exception as e:
+                result, error, started = None, e, False
+            if error is None:
+                supervisor.record_success(retried=attempt > 0)
+                return result
+            if retryable and started and supervisor.should_retry(error, attempt, deadline):
+                delay = supervisor.retry_delay(attempt)
+                supervisor.record_retry(error, attempt, delay)
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            if supervisor.record_failure(error) == CONNECTION:
+                self.broken = True
+            raise error
+
+    async def _log_slow_query(self, method: str, call: str, sql: str, parameters, elapsed_ms: float):
+        plan = []
+        if call in ('execute', 'executemany', 'fetchone', 'fetchmany', 'fetchall') and sql.lstrip().upper().startswith(_EXPLAINABLE):
+            if parameters is not None:
+                try:
+                    # Straight to the base class so the EXPLAIN itself is not timed
+                    cursor = await super()._execute(self._conn.execute, f'EXPLAIN QUERY PLAN {sql}', parameters)
+                    plan = [row[-1] for row in await super()._execute(cursor.fetchall)]
+                except Exception as e:
+                    plan = [f'(plan unavailable: {e})']
+        entry = {
+            'method': method,
+            'call': call,
+            'elapsed_ms': round(elapsed_ms, 3),
+            'sql': ' '.join(sql.split()),
+            'plan': plan,
+            'at': time.time(),
+        }
+        self._query_stats.slow_queries.append(entry)
+        slow_query_logger.warning(
+            f"Slow query in {method} ({call}, {elapsed_ms:.1f} ms): {entry['sql']}"
+            + (''.join(f"\n    {step}" for step in plan) if plan else '')
+        )
+
+
+def connect(database: str, stats: QueryStats, *, iter_chunk_size: int = 64, supervisor=None,
+            retry_budget: Optional[float] = None, **kwargs) -> TimedConnection:
+    """aiosqlite.connect() returning a TimedConnection"""
+    def connector():
+        return sqlite3.connect(database, **kwargs)
+
+    return TimedConnection(connector, iter_chunk_size, stats, supervisor, retry_budget)
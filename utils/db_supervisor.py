@@ -0,0 +1,194 @@
+import logging
+import random
+import sqlite3
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Error classes, see classify_error
+TRANSIENT = 'transient'
+CONNECTION = 'connection'
+LOGICAL = 'logical'
+
+# Primary result codes (extended codes are masked down to these)
+TRANSIENT_ERROR_CODES = frozenset({sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED})
+CONNECTION_ERROR_CODES = frozenset({sqlite3.SQLITE_IOERR, sqlite3.SQLITE_CANTOPEN, sqlite3.SQLITE_NOTADB,
+                                    sqlite3.SQLITE_FULL})
+# Extended codes that are transient for the transaction but not for the statement:
+# SQLITE_BUSY_SNAPSHOT means the read snapshot is stale, so only a new transaction helps
+UNRETRYABLE_ERROR_CODES = frozenset({sqlite3.SQLITE_BUSY_SNAPSHOT})
+
+# PRAGMA busy_timeout for every connection. SQLite's own busy handler only
+# covers short lock waits; longer ones surface as SQLITE_BUSY and are retried
+# by the supervisor with jittered backoff, so one statement cannot stall for
+# tens of seconds inside SQLite.
+BUSY_TIMEOUT_MS = 250
+# How long a writer's statement keeps being retried on SQLITE_BUSY before it
+# fails: the 30 s writers used to wait under busy_timeout. Readers, which WAL
+# rarely makes wait, give up after max_retries.
+WRITER_RETRY_BUDGET_S = 30.0
+
+# Circuit breaker states
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def classify_error(error: BaseException) -> str:
+    """Sort a database error into TRANSIENT, CONNECTION or LOGICAL
+
+    TRANSIENT: another connection holds a lock (SQLITE_BUSY, SQLITE_LOCKED);
+    the same statement can succeed if retried. CONNECTION: the connection or
+    the file under it is unusable (closed connection, I/O error, disk full).
+    LOGICAL: everything else - constraint violations, SQL errors, bad
+    parameters - which retrying or reconnecting cannot fix.
+    """
+    if isinstance(error, sqlite3.Error):
+        code = getattr(error, 'sqlite_errorcode', None)
+        if code is not None:
+            if code & 0xFF in TRANSIENT_ERROR_CODES:
+                return TRANSIENT
+            if code & 0xFF in CONNECTION_ERROR_CODES:
+                return CONNECTION
+        elif isinstance(error, sqlite3.OperationalError) and 'locked' in str(error):
+            return TRANSIENT
+        if isinstance(error, sqlite3.ProgrammingError) and 'closed' in str(error):
+            return CONNECTION
+        return LOGICAL
+    if isinstance(error, ValueError) and ('Connection closed' in str(error) or 'no active connection' in str(error)):
+        return CONNECTION  # raised by aiosqlite once its connection thread is gone
+    return LOGICAL
+
+
+class ConnectionSupervisor:
+    """
+    Health counters, retry policy and circuit breaker for one database's connections.
+
+    Connections report the outcome of every statement. Transient errors are
+    retried up to max_retries times (writers: until their retry deadline)
+    with full-jitter exponential backoff,
+    except on a statement that runs inside an open transaction (that
+    transaction's unit of work fails and is retried as a whole) and for
+    SQLITE_BUSY_SNAPSHOT; logical errors are raised at once and leave the connection alone;
+    connection errors mark the connection broken so the manager replaces it.
+
+    A statement that still fails with a transient or connection error counts
+    as a failure. failure_threshold failures in a row open the circuit
+    breaker; after reset_timeout seconds it reports half_open, and the next
+    successful statement closes it again (a failure re-opens it). The breaker
+    does not block statements - callers about to start expensive work
+    (backups, archives, retention) check allow_expensive_work() first.
+    """
+
+    def __init__(self, max_retries: int = 8, base_delay: float = 0.05, max_delay: float = 2.0,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = max(failure_threshold, 1)
+        self.reset_timeout = reset_timeout
+        self.reset()
+
+    def reset(self):
+        """Clear the counters and close the breaker"""
+        self.counters = {
+            'statements': 0,
+            'retries': 0,
+            'backoff_ms': 0.0,
+            'recovered': 0,
+            'transient_errors': 0,
+            'logical_errors': 0,
+            'connection_errors': 0,
+            'reconnects': 0,
+            'circuit_opened': 0,
+        }
+        self.consecutive_failures = 0
+        self._state = CLOSED
+        self._opened_at = None
+        self.last_error = None
+        self.last_error_at = None
+
+    # Retry policy
+
+    def should_retry(self, error: BaseException, attempt: int, deadline: Optional[float] = None) -> bool:
+        """Whether a failed statement is retried; a deadline (time.monotonic()) replaces max_retries"""
+        if getattr(error, 'sqlite_errorcode', None) in UNRETRYABLE_ERROR_CODES:
+            return False
+        if classify_error(error) != TRANSIENT:
+            return False
+        if deadline is not None:
+            return time.monotonic() < deadline
+        return attempt < self.max_retries
+
+    def retry_delay(self, attempt: int) -> float:
+        """Full-jitter backoff: uniform in [0, min(max_delay, base_delay * 2**attempt)]"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    # Outcomes reported by connections
+
+    def record_retry(self, error: BaseException, attempt: int, delay: float):
+        self.counters['retries'] += 1
+        self.counters['backoff_ms'] += delay * 1000
+        logger.debug(f"Transient database error (attempt {attempt + 1}), retrying in {delay * 1000:.0f} ms: {error}")
+
+    def record_success(self, retried: bool = False):
+        self.counters['statements'] += 1
+        if retried:
+            self.counters['recovered'] += 1
+        self.consecutive_failures = 0
+        if self._state != CLOSED:
+            logger.info("Database circuit breaker closed")
+            self._state = CLOSED
+            self._opened_at = None
+
+    def record_failure(self, error: BaseException) -> str:
+        """Count a failed statement; returns its error class"""
+        kind = classify_error(error)
+        self.counters['statements'] += 1
+        self.counters[f'{kind}_errors'] += 1
+        self.last_error = f'{type(error).__name__}: {error}'
+        self.last_error_at = time.time()
+        if kind == LOGICAL:
+            return kind
+
+        self.consecutive_failures += 1
+        state = self.state
+        if state == HALF_OPEN or (state == CLOSED and self.consecutive_failures >= self.failure_threshold):
+            self._state = OPEN
+            self._opened_at = time.monotonic()
+            self.counters['circuit_opened'] += 1
+            logger.error(f"Database circuit breaker opened after {self.consecutive_failures} "
+                         f"failed statement(s); last error: {self.last_error}")
+        return kind
+
+    def record_reconnect(self):
+        self.counters['reconnects'] += 1
+
+    # Circuit breaker
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+        return self._state
+
+    def allow_expensive_work(self) -> bool:
+        """False while the breaker is open"""
+        return self.state != OPEN
+
+    def health(self) -> Dict[str, Any]:
+        """Snapshot of the counters and breaker state"""
+        state = self.state
+        retry_in = None
+        if state == OPEN:
+            retry_in = round(max(self.reset_timeout - (time.monotonic() - self._opened_at), 0), 1)
+        return dict(
+            self.counters,
+            state=state,
+            consecutive_failures=self.consecutive_failures,
+            retry_in_s=retry_in,
+            last_error=self.last_error,
+            last_error_at=self.last_error_at,
+        )
+
@@ -163,13 +163,11 @@ class LOANotificationManager:
         
         # Check if cross-server notifications are enabled
         if config.get('cross_server_notifications', False):
-            # Find all guilds with LOA notification channels configured
+            # Find all guilds with LOA notification channels configured (one
+            # lookup, so per-guild shards are not opened just to check)
+            configured = set(await self.bot.db.get_loa_notification_guild_ids())
             for guild in self.bot.guilds:
-                if guild.id == origin_guild_id:
-                    continue
-                
-                guild_config = await self.bot.db.get_server_config(guild.id)
-                if guild_config and guild_config.get('loa_notification_channel_id'):
+                if guild.id != origin_guild_id and guild.id in configured:
                     guilds_to_notify.append(guild.id)
         
         return guilds_to_notify